@@ -38,6 +38,39 @@ class Settings:
     # User
     NAME_MIN_LENGTH = int(os.getenv('NAME_MIN_LENGTH', 3))
 
+    # Configurations
+    CONFIG_POLL_INTERVAL = float(os.getenv('CONFIG_POLL_INTERVAL', 2.0))
+    CONFIG_GAP_TIMEOUT = float(os.getenv('CONFIG_GAP_TIMEOUT', 60.0))
+    CONFIG_SNAPSHOT_PATH = os.getenv('CONFIG_SNAPSHOT_PATH', str(BASE_DIR / 'data' / 'config_snapshot.json'))
+    CONFIG_HISTORY_RETENTION_DAYS = int(os.getenv('CONFIG_HISTORY_RETENTION_DAYS', 90))
+    CONFIG_HISTORY_ARCHIVE_DAYS = int(os.getenv('CONFIG_HISTORY_ARCHIVE_DAYS', 730))
+    CONFIG_HISTORY_BATCH_SIZE = int(os.getenv('CONFIG_HISTORY_BATCH_SIZE', 1000))
+    CONFIG_CHECKPOINT_INTERVAL_HOURS = int(os.getenv('CONFIG_CHECKPOINT_INTERVAL_HOURS', 24))
+
+    # Routing
+    ROUTE_MATRIX_DIR = os.getenv('ROUTE_MATRIX_DIR', str(BASE_DIR / 'data' / 'route_matrix'))
+    ROUTE_MATRIX_MAX_STATIONS = int(os.getenv('ROUTE_MATRIX_MAX_STATIONS', 4000))
+    ROUTE_CACHE_SIZE = int(os.getenv('ROUTE_CACHE_SIZE', 10000))
+    SPATIAL_CELL_SIZE = float(os.getenv('SPATIAL_CELL_SIZE', 5.0))  # metros
+
+    # Dispatch
+    DISPATCH_BATCH_SIZE = int(os.getenv('DISPATCH_BATCH_SIZE', 1000))
+    DISPATCH_MAX_OPTIMAL = int(os.getenv('DISPATCH_MAX_OPTIMAL', 400))
+    DISPATCH_PRIORITY_WEIGHT = float(os.getenv('DISPATCH_PRIORITY_WEIGHT', 30.0))
+
+    # Telemetry
+    TELEMETRY_SINK = os.getenv('TELEMETRY_SINK', 'file')  # file, database
+    TELEMETRY_DIR = os.getenv('TELEMETRY_DIR', str(BASE_DIR / 'data' / 'telemetry'))
+    TELEMETRY_SEGMENT_MB = int(os.getenv('TELEMETRY_SEGMENT_MB', 64))
+    TELEMETRY_BUFFER_SIZE = int(os.getenv('TELEMETRY_BUFFER_SIZE', 3000))
+    TELEMETRY_FLUSH_INTERVAL = float(os.getenv('TELEMETRY_FLUSH_INTERVAL', 1.0))
+
+    # Traffic
+    ZONE_LEASE_SECONDS = float(os.getenv('ZONE_LEASE_SECONDS', 30.0))
+    ZONE_JOURNAL_DIR = os.getenv('ZONE_JOURNAL_DIR', str(BASE_DIR / 'data' / 'zone_locks'))
+    DEADLOCK_MAX_RETREAT = float(os.getenv('DEADLOCK_MAX_RETREAT', 30.0))
+    DEADLOCK_LATENCY_SAMPLES = int(os.getenv('DEADLOCK_LATENCY_SAMPLES', 10000))
+
     @property
     def database_url(self) -> str:
         """Retorna URL de conexão do banco"""
@@ -0,0 +1,56 @@
+"""
+Benchmark da atribuição de missões: húngaro x gulosa x "AGV livre mais próximo"
+
+    python scripts/benchmark_dispatch.py
+    python scripts/benchmark_dispatch.py --agvs 1000 --missions 1500
+"""
+
+import sys
+import os
+import argparse
+import time
+
+import numpy as np
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routing.assignment import greedy, hungarian
+
+
+def nearest_first(cost: np.ndarray):
+    """Uma missão por vez, cada uma para o AGV livre mais próximo"""
+    free = np.ones(cost.shape[0], dtype=bool)
+    rows, cols = [], []
+    for col in range(min(cost.shape[1], cost.shape[0])):
+        row = int(np.argmin(np.where(free, cost[:, col], np.inf)))
+        free[row] = False
+        rows.append(row)
+        cols.append(col)
+    return np.array(rows), np.array(cols)
+
+
+def benchmark(agvs: int = 300, missions: int = 400, seed: int = 1):
+    # Distância Manhattan num galpão 200 x 100 (como numa grade de corredores)
+    rng = np.random.default_rng(seed)
+    positions = rng.random((agvs, 2)) * (200, 100)
+    pickups = rng.random((missions, 2)) * (200, 100)
+    cost = np.abs(positions[:, None, :] - pickups[None, :, :]).sum(axis=2)
+
+    print(f"AGVs: {agvs} | Missões: {missions}")
+    baseline = None
+    for name, solve in (('mais próximo', nearest_first), ('gulosa', greedy), ('húngaro', hungarian)):
+        started = time.perf_counter()
+        rows, cols = solve(cost)
+        elapsed = (time.perf_counter() - started) * 1000
+        total = cost[rows, cols].sum()
+        baseline = baseline or total
+        print(f"  {name:14s} {len(rows):6d} pares  custo {total:12,.1f} ({total / baseline:.2f}x)  {elapsed:9.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da atribuição de missões")
+    parser.add_argument('--agvs', type=int, default=300)
+    parser.add_argument('--missions', type=int, default=400)
+    args = parser.parse_args()
+
+    benchmark(args.agvs, args.missions)
@@ -0,0 +1,67 @@
+"""
+Benchmark do FleetPlanner: AGVs planejados sem conflito numa grade
+
+    python scripts/benchmark_fleet_planner.py
+    python scripts/benchmark_fleet_planner.py --size 50 --agvs 300 --budget 5
+"""
+
+import sys
+import os
+import argparse
+import random
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routing.fleet_planner import FleetPlanner, PlanRequest
+from src.routing.layout_graph import LayoutGraph
+
+
+def grid_graph(size: int) -> LayoutGraph:
+    """Grade size x size com trechos bidirecionais de comprimento 1"""
+    stations = []
+    paths = []
+    for row in range(size):
+        for col in range(size):
+            station_id = row * size + col + 1
+            stations.append({'id': station_id, 'code': f'S{row}_{col}', 'x': col, 'y': row})
+            for neighbor in ((station_id + 1) if col + 1 < size else None,
+                             (station_id + size) if row + 1 < size else None):
+                if neighbor is not None:
+                    paths.append({
+                        'id': len(paths) + 1, 'from_station_id': station_id, 'to_station_id': neighbor,
+                        'length': None, 'bidirectional': True
+                    })
+    return LayoutGraph.from_rows(stations, paths)
+
+
+def benchmark(size: int = 40, agvs: int = 200, budget: float = None, seed: int = 1):
+    graph = grid_graph(size)
+    rng = random.Random(seed)
+    codes = list(graph.station_codes)
+    requests = [
+        PlanRequest(f'AGV-{k:03d}', origin, destination, priority=rng.randint(0, 3))
+        for k, (origin, destination) in enumerate(zip(rng.sample(codes, agvs), rng.sample(codes, agvs)))
+    ]
+
+    result = FleetPlanner(graph).plan(requests, time_budget=budget)
+    plans = result.plans.values()
+
+    print(f"Layout: {graph.num_stations} estações, {graph.num_edges} arestas | AGVs: {agvs}")
+    print(f"  planejados      {len(result.plans)} ({len(result.failed)} falharam)")
+    print(f"  rodadas         {result.rounds}")
+    print(f"  expansões       {result.expansions:,}")
+    print(f"  tempo           {result.elapsed_ms:,.1f} ms ({result.elapsed_ms / max(1, agvs):.2f} ms/AGV)")
+    if plans:
+        print(f"  espera média    {sum(p.wait_time for p in plans) / len(result.plans):.2f} s")
+    if result.budget_exceeded:
+        print("  orçamento de tempo esgotado")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do FleetPlanner")
+    parser.add_argument('--size', type=int, default=40)
+    parser.add_argument('--agvs', type=int, default=200)
+    parser.add_argument('--budget', type=float, default=None, help="Orçamento do ciclo (segundos)")
+    args = parser.parse_args()
+
+    benchmark(args.size, args.agvs, args.budget)
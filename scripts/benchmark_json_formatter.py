@@ -0,0 +1,72 @@
+"""
+Micro-benchmark do JSONFormatter: modo padrão x modo rápido
+
+    python scripts/benchmark_json_formatter.py
+    python scripts/benchmark_json_formatter.py --records 200000
+"""
+
+import sys
+import os
+import argparse
+import logging
+import time
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.log import log as log_module
+from src.log.log import JSONFormatter, UserContext, UserContextFilter
+
+
+def build_records(count: int):
+    """Gera registros com poucos pontos de chamada, como numa aplicação real"""
+    UserContext.set_user('operador', user_id=7, role='admin', department='TI', session_id='bench')
+    user_filter = UserContextFilter()
+
+    records = []
+    for i in range(count):
+        record = logging.LogRecord(
+            name='agv.dispatch',
+            level=logging.INFO if i % 10 else logging.WARNING,
+            pathname='/app/src/services/dispatch_service.py',
+            lineno=100 + i % 8,
+            msg='AGV %s atribuído à missão %d',
+            args=(f'AGV-{i % 50:03d}', i),
+            exc_info=None,
+            func='assign_mission'
+        )
+        user_filter.filter(record)
+        records.append(record)
+    return records
+
+
+def run(formatter: logging.Formatter, records, encode) -> float:
+    """Retorna registros/segundo"""
+    start = time.perf_counter()
+    for record in records:
+        encode(formatter, record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def benchmark(count: int = 100000):
+    records = build_records(count)
+
+    results = {
+        'padrão (json.dumps)': run(JSONFormatter(), records, lambda f, r: f.format(r).encode('utf-8')),
+        'rápido (format)': run(JSONFormatter(fast=True), records, lambda f, r: f.format(r)),
+        'rápido (format_bytes)': run(JSONFormatter(fast=True), records, lambda f, r: f.format_bytes(r)),
+    }
+
+    backend = 'orjson' if log_module.orjson is not None else 'json (orjson não instalado)'
+    print(f"Registros: {count} | Backend do modo rápido: {backend}")
+
+    baseline = results['padrão (json.dumps)']
+    for name, rate in results.items():
+        print(f"  {name:24s} {rate:12,.0f} reg/s  ({rate / baseline:.2f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do JSONFormatter")
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    benchmark(args.records)
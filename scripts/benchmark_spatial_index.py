@@ -0,0 +1,86 @@
+"""
+Benchmark do índice espacial: grade x varredura de todos os AGVs
+
+Frotas de 100, 1k e 10k AGVs num galpão com densidade constante; mede a
+atualização de posição (telemetria) e as consultas "AGVs a até 5 m" e
+"5 AGVs livres mais próximos", comparando com a varredura em Python (um
+AGV por vez) e com a varredura vetorizada em NumPy.
+
+    python scripts/benchmark_spatial_index.py
+    python scripts/benchmark_spatial_index.py --sizes 1000 50000 --queries 2000
+"""
+
+import sys
+import os
+import argparse
+import math
+import time
+
+import numpy as np
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routing.spatial_index import SpatialGrid
+
+IDLE = 0
+
+
+def python_scan(agvs, x, y, radius):
+    """Uma distância por AGV (o que o índice substitui)"""
+    return sorted(
+        (math.hypot(ax - x, ay - y), agv) for agv, (ax, ay, _) in agvs.items() if math.hypot(ax - x, ay - y) <= radius
+    )
+
+
+def numpy_scan(xs, ys, states, x, y, k):
+    distances = np.hypot(xs - x, ys - y)
+    distances[states != IDLE] = np.inf
+    top = np.argpartition(distances, k - 1)[:k]
+    return top[np.argsort(distances[top])]
+
+
+def timed(function, queries) -> float:
+    """Microssegundos por consulta"""
+    started = time.perf_counter()
+    for x, y in queries:
+        function(x, y)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def benchmark(size: int, queries: int, radius: float, k: int, seed: int = 1):
+    # ~1 AGV a cada 50 m² de galpão
+    side = math.sqrt(size * 50.0)
+    rng = np.random.default_rng(seed)
+    xs, ys = rng.random(size) * side, rng.random(size) * side
+    states = (rng.random(size) < 0.3).astype(np.uint8)    # 70% livres
+    agvs = {agv: (float(xs[agv]), float(ys[agv]), int(states[agv])) for agv in range(size)}
+    points = rng.random((queries, 2)) * side
+
+    started = time.perf_counter()
+    grid = SpatialGrid.from_points(range(size), xs, ys, states)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    moves = rng.integers(size, size=queries)
+    started = time.perf_counter()
+    for agv, (dx, dy) in zip(moves.tolist(), (rng.random((queries, 2)) - 0.5).tolist()):
+        grid.update(agv, xs[agv] + dx, ys[agv] + dy)
+    update_us = (time.perf_counter() - started) / queries * 1e6
+
+    print(f"AGVs: {size:,} | galpão {side:.0f} x {side:.0f} m | célula {grid.cell_size:g} m | montagem {build_ms:.1f} ms")
+    print(f"  atualização de posição      {update_us:9.2f} µs")
+    print(f"  raio {radius:g} m   varredura Python {timed(lambda x, y: python_scan(agvs, x, y, radius), points[:200]):9.1f} µs"
+          f"   grade {timed(lambda x, y: grid.radius(x, y, radius), points):7.1f} µs")
+    print(f"  {k} livres  varredura NumPy  {timed(lambda x, y: numpy_scan(xs, ys, states, x, y, k), points):9.1f} µs"
+          f"   grade {timed(lambda x, y: grid.nearest(x, y, k, states=[IDLE]), points):7.1f} µs")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do índice espacial")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--radius', type=float, default=5.0)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        benchmark(size, args.queries, args.radius, args.k)
@@ -0,0 +1,54 @@
+"""
+Benchmark da ingestão de telemetria: amostras/s no record() e custo do flush
+
+    python scripts/benchmark_telemetry.py
+    python scripts/benchmark_telemetry.py --agvs 500 --hz 50 --seconds 5
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import time
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.telemetry.buffer import RECORD_DTYPE
+from src.telemetry.ingest import TelemetryIngestor
+from src.telemetry.storage import SegmentFileSink
+
+
+def benchmark(agvs: int = 200, hz: float = 20.0, seconds: float = 5.0):
+    directory = tempfile.mkdtemp(prefix='telemetry_')
+    samples = int(hz * seconds)
+    ingestor = TelemetryIngestor(SegmentFileSink(directory), buffer_size=samples)
+
+    started = time.perf_counter()
+    for k in range(samples):
+        ts = 1_700_000_000.0 + k / hz
+        for agv in range(1, agvs + 1):
+            ingestor.record(agv, ts, x=agv + 0.1 * k, y=2.0 * agv, speed=1.5, battery=90.0 - 0.001 * k, state=1)
+    elapsed = time.perf_counter() - started
+
+    total = agvs * samples
+    started = time.perf_counter()
+    ingestor.flush()
+    flush_ms = (time.perf_counter() - started) * 1000
+    stats = ingestor.stats()
+    raw = total * RECORD_DTYPE.itemsize
+
+    print(f"AGVs: {agvs} | {hz:g} Hz | {seconds:g} s de telemetria ({total:,} amostras)")
+    print(f"  record()  {total / elapsed:12,.0f} amostras/s  (necessário: {agvs * hz:,.0f}/s)")
+    print(f"  flush     {flush_ms:12.1f} ms para o lote inteiro")
+    print(f"  gravado   {stats['bytes_written']:12,d} bytes ({raw / max(stats['bytes_written'], 1):.1f}x de compressão)")
+    print(f"  diretório {directory}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da ingestão de telemetria")
+    parser.add_argument('--agvs', type=int, default=200)
+    parser.add_argument('--hz', type=float, default=20.0)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    benchmark(args.agvs, args.hz, args.seconds)
@@ -0,0 +1,25 @@
+"""Script para exportar o snapshot local de configurações"""
+
+import sys
+import os
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.repositories.config_repository import ConfigManager
+from src.log.log import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+
+def export_snapshot(path: str = None):
+    """Exporta todas as configurações para o arquivo de snapshot"""
+    try:
+        path = ConfigManager().export_snapshot(path)
+        logger.info(f"✓ Snapshot exportado: {path}")
+    except Exception as e:
+        logger.error(f"✗ Erro ao exportar snapshot: {e}")
+        raise
+
+if __name__ == "__main__":
+    export_snapshot(sys.argv[1] if len(sys.argv) > 1 else None)
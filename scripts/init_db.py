@@ -109,27 +109,105 @@ def create_tables():
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
 
+    # Trecho entre duas estações; length NULL usa a distância euclidiana
     path_table = """
     CREATE TABLE IF NOT EXISTS path (
         id INT AUTO_INCREMENT PRIMARY KEY,
+        layout_id INT NULL,
         code VARCHAR(25) NOT NULL,
-        description VARCHAR(250) NOT NULL
+        description VARCHAR(250) NOT NULL,
+        from_station_id INT NULL,
+        to_station_id INT NULL,
+        length DOUBLE NULL,
+        bidirectional BOOLEAN NOT NULL DEFAULT TRUE,
+
+        INDEX idx_layout_id (layout_id)
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
 
     station_table = """
     CREATE TABLE IF NOT EXISTS station (
         id INT AUTO_INCREMENT PRIMARY KEY,
+        layout_id INT NULL,
         code VARCHAR(25) NOT NULL,
-        description VARCHAR(250) NOT NULL
+        description VARCHAR(250) NOT NULL,
+        x DOUBLE NOT NULL DEFAULT 0,
+        y DOUBLE NOT NULL DEFAULT 0,
+
+        INDEX idx_layout_id (layout_id)
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
 
+    # station_id é a estação atual; speed em unidades de comprimento por segundo
     agv_table = """
     CREATE TABLE IF NOT EXISTS agv (
         id INT AUTO_INCREMENT PRIMARY KEY,
+        layout_id INT NULL,
         code VARCHAR(25) NOT NULL,
-        description VARCHAR(250) NOT NULL
+        description VARCHAR(250) NOT NULL,
+        station_id INT NULL,
+        speed DOUBLE NOT NULL DEFAULT 1.0,
+        status VARCHAR(20) NOT NULL DEFAULT 'idle',
+
+        INDEX idx_layout_id (layout_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+
+    # Missão de transporte: coleta em pickup_station_id, entrega em dropoff_station_id
+    mission_table = """
+    CREATE TABLE IF NOT EXISTS mission (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        layout_id INT NOT NULL,
+        code VARCHAR(25) NOT NULL,
+        pickup_station_id INT NOT NULL,
+        dropoff_station_id INT NULL,
+        priority INT NOT NULL DEFAULT 0,
+        status VARCHAR(20) NOT NULL DEFAULT 'pending',
+        agv_id INT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        assigned_at TIMESTAMP NULL,
+
+        INDEX idx_layout_status (layout_id, status),
+        INDEX idx_agv_id (agv_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+
+    # Telemetria: um lote comprimido por linha (ver src/telemetry/storage.py)
+    telemetry_table = """
+    CREATE TABLE IF NOT EXISTS agv_telemetry (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        ts_start DOUBLE NOT NULL,
+        ts_end DOUBLE NOT NULL,
+        samples INT NOT NULL,
+        codec VARCHAR(10) NOT NULL,
+        payload LONGBLOB NOT NULL,
+
+        INDEX idx_ts_end (ts_end),
+        INDEX idx_ts_start (ts_start)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+
+    # Zona de intertravamento (cruzamento, corredor estreito): até capacity AGVs por vez
+    zone_table = """
+    CREATE TABLE IF NOT EXISTS zone (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        layout_id INT NOT NULL,
+        code VARCHAR(25) NOT NULL,
+        name VARCHAR(100) NULL,
+        capacity INT NOT NULL DEFAULT 1,
+        policy VARCHAR(10) NOT NULL DEFAULT 'fifo',
+
+        UNIQUE KEY uq_layout_code (layout_id, code)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+
+    zone_station_table = """
+    CREATE TABLE IF NOT EXISTS zone_station (
+        zone_id INT NOT NULL,
+        station_id INT NOT NULL,
+
+        PRIMARY KEY (zone_id, station_id),
+        INDEX idx_station_id (station_id)
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
 
@@ -199,6 +277,7 @@ def create_tables():
 
         -- Valores antigos e novos
         tipo ENUM('BOOLEAN', 'INTEGER', 'FLOAT', 'STRING') NOT NULL,
+        operacao ENUM('INSERT', 'UPDATE', 'DELETE') NOT NULL DEFAULT 'UPDATE',
         valor_antigo TEXT,
         valor_novo TEXT,
 
@@ -207,7 +286,56 @@ def create_tables():
         alterado_por VARCHAR(100),
 
         INDEX idx_config_id (config_id),
-        INDEX idx_alterado_em (alterado_em)
+        INDEX idx_alterado_em (alterado_em),
+        INDEX idx_nome_tela_alterado (nome, tela, alterado_em),
+        INDEX idx_tela_alterado (tela, alterado_em)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+
+    # Arquivo morto do histórico (linhas compactadas pela manutenção)
+    history_archive_table = """
+    CREATE TABLE IF NOT EXISTS configurations_history_archive (
+        id INT PRIMARY KEY,
+        config_id INT NOT NULL,
+        nome VARCHAR(100) NOT NULL,
+        tela VARCHAR(100) NOT NULL,
+        escopo ENUM('GLOBAL', 'INSTANCE', 'USER') NOT NULL,
+        instance_id VARCHAR(50) NULL,
+        user_id INT NULL,
+        tipo ENUM('BOOLEAN', 'INTEGER', 'FLOAT', 'STRING') NOT NULL,
+        operacao ENUM('INSERT', 'UPDATE', 'DELETE') NOT NULL DEFAULT 'UPDATE',
+        valor_antigo TEXT,
+        valor_novo TEXT,
+        alterado_em TIMESTAMP NULL,
+        alterado_por VARCHAR(100),
+
+        INDEX idx_alterado_em (alterado_em),
+        INDEX idx_nome_tela_alterado (nome, tela, alterado_em)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci ROW_FORMAT=COMPRESSED;
+    """
+
+    # Checkpoints do estado completo (reconstrução no tempo)
+    checkpoints_table = """
+    CREATE TABLE IF NOT EXISTS configurations_checkpoints (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        history_id INT NOT NULL,
+        total INT NOT NULL,
+        payload LONGBLOB NOT NULL,
+        criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        criado_por VARCHAR(100),
+
+        INDEX idx_criado_em (criado_em),
+        INDEX idx_history_id (history_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+
+    # Horizonte de retenção do histórico (uma linha, atualizada pela compactação)
+    history_horizon_table = """
+    CREATE TABLE IF NOT EXISTS configurations_history_horizon (
+        id TINYINT PRIMARY KEY,
+        horizon TIMESTAMP NOT NULL,
+        history_id INT NOT NULL,
+        atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
 
@@ -246,12 +374,33 @@ def create_tables():
             cursor.execute(agv_table)
             logger.info("✓ Tabela 'agv_table' criada")
 
+            cursor.execute(mission_table)
+            logger.info("✓ Tabela 'mission_table' criada")
+
+            cursor.execute(telemetry_table)
+            logger.info("✓ Tabela 'telemetry_table' criada")
+
+            cursor.execute(zone_table)
+            logger.info("✓ Tabela 'zone_table' criada")
+
+            cursor.execute(zone_station_table)
+            logger.info("✓ Tabela 'zone_station_table' criada")
+
             cursor.execute(config_table)
             logger.info("✓ Tabela 'config_table' criada")
 
             cursor.execute(history_table)
             logger.info("✓ Tabela 'history_table' criada")
 
+            cursor.execute(checkpoints_table)
+            logger.info("✓ Tabela 'checkpoints_table' criada")
+
+            cursor.execute(history_archive_table)
+            logger.info("✓ Tabela 'history_archive_table' criada")
+
+            cursor.execute(history_horizon_table)
+            logger.info("✓ Tabela 'history_horizon_table' criada")
+
             conn.commit()
             logger.info("✓ Banco de dados inicializado com sucesso!")
 
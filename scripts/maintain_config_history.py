@@ -0,0 +1,89 @@
+"""
+Script de manutenção do histórico de configurações
+
+Executar periodicamente (ex.: cron diário):
+    python scripts/maintain_config_history.py
+    python scripts/maintain_config_history.py --retention-days 30 --dry-run
+
+Etapas:
+    1. Cria um checkpoint se o último for mais antigo que o intervalo
+    2. Move para o arquivo morto as linhas anteriores à retenção já cobertas por checkpoint
+    3. Remove checkpoints que não servem mais de base para reconstrução
+    4. Remove do arquivo morto as linhas anteriores à retenção do arquivo
+"""
+
+import sys
+import os
+import argparse
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from config.settings import settings
+from src.repositories.config_history_repository import ConfigHistoryRepository
+from src.log.log import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+
+def maintain(
+    retention_days: int = settings.CONFIG_HISTORY_RETENTION_DAYS,
+    archive_days: int = settings.CONFIG_HISTORY_ARCHIVE_DAYS,
+    batch_size: int = settings.CONFIG_HISTORY_BATCH_SIZE,
+    checkpoint_hours: int = settings.CONFIG_CHECKPOINT_INTERVAL_HOURS,
+    archive: bool = True,
+    pause: float = 0.05,
+    dry_run: bool = False
+):
+    """Executa a manutenção do histórico de configurações"""
+    repo = ConfigHistoryRepository()
+    cutoff = datetime.now() - timedelta(days=retention_days)
+
+    try:
+        if not dry_run:
+            checkpoint_id = repo.ensure_checkpoint(timedelta(hours=checkpoint_hours))
+            if checkpoint_id:
+                logger.info(f"✓ Checkpoint criado: {checkpoint_id}")
+
+        removed = repo.compact(cutoff, batch_size=batch_size, archive=archive, pause=pause, dry_run=dry_run)
+        if dry_run:
+            logger.info(f"○ Linhas elegíveis para compactação: {removed}")
+            return
+
+        logger.info(f"✓ Linhas compactadas: {removed}")
+
+        pruned = repo.prune_checkpoints(cutoff)
+        logger.info(f"✓ Checkpoints removidos: {pruned}")
+
+        if archive:
+            purged = repo.purge_archive(
+                datetime.now() - timedelta(days=archive_days),
+                batch_size=batch_size, pause=pause
+            )
+            logger.info(f"✓ Linhas removidas do arquivo morto: {purged}")
+
+    except Exception as e:
+        logger.error(f"✗ Erro na manutenção do histórico: {e}")
+        raise
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção de configurations_history")
+    parser.add_argument('--retention-days', type=int, default=settings.CONFIG_HISTORY_RETENTION_DAYS)
+    parser.add_argument('--archive-days', type=int, default=settings.CONFIG_HISTORY_ARCHIVE_DAYS)
+    parser.add_argument('--batch-size', type=int, default=settings.CONFIG_HISTORY_BATCH_SIZE)
+    parser.add_argument('--checkpoint-hours', type=int, default=settings.CONFIG_CHECKPOINT_INTERVAL_HOURS)
+    parser.add_argument('--no-archive', action='store_true', help="Remove sem copiar para o arquivo morto")
+    parser.add_argument('--pause', type=float, default=0.05, help="Pausa entre lotes (segundos)")
+    parser.add_argument('--dry-run', action='store_true', help="Apenas conta as linhas elegíveis")
+    args = parser.parse_args()
+
+    maintain(
+        retention_days=args.retention_days,
+        archive_days=args.archive_days,
+        batch_size=args.batch_size,
+        checkpoint_hours=args.checkpoint_hours,
+        archive=not args.no_archive,
+        pause=args.pause,
+        dry_run=args.dry_run
+    )
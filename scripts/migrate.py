@@ -1 +1,233 @@
+"""Script para aplicar migrações incrementais no banco de dados"""
 
+import sys
+import os
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import Error, errorcode
+from src.utils.database import DatabaseManager
+from src.log.log import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+# Cada migração é aplicada uma única vez, na ordem da lista.
+# Bancos criados pelo init_db.py já possuem as colunas e índices mais recentes,
+# por isso erros de coluna/índice duplicado são tratados como já aplicados.
+MIGRATIONS = [
+    (
+        '001_configurations_history_operacao',
+        [
+            """
+            ALTER TABLE configurations_history
+                ADD COLUMN operacao ENUM('INSERT', 'UPDATE', 'DELETE') NOT NULL DEFAULT 'UPDATE'
+                AFTER tipo
+            """,
+        ],
+    ),
+    (
+        '002_configurations_checkpoints',
+        [
+            """
+            CREATE TABLE configurations_checkpoints (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                history_id INT NOT NULL,
+                total INT NOT NULL,
+                payload LONGBLOB NOT NULL,
+                criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                criado_por VARCHAR(100),
+
+                INDEX idx_criado_em (criado_em),
+                INDEX idx_history_id (history_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+        ],
+    ),
+    (
+        '003_configurations_history_maintenance',
+        [
+            # Índices usados por get_config_history e as_of
+            "ALTER TABLE configurations_history ADD INDEX idx_nome_tela_alterado (nome, tela, alterado_em)",
+            "ALTER TABLE configurations_history ADD INDEX idx_tela_alterado (tela, alterado_em)",
+            """
+            CREATE TABLE configurations_history_archive (
+                id INT PRIMARY KEY,
+                config_id INT NOT NULL,
+                nome VARCHAR(100) NOT NULL,
+                tela VARCHAR(100) NOT NULL,
+                escopo ENUM('GLOBAL', 'INSTANCE', 'USER') NOT NULL,
+                instance_id VARCHAR(50) NULL,
+                user_id INT NULL,
+                tipo ENUM('BOOLEAN', 'INTEGER', 'FLOAT', 'STRING') NOT NULL,
+                operacao ENUM('INSERT', 'UPDATE', 'DELETE') NOT NULL DEFAULT 'UPDATE',
+                valor_antigo TEXT,
+                valor_novo TEXT,
+                alterado_em TIMESTAMP NULL,
+                alterado_por VARCHAR(100),
+
+                INDEX idx_alterado_em (alterado_em),
+                INDEX idx_nome_tela_alterado (nome, tela, alterado_em)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci ROW_FORMAT=COMPRESSED
+            """,
+        ],
+    ),
+    (
+        '004_layout_graph',
+        [
+            # Estações com posição e trechos com origem/destino (LayoutGraph)
+            "ALTER TABLE station ADD COLUMN layout_id INT NULL AFTER id",
+            "ALTER TABLE station ADD COLUMN x DOUBLE NOT NULL DEFAULT 0",
+            "ALTER TABLE station ADD COLUMN y DOUBLE NOT NULL DEFAULT 0",
+            "ALTER TABLE station ADD INDEX idx_layout_id (layout_id)",
+            "ALTER TABLE path ADD COLUMN layout_id INT NULL AFTER id",
+            "ALTER TABLE path ADD COLUMN from_station_id INT NULL",
+            "ALTER TABLE path ADD COLUMN to_station_id INT NULL",
+            "ALTER TABLE path ADD COLUMN length DOUBLE NULL",
+            "ALTER TABLE path ADD COLUMN bidirectional BOOLEAN NOT NULL DEFAULT TRUE",
+            "ALTER TABLE path ADD INDEX idx_layout_id (layout_id)",
+        ],
+    ),
+    (
+        '005_agv_position',
+        [
+            # Posição atual e velocidade de cada AGV (FleetPlanner)
+            "ALTER TABLE agv ADD COLUMN layout_id INT NULL AFTER id",
+            "ALTER TABLE agv ADD COLUMN station_id INT NULL",
+            "ALTER TABLE agv ADD COLUMN speed DOUBLE NOT NULL DEFAULT 1.0",
+            "ALTER TABLE agv ADD INDEX idx_layout_id (layout_id)",
+        ],
+    ),
+    (
+        '006_missions',
+        [
+            # Missões de transporte e estado do AGV (DispatchService)
+            "ALTER TABLE agv ADD COLUMN status VARCHAR(20) NOT NULL DEFAULT 'idle'",
+            """
+            CREATE TABLE mission (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                layout_id INT NOT NULL,
+                code VARCHAR(25) NOT NULL,
+                pickup_station_id INT NOT NULL,
+                dropoff_station_id INT NULL,
+                priority INT NOT NULL DEFAULT 0,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                agv_id INT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                assigned_at TIMESTAMP NULL,
+
+                INDEX idx_layout_status (layout_id, status),
+                INDEX idx_agv_id (agv_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+        ],
+    ),
+    (
+        '007_agv_telemetry',
+        [
+            # Lotes comprimidos de telemetria (TelemetryIngestor / DatabaseSink)
+            """
+            CREATE TABLE agv_telemetry (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                ts_start DOUBLE NOT NULL,
+                ts_end DOUBLE NOT NULL,
+                samples INT NOT NULL,
+                codec VARCHAR(10) NOT NULL,
+                payload LONGBLOB NOT NULL,
+
+                INDEX idx_ts_end (ts_end),
+                INDEX idx_ts_start (ts_start)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+        ],
+    ),
+    (
+        '008_zones',
+        [
+            # Zonas de intertravamento e suas estações (ZoneLockManager)
+            """
+            CREATE TABLE zone (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                layout_id INT NOT NULL,
+                code VARCHAR(25) NOT NULL,
+                name VARCHAR(100) NULL,
+                capacity INT NOT NULL DEFAULT 1,
+                policy VARCHAR(10) NOT NULL DEFAULT 'fifo',
+
+                UNIQUE KEY uq_layout_code (layout_id, code)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+            """
+            CREATE TABLE zone_station (
+                zone_id INT NOT NULL,
+                station_id INT NOT NULL,
+
+                PRIMARY KEY (zone_id, station_id),
+                INDEX idx_station_id (station_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+        ],
+    ),
+    (
+        '009_configurations_history_horizon',
+        [
+            # Horizonte de retenção: as_of não reconstrói instantes anteriores a ele
+            """
+            CREATE TABLE configurations_history_horizon (
+                id TINYINT PRIMARY KEY,
+                horizon TIMESTAMP NOT NULL,
+                history_id INT NOT NULL,
+                atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+        ],
+    ),
+]
+
+ALREADY_APPLIED_ERRORS = (
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_TABLE_EXISTS_ERROR,
+)
+
+
+def get_applied_migrations(cursor) -> set:
+    """Retorna as migrações já aplicadas"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        name VARCHAR(100) PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """)
+    cursor.execute("SELECT name FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate():
+    """Aplica as migrações pendentes"""
+
+    with DatabaseManager.get_cursor(dictionary=False) as (cursor, conn):
+        applied = get_applied_migrations(cursor)
+
+        for name, statements in MIGRATIONS:
+            if name in applied:
+                logger.info(f"○ Migração já aplicada: {name}")
+                continue
+
+            try:
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except Error as e:
+                        if e.errno not in ALREADY_APPLIED_ERRORS:
+                            raise
+                cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+                conn.commit()
+                logger.info(f"✓ Migração aplicada: {name}")
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"✗ Erro ao aplicar migração {name}: {e}")
+                raise
+
+if __name__ == "__main__":
+    migrate()
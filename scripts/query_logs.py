@@ -0,0 +1,93 @@
+"""
+Busca indexada nos logs JSON
+
+Exemplos:
+    python scripts/query_logs.py --user-id 123 --level WARNING --since 03:00 --until 03:15
+    python scripts/query_logs.py logs/agv_2026-10-19.json --session abc-123 --limit 50
+    python scripts/query_logs.py --module auth_service --contains "login" --stats
+
+Horários sem data (HH:MM) usam --date (padrão: hoje). O índice lateral
+(.idx) é criado/atualizado automaticamente a cada consulta.
+"""
+
+import sys
+import os
+import argparse
+import json
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from pathlib import Path
+from src.log.log_index import LogQuery, build_index, find_log_files
+
+
+def parse_time(value: str, date: str) -> str:
+    """Completa 'HH:MM[:SS]' com a data (LogQuery interpreta e valida o horário)"""
+    if value is None:
+        return None
+    if 'T' in value or ' ' in value or '-' in value:
+        return value
+    return f"{date}T{value}"
+
+
+def resolve_files(paths, log_dir: str):
+    files = []
+    for path in paths or [log_dir]:
+        path = Path(path)
+        if not path.exists():
+            sys.exit(f"✗ Caminho não encontrado: {path}")
+        files.extend(find_log_files(path) if path.is_dir() else [path])
+    return files
+
+
+def query(args):
+    date = args.date or datetime.now().strftime('%Y-%m-%d')
+    files = resolve_files(args.paths, args.log_dir)
+
+    if args.rebuild_index:
+        for path in files:
+            build_index(path, rebuild=True)
+
+    log_query = LogQuery(
+        user_id=args.user_id,
+        session_id=args.session,
+        min_level=args.level,
+        module=args.module,
+        since=parse_time(args.since, date),
+        until=parse_time(args.until, date),
+        contains=args.contains
+    )
+
+    count = 0
+    for entry in log_query.search(files, limit=args.limit, use_index=not args.no_index):
+        print(json.dumps(entry, ensure_ascii=False))
+        count += 1
+
+    if args.stats:
+        print(
+            f"Resultados: {count} | Arquivos: {len(files)} | "
+            f"Blocos lidos: {log_query.blocks_scanned}/{log_query.blocks_total}",
+            file=sys.stderr
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca nos logs JSON usando índice lateral")
+    parser.add_argument('paths', nargs='*', help="Arquivos ou diretórios (padrão: --log-dir)")
+    parser.add_argument('--log-dir', default='logs')
+    parser.add_argument('--user-id')
+    parser.add_argument('--session')
+    parser.add_argument('--level', help="Nível mínimo (DEBUG, INFO, WARNING, ERROR, CRITICAL)")
+    parser.add_argument('--module')
+    parser.add_argument('--since', help="Início (HH:MM ou ISO)")
+    parser.add_argument('--until', help="Fim (HH:MM ou ISO)")
+    parser.add_argument('--date', help="Data para horários sem data (AAAA-MM-DD)")
+    parser.add_argument('--contains', help="Texto contido na mensagem")
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--no-index', action='store_true', help="Varre os arquivos sem índice")
+    parser.add_argument('--rebuild-index', action='store_true', help="Refaz os índices antes da busca")
+    parser.add_argument('--stats', action='store_true', help="Mostra blocos lidos/total em stderr")
+    args = parser.parse_args()
+
+    query(args)
@@ -0,0 +1,99 @@
+"""
+Teste de carga de rotas e atribuição com o simulador de eventos discretos
+
+Roda a simulação para cada tamanho de frota informado e mostra missões/hora,
+congestionamento e latência do planejador e da atribuição, para avaliar a
+escala antes de levar a uma planta maior.
+
+    python scripts/simulate_fleet.py --grid 30 --agvs 20 40 80 --missions-per-hour 2000
+    python scripts/simulate_fleet.py --layout LAYOUT-01 --agvs 50 --hours 8 --telemetry
+    python scripts/simulate_fleet.py --grid 20 --agvs 30 --json
+"""
+
+import sys
+import os
+import argparse
+import json
+import tempfile
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routing.layout_graph import LayoutGraph
+from src.routing.spatial_index import SpatialGrid
+from src.services.route_service import RouteService
+from src.simulation.simulator import FleetSimulator
+from src.telemetry.ingest import TelemetryIngestor
+from src.telemetry.storage import SegmentFileSink
+
+
+def grid_layout(size: int, spacing: float = 3.0) -> LayoutGraph:
+    """Galpão sintético: grade size x size de corredores bidirecionais"""
+    stations, paths = [], []
+    for row in range(size):
+        for col in range(size):
+            station_id = row * size + col + 1
+            stations.append({'id': station_id, 'code': f'S{row}_{col}', 'x': col * spacing, 'y': row * spacing})
+            if col + 1 < size:
+                paths.append({'id': len(paths) + 1, 'from_station_id': station_id, 'to_station_id': station_id + 1})
+            if row + 1 < size:
+                paths.append({'id': len(paths) + 1, 'from_station_id': station_id, 'to_station_id': station_id + size})
+    return LayoutGraph.from_rows(stations, paths)
+
+
+def print_report(data: dict):
+    missions, congestion = data['missions'], data['congestion']
+    print(f"AGVs: {data['agvs']} | estações: {data['stations']} | "
+          f"{data['sim_seconds'] / 3600:.1f} h simuladas em {data['wall_seconds']:.1f} s ({data['speedup']:.0f}x)")
+    print(f"  missões        {missions['completed']:6d} concluídas / {missions['created']} criadas "
+          f"({missions['per_hour']:.0f}/h), {missions['pending']} pendentes")
+    print(f"  ciclo          média {data['cycle_time']['mean']:8.1f} s   p95 {data['cycle_time']['p95']:8.1f} s")
+    print(f"  espera         média {data['assignment_wait']['mean']:8.1f} s   p95 {data['assignment_wait']['p95']:8.1f} s"
+          f"   utilização {data['utilization']:.0%}")
+    print(f"  congestionam.  atraso {congestion['delay_factor']:.3f}x   espera {congestion['wait_seconds']:.0f} s   "
+          f"falhas {congestion['plan_failures']}   deslocamentos {congestion['relocations']}")
+    if congestion['hot_stations']:
+        print("                 " + ", ".join(f"{code} ({seconds:.0f} s)" for code, seconds in congestion['hot_stations']))
+    for name, key in (('planejador', 'planner_ms'), ('atribuição', 'dispatch_ms')):
+        stats = data[key]
+        print(f"  {name:14s} {stats['count']:6d} ciclos   p50 {stats['p50']:7.2f} ms   "
+              f"p95 {stats['p95']:7.2f} ms   máx {stats['max']:7.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulação da frota para teste de carga")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--layout', help='Código do layout no banco')
+    source.add_argument('--grid', type=int, default=20, help='Lado da grade sintética (sem banco)')
+    parser.add_argument('--agvs', type=int, nargs='+', default=[20])
+    parser.add_argument('--missions-per-hour', type=float, default=600.0)
+    parser.add_argument('--hours', type=float, default=1.0)
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--telemetry', action='store_true', help='Alimenta o TelemetryIngestor (arquivos temporários)')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    graph = LayoutGraph.get(args.layout) if args.layout else grid_layout(args.grid)
+    route_service = RouteService(graph=graph)
+
+    for agvs in args.agvs:
+        ingestor = None
+        if args.telemetry:
+            ingestor = TelemetryIngestor(
+                SegmentFileSink(tempfile.mkdtemp(prefix='simulation_')), spatial_index=SpatialGrid()
+            )
+            ingestor.start()
+
+        simulator = FleetSimulator(
+            graph, agvs, args.missions_per_hour, route_service=route_service,
+            ingestor=ingestor, speed=args.speed, seed=args.seed
+        )
+        data = simulator.run(hours=args.hours).to_dict()
+        if ingestor is not None:
+            ingestor.stop()
+            data['telemetry'] = ingestor.stats()
+
+        if args.json:
+            print(json.dumps(data, ensure_ascii=False))
+        else:
+            print_report(data)
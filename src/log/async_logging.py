@@ -0,0 +1,281 @@
+"""
+Pipeline de logging assíncrono
+
+As threads da aplicação apenas enfileiram o LogRecord; uma única thread
+(LogListener) formata e grava os registros em lote nos handlers reais.
+"""
+import atexit
+import logging
+import threading
+
+from collections import deque
+from typing import Dict, List, Optional
+
+# Políticas de estouro da fila
+OVERFLOW_BLOCK = 'block'              # Aguarda espaço na fila (até block_timeout)
+OVERFLOW_DROP_OLDEST = 'drop_oldest'  # Descarta o registro mais antigo
+OVERFLOW_SAMPLE = 'sample'            # Acima da marca d'água, mantém 1 a cada N
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SAMPLE)
+
+# =====================================================
+# FILA LIMITADA
+# =====================================================
+
+class BoundedLogQueue:
+    """
+    Fila limitada de LogRecords
+
+    Baseada em collections.deque: append/popleft são atômicos no CPython;
+    o lock protege só os contadores. A política 'block' usa um semáforo de
+    vagas e espera no máximo block_timeout segundos (None = sem limite)
+    antes de descartar; as demais nunca bloqueiam o produtor.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        overflow_policy: str = OVERFLOW_BLOCK,
+        sample_rate: int = 10,
+        high_watermark: float = 0.8,
+        block_timeout: Optional[float] = 1.0
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de estouro inválida: {overflow_policy}")
+
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.sample_rate = max(1, sample_rate)
+        self.high_watermark = int(capacity * high_watermark)
+        self.block_timeout = block_timeout
+
+        # Com drop_oldest o próprio deque descarta o registro mais antigo
+        maxlen = capacity if overflow_policy == OVERFLOW_DROP_OLDEST else None
+        self._items = deque(maxlen=maxlen)
+        self._slots = threading.Semaphore(capacity) if overflow_policy == OVERFLOW_BLOCK else None
+        self._sample_counter = 0
+        self._lock = threading.Lock()
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, record: logging.LogRecord, block: bool = True) -> bool:
+        """
+        Enfileira um registro conforme a política de estouro
+
+        block=False nunca espera por vaga (ex.: log gerado pela própria
+        thread de gravação, que é quem libera as vagas).
+
+        Returns:
+            True se o registro foi aceito
+        """
+        if self._slots is not None:
+            timeout = self.block_timeout if block else 0
+            if not self._slots.acquire(blocking=timeout != 0, timeout=timeout or None):
+                self._count('dropped')
+                return False
+
+        elif self.overflow_policy == OVERFLOW_DROP_OLDEST:
+            if len(self._items) >= self.capacity:
+                self._count('dropped')
+
+        elif len(self._items) >= self.high_watermark:
+            # Erros sempre passam enquanto houver espaço
+            if len(self._items) >= self.capacity:
+                self._count('dropped')
+                return False
+            if record.levelno < logging.ERROR:
+                with self._lock:
+                    self._sample_counter += 1
+                    if self._sample_counter % self.sample_rate:
+                        self.sampled_out += 1
+                        return False
+
+        self._items.append(record)
+        self._count('enqueued')
+        return True
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_batch(self, max_items: int) -> List[logging.LogRecord]:
+        """Retira até max_items registros da fila"""
+        batch = []
+        popleft = self._items.popleft
+
+        try:
+            while len(batch) < max_items:
+                batch.append(popleft())
+        except IndexError:
+            pass
+
+        if self._slots is not None:
+            for _ in batch:
+                self._slots.release()
+
+        return batch
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores da fila"""
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'size': len(self._items),
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'sampled_out': self.sampled_out,
+            }
+
+# =====================================================
+# HANDLER DE ENFILEIRAMENTO
+# =====================================================
+
+class AsyncLogHandler(logging.Handler):
+    """
+    Handler instalado no root logger no modo assíncrono
+
+    Os filtros (ex.: UserContextFilter) rodam aqui, na thread que gerou o log,
+    para capturar o contexto correto. A mensagem é interpolada antes de
+    enfileirar para que argumentos mutáveis não mudem até a gravação.
+    """
+
+    def __init__(self, log_queue: BoundedLogQueue, listener: 'LogListener'):
+        super().__init__()
+        self.queue = log_queue
+        self.listener = listener
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # Sem o lock do Handler: a fila já é segura entre threads
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            record.message = record.getMessage()
+            record.msg = record.message
+            record.args = None
+            if self.queue.put(record, block=self.listener.can_wait()):
+                self.listener.notify()
+        except Exception:
+            self.handleError(record)
+
+# =====================================================
+# THREAD DE GRAVAÇÃO
+# =====================================================
+
+class LogListener:
+    """Thread única que formata e grava os registros em lote"""
+
+    def __init__(
+        self,
+        log_queue: BoundedLogQueue,
+        handlers: List[logging.Handler],
+        batch_size: int = 256,
+        idle_interval: float = 0.05
+    ):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._idle = False
+        self._thread: Optional[threading.Thread] = None
+
+    def notify(self):
+        """Acorda a thread se ela estiver ociosa"""
+        if self._idle:
+            self._wakeup.set()
+
+    def can_wait(self) -> bool:
+        """
+        Produtor pode esperar por vaga: a thread de gravação está viva e não é
+        a chamadora (handler que loga de volta na fila não pode esperar por si)
+        """
+        thread = self._thread
+        return thread is not None and thread.is_alive() and thread is not threading.current_thread()
+
+    def start(self):
+        """Inicia a thread de gravação"""
+        self._thread = threading.Thread(target=self._run, name='LogListener', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Grava o que restou na fila e encerra a thread"""
+        if self._thread is None:
+            return
+
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        atexit.unregister(self.stop)
+
+        for handler in self.handlers:
+            handler.flush()
+
+    def _run(self):
+        while True:
+            batch = self.queue.get_batch(self.batch_size)
+
+            if batch:
+                self._write(batch)
+                continue
+
+            if self._stopping:
+                return
+
+            self._idle = True
+            # Revalida após marcar ociosa: evita perder um notify concorrente
+            if not len(self.queue):
+                self._wakeup.wait(self.idle_interval)
+            self._wakeup.clear()
+            self._idle = False
+
+    def _write(self, batch: List[logging.LogRecord]):
+        write_records(self.handlers, batch)
+
+def write_records(handlers: List[logging.Handler], batch: List[logging.LogRecord]):
+    """Grava um lote em cada handler, com uma escrita e um flush por handler"""
+    for handler in handlers:
+        records = [
+            record for record in batch
+            if record.levelno >= handler.level and handler.filter(record)
+        ]
+        if not records:
+            continue
+
+        try:
+            write_batch = getattr(handler, 'write_batch', None)
+            if write_batch is not None:
+                write_batch(records)
+            elif type(handler) in (logging.StreamHandler, logging.FileHandler):
+                _write_stream(handler, records)
+            else:
+                for record in records:
+                    handler.handle(record)
+        except Exception:
+            handler.handleError(records[0])
+
+def _write_stream(handler: logging.StreamHandler, records: List[logging.LogRecord]):
+    # FileHandler com delay=True ainda não abriu o arquivo
+    if handler.stream is None and hasattr(handler, '_open'):
+        handler.stream = handler._open()
+
+    data = ''.join(handler.format(record) + handler.terminator for record in records)
+
+    handler.acquire()
+    try:
+        handler.stream.write(data)
+        handler.flush()
+    finally:
+        handler.release()
@@ -11,51 +11,103 @@ import logging
 import functools
 import os
 import json
+import random
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
-import threading
+from typing import Optional, Dict, Any, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .timing import TimingRegistry
+from .tracing import Tracer
+from .rotation import RotatingLogHandler
+from .rate_limit import CallsiteRateLimitFilter
+
+try:
+    import orjson
+except ImportError:  # Opcional: acelera o JSONFormatter no modo rápido
+    orjson = None
+
+if orjson is not None:
+    def _json_bytes(value) -> bytes:
+        return orjson.dumps(value, default=str)
+else:
+    def _json_bytes(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
 
 # =====================================================
 # 1. CONFIGURAÇÃO DO CONTEXTO DE USUÁRIO
 # =====================================================
 
+class UserInfo:
+    """Dados do usuário de um contexto (imutável; o filtro lê um único objeto)"""
+
+    __slots__ = ('username', 'user_id', 'extra_info', 'record_user_id', 'role', 'department', 'session_id')
+
+    def __init__(self, username: str, user_id: Optional[int] = None, extra_info: Optional[Dict[str, Any]] = None):
+        extra_info = extra_info or {}
+        self.username = username
+        self.user_id = user_id
+        self.extra_info = extra_info
+        # Valores já no formato gravado pelo UserContextFilter
+        self.record_user_id = user_id or 'N/A'
+        self.role = extra_info.get('role', 'N/A')
+        self.department = extra_info.get('department', 'N/A')
+        self.session_id = extra_info.get('session_id', 'N/A')
+
+SYSTEM_USER = UserInfo('SYSTEM')
+
 class UserContext:
-    """Gerencia o contexto do usuário atual usando thread-local storage"""
+    """
+    Gerencia o contexto do usuário atual usando contextvars
 
-    _context = threading.local()
+    Cada thread e cada task asyncio enxerga o seu próprio usuário: tasks
+    criadas herdam uma cópia do contexto de quem as criou, e um set_user
+    dentro da task não afeta as demais.
+    """
+
+    _context: ContextVar[UserInfo] = ContextVar('user_context', default=SYSTEM_USER)
 
     @classmethod
     def set_user(cls, username: str, user_id: Optional[int] = None, **extra_info):
         """Define o usuário atual no contexto"""
-        cls._context.username = username
-        cls._context.user_id = user_id
-        cls._context.extra_info = extra_info
+        cls._context.set(UserInfo(username, user_id, extra_info))
+
+    @classmethod
+    def get_context(cls) -> UserInfo:
+        """Retorna o objeto com todos os dados do usuário atual"""
+        return cls._context.get()
 
     @classmethod
     def get_user(cls) -> str:
         """Retorna o nome do usuário atual"""
-        return getattr(cls._context, 'username', 'SYSTEM')
+        return cls._context.get().username
 
     @classmethod
     def get_user_id(cls) -> Optional[int]:
         """Retorna o ID do usuário atual"""
-        return getattr(cls._context, 'user_id', None)
+        return cls._context.get().user_id
 
     @classmethod
     def get_extra_info(cls) -> Dict[str, Any]:
         """Retorna informações extras do usuário"""
-        return getattr(cls._context, 'extra_info', {})
+        return cls._context.get().extra_info
 
     @classmethod
     def clear_user(cls):
         """Limpa o contexto do usuário"""
-        if hasattr(cls._context, 'username'):
-            delattr(cls._context, 'username')
-        if hasattr(cls._context, 'user_id'):
-            delattr(cls._context, 'user_id')
-        if hasattr(cls._context, 'extra_info'):
-            delattr(cls._context, 'extra_info')
+        cls._context.set(SYSTEM_USER)
+
+    @classmethod
+    @contextmanager
+    def user(cls, username: str, user_id: Optional[int] = None, **extra_info):
+        """Define o usuário apenas dentro do bloco, restaurando o anterior"""
+        token = cls._context.set(UserInfo(username, user_id, extra_info))
+        try:
+            yield
+        finally:
+            cls._context.reset(token)
 
 # =====================================================
 # 2. FILTRO CUSTOMIZADO PARA ADICIONAR INFORMAÇÕES
@@ -65,15 +117,16 @@ class UserContextFilter(logging.Filter):
     """Filtro que adiciona informações de contexto aos logs"""
 
     def filter(self, record):
+        user = UserContext._context.get()
+
         # Adicionar informações do usuário
-        record.username = UserContext.get_user()
-        record.user_id = UserContext.get_user_id() or 'N/A'
+        record.username = user.username
+        record.user_id = user.record_user_id
 
         # Adicionar informações extras
-        extra_info = UserContext.get_extra_info()
-        record.user_role = extra_info.get('role', 'N/A')
-        record.user_department = extra_info.get('department', 'N/A')
-        record.session_id = extra_info.get('session_id', 'N/A')
+        record.user_role = user.role
+        record.user_department = user.department
+        record.session_id = user.session_id
 
         # Adicionar informações de módulo e função
         # Já vem automaticamente em record.module e record.funcName
@@ -96,9 +149,31 @@ class DetailedFormatter(logging.Formatter):
         )
 
 class JSONFormatter(logging.Formatter):
-    """Formatter que gera logs em formato JSON"""
+    """
+    Formatter que gera logs em formato JSON
+
+    Com fast=True os fragmentos estáticos de cada ponto de chamada (nível,
+    módulo, função, linha, arquivo) são codificados uma única vez, o prefixo
+    do timestamp é reaproveitado dentro do mesmo segundo e o registro é
+    montado direto em bytes (orjson quando instalado). Use format_bytes com
+    JSONFileHandler para gravar sem decodificar.
+    """
+
+    # Limite dos caches de contexto de usuário/thread
+    CACHE_LIMIT = 1024
+
+    def __init__(self, fast: bool = False):
+        super().__init__()
+        self.fast = fast
+        self._callsites: Dict[tuple, bytes] = {}
+        self._users: Dict[tuple, bytes] = {}
+        self._threads: Dict[tuple, bytes] = {}
+        self._second_prefix = (None, b'')
 
     def format(self, record):
+        if self.fast:
+            return self.format_bytes(record).decode('utf-8')
+
         log_data = {
             'timestamp': datetime.fromtimestamp(record.created).isoformat(),
             'level': record.levelname,
@@ -120,12 +195,121 @@ class JSONFormatter(logging.Formatter):
             'thread_name': record.threadName
         }
 
+        # Adicionar métricas se houver (ex.: resumo de tempos)
+        metrics = getattr(record, 'metrics', None)
+        if metrics is not None:
+            log_data['metrics'] = metrics
+
         # Adicionar exceção se houver
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
 
         return json.dumps(log_data, ensure_ascii=False)
 
+    # ----- Modo rápido -----
+
+    def _timestamp(self, created: float) -> bytes:
+        """ISO 8601 com microssegundos; a parte até os segundos é cacheada"""
+        second = int(created)
+        cached_second, prefix = self._second_prefix
+        if cached_second != second:
+            prefix = datetime.fromtimestamp(second).strftime('%Y-%m-%dT%H:%M:%S').encode()
+            self._second_prefix = (second, prefix)
+
+        micro = int((created - second) * 1e6)
+        return b'%s.%06d' % (prefix, micro)
+
+    def _callsite(self, record) -> bytes:
+        key = (record.pathname, record.lineno, record.funcName, record.levelname)
+        fragment = self._callsites.get(key)
+        if fragment is None:
+            fragment = b'"level":%s,"code":%s' % (
+                _json_bytes(record.levelname),
+                _json_bytes({
+                    'module': record.module,
+                    'function': record.funcName,
+                    'line': record.lineno,
+                    'pathname': record.pathname
+                })
+            )
+            self._callsites[key] = fragment
+        return fragment
+
+    def _user(self, record) -> bytes:
+        key = (
+            getattr(record, 'username', 'SYSTEM'),
+            getattr(record, 'user_id', None),
+            getattr(record, 'user_role', None),
+            getattr(record, 'user_department', None),
+            getattr(record, 'session_id', None)
+        )
+        fragment = self._users.get(key)
+        if fragment is None:
+            if len(self._users) >= self.CACHE_LIMIT:
+                self._users.clear()
+            fragment = _json_bytes(dict(zip(('username', 'user_id', 'role', 'department', 'session_id'), key)))
+            self._users[key] = fragment
+        return fragment
+
+    def _thread(self, record) -> bytes:
+        key = (record.thread, record.threadName)
+        fragment = self._threads.get(key)
+        if fragment is None:
+            if len(self._threads) >= self.CACHE_LIMIT:
+                self._threads.clear()
+            fragment = b'"thread":%s,"thread_name":%s' % (_json_bytes(record.thread), _json_bytes(record.threadName))
+            self._threads[key] = fragment
+        return fragment
+
+    def format_bytes(self, record) -> bytes:
+        """Serializa o registro em bytes UTF-8 (mesmos campos do modo padrão)"""
+        parts = [
+            b'{"timestamp":"', self._timestamp(record.created), b'",',
+            self._callsite(record),
+            b',"user":', self._user(record),
+            b',"message":', _json_bytes(record.getMessage()),
+            b',', self._thread(record)
+        ]
+
+        metrics = getattr(record, 'metrics', None)
+        if metrics is not None:
+            parts.append(b',"metrics":')
+            parts.append(_json_bytes(metrics))
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            parts.append(b',"exception":')
+            parts.append(_json_bytes(record.exc_text))
+
+        parts.append(b'}')
+        return b''.join(parts)
+
+class JSONFileHandler(logging.FileHandler):
+    """FileHandler binário que grava a saída de JSONFormatter.format_bytes"""
+
+    def __init__(self, filename, delay: bool = False):
+        super().__init__(filename, mode='ab', delay=delay)
+        self.setFormatter(JSONFormatter(fast=True))
+
+    def emit(self, record):
+        self.write_batch([record])
+
+    def write_batch(self, records):
+        """Grava vários registros com uma única escrita (usado pelo LogListener)"""
+        try:
+            data = b''.join(self.formatter.format_bytes(record) + b'\n' for record in records)
+            self.acquire()
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(data)
+                self.stream.flush()
+            finally:
+                self.release()
+        except Exception:
+            self.handleError(records[0])
+
 class ColoredFormatter(logging.Formatter):
     """Formatter com cores para console"""
 
@@ -181,6 +365,11 @@ class AppLogger:
     """Classe para configurar e gerenciar loggers da aplicação"""
 
     _configured = False
+    _listener = None
+    _queue = None
+    _rate_limit_filter = None
+    # Handlers criados pelo setup_logging (fechados no shutdown)
+    _handlers: List[logging.Handler] = []
 
     # @property
     # def logger(self) -> AppLogger:
@@ -194,72 +383,230 @@ class AppLogger:
         level: int = logging.INFO,
         console_output: bool = True,
         file_output: bool = False,
-        json_output: bool = False
+        json_output: bool = False,
+        json_fast: bool = False,
+        async_mode: bool = False,
+        queue_size: int = 10000,
+        overflow_policy: str = 'block',
+        sample_rate: int = 10,
+        timing_report_interval: Optional[float] = None,
+        rotate: bool = False,
+        max_bytes: int = 0,
+        compression: Optional[str] = 'gzip',
+        retention_days: Optional[int] = None,
+        collector_address=None,
+        rate_limit: bool = False,
+        rate_limit_per_second: float = 10.0,
+        rate_limit_burst: int = 50,
+        rate_limit_config: bool = False
     ):
-        """Configura o sistema de logging"""
+        """
+        Configura o sistema de logging
+
+        Com async_mode=True as threads apenas enfileiram os registros e uma
+        única thread de gravação formata e escreve em lote. overflow_policy
+        define o comportamento com a fila cheia: 'block' (espera até 1 s e
+        descarta), 'drop_oldest' ou 'sample' (mantém 1 a cada sample_rate
+        registros abaixo de ERROR).
+        json_fast=True grava o JSON em bytes com o modo rápido do JSONFormatter.
+        timing_report_interval (segundos) grava periodicamente o resumo dos
+        histogramas de log_execution_time (durações do último intervalo).
+
+        Com rotate=True (opcional) os arquivos viram de segmento a cada dia e
+        ao passar de max_bytes (0 = sem limite) e a compressão ('gzip', 'zstd'
+        ou None) roda em segundo plano; _errors.log passa a ser
+        {app_name}_errors_{data}.log. Segmentos com mais de retention_days
+        dias só são removidos se retention_days for informado.
+
+        Com collector_address (caminho de socket Unix ou (host de loopback, porta)) o
+        processo não abre arquivos: os registros vão em lote para o coletor
+        (ver src/log/multiprocess.py). O modo assíncrono é ativado.
+
+        rate_limit=True limita cada ponto de chamada (logger, linha, nível) a
+        rate_limit_per_second com rajadas de rate_limit_burst, gravando
+        resumos das mensagens suprimidas; com rate_limit_config=True os
+        parâmetros vêm da tela LOGGING do ConfigManager (com o banco fora, os
+        valores acima valem até a configuração ser carregada).
+        """
 
         if cls._configured:
             return
 
-        # Criar diretório de logs
-        log_path = Path(log_dir)
-        log_path.mkdir(exist_ok=True)
-
         # Obter logger raiz
         root_logger = logging.getLogger()
         root_logger.setLevel(level)
 
         # Limpar handlers existentes
+        cls.shutdown()
         root_logger.handlers.clear()
 
         # Adicionar filtro de contexto
         user_filter = UserContextFilter()
 
+        handlers = []
+
         # 1. Handler para Console (com cores)
         if console_output:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(level)
             console_handler.setFormatter(ColoredFormatter())
-            console_handler.addFilter(user_filter)
-            root_logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        if collector_address is not None:
+            # Arquivos pertencem ao processo coletor; o envio é em lote
+            from .multiprocess import ProcessLogShipper
+
+            shipper = ProcessLogShipper(collector_address)
+            shipper.setLevel(level)
+            handlers.append(shipper)
+            async_mode = True
+        else:
+            handlers.extend(cls.build_handlers(
+                log_dir=log_dir,
+                app_name=app_name,
+                level=level,
+                file_output=file_output,
+                json_output=json_output,
+                json_fast=json_fast,
+                rotate=rotate,
+                max_bytes=max_bytes,
+                compression=compression,
+                retention_days=retention_days
+            ))
+
+        filters = [user_filter]
+        if rate_limit:
+            # Antes do filtro de contexto: registros suprimidos não pagam por ele
+            cls._rate_limit_filter = CallsiteRateLimitFilter(rate_limit_per_second, rate_limit_burst)
+            filters.insert(0, cls._rate_limit_filter)
+
+        cls._handlers = handlers
+        if async_mode:
+            # Handlers reais gravados pela thread de log; os filtros rodam no
+            # AsyncLogHandler, na thread que gerou o registro
+            from .async_logging import AsyncLogHandler, BoundedLogQueue, LogListener
+
+            cls._queue = BoundedLogQueue(queue_size, overflow_policy, sample_rate)
+            cls._listener = LogListener(cls._queue, handlers)
+            async_handler = AsyncLogHandler(cls._queue, cls._listener)
+            for log_filter in filters:
+                async_handler.addFilter(log_filter)
+            root_logger.addHandler(async_handler)
+            cls._listener.start()
+        else:
+            for handler in handlers:
+                for log_filter in filters:
+                    handler.addFilter(log_filter)
+                root_logger.addHandler(handler)
+
+        if timing_report_interval:
+            TimingRegistry.start_reporting(timing_report_interval)
+
+        # Só depois dos handlers: sem banco, o aviso é gravado e o filtro
+        # segue com os valores padrão até conseguir carregar a configuração
+        if rate_limit and rate_limit_config:
+            cls._rate_limit_filter.bind_config()
+
+        cls._configured = True
+
+        logging.info("Sistema de logging configurado com sucesso")
+
+    @classmethod
+    def build_handlers(
+        cls,
+        log_dir: str = 'logs',
+        app_name: str = 'app',
+        level: int = logging.INFO,
+        file_output: bool = False,
+        json_output: bool = False,
+        json_fast: bool = False,
+        rotate: bool = False,
+        max_bytes: int = 0,
+        compression: Optional[str] = 'gzip',
+        retention_days: Optional[int] = None
+    ) -> List[logging.Handler]:
+        """Cria os handlers de arquivo (texto, JSON e erros) sem instalá-los"""
+
+        # Criar diretório de logs
+        log_path = Path(log_dir)
+        log_path.mkdir(exist_ok=True)
+
+        def file_handler_for(prefix: str, suffix: str, binary: bool = False):
+            if rotate:
+                return RotatingLogHandler(
+                    log_path, prefix, suffix,
+                    max_bytes=max_bytes,
+                    compression=compression,
+                    retention_days=retention_days,
+                    binary=binary
+                )
+            today = datetime.now().strftime('%Y-%m-%d')
+            if binary:
+                return JSONFileHandler(log_path / f'{prefix}_{today}{suffix}')
+            return logging.FileHandler(log_path / f'{prefix}_{today}{suffix}', encoding='utf-8')
+
+        handlers = []
 
         # 2. Handler para Arquivo texto (detalhado)
         if file_output:
-            today = datetime.now().strftime('%Y-%m-%d')
-            file_handler = logging.FileHandler(
-                log_path / f'{app_name}_{today}.log',
-                encoding='utf-8'
-            )
+            file_handler = file_handler_for(app_name, '.log')
             file_handler.setLevel(level)
             file_handler.setFormatter(DetailedFormatter())
-            file_handler.addFilter(user_filter)
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
 
         # 3. Handler para JSON (análise e integração)
         if json_output:
-            today = datetime.now().strftime('%Y-%m-%d')
-            json_handler = logging.FileHandler(
-                log_path / f'{app_name}_{today}.json',
-                encoding='utf-8'
-            )
+            json_handler = file_handler_for(app_name, '.json', binary=json_fast)
             json_handler.setLevel(level)
-            json_handler.setFormatter(JSONFormatter())
-            json_handler.addFilter(user_filter)
-            root_logger.addHandler(json_handler)
+            json_handler.setFormatter(JSONFormatter(fast=json_fast))
+            handlers.append(json_handler)
 
         # 4. Handler para Erros (arquivo separado)
-        error_handler = logging.FileHandler(
-            log_path / f'{app_name}_errors.log',
-            encoding='utf-8'
-        )
+        if rotate:
+            error_handler = file_handler_for(f'{app_name}_errors', '.log')
+        else:
+            error_handler = logging.FileHandler(
+                log_path / f'{app_name}_errors.log',
+                encoding='utf-8'
+            )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(DetailedFormatter())
-        error_handler.addFilter(user_filter)
-        root_logger.addHandler(error_handler)
+        handlers.append(error_handler)
 
-        cls._configured = True
+        return handlers
 
-        logging.info("Sistema de logging configurado com sucesso")
+    @classmethod
+    def shutdown(cls):
+        """Grava os registros pendentes e encerra as threads de log"""
+        TimingRegistry.stop_reporting()
+
+        if cls._rate_limit_filter is not None:
+            cls._rate_limit_filter.close()
+            cls._rate_limit_filter = None
+
+        if cls._listener is not None:
+            cls._listener.stop()
+            logging.getLogger().handlers.clear()
+            cls._listener = None
+            cls._queue = None
+
+        # Nos dois modos: no síncrono os handlers estão direto no root logger
+        root_logger = logging.getLogger()
+        for handler in cls._handlers:
+            root_logger.removeHandler(handler)
+            handler.close()
+        cls._handlers = []
+        cls._configured = False
+
+    @classmethod
+    def get_rate_limit_filter(cls) -> Optional[CallsiteRateLimitFilter]:
+        """Filtro de limitação por ponto de chamada (None se desativado)"""
+        return cls._rate_limit_filter
+
+    @classmethod
+    def get_queue_stats(cls) -> Dict[str, int]:
+        """Contadores da fila de log (vazio fora do modo assíncrono)"""
+        return cls._queue.stats() if cls._queue is not None else {}
 
     @classmethod
     def get_logger(cls, name: str) -> logging.Logger:
@@ -272,82 +619,192 @@ class AppLogger:
 # 5. DECORATORS PARA LOG AUTOMÁTICO
 # =====================================================
 
+class LogDecoratorConfig:
+    """
+    Controle global dos decorators de log
+
+    enabled=False desliga os decorators (custo de um teste por chamada).
+    A taxa de amostragem por módulo (0.0 a 1.0) vale para o módulo e seus
+    submódulos; erros são sempre registrados.
+    """
+
+    enabled = True
+    _sample_rates: Dict[str, float] = {}
+    _resolved: Dict[str, float] = {}
+
+    @classmethod
+    def set_enabled(cls, enabled: bool):
+        """Liga/desliga todos os decorators de log"""
+        cls.enabled = enabled
+
+    @classmethod
+    def set_sample_rate(cls, module: str, rate: float):
+        """Define a fração de chamadas logadas para um módulo (ex.: 'services.dispatch')"""
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("rate deve estar entre 0.0 e 1.0")
+        cls._sample_rates[module] = rate
+        cls._resolved = {}
+
+    @classmethod
+    def clear_sample_rates(cls):
+        """Remove todas as taxas de amostragem"""
+        cls._sample_rates = {}
+        cls._resolved = {}
+
+    @classmethod
+    def get_sample_rate(cls, module: str) -> float:
+        """Taxa do módulo ou do pacote pai mais próximo (1.0 se não houver)"""
+        rate = cls._resolved.get(module)
+        if rate is None:
+            rate = 1.0
+            name = module
+            while name:
+                if name in cls._sample_rates:
+                    rate = cls._sample_rates[name]
+                    break
+                name = name.rpartition('.')[0]
+            cls._resolved[module] = rate
+        return rate
+
+    @classmethod
+    def should_log(cls, logger: logging.Logger, level: int) -> bool:
+        """Verifica kill switch, nível e amostragem antes de qualquer formatação"""
+        if not cls.enabled or not logger.isEnabledFor(level):
+            return False
+        rate = cls.get_sample_rate(logger.name)
+        return rate >= 1.0 or random.random() < rate
+
+class _LazySignature:
+    """Representação dos argumentos, montada só se a mensagem for formatada"""
+
+    __slots__ = ('args', 'kwargs')
+
+    def __init__(self, args, kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        args_repr = [repr(a) for a in self.args[:3]]  # Primeiros 3 args
+        kwargs_repr = [f"{k}={v!r}" for k, v in list(self.kwargs.items())[:3]]
+        return ", ".join(args_repr + kwargs_repr)
+
 def log_function_call(level: int = logging.INFO):
     """Decorator que loga automaticamente entrada e saída de funções"""
 
     def decorator(func):
+        logger = logging.getLogger(func.__module__)
+        name = func.__name__
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            logger = logging.getLogger(func.__module__)
-
-            # Log de entrada
-            args_repr = [repr(a) for a in args[:3]]  # Primeiros 3 args
-            kwargs_repr = [f"{k}={v!r}" for k, v in list(kwargs.items())[:3]]
-            signature = ", ".join(args_repr + kwargs_repr)
+            if not LogDecoratorConfig.should_log(logger, level):
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if LogDecoratorConfig.enabled and logger.isEnabledFor(logging.ERROR):
+                        logger.error("✗ Erro em %s: %s: %s", name, type(e).__name__, e, exc_info=True)
+                    raise
 
-            logger.log(level, f"→ Iniciando {func.__name__}({signature})")
+            # Log de entrada (argumentos formatados apenas na emissão)
+            logger.log(level, "→ Iniciando %s(%s)", name, _LazySignature(args, kwargs))
 
             try:
                 # Executar função
                 result = func(*args, **kwargs)
 
                 # Log de saída bem-sucedida
-                logger.log(level, f"✓ Concluído {func.__name__} → {type(result).__name__}")
+                logger.log(level, "✓ Concluído %s → %s", name, type(result).__name__)
 
                 return result
 
             except Exception as e:
                 # Log de erro
-                logger.error(f"✗ Erro em {func.__name__}: {type(e).__name__}: {e}", exc_info=True)
+                logger.error("✗ Erro em %s: %s: %s", name, type(e).__name__, e, exc_info=True)
                 raise
 
         return wrapper
     return decorator
 
-def log_execution_time(func):
-    """Decorator que loga o tempo de execução"""
+def log_execution_time(func=None, *, log_each_call: bool = True, histogram: bool = True):
+    """
+    Decorator que loga o tempo de execução
 
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        import time
+    As durações vão para o histograma da função (ver get_timing_report);
+    log_each_call=False dispensa a linha por chamada.
+
+    Usage:
+        @log_execution_time
+        @log_execution_time(log_each_call=False)
+    """
+
+    def decorator(func):
         logger = logging.getLogger(func.__module__)
+        name = func.__name__
+        timings = TimingRegistry.histogram(f"{func.__module__}.{func.__qualname__}") if histogram else None
 
-        start_time = time.time()
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not LogDecoratorConfig.enabled or (timings is None and not logger.isEnabledFor(logging.INFO)):
+                return func(*args, **kwargs)
 
-        try:
-            result = func(*args, **kwargs)
-            execution_time = time.time() - start_time
+            start_time = time.perf_counter_ns()
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                elapsed = time.perf_counter_ns() - start_time
+                if timings is not None:
+                    timings.record(elapsed)
+                logger.error("⏱️ %s falhou após %.4fs", name, elapsed / 1e9)
+                raise
 
-            logger.info(f"⏱️ {func.__name__} executado em {execution_time:.4f}s")
+            elapsed = time.perf_counter_ns() - start_time
+            if timings is not None:
+                timings.record(elapsed)
+            if log_each_call and LogDecoratorConfig.should_log(logger, logging.INFO):
+                logger.info("⏱️ %s executado em %.4fs", name, elapsed / 1e9)
 
             return result
 
-        except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(f"⏱️ {func.__name__} falhou após {execution_time:.4f}s")
-            raise
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
-    return wrapper
+def get_timing_report() -> Dict[str, Dict[str, float]]:
+    """Resumo (count, mean, p50, p90, p99, max em ms) por função decorada com log_execution_time"""
+    return TimingRegistry.report()
 
 # =====================================================
 # 6. CONTEXT MANAGER PARA OPERAÇÕES
 # =====================================================
 
 class LoggedOperation:
-    """Context manager para logar operações complexas"""
+    """
+    Context manager para logar operações complexas
 
-    def __init__(self, operation_name: str, logger: Optional[logging.Logger] = None):
+    Cada operação é também um span (ver src/log/tracing.py): operações
+    aninhadas registram o pai, a duração em nanossegundos e os atributos.
+    """
+
+    def __init__(self, operation_name: str, logger: Optional[logging.Logger] = None, **attributes):
         self.operation_name = operation_name
         self.logger = logger or logging.getLogger(__name__)
+        self.attributes = attributes
         self.start_time = None
+        self.span = None
+        self._token = None
 
     def __enter__(self):
         self.start_time = datetime.now()
+        self.span, self._token = Tracer.begin(self.operation_name, **self.attributes)
         self.logger.info(f"╔═ Iniciando operação: {self.operation_name}")
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = (datetime.now() - self.start_time).total_seconds()
+        Tracer.end(self.span, self._token, exc_val)
+        duration = self.span.duration_ns / 1e9
 
         if exc_type is None:
             self.logger.info(f"╚═ Operação concluída: {self.operation_name} ({duration:.2f}s)")
@@ -360,8 +817,6 @@ class LoggedOperation:
         # Não suprimir exceção
         return False
 
-
-
 # =====================================================
 # 7. EXEMPLO DE USO
 # =====================================================
@@ -0,0 +1,463 @@
+"""
+Índice lateral para busca em logs JSON
+
+Cada arquivo {nome}.json ganha um {nome}.json.idx com um resumo por bloco
+de linhas: deslocamento, intervalo de timestamps e os conjuntos de user_id,
+session_id, nível e módulo presentes. A consulta lê o índice, descarta os
+blocos que não podem conter resultado e só decodifica as linhas dos blocos
+restantes (arquivo mapeado em memória com mmap).
+
+O índice é incremental: blocos completos nunca são refeitos, apenas o
+trecho acrescentado desde a última indexação. Segmentos rotacionados são
+indexados antes da compressão (ver RotatingLogHandler); para .gz/.zst os
+deslocamentos valem para o conteúdo descomprimido, lido em fluxo.
+"""
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import re
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson é opcional
+    _loads = json.loads
+
+INDEX_FORMAT = 'agv-log-index'
+INDEX_VERSION = 1
+
+# Linhas por bloco e limite de valores distintos guardados por bloco;
+# acima do limite o campo vira None ("qualquer valor")
+BLOCK_LINES = 2048
+SET_LIMIT = 128
+
+# Bytes do início do arquivo usados para detectar que ele foi substituído
+FINGERPRINT_BYTES = 4096
+
+# Tamanho dos pedaços lidos em fluxo (arquivos comprimidos e trechos sem índice)
+READ_CHUNK = 1024 * 1024
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+def index_path_for(log_path: Path) -> Path:
+    """Caminho do índice (o mesmo para o arquivo comprimido ou não)"""
+    log_path = Path(log_path)
+    if log_path.suffix in COMPRESSED_SUFFIXES:
+        log_path = log_path.with_suffix('')
+    return log_path.with_name(log_path.name + '.idx')
+
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha1(data[:FINGERPRINT_BYTES]).hexdigest()
+
+# =====================================================
+# LEITURA DO ARQUIVO
+# =====================================================
+
+class _LogContent:
+    """
+    Conteúdo do log: mmap para arquivos planos, descompressão em fluxo para .gz/.zst
+
+    Os segmentos comprimidos nunca são carregados inteiros: read() e
+    iter_lines() avançam o fluxo descomprimido (reabrindo quando é preciso
+    voltar), com memória limitada a um bloco.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.compressed = self.path.suffix in COMPRESSED_SUFFIXES
+        self._file = None
+        self._mmap = None
+        self._stream = None
+        self._position = 0
+
+        if not self.compressed:
+            self._file = open(self.path, 'rb')
+            size = os.fstat(self._file.fileno()).st_size
+            if size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def size(self) -> Optional[int]:
+        """Tamanho do conteúdo (None para comprimidos: exigiria descomprimir tudo)"""
+        if self.compressed:
+            return None
+        return len(self._mmap) if self._mmap is not None else 0
+
+    def _open_stream(self):
+        self._close_stream()
+        if self.path.suffix == '.gz':
+            self._stream = gzip.open(self.path, 'rb')
+        else:
+            import zstandard
+            self._file = open(self.path, 'rb')
+            self._stream = zstandard.ZstdDecompressor().stream_reader(self._file)
+        self._position = 0
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _seek(self, offset: int):
+        """Posiciona o fluxo descomprimido (só anda para frente; voltar reabre)"""
+        if self._stream is None or offset < self._position:
+            self._open_stream()
+        while self._position < offset:
+            skipped = self._stream.read(min(offset - self._position, READ_CHUNK))
+            if not skipped:
+                break
+            self._position += len(skipped)
+
+    def read(self, start: int, end: int) -> bytes:
+        """Bytes [start, end) do conteúdo (descomprimido)"""
+        if not self.compressed:
+            return bytes(self._mmap[start:end]) if self._mmap is not None else b''
+        self._seek(start)
+        chunks = []
+        remaining = end - start
+        while remaining > 0:
+            chunk = self._stream.read(min(remaining, READ_CHUNK))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            self._position += len(chunk)
+        return b''.join(chunks)
+
+    def iter_lines(self, start: int, complete_only: bool = False) -> Iterator[bytes]:
+        """Linhas (com o \\n) a partir de start até o fim, lidas em pedaços"""
+        position = start
+        pending = b''
+        while True:
+            chunk = self.read(position, position + READ_CHUNK)
+            if not chunk:
+                break
+            position += len(chunk)
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + b'\n'
+        if pending and not complete_only:
+            yield pending
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._close_stream()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# =====================================================
+# CONSTRUÇÃO DO ÍNDICE
+# =====================================================
+
+def _add_value(values: Optional[set], value) -> Optional[set]:
+    if values is None:
+        return None
+    values.add(value)
+    return values if len(values) <= SET_LIMIT else None
+
+def _summarize_block(data: bytes, offset: int) -> Dict[str, Any]:
+    """Resumo de um bloco de linhas completas que começa em offset"""
+    ts_min = ts_max = None
+    users, sessions, modules = set(), set(), set()
+    levels = set()
+    lines = 0
+
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        lines += 1
+        try:
+            entry = _loads(line)
+        except ValueError:
+            continue
+
+        timestamp = entry.get('timestamp')
+        if timestamp:
+            ts_min = timestamp if ts_min is None or timestamp < ts_min else ts_min
+            ts_max = timestamp if ts_max is None or timestamp > ts_max else ts_max
+
+        user = entry.get('user') or {}
+        levels.add(entry.get('level'))
+        users = _add_value(users, str(user.get('user_id')))
+        sessions = _add_value(sessions, str(user.get('session_id')))
+        modules = _add_value(modules, (entry.get('code') or {}).get('module'))
+
+    return {
+        'offset': offset,
+        'length': len(data),
+        'lines': lines,
+        'ts_min': ts_min,
+        'ts_max': ts_max,
+        'levels': sorted(level for level in levels if level),
+        'user_ids': sorted(users) if users is not None else None,
+        'session_ids': sorted(sessions) if sessions is not None else None,
+        'modules': sorted(m for m in modules if m) if modules is not None else None,
+    }
+
+def _load_index(index_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('format') != INDEX_FORMAT or index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+def build_index(log_path, block_lines: int = BLOCK_LINES, rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Cria ou atualiza o índice de um arquivo de log JSON
+
+    Reaproveita os blocos completos de um índice existente e indexa apenas
+    o conteúdo novo; o último bloco (incompleto) é refeito. Segmentos
+    comprimidos não mudam depois da rotação: um índice válido é usado como
+    está, e um índice ausente é criado lendo o segmento em fluxo.
+    """
+    log_path = Path(log_path)
+    index_path = index_path_for(log_path)
+
+    with _LogContent(log_path) as content:
+        size = content.size
+        index = None if rebuild else _load_index(index_path)
+        if (
+            index
+            and (size is None or index['indexed_bytes'] <= size)
+            and index['fingerprint'] == _fingerprint(content.read(0, index['fingerprint_bytes']))
+        ):
+            if size is None or index['indexed_bytes'] == size:
+                return index
+            # Mantém o tamanho de bloco do índice existente
+            block_lines = index['block_lines']
+            blocks = index['blocks']
+            if blocks and blocks[-1]['lines'] < block_lines:
+                blocks.pop()
+        else:
+            blocks = []
+
+        head = content.read(0, FINGERPRINT_BYTES)
+        fingerprint_bytes = len(head)
+        fingerprint = _fingerprint(head)
+        offset = blocks[-1]['offset'] + blocks[-1]['length'] if blocks else 0
+
+        # Só linhas completas: um registro ainda sendo gravado fica para depois
+        block = []
+        for line in content.iter_lines(offset, complete_only=True):
+            block.append(line)
+            if len(block) == block_lines:
+                data = b''.join(block)
+                blocks.append(_summarize_block(data, offset))
+                offset += len(data)
+                block = []
+        if block:
+            data = b''.join(block)
+            blocks.append(_summarize_block(data, offset))
+            offset += len(data)
+
+    index = {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'file': log_path.name,
+        'fingerprint': fingerprint,
+        'fingerprint_bytes': fingerprint_bytes,
+        'indexed_bytes': offset,
+        'block_lines': block_lines,
+        'built_at': datetime.now().isoformat(),
+        'blocks': blocks,
+    }
+
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, index_path)
+
+    return index
+
+# =====================================================
+# CONSULTA
+# =====================================================
+
+def _parse_bound(value, upper: bool = False) -> Optional[str]:
+    """
+    Converte o limite de horário em timestamp ISO comparável ao do JSONFormatter
+
+    O limite superior inclui toda a unidade informada: '2026-10-19T03:15'
+    vale até 03:15:59.999999 e '2026-10-19' até o fim do dia.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='microseconds') if upper else value.isoformat()
+
+    text = value.strip()
+    parsed = datetime.fromisoformat(text)
+    if not upper:
+        return parsed.isoformat()
+
+    clock = re.split(r'[+\-Z]', text[10:].lstrip('T '))[0]
+    if not clock:
+        unit = timedelta(days=1)
+    elif '.' in clock:
+        unit = None
+    else:
+        unit = (timedelta(hours=1), timedelta(minutes=1), timedelta(seconds=1))[min(clock.count(':'), 2)]
+    if unit is not None:
+        parsed += unit - timedelta(microseconds=1)
+    return parsed.isoformat(timespec='microseconds')
+
+def _encoded_needles(text: str) -> List[bytes]:
+    """Formas do texto dentro de uma string JSON (com e sem ensure_ascii)"""
+    needles = {
+        json.dumps(text, ensure_ascii=ascii_only)[1:-1].encode('utf-8')
+        for ascii_only in (False, True)
+    }
+    return sorted(needles)
+
+class LogQuery:
+    """
+    Filtro de busca em logs JSON
+
+    since/until aceitam ISO (com ou sem segundos) ou datetime; until inclui
+    toda a unidade informada.
+
+    Usage:
+        query = LogQuery(user_id=123, min_level='WARNING',
+                         since='2026-10-19T03:00', until='2026-10-19T03:15')
+        for entry in query.search(['logs/agv_2026-10-19.json']):
+            ...
+    """
+
+    def __init__(
+        self,
+        user_id=None,
+        session_id: Optional[str] = None,
+        min_level: Optional[str] = None,
+        module: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        contains: Optional[str] = None
+    ):
+        if min_level is not None and min_level.upper() not in LEVELS:
+            raise ValueError(f"Nível inválido: {min_level}")
+
+        self.user_id = str(user_id) if user_id is not None else None
+        self.session_id = session_id
+        self.min_level = LEVELS[min_level.upper()] if min_level else None
+        self.module = module
+        self.since = _parse_bound(since)
+        self.until = _parse_bound(until, upper=True)
+        self.contains = contains
+
+        self.blocks_total = 0
+        self.blocks_scanned = 0
+
+    def _block_may_match(self, block: Dict[str, Any]) -> bool:
+        if not block['lines']:
+            return False
+        if self.since and block['ts_max'] and block['ts_max'] < self.since:
+            return False
+        if self.until and block['ts_min'] and block['ts_min'] > self.until:
+            return False
+        if self.min_level and not any(LEVELS.get(level, 0) >= self.min_level for level in block['levels']):
+            return False
+        if self.user_id is not None and block['user_ids'] is not None and self.user_id not in block['user_ids']:
+            return False
+        if self.session_id is not None and block['session_ids'] is not None and self.session_id not in block['session_ids']:
+            return False
+        if self.module is not None and block['modules'] is not None and self.module not in block['modules']:
+            return False
+        return True
+
+    def matches(self, entry: Dict[str, Any]) -> bool:
+        """Verifica um registro já decodificado"""
+        timestamp = entry.get('timestamp', '')
+        if self.since and timestamp < self.since:
+            return False
+        if self.until and timestamp > self.until:
+            return False
+        if self.min_level and LEVELS.get(entry.get('level'), 0) < self.min_level:
+            return False
+
+        user = entry.get('user') or {}
+        if self.user_id is not None and str(user.get('user_id')) != self.user_id:
+            return False
+        if self.session_id is not None and str(user.get('session_id')) != self.session_id:
+            return False
+        if self.module is not None and (entry.get('code') or {}).get('module') != self.module:
+            return False
+        if self.contains is not None and self.contains not in entry.get('message', ''):
+            return False
+        return True
+
+    def _lines(self, content: _LogContent, index: Optional[Dict[str, Any]]) -> Iterator[bytes]:
+        """Linhas dos blocos que podem ter resultado, mais o trecho não indexado"""
+        if index is None:
+            self.blocks_scanned += 1
+            yield from content.iter_lines(0)
+            return
+
+        blocks = index['blocks']
+        self.blocks_total += len(blocks)
+        for block in blocks:
+            if self._block_may_match(block):
+                self.blocks_scanned += 1
+                yield from content.read(block['offset'], block['offset'] + block['length']).splitlines()
+
+        # Linhas ainda não indexadas (registro em gravação) são lidas direto;
+        # segmentos comprimidos foram indexados por inteiro antes da compressão
+        tail = index['indexed_bytes']
+        if content.size is not None and tail < content.size:
+            self.blocks_scanned += 1
+            yield from content.iter_lines(tail)
+
+    def search_file(self, log_path, use_index: bool = True) -> Iterator[Dict[str, Any]]:
+        """Busca em um arquivo, atualizando o índice se necessário"""
+        log_path = Path(log_path)
+        index = build_index(log_path) if use_index else None
+        # O texto aparece escapado na linha JSON (aspas, barras, não ASCII)
+        needles = _encoded_needles(self.contains) if self.contains else None
+
+        with _LogContent(log_path) as content:
+            for line in self._lines(content, index):
+                if not line.strip() or (needles is not None and not any(n in line for n in needles)):
+                    continue
+                try:
+                    entry = _loads(line)
+                except ValueError:
+                    continue
+                if self.matches(entry):
+                    yield entry
+
+    def search(self, paths: List, limit: Optional[int] = None, use_index: bool = True) -> Iterator[Dict[str, Any]]:
+        """Busca em vários arquivos, na ordem informada"""
+        found = 0
+        for path in paths:
+            for entry in self.search_file(path, use_index=use_index):
+                yield entry
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+def find_log_files(log_dir, pattern: str = '*.json') -> List[Path]:
+    """Arquivos JSON de um diretório (inclusive segmentos comprimidos), em ordem de nome"""
+    log_dir = Path(log_dir)
+    files = set(log_dir.glob(pattern))
+    for suffix in COMPRESSED_SUFFIXES:
+        files.update(log_dir.glob(pattern + suffix))
+    return sorted(files)
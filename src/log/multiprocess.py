@@ -0,0 +1,281 @@
+"""
+Logging com múltiplos processos
+
+Os workers não abrem os arquivos de log: enviam os registros em lote para
+um único processo coletor por socket local (Unix ou TCP em loopback). Cada
+lote é um frame com prefixo de tamanho (4 bytes big-endian) seguido de uma
+lista JSON de dicionários de LogRecord, com mensagem e exceção já
+formatadas. O coletor só aceita endereços locais e nunca desserializa
+objetos Python (sem pickle). O coletor é o único dono dos arquivos, então
+as linhas não se intercalam.
+
+Usage:
+    # Processo principal
+    collector = start_collector_process('/tmp/agv-log.sock', log_dir='logs', app_name='agv',
+                                        file_output=True, json_output=True)
+
+    # Cada worker
+    AppLogger.setup_logging(app_name='agv', collector_address='/tmp/agv-log.sock')
+"""
+import ipaddress
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .async_logging import write_records
+
+Address = Union[str, Tuple[str, int]]
+
+FRAME_HEADER = struct.Struct('>I')
+
+# Tamanho máximo aceito para um frame (proteção contra lixo no socket)
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+def _socket_family(address: Address) -> int:
+    return socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+
+def _check_local(address: Address):
+    """Recusa endereços acessíveis de fora da máquina"""
+    if isinstance(address, str):
+        return
+    host = address[0]
+    if host == 'localhost':
+        return
+    try:
+        if ipaddress.ip_address(host).is_loopback:
+            return
+    except ValueError:
+        pass
+    raise ValueError(f"Coletor de logs só aceita socket Unix ou TCP em loopback (recebido {host!r})")
+
+def encode_batch(records: List[logging.LogRecord]) -> bytes:
+    """Serializa um lote de registros em um frame com prefixo de tamanho"""
+    payload = json.dumps(
+        [_record_to_dict(record) for record in records],
+        ensure_ascii=False, separators=(',', ':'), default=str
+    ).encode('utf-8')
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def decode_batch(payload: bytes) -> List[logging.LogRecord]:
+    """Reconstrói os registros de um frame (ValueError se o conteúdo não for um lote válido)"""
+    items = json.loads(payload)
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError("Frame de log inválido")
+
+    records = []
+    for data in items:
+        # Mensagem já formatada no worker: nada é interpolado de novo aqui
+        data['args'] = None
+        data['exc_info'] = None
+        records.append(logging.makeLogRecord(data))
+    return records
+
+def _record_to_dict(record: logging.LogRecord) -> Dict[str, Any]:
+    """Prepara o registro para outro processo (mensagem e exceção já formatadas)"""
+    data = dict(record.__dict__)
+    data['msg'] = record.getMessage()
+    data['args'] = None
+    data['message'] = data['msg']
+    if record.exc_info:
+        data['exc_text'] = record.exc_text or logging.Formatter().formatException(record.exc_info)
+    data['exc_info'] = None
+    return data
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+# =====================================================
+# LADO DO WORKER
+# =====================================================
+
+class ProcessLogShipper(logging.Handler):
+    """
+    Handler do worker que envia lotes ao coletor
+
+    Feito para rodar atrás do LogListener (modo assíncrono): cada lote do
+    listener vira um único frame e um único sendall.
+    """
+
+    def __init__(self, address: Address, connect_timeout: float = 5.0):
+        super().__init__()
+        self.address = address
+        self.connect_timeout = connect_timeout
+        self.sock: Optional[socket.socket] = None
+        self.sent = 0
+        self.dropped = 0
+
+    def _connect(self):
+        sock = socket.socket(_socket_family(self.address), socket.SOCK_STREAM)
+        sock.settimeout(self.connect_timeout)
+        sock.connect(self.address)
+        sock.settimeout(None)
+        self.sock = sock
+
+    def emit(self, record):
+        self.write_batch([record])
+
+    def write_batch(self, records: List[logging.LogRecord]):
+        """Envia o lote; reconecta uma vez se o coletor reiniciou"""
+        frame = encode_batch(records)
+
+        self.acquire()
+        try:
+            for attempt in range(2):
+                try:
+                    if self.sock is None:
+                        self._connect()
+                    self.sock.sendall(frame)
+                    self.sent += len(records)
+                    return
+                except OSError:
+                    self._close_socket()
+                    if attempt:
+                        self.dropped += len(records)
+                        raise
+        except OSError:
+            self.handleError(records[0])
+        finally:
+            self.release()
+
+    def _close_socket(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def close(self):
+        self.acquire()
+        try:
+            self._close_socket()
+        finally:
+            self.release()
+        super().close()
+
+# =====================================================
+# LADO DO COLETOR
+# =====================================================
+
+class _FrameHandler(socketserver.BaseRequestHandler):
+    """Uma thread por worker conectado: lê frames e grava os lotes"""
+
+    def handle(self):
+        collector: LogCollector = self.server.collector
+        while True:
+            header = _recv_exact(self.request, FRAME_HEADER.size)
+            if header is None:
+                return
+            (size,) = FRAME_HEADER.unpack(header)
+            if size > MAX_FRAME_SIZE:
+                return
+            payload = _recv_exact(self.request, size)
+            if payload is None:
+                return
+            try:
+                records = decode_batch(payload)
+            except ValueError:
+                return
+            collector.write(records)
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class LogCollector:
+    """Recebe lotes dos workers e grava nos handlers (arquivos) do coletor"""
+
+    def __init__(self, address: Address, handlers: List[logging.Handler]):
+        _check_local(address)
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)
+
+        server_class = _UnixServer if isinstance(address, str) else _TCPServer
+        self.server = server_class(address, _FrameHandler)
+        self.server.collector = self
+        self.address = self.server.server_address
+        if isinstance(self.address, str):
+            # Só o dono do processo conecta
+            os.chmod(self.address, 0o600)
+        self.handlers = handlers
+        self.received = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, records: List[logging.LogRecord]):
+        # Uma thread por worker conectado
+        with self._lock:
+            self.received += len(records)
+        write_records(self.handlers, records)
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self):
+        """Atende os workers em uma thread (coletor no próprio processo)"""
+        self._thread = threading.Thread(target=self.serve_forever, name='LogCollector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for handler in self.handlers:
+            handler.flush()
+            handler.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def _run_collector(address: Address, ready, options: Dict[str, Any]):
+    from .log import AppLogger
+
+    # terminate() encerra com a mesma limpeza de um Ctrl+C
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    collector = LogCollector(address, AppLogger.build_handlers(**options))
+    ready.set()
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+
+def start_collector_process(address: Address, timeout: float = 10.0, **options) -> multiprocessing.Process:
+    """
+    Inicia o processo coletor e aguarda o socket ficar pronto
+
+    options são os mesmos de AppLogger.build_handlers (log_dir, app_name,
+    file_output, json_output, rotate, ...).
+    """
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=_run_collector, args=(address, ready, options), name='LogCollector', daemon=True
+    )
+    process.start()
+
+    if not ready.wait(timeout):
+        process.terminate()
+        raise TimeoutError("Coletor de logs não iniciou a tempo")
+    return process
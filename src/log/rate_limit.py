@@ -0,0 +1,259 @@
+"""
+Limitação de taxa por ponto de chamada
+
+Cada (logger, linha, nível) tem um token bucket: rajadas de até burst
+registros passam, depois a taxa sustentada é rate registros/segundo. Com o
+bucket vazio o registro é descartado, ou mantido 1 a cada sample_rate se a
+amostragem estiver ativa. Periodicamente é gravado um resumo
+"N mensagens semelhantes suprimidas" por ponto de chamada.
+
+Os parâmetros podem vir do ConfigManager (tela LOGGING) e são atualizados
+em tempo real:
+    rate_limit_enabled (BOOLEAN), rate_limit_per_second (FLOAT),
+    rate_limit_burst (INTEGER), rate_limit_sample_rate (INTEGER),
+    rate_limit_summary_interval (FLOAT)
+"""
+import logging
+import threading
+import time
+
+from typing import Any, Dict, Optional, Tuple
+
+# Nome da configuração (tela LOGGING) -> parâmetro do filtro
+CONFIG_TELA = 'LOGGING'
+CONFIG_PARAMETERS = {
+    'rate_limit_enabled': 'enabled',
+    'rate_limit_per_second': 'rate',
+    'rate_limit_burst': 'burst',
+    'rate_limit_sample_rate': 'sample_rate',
+    'rate_limit_summary_interval': 'summary_interval',
+}
+
+class _Bucket:
+    __slots__ = ('tokens', 'updated', 'suppressed', 'sampled', 'logger_name', 'lineno', 'levelno', 'pathname')
+
+    def __init__(self, tokens: float, now: float, record: logging.LogRecord):
+        self.tokens = tokens
+        self.updated = now
+        self.suppressed = 0
+        self.sampled = 0
+        self.logger_name = record.name
+        self.lineno = record.lineno
+        self.levelno = record.levelno
+        self.pathname = record.pathname
+
+class CallsiteRateLimitFilter(logging.Filter):
+    """
+    Filtro de token bucket por (logger, linha, nível)
+
+    Pode ser instalado em vários handlers: a decisão fica gravada no próprio
+    registro, então cada registro consome um único token.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 50,
+        sample_rate: int = 0,
+        summary_interval: float = 10.0,
+        exempt_level: int = logging.CRITICAL,
+        enabled: bool = True
+    ):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, int, int], _Bucket] = {}
+        self._summary_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._subscription = None
+        self._bind_thread: Optional[threading.Thread] = None
+        self.exempt_level = exempt_level
+        # Valores usados quando a configuração correspondente é removida
+        self._defaults = {
+            'rate': rate, 'burst': burst, 'sample_rate': sample_rate,
+            'summary_interval': summary_interval, 'enabled': enabled
+        }
+        self.configure(**self._defaults)
+
+    def configure(self, **parameters):
+        """Altera parâmetros em tempo real (rate, burst, sample_rate, summary_interval, enabled)"""
+        with self._lock:
+            for name, value in parameters.items():
+                if name not in CONFIG_PARAMETERS.values():
+                    raise ValueError(f"Parâmetro desconhecido: {name}")
+                if value is not None:
+                    setattr(self, name, value)
+            # Buckets existentes não podem ficar acima do novo limite
+            for bucket in self._buckets.values():
+                bucket.tokens = min(bucket.tokens, self.burst)
+
+    # ----- Filtro -----
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decision = getattr(record, 'rate_limit_passed', None)
+        if decision is not None:
+            return decision
+
+        decision = self._decide(record)
+        record.rate_limit_passed = decision
+        return decision
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        if not self.enabled or record.levelno >= self.exempt_level or getattr(record, 'rate_limit_summary', False):
+            return True
+
+        key = (record.name, record.lineno, record.levelno)
+        now = time.monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(self.burst, now, record)
+            else:
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return True
+
+            if self.sample_rate:
+                bucket.sampled += 1
+                if bucket.sampled % self.sample_rate == 0:
+                    return True
+
+            bucket.suppressed += 1
+
+        self._ensure_summary_thread()
+        return False
+
+    # ----- Resumos -----
+
+    def _ensure_summary_thread(self):
+        if self._summary_thread is not None:
+            return
+        with self._lock:
+            if self._summary_thread is None:
+                self._stop.clear()
+                self._summary_thread = threading.Thread(target=self._run_summaries, name='RateLimitSummary', daemon=True)
+                self._summary_thread.start()
+
+    def _run_summaries(self):
+        while not self._stop.wait(self.summary_interval):
+            self.emit_summaries()
+
+    def emit_summaries(self) -> int:
+        """Grava um resumo por ponto de chamada com mensagens suprimidas"""
+        with self._lock:
+            pending = [
+                (bucket.logger_name, bucket.levelno, bucket.pathname, bucket.lineno, bucket.suppressed)
+                for bucket in self._buckets.values() if bucket.suppressed
+            ]
+            for bucket in self._buckets.values():
+                bucket.suppressed = 0
+
+        for logger_name, levelno, pathname, lineno, suppressed in pending:
+            logging.getLogger(logger_name).log(
+                levelno,
+                "⚠️ %d mensagens semelhantes suprimidas (%s:%d)",
+                suppressed, pathname, lineno,
+                extra={'rate_limit_summary': True, 'metrics': {'suppressed': suppressed, 'line': lineno}}
+            )
+        return len(pending)
+
+    def stats(self) -> Dict[str, int]:
+        """Pontos de chamada monitorados e mensagens suprimidas ainda não resumidas"""
+        with self._lock:
+            return {
+                'callsites': len(self._buckets),
+                'suppressed': sum(bucket.suppressed for bucket in self._buckets.values()),
+            }
+
+    def close(self):
+        """Encerra a thread de resumo (gravando o último) e a assinatura de configuração"""
+        if self._bind_thread is not None:
+            self._stop.set()
+            self._bind_thread.join()
+            self._bind_thread = None
+
+        if self._subscription is not None:
+            manager, subscription_id = self._subscription
+            manager.unsubscribe(subscription_id)
+            self._subscription = None
+
+        if self._summary_thread is not None:
+            self._stop.set()
+            self._summary_thread.join()
+            self._summary_thread = None
+            self.emit_summaries()
+
+    # ----- Configuração via ConfigManager -----
+
+    def bind_config(self, manager=None, instance_id: Optional[str] = None, retry_interval: float = 30.0) -> bool:
+        """
+        Carrega os parâmetros da tela LOGGING e acompanha as alterações
+
+        Se o banco estiver indisponível, mantém os parâmetros atuais e tenta
+        de novo em segundo plano a cada retry_interval segundos.
+
+        Returns:
+            True se a configuração foi carregada agora
+        """
+        try:
+            self._bind(manager, instance_id)
+            return True
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                "⚠️ Configuração de rate limit indisponível, usando os valores padrão: %s", e
+            )
+
+        def retry():
+            while not self._stop.wait(retry_interval):
+                try:
+                    self._bind(manager, instance_id)
+                    return
+                except Exception:
+                    continue
+
+        self._bind_thread = threading.Thread(target=retry, name='RateLimitConfig', daemon=True)
+        self._bind_thread.start()
+        return False
+
+    def _bind(self, manager, instance_id: Optional[str]):
+        if manager is None:
+            from src.repositories.config_repository import ConfigManager
+            manager = ConfigManager()
+
+        # Assina antes de carregar: alterações feitas durante a leitura ficam
+        # guardadas e são reaplicadas sobre ela (reaplicar é idempotente)
+        lock = threading.Lock()
+        loaded = {'view': None, 'pending': []}
+
+        def on_change(change: Dict[str, Any]):
+            with lock:
+                view = loaded['view']
+                if view is None:
+                    loaded['pending'].append(change)
+                    return
+                view.apply_change(change)
+            self._apply_view(view)
+
+        subscription_id = manager.subscribe(f'{CONFIG_TELA}.rate_limit_*', on_change)
+        try:
+            view = manager.get_view(CONFIG_TELA, instance_id=instance_id, follow=False)
+        except Exception:
+            manager.unsubscribe(subscription_id)
+            raise
+
+        with lock:
+            for change in loaded['pending']:
+                view.apply_change(change)
+            loaded['view'] = view
+            loaded['pending'] = None
+        self._subscription = (manager, subscription_id)
+        self._apply_view(view)
+
+    def _apply_view(self, view):
+        self.configure(**{
+            parameter: view.get(nome, self._defaults[parameter])
+            for nome, parameter in CONFIG_PARAMETERS.items()
+        })
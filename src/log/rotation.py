@@ -0,0 +1,256 @@
+"""
+Rotação de arquivos de log por data e tamanho
+
+O handler nunca renomeia nem comprime no caminho da requisição: ao virar o
+dia (ou atingir max_bytes) ele apenas fecha o arquivo atual e abre um novo
+com outro nome ({prefixo}_{data}[.N]{sufixo}). A compressão (gzip/zstd) dos
+segmentos fechados e a remoção dos antigos rodam na thread LogMaintenance.
+"""
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # Opcional: compressão zstd
+    zstandard = None
+
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+# =====================================================
+# MANUTENÇÃO EM SEGUNDO PLANO
+# =====================================================
+
+class LogMaintenance:
+    """Thread única que comprime segmentos fechados e aplica a retenção"""
+
+    _jobs: 'queue.Queue' = queue.Queue()
+    _thread: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, job, *args):
+        """Agenda uma tarefa (função e argumentos)"""
+        cls._ensure_started()
+        cls._jobs.put((job, args))
+
+    @classmethod
+    def wait(cls):
+        """Aguarda todas as tarefas agendadas (usado em testes e no desligamento)"""
+        if cls._thread is not None:
+            cls._jobs.join()
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls._thread is not None:
+            return
+        with cls._lock:
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._run, name='LogMaintenance', daemon=True)
+                cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            job, args = cls._jobs.get()
+            try:
+                job(*args)
+            except Exception as e:
+                # Sem logging aqui: evitaria recursão nos próprios handlers
+                print(f"[LogMaintenance] {getattr(job, '__name__', job)} falhou: {e}", flush=True)
+            finally:
+                cls._jobs.task_done()
+
+def compress_file(path: Path, compression: str):
+    """Comprime o arquivo (tmp + os.replace) e remove o original"""
+    if compression == 'zstd' and zstandard is None:
+        compression = 'gzip'
+
+    target = path.with_name(path.name + COMPRESSION_EXTENSIONS[compression])
+    tmp = target.with_name(target.name + '.tmp')
+
+    with open(path, 'rb') as source:
+        if compression == 'zstd':
+            with open(tmp, 'wb') as raw:
+                zstandard.ZstdCompressor().copy_stream(source, raw)
+        else:
+            with gzip.open(tmp, 'wb') as compressed:
+                shutil.copyfileobj(source, compressed, 1024 * 1024)
+
+    os.replace(tmp, target)
+    path.unlink()
+
+def prune_files(log_dir: Path, prefix: str, suffix: str, retention_days: int, keep: Optional[Path] = None):
+    """Remove segmentos (comprimidos ou não) mais antigos que a retenção"""
+    cutoff = time.time() - retention_days * 86400
+    # O dígito evita que o prefixo 'app' alcance os arquivos 'app_errors'
+    for path in log_dir.glob(f'{prefix}_[0-9]*{suffix}*'):
+        if path == keep or path.name.endswith('.tmp'):
+            continue
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+
+# =====================================================
+# HANDLER
+# =====================================================
+
+class RotatingLogHandler(logging.FileHandler):
+    """
+    FileHandler com rotação diária e por tamanho
+
+    Arquivos: {prefix}_{AAAA-MM-DD}{suffix}, e {prefix}_{AAAA-MM-DD}.N{suffix}
+    quando o mesmo dia ultrapassa max_bytes. Com binary=True o formatter deve
+    oferecer format_bytes (JSONFormatter(fast=True)).
+    """
+
+    def __init__(
+        self,
+        log_dir,
+        prefix: str,
+        suffix: str = '.log',
+        max_bytes: int = 0,
+        compression: Optional[str] = 'gzip',
+        retention_days: Optional[int] = None,
+        binary: bool = False,
+        encoding: str = 'utf-8'
+    ):
+        if compression is not None and compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Compressão inválida: {compression}")
+
+        self.log_dir = Path(log_dir)
+        self.prefix = prefix
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.retention_days = retention_days
+        self.binary = binary
+
+        self._date, self._index = self._resume_segment(datetime.now())
+        self._rollover_at = self._next_midnight(datetime.now())
+
+        super().__init__(
+            self._segment_path(self._date, self._index),
+            mode='ab' if binary else 'a',
+            encoding=None if binary else encoding
+        )
+        self._bytes_written = self._current_size()
+
+        # Segmentos deixados por uma execução anterior
+        LogMaintenance.submit(self._finish_stale_segments)
+
+    # ----- Nomes dos segmentos -----
+
+    def _segment_path(self, date: str, index: int) -> Path:
+        number = f'.{index}' if index else ''
+        return self.log_dir / f'{self.prefix}_{date}{number}{self.suffix}'
+
+    def _resume_segment(self, now: datetime):
+        """Continua no último segmento do dia (após um reinício)"""
+        date = now.strftime('%Y-%m-%d')
+        head = f'{self.prefix}_{date}.'
+        index = 0
+        for path in self.log_dir.glob(f'{head}*{self.suffix}*'):
+            number = path.name[len(head):].split('.', 1)[0]
+            if number.isdigit():
+                index = max(index, int(number))
+        return date, index
+
+    @staticmethod
+    def _next_midnight(now: datetime) -> float:
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return tomorrow.timestamp()
+
+    def _current_size(self) -> int:
+        try:
+            return os.path.getsize(self.baseFilename)
+        except OSError:
+            return 0
+
+    # ----- Rotação -----
+
+    def _should_rollover(self, created: float, size: int) -> bool:
+        if created >= self._rollover_at:
+            return True
+        return bool(self.max_bytes) and self._bytes_written > 0 and self._bytes_written + size > self.max_bytes
+
+    def _rollover(self, created: float):
+        """Troca de segmento: fecha o atual e abre o próximo (sem renomear)"""
+        closed = Path(self.baseFilename)
+        now = datetime.fromtimestamp(created)
+        date = now.strftime('%Y-%m-%d')
+
+        if created >= self._rollover_at:
+            self._date, self._index = date, 0
+            self._rollover_at = self._next_midnight(now)
+        else:
+            self._index += 1
+
+        if self.stream is not None:
+            self.stream.close()
+        self.baseFilename = os.path.abspath(self._segment_path(self._date, self._index))
+        self.stream = self._open()
+        self._bytes_written = self._current_size()
+
+        LogMaintenance.submit(self._finish_segment, closed)
+
+    def _close_segment(self, path: Path):
+        """Indexa (logs JSON) e comprime um segmento fechado"""
+        if self.suffix == '.json':
+            from .log_index import build_index
+            build_index(path)
+        if self.compression:
+            compress_file(path, self.compression)
+
+    def _finish_segment(self, path: Path):
+        if path.exists() and os.path.abspath(path) != self.baseFilename:
+            self._close_segment(path)
+        self._prune()
+
+    def _finish_stale_segments(self):
+        for path in self.log_dir.glob(f'{self.prefix}_[0-9]*{self.suffix}'):
+            if os.path.abspath(path) != self.baseFilename:
+                self._close_segment(path)
+        self._prune()
+
+    def _prune(self):
+        if self.retention_days is not None:
+            prune_files(self.log_dir, self.prefix, self.suffix, self.retention_days, Path(self.baseFilename))
+
+    # ----- Escrita -----
+
+    def _encode(self, record):
+        if self.binary:
+            return self.formatter.format_bytes(record) + b'\n'
+        return self.format(record) + self.terminator
+
+    def emit(self, record):
+        self.write_batch([record])
+
+    def write_batch(self, records: List[logging.LogRecord]):
+        """Grava vários registros com uma única escrita (usado pelo LogListener)"""
+        try:
+            data = (b'' if self.binary else '').join(self._encode(record) for record in records)
+            # Em modo texto o tamanho é aproximado (caracteres)
+            size = len(data)
+
+            self.acquire()
+            try:
+                if self._should_rollover(records[-1].created, size):
+                    self._rollover(records[-1].created)
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(data)
+                self.stream.flush()
+                self._bytes_written += size
+            finally:
+                self.release()
+        except Exception:
+            self.handleError(records[0])
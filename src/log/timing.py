@@ -0,0 +1,237 @@
+"""
+Histogramas de latência para log_execution_time
+
+Cada função decorada acumula suas durações em um histograma log-linear
+(16 sub-faixas por potência de 2, erro relativo < 6.25%). Os histogramas
+são combináveis (merge) e o registro custa uma conta de bits e um lock.
+report() é cumulativo; o relatório periódico (dump) mostra só o intervalo
+desde o dump anterior.
+"""
+import logging
+import math
+import threading
+
+from typing import Dict, List, Optional
+
+# Sub-faixas por potência de 2 (2 ** SUB_BITS)
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+# Cobre durações até 2 ** 63 ns
+BUCKET_COUNT = (64 - SUB_BITS + 1) * SUB_COUNT
+
+PERCENTILES = (('p50', 0.50), ('p90', 0.90), ('p99', 0.99))
+
+def bucket_index(value: int) -> int:
+    """Índice da faixa de um valor (ns)"""
+    if value < SUB_COUNT:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BITS - 1
+    return (shift + 1) * SUB_COUNT + (value >> shift) - SUB_COUNT
+
+def bucket_upper_bound(index: int) -> int:
+    """Maior valor (ns) que cai na faixa"""
+    if index < SUB_COUNT:
+        return index
+    shift = index // SUB_COUNT - 1
+    mantissa = index % SUB_COUNT + SUB_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+def bucket_midpoint(index: int) -> int:
+    """Valor central (ns) da faixa, usado como estimativa dos percentis"""
+    lower = bucket_upper_bound(index - 1) + 1 if index else 0
+    return (lower + bucket_upper_bound(index)) // 2
+
+# =====================================================
+# HISTOGRAMA
+# =====================================================
+
+class LatencyHistogram:
+    """Histograma log-linear de durações em nanossegundos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        # Marca do último interval(): contagens naquele momento e máximo desde então
+        self._mark: Optional[List[int]] = None
+        self._mark_count = 0
+        self._mark_total = 0
+        self._interval_max = 0
+
+    def record(self, value_ns: int):
+        """Registra uma duração"""
+        index = bucket_index(value_ns)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value_ns
+            if value_ns > self.max:
+                self.max = value_ns
+            if value_ns > self._interval_max:
+                self._interval_max = value_ns
+
+    def clear(self):
+        """Zera as contagens no próprio objeto (quem guarda a referência continua registrando nele)"""
+        with self._lock:
+            self._counts = [0] * BUCKET_COUNT
+            self.count = 0
+            self.total = 0
+            self.max = 0
+            self._mark = None
+            self._mark_count = 0
+            self._mark_total = 0
+            self._interval_max = 0
+
+    def interval(self) -> 'LatencyHistogram':
+        """
+        Histograma só das durações registradas desde a chamada anterior
+
+        Não altera as contagens cumulativas; a marca é única por histograma
+        (um único consumidor, o relatório periódico).
+        """
+        delta = LatencyHistogram()
+        with self._lock:
+            if self._mark is None:
+                delta._counts = list(self._counts)
+            else:
+                delta._counts = [a - b for a, b in zip(self._counts, self._mark)]
+            delta.count = self.count - self._mark_count
+            delta.total = self.total - self._mark_total
+            delta.max = self._interval_max
+
+            self._mark = list(self._counts)
+            self._mark_count = self.count
+            self._mark_total = self.total
+            self._interval_max = 0
+        return delta
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Soma as contagens de outro histograma a este"""
+        with other._lock:
+            counts = list(other._counts)
+            count, total, maximum = other.count, other.total, other.max
+
+        with self._lock:
+            self._counts = [a + b for a, b in zip(self._counts, counts)]
+            self.count += count
+            self.total += total
+            self.max = max(self.max, maximum)
+            self._interval_max = max(self._interval_max, maximum)
+
+    def percentile(self, quantile: float) -> int:
+        """Valor estimado (ns) do percentil, limitado ao máximo observado"""
+        with self._lock:
+            return self._percentiles((quantile,))[0]
+
+    def _percentiles(self, quantiles) -> List[int]:
+        if not self.count:
+            return [0] * len(quantiles)
+
+        targets = [max(1, math.ceil(round(q * self.count, 6))) for q in quantiles]
+        results = []
+        seen = 0
+        position = 0
+
+        for index, bucket in enumerate(self._counts):
+            if not bucket:
+                continue
+            seen += bucket
+            while position < len(targets) and seen >= targets[position]:
+                results.append(min(bucket_midpoint(index), self.max))
+                position += 1
+            if position == len(targets):
+                break
+
+        return results
+
+    def summary(self) -> Dict[str, float]:
+        """count, mean, p50, p90, p99 e max (em ms)"""
+        with self._lock:
+            values = self._percentiles([q for _, q in PERCENTILES])
+            data = {'count': self.count, 'mean_ms': (self.total / self.count / 1e6) if self.count else 0.0}
+            for (name, _), value in zip(PERCENTILES, values):
+                data[f'{name}_ms'] = value / 1e6
+            data['max_ms'] = self.max / 1e6
+        return data
+
+# =====================================================
+# REGISTRO GLOBAL DE TEMPOS
+# =====================================================
+
+class TimingRegistry:
+    """Histogramas por função e relatório periódico no log"""
+
+    _histograms: Dict[str, LatencyHistogram] = {}
+    _lock = threading.Lock()
+    _reporter: Optional[threading.Thread] = None
+    _stop = threading.Event()
+
+    @classmethod
+    def histogram(cls, name: str) -> LatencyHistogram:
+        """Retorna (criando se preciso) o histograma de uma função"""
+        histogram = cls._histograms.get(name)
+        if histogram is None:
+            with cls._lock:
+                histogram = cls._histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    @classmethod
+    def report(cls) -> Dict[str, Dict[str, float]]:
+        """Resumo de todas as funções"""
+        with cls._lock:
+            histograms = sorted(cls._histograms.items())
+        return {name: histogram.summary() for name, histogram in histograms}
+
+    @classmethod
+    def reset(cls):
+        """Zera todos os histogramas (os decoradores já criados continuam ligados a eles)"""
+        with cls._lock:
+            histograms = list(cls._histograms.values())
+        for histogram in histograms:
+            histogram.clear()
+
+    @classmethod
+    def dump(cls, logger: Optional[logging.Logger] = None):
+        """Grava uma linha de resumo por função com as durações desde o dump anterior (campo 'metrics' no JSON)"""
+        logger = logger or logging.getLogger('timing')
+        with cls._lock:
+            histograms = sorted(cls._histograms.items())
+        for name, histogram in histograms:
+            data = histogram.interval().summary()
+            if not data['count']:
+                continue
+            logger.info(
+                "⏱️ %s: n=%d p50=%.3fms p90=%.3fms p99=%.3fms max=%.3fms",
+                name, data['count'], data['p50_ms'], data['p90_ms'], data['p99_ms'], data['max_ms'],
+                extra={'metrics': dict(data, function=name)}
+            )
+
+    @classmethod
+    def start_reporting(cls, interval: float = 60.0, logger: Optional[logging.Logger] = None):
+        """Inicia a thread que chama dump() a cada interval segundos"""
+        if cls._reporter is not None:
+            return
+
+        cls._stop.clear()
+
+        def run():
+            while not cls._stop.wait(interval):
+                cls.dump(logger)
+
+        cls._reporter = threading.Thread(target=run, name='TimingReporter', daemon=True)
+        cls._reporter.start()
+
+    @classmethod
+    def stop_reporting(cls, final_dump: bool = True, logger: Optional[logging.Logger] = None):
+        """Encerra a thread de relatório"""
+        if cls._reporter is None:
+            return
+
+        cls._stop.set()
+        cls._reporter.join()
+        cls._reporter = None
+
+        if final_dump:
+            cls.dump(logger)
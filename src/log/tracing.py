@@ -0,0 +1,295 @@
+"""
+Rastreamento leve de spans
+
+Spans aninhados propagados por contextvars, com ids, pai, tempos em
+nanossegundos e atributos. Os spans finalizados ficam num buffer limitado
+e podem ser exportados no formato Chrome trace-event (chrome://tracing,
+Perfetto) para inspecionar, por exemplo, um AuthService.login lento.
+
+Usage:
+    with Tracer.start_span('importacao', arquivo='dados.csv'):
+        ...
+
+    instrument_database()
+    instrument_services()
+    export_chrome_trace('logs/trace.json')
+"""
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Span ativo no contexto atual (thread ou task)
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+# Tamanho máximo de SQL guardado como atributo
+SQL_ATTRIBUTE_LIMIT = 500
+
+# =====================================================
+# SPAN
+# =====================================================
+
+class Span:
+    """Intervalo de execução com nome, ids e atributos"""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns',
+                 'attributes', 'status', 'thread_id', 'thread_name')
+
+    def __init__(self, name: str, parent: Optional['Span'] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes or {}
+        self.status = 'OK'
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+
+    @property
+    def duration_ns(self) -> int:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return end - self.start_ns
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        self.status = 'ERROR'
+        self.attributes['error.type'] = type(exc).__name__
+        self.attributes['error.message'] = str(exc)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ns': self.duration_ns,
+            'status': self.status,
+            'thread_id': self.thread_id,
+            'thread_name': self.thread_name,
+            'attributes': dict(self.attributes),
+        }
+
+    def __repr__(self):
+        return f"Span({self.name!r}, span_id={self.span_id}, parent_id={self.parent_id})"
+
+# =====================================================
+# TRACER
+# =====================================================
+
+class Tracer:
+    """Cria spans e guarda os finalizados em um buffer limitado"""
+
+    max_spans = 10000
+    _finished: deque = deque(maxlen=max_spans)
+
+    @classmethod
+    def current_span(cls) -> Optional[Span]:
+        """Span ativo no contexto atual"""
+        return _current_span.get()
+
+    @classmethod
+    def begin(cls, name: str, **attributes) -> tuple:
+        """Abre um span filho do span atual; retorna (span, token) para end()"""
+        span = Span(name, _current_span.get(), attributes)
+        return span, _current_span.set(span)
+
+    @classmethod
+    def end(cls, span: Span, token, exc: Optional[BaseException] = None):
+        """Finaliza o span e restaura o span pai no contexto"""
+        span.end_ns = time.perf_counter_ns()
+        if exc is not None:
+            span.record_exception(exc)
+        _current_span.reset(token)
+        cls._finished.append(span)
+
+    @classmethod
+    @contextmanager
+    def start_span(cls, name: str, **attributes) -> Iterator[Span]:
+        """Context manager de span"""
+        span, token = cls.begin(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            cls.end(span, token, e)
+            raise
+        cls.end(span, token)
+
+    @classmethod
+    def get_finished_spans(cls, trace_id: Optional[str] = None) -> List[Span]:
+        """Spans finalizados (opcionalmente de um único trace)"""
+        spans = list(cls._finished)
+        if trace_id is not None:
+            spans = [span for span in spans if span.trace_id == trace_id]
+        return spans
+
+    @classmethod
+    def clear(cls):
+        """Descarta os spans finalizados"""
+        cls._finished.clear()
+
+    @classmethod
+    def set_max_spans(cls, max_spans: int):
+        """Redimensiona o buffer de spans finalizados"""
+        cls.max_spans = max_spans
+        cls._finished = deque(cls._finished, maxlen=max_spans)
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator que executa a função dentro de um span"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            span, token = Tracer.begin(span_name, **attributes)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                Tracer.end(span, token, e)
+                raise
+            Tracer.end(span, token)
+            return result
+
+        wrapper.__traced__ = func
+        return wrapper
+    return decorator
+
+# =====================================================
+# EXPORTAÇÃO (CHROME TRACE-EVENT)
+# =====================================================
+
+def to_chrome_trace(spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+    """Converte spans em eventos completos ('X') do formato Chrome trace-event"""
+    spans = Tracer.get_finished_spans() if spans is None else spans
+    pid = os.getpid()
+
+    events = [
+        {
+            'name': span.name,
+            'cat': span.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': span.start_ns / 1000,
+            'dur': span.duration_ns / 1000,
+            'pid': pid,
+            'tid': span.thread_id,
+            'args': dict(
+                span.attributes,
+                trace_id=span.trace_id,
+                span_id=span.span_id,
+                parent_id=span.parent_id,
+                status=span.status
+            ),
+        }
+        for span in sorted(spans, key=lambda s: s.start_ns)
+    ]
+
+    thread_names = {span.thread_id: span.thread_name for span in spans}
+    events.extend(
+        {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}}
+        for tid, thread_name in thread_names.items()
+    )
+
+    return {'traceEvents': events, 'displayTimeUnit': 'ns'}
+
+def export_chrome_trace(path: str, spans: Optional[List[Span]] = None) -> Path:
+    """Grava os spans em um arquivo JSON para chrome://tracing ou Perfetto"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(to_chrome_trace(spans), f, ensure_ascii=False, default=str)
+    return path
+
+# =====================================================
+# AUTO-INSTRUMENTAÇÃO
+# =====================================================
+
+class _TracedCursor:
+    """Proxy de cursor que abre um span por execute/executemany"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _traced(self, method, operation, *args, **kwargs):
+        # Repassa só os argumentos recebidos: com params, o conector trata '%' como marcador
+        with Tracer.start_span('db.query', sql=str(operation)[:SQL_ATTRIBUTE_LIMIT]) as span:
+            result = method(operation, *args, **kwargs)
+            span.set_attribute('rowcount', self._cursor.rowcount)
+            return result
+
+    def execute(self, operation, *args, **kwargs):
+        return self._traced(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._traced(self._cursor.executemany, operation, *args, **kwargs)
+
+_originals: Dict[tuple, Any] = {}
+
+def instrument_database():
+    """Envolve DatabaseManager.get_cursor em um span 'db.cursor' com spans por query"""
+    from src.utils.database import DatabaseManager
+
+    key = (DatabaseManager, 'get_cursor')
+    if key in _originals:
+        return
+
+    original = DatabaseManager.__dict__['get_cursor']
+    get_cursor = original.__func__
+
+    @classmethod
+    @contextmanager
+    @functools.wraps(get_cursor)
+    def traced_get_cursor(cls, dictionary=True):
+        with Tracer.start_span('db.cursor'):
+            with get_cursor(cls, dictionary) as (cursor, connection):
+                yield _TracedCursor(cursor), connection
+
+    _originals[key] = original
+    DatabaseManager.get_cursor = traced_get_cursor
+
+def instrument_services(*service_classes):
+    """
+    Envolve os métodos públicos das classes de serviço em spans
+    ('AuthService.login', ...). Sem argumentos instrumenta os serviços do
+    pacote src.services.
+    """
+    if not service_classes:
+        from src.services.auth_service import AuthService
+        from src.services.role_service import RoleService
+        from src.services.user_service import UserService
+        service_classes = (AuthService, RoleService, UserService)
+
+    for service_class in service_classes:
+        for attr, value in list(vars(service_class).items()):
+            if attr.startswith('_') or not inspect.isfunction(value) or (service_class, attr) in _originals:
+                continue
+            _originals[(service_class, attr)] = value
+            setattr(service_class, attr, traced(f"{service_class.__name__}.{attr}")(value))
+
+def uninstrument():
+    """Remove toda a auto-instrumentação"""
+    for (owner, attr), original in _originals.items():
+        setattr(owner, attr, original)
+    _originals.clear()
@@ -13,7 +13,7 @@ import logging
 from datetime import datetime
 from loguru import logger
 from log.log import AppLogger, UserContext, log_function_call, log_execution_time
-from repositories.config_repository import ConfigManager, is_connected 
+from repositories.config_repository import ConfigManager, decode_config_value, is_connected 
 
 # Configurar logger
 #logger.remove()
@@ -173,18 +173,13 @@ def test_configuration():
     print("\n5. Todas as configurações da tela INTERFACE:")
     configs = manager.get_configs_by_screen('INTERFACE')
     for config in configs:
-        tipo = config['tipo']
-        if tipo == 'BOOLEAN':
-            valor = config['valor_booleano']
-        elif tipo == 'INTEGER':
-            valor = config['valor_inteiro']
-        elif tipo == 'FLOAT':
-            valor = config['valor_real']
-        else:
-            valor = config['valor_string']
-
+        valor = decode_config_value(config)
         print(f"   - {config['nome']}: {valor} ({config['escopo']})")
 
+    # Exemplo 5b: Visão tipada da tela (valores decodificados uma única vez)
+    view = manager.get_view('INTERFACE', user_id=1, follow=False)
+    print(f"   Tema efetivo do usuário 1: {view.get('theme')}")
+
     # Exemplo 6: Histórico
     print("\n6. Histórico da configuração 'theme':")
     history = manager.get_config_history('theme', 'INTERFACE', limit=5)
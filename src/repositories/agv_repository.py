@@ -0,0 +1,47 @@
+from typing import Optional, Dict, Any, List
+from .base_repository import BaseRepository
+from src.utils.database import DatabaseManager
+
+AGV_IDLE = 'idle'
+AGV_BUSY = 'busy'
+
+class AgvRepository(BaseRepository):
+    """Repositório de AGVs"""
+
+    def __init__(self):
+        super().__init__('agv')
+
+    def find_by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        """Busca AGV por código"""
+        query = f"SELECT * FROM {self.table_name} WHERE code = %s"
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (code,))
+            return cursor.fetchone()
+
+    def find_by_layout(self, layout_id: int) -> List[Dict[str, Any]]:
+        """AGVs do layout, em ordem de id"""
+        query = f"SELECT * FROM {self.table_name} WHERE layout_id = %s ORDER BY id"
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (layout_id,))
+            return cursor.fetchall()
+
+    def find_idle(self, layout_id: int) -> List[Dict[str, Any]]:
+        """AGVs livres do layout com posição conhecida"""
+        query = f"""
+        SELECT id, code, station_id, speed
+        FROM {self.table_name}
+        WHERE layout_id = %s
+          AND status = %s
+          AND station_id IS NOT NULL
+        ORDER BY id
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (layout_id, AGV_IDLE))
+            return cursor.fetchall()
+
+    def update_station(self, agv_id: int, station_id: int) -> bool:
+        """Atualiza a estação atual do AGV"""
+        return self.update(agv_id, {'station_id': station_id})
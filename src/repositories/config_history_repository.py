@@ -0,0 +1,421 @@
+import json
+import time
+import zlib
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from .base_repository import BaseRepository
+from .config_repository import ConfigManager, ConfigType, decode_config_value
+from .config_view import SCOPE_PRECEDENCE
+from src.utils.database import DatabaseManager
+from src.utils.exceptions import ConfigHistoryError
+
+ConfigKey = Tuple[str, str, str, Optional[str], Optional[int]]
+
+def _key(row: Dict[str, Any]) -> ConfigKey:
+    return (row['nome'], row['tela'], row['escopo'], row.get('instance_id'), row.get('user_id'))
+
+def _scope_filter(tela: Optional[str], instance_id: Optional[str]) -> Tuple[str, List[Any]]:
+    """Monta o filtro SQL de tela/instância usado pelas consultas de histórico"""
+    clauses, params = [], []
+
+    if tela:
+        clauses.append("tela = %s")
+        params.append(tela)
+
+    if instance_id:
+        clauses.append("(escopo = 'GLOBAL' OR (escopo = 'INSTANCE' AND instance_id = %s))")
+        params.append(instance_id)
+
+    return ''.join(f" AND {clause}" for clause in clauses), params
+
+class ConfigHistoryRepository(BaseRepository):
+    """Repositório do histórico e dos checkpoints de configurações"""
+
+    def __init__(self):
+        super().__init__('configurations_history')
+        self._converter = ConfigManager()
+
+    # =====================================================
+    # CHECKPOINTS
+    # =====================================================
+
+    def create_checkpoint(self, alterado_por: str = 'SYSTEM') -> int:
+        """
+        Grava o estado completo das configurações como checkpoint
+
+        O MAX(id) do histórico e as linhas são lidos na mesma transação
+        (REPEATABLE READ), então o checkpoint corresponde exatamente ao
+        histórico até history_id.
+
+        Returns:
+            ID do checkpoint
+        """
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS last_id FROM configurations_history")
+            history_id = cursor.fetchone()['last_id']
+
+            cursor.execute("""
+            SELECT
+                nome, tela, escopo, instance_id, user_id, tipo,
+                valor_string, valor_inteiro, valor_real, valor_booleano
+            FROM configurations
+            """)
+            state = [
+                {
+                    'nome': row['nome'], 'tela': row['tela'], 'escopo': row['escopo'],
+                    'instance_id': row['instance_id'], 'user_id': row['user_id'],
+                    'tipo': row['tipo'], 'valor': decode_config_value(row)
+                }
+                for row in cursor.fetchall()
+            ]
+
+            payload = zlib.compress(json.dumps(state, ensure_ascii=False).encode('utf-8'))
+
+            cursor.execute("""
+            INSERT INTO configurations_checkpoints (history_id, total, payload, criado_por)
+            VALUES (%s, %s, %s, %s)
+            """, (history_id, len(state), payload, alterado_por))
+            conn.commit()
+
+            logger.info(f"Checkpoint de configurações criado (histórico até id {history_id}, {len(state)} itens)")
+            return cursor.lastrowid
+
+    def find_checkpoint_before(self, timestamp: datetime) -> Optional[Dict[str, Any]]:
+        """Busca o checkpoint mais recente criado até o instante informado"""
+        query = """
+        SELECT id, history_id, total, payload, criado_em
+        FROM configurations_checkpoints
+        WHERE criado_em <= %s
+        ORDER BY criado_em DESC, id DESC
+        LIMIT 1
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (timestamp,))
+            return cursor.fetchone()
+
+    # =====================================================
+    # RECONSTRUÇÃO NO TEMPO
+    # =====================================================
+
+    def _count(self, where: str, params: List[Any]) -> int:
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(f"SELECT COUNT(*) AS total FROM configurations_history WHERE {where}", tuple(params))
+            return cursor.fetchone()['total']
+
+    def _fetch(self, where: str, params: List[Any], order: str) -> List[Dict[str, Any]]:
+        query = f"""
+        SELECT
+            id, nome, tela, escopo, instance_id, user_id, tipo, operacao,
+            valor_antigo, valor_novo, alterado_em
+        FROM configurations_history
+        WHERE {where}
+        ORDER BY id {order}
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, tuple(params))
+            return cursor.fetchall()
+
+    def _parse(self, texto: Optional[str], tipo: str) -> Any:
+        """Converte o texto gravado no histórico para o tipo nativo"""
+        if texto is None or (texto == 'None' and tipo != 'STRING'):
+            return None
+        return self._converter._convert_value(texto, ConfigType(tipo))
+
+    def _state_row(self, change: Dict[str, Any], valor: Any) -> Dict[str, Any]:
+        return {
+            'nome': change['nome'], 'tela': change['tela'], 'escopo': change['escopo'],
+            'instance_id': change.get('instance_id'), 'user_id': change.get('user_id'),
+            'tipo': change['tipo'], 'valor': valor
+        }
+
+    def as_of(
+        self,
+        timestamp: datetime,
+        tela: Optional[str] = None,
+        instance_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Reconstrói o estado das configurações em um instante
+
+        Escolhe o caminho com menos linhas de histórico a ler:
+        - para frente: checkpoint anterior ao instante + alterações até ele
+        - para trás: estado atual desfazendo as alterações posteriores a ele
+
+        Instantes anteriores ao horizonte de retenção (checkpoint base da
+        última compactação) não podem ser reconstruídos: as linhas que os
+        cobriam foram removidas do histórico.
+
+        Args:
+            timestamp: Instante desejado
+            tela: Restringe a uma tela
+            instance_id: Configuração efetiva da instância: uma linha por
+                (nome, tela), a INSTANCE sobrepondo a GLOBAL (como na ConfigView)
+
+        Returns:
+            Lista de dicts (nome, tela, escopo, instance_id, user_id, tipo, valor)
+
+        Raises:
+            ConfigHistoryError: Instante anterior ao horizonte de retenção
+        """
+        horizon = self.retention_horizon()
+        if horizon is not None and timestamp < horizon:
+            raise ConfigHistoryError(
+                f"Instante {timestamp} anterior ao horizonte de retenção do histórico ({horizon}); "
+                f"as alterações anteriores estão em configurations_history_archive"
+            )
+
+        scope_sql, scope_params = _scope_filter(tela, instance_id)
+
+        checkpoint = self.find_checkpoint_before(timestamp)
+        backward_cost = self._count("alterado_em > %s" + scope_sql, [timestamp] + scope_params)
+
+        if checkpoint is not None:
+            forward_where = "id > %s AND alterado_em <= %s" + scope_sql
+            forward_params = [checkpoint['history_id'], timestamp] + scope_params
+            forward_cost = self._count(forward_where, forward_params)
+        else:
+            forward_cost = None
+
+        state: Dict[ConfigKey, Dict[str, Any]] = {}
+
+        if forward_cost is not None and forward_cost <= backward_cost:
+            for row in json.loads(zlib.decompress(checkpoint['payload']).decode('utf-8')):
+                if (not tela or row['tela'] == tela) and (
+                    not instance_id or row['escopo'] == 'GLOBAL'
+                    or (row['escopo'] == 'INSTANCE' and row['instance_id'] == instance_id)
+                ):
+                    state[_key(row)] = row
+
+            for change in self._fetch(forward_where, forward_params, 'ASC'):
+                if change['operacao'] == 'DELETE':
+                    state.pop(_key(change), None)
+                else:
+                    state[_key(change)] = self._state_row(
+                        change, self._parse(change['valor_novo'], change['tipo'])
+                    )
+        else:
+            for row in self._current_configs(scope_sql, scope_params):
+                state[_key(row)] = {
+                    'nome': row['nome'], 'tela': row['tela'], 'escopo': row['escopo'],
+                    'instance_id': row['instance_id'], 'user_id': row['user_id'],
+                    'tipo': row['tipo'], 'valor': decode_config_value(row)
+                }
+
+            for change in self._fetch("alterado_em > %s" + scope_sql, [timestamp] + scope_params, 'DESC'):
+                if change['operacao'] == 'INSERT':
+                    state.pop(_key(change), None)
+                else:
+                    state[_key(change)] = self._state_row(
+                        change, self._parse(change['valor_antigo'], change['tipo'])
+                    )
+
+        rows = state.values()
+        if instance_id:
+            effective: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            for row in rows:
+                current = effective.get((row['nome'], row['tela']))
+                if current is None or SCOPE_PRECEDENCE[row['escopo']] > SCOPE_PRECEDENCE[current['escopo']]:
+                    effective[(row['nome'], row['tela'])] = row
+            rows = effective.values()
+
+        return sorted(
+            rows,
+            key=lambda row: (row['tela'], row['nome'], row['escopo'],
+                             row['instance_id'] or '', row['user_id'] or 0)
+        )
+
+    def _current_configs(self, scope_sql: str, scope_params: List[Any]) -> List[Dict[str, Any]]:
+        """Estado atual das configurações no banco"""
+        query = f"""
+        SELECT
+            nome, tela, escopo, instance_id, user_id, tipo,
+            valor_string, valor_inteiro, valor_real, valor_booleano
+        FROM configurations
+        WHERE 1 = 1{scope_sql}
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, tuple(scope_params))
+            return cursor.fetchall()
+
+    # =====================================================
+    # MANUTENÇÃO (RETENÇÃO E COMPACTAÇÃO)
+    # =====================================================
+
+    def retention_horizon(self) -> Optional[datetime]:
+        """Instante mais antigo que as_of consegue reconstruir (None = histórico completo)"""
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute("SELECT horizon FROM configurations_history_horizon WHERE id = 1")
+            row = cursor.fetchone()
+            return row['horizon'] if row else None
+
+    def _record_horizon(self, checkpoint: Dict[str, Any]):
+        """Avança o horizonte de retenção até o checkpoint base da compactação"""
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute("""
+            INSERT INTO configurations_history_horizon (id, horizon, history_id)
+            VALUES (1, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                horizon = GREATEST(horizon, VALUES(horizon)),
+                history_id = GREATEST(history_id, VALUES(history_id))
+            """, (checkpoint['criado_em'], checkpoint['history_id']))
+            conn.commit()
+
+    def latest_checkpoint(self, until: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Busca o checkpoint mais recente (opcionalmente criado até 'until')"""
+        query = "SELECT id, history_id, total, criado_em FROM configurations_checkpoints"
+        params = []
+
+        if until is not None:
+            query += " WHERE criado_em <= %s"
+            params.append(until)
+
+        query += " ORDER BY criado_em DESC, id DESC LIMIT 1"
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, tuple(params))
+            return cursor.fetchone()
+
+    def ensure_checkpoint(self, interval: timedelta) -> Optional[int]:
+        """
+        Cria um checkpoint se o último for mais antigo que o intervalo
+
+        Returns:
+            ID do checkpoint criado ou None se não foi necessário
+        """
+        latest = self.latest_checkpoint()
+        if latest and latest['criado_em'] > datetime.now() - interval:
+            return None
+        return self.create_checkpoint('MAINTENANCE')
+
+    def compact(
+        self,
+        cutoff: datetime,
+        batch_size: int = 1000,
+        archive: bool = True,
+        pause: float = 0.0,
+        dry_run: bool = False
+    ) -> int:
+        """
+        Remove do histórico as linhas anteriores ao corte já cobertas por checkpoint
+
+        Só são removidas linhas com id <= history_id do último checkpoint criado
+        até o corte, assim as_of continua correto para qualquer instante a
+        partir desse checkpoint, que passa a ser o horizonte de retenção
+        (gravado antes da remoção). A remoção é feita em lotes por faixa de
+        id, cada um em sua própria transação, para não manter locks longos.
+
+        Args:
+            cutoff: Linhas com alterado_em anterior a este instante são elegíveis
+            batch_size: Linhas por lote
+            archive: Copia as linhas para configurations_history_archive antes de remover
+            pause: Pausa entre lotes (segundos) para aliviar o banco
+            dry_run: Apenas conta as linhas elegíveis
+
+        Returns:
+            Número de linhas removidas (ou elegíveis, em dry_run)
+        """
+        checkpoint = self.latest_checkpoint(until=cutoff)
+        if checkpoint is None:
+            logger.info("Nenhum checkpoint anterior ao corte; histórico mantido")
+            return 0
+
+        limit_id = checkpoint['history_id']
+
+        if dry_run:
+            return self._count("id <= %s AND alterado_em < %s", [limit_id, cutoff])
+
+        # Grava antes de remover: um as_of concorrente nunca lê um instante já perdido
+        if self._count("id <= %s AND alterado_em < %s", [limit_id, cutoff]):
+            self._record_horizon(checkpoint)
+
+        columns = """
+            id, config_id, nome, tela, escopo, instance_id, user_id, tipo, operacao,
+            valor_antigo, valor_novo, alterado_em, alterado_por
+        """
+
+        removed = 0
+        last_id = 0
+        while True:
+            with DatabaseManager.get_cursor() as (cursor, conn):
+                cursor.execute("""
+                SELECT id FROM configurations_history
+                WHERE id > %s AND id <= %s AND alterado_em < %s
+                ORDER BY id
+                LIMIT %s
+                """, (last_id, limit_id, cutoff, batch_size))
+                ids = [row['id'] for row in cursor.fetchall()]
+
+                if not ids:
+                    break
+
+                first_id, last_id = ids[0], ids[-1]
+                range_params = (first_id, last_id, cutoff)
+
+                try:
+                    if archive:
+                        cursor.execute(f"""
+                        INSERT IGNORE INTO configurations_history_archive ({columns})
+                        SELECT {columns}
+                        FROM configurations_history
+                        WHERE id BETWEEN %s AND %s AND alterado_em < %s
+                        """, range_params)
+
+                    cursor.execute("""
+                    DELETE FROM configurations_history
+                    WHERE id BETWEEN %s AND %s AND alterado_em < %s
+                    """, range_params)
+                    removed += cursor.rowcount
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        logger.info(f"Histórico de configurações compactado: {removed} linhas (até id {limit_id})")
+        return removed
+
+    def prune_checkpoints(self, cutoff: datetime) -> int:
+        """
+        Remove checkpoints que não são mais necessários
+
+        Mantém o checkpoint mais recente anterior ao corte (base da reconstrução)
+        e todos os posteriores a ele.
+        """
+        keep = self.latest_checkpoint(until=cutoff)
+        if keep is None:
+            return 0
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(
+                "DELETE FROM configurations_checkpoints WHERE criado_em < %s AND id <> %s",
+                (keep['criado_em'], keep['id'])
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def purge_archive(self, cutoff: datetime, batch_size: int = 1000, pause: float = 0.0) -> int:
+        """Remove do arquivo morto as linhas anteriores ao corte, em lotes"""
+        removed = 0
+        while True:
+            with DatabaseManager.get_cursor() as (cursor, conn):
+                cursor.execute(
+                    "DELETE FROM configurations_history_archive WHERE alterado_em < %s ORDER BY id LIMIT %s",
+                    (cutoff, batch_size)
+                )
+                conn.commit()
+                deleted = cursor.rowcount
+
+            removed += deleted
+            if deleted < batch_size:
+                return removed
+            if pause:
+                time.sleep(pause)
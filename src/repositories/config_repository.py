@@ -1,11 +1,17 @@
 import json
+import time
+import threading
 
 from typing import Any, Optional, Dict, List, Union
 from .base_repository import BaseRepository
 from src.utils.database import DatabaseManager
+from mysql.connector import Error
+from loguru import logger
+from config.settings import settings
 from enum import Enum
 from datetime import datetime
 from contextlib import contextmanager
+from pathlib import Path
 
 class ConfigScope(Enum):
     """Escopo da configuração"""
@@ -20,6 +26,32 @@ class ConfigType(Enum):
     FLOAT = "FLOAT"
     STRING = "STRING"
 
+# Coluna de valor e conversão nativa por tipo (resolvidas uma única vez)
+VALUE_COLUMNS = {
+    'BOOLEAN': 'valor_booleano',
+    'INTEGER': 'valor_inteiro',
+    'FLOAT': 'valor_real',
+    'STRING': 'valor_string'
+}
+
+VALUE_DECODERS = {
+    'BOOLEAN': bool,
+    'INTEGER': int,
+    'FLOAT': float,
+    'STRING': str
+}
+
+def decode_config_value(config: Dict[str, Any], default_value: Any = None) -> Any:
+    """Retorna o valor de uma linha de configurations no tipo Python nativo"""
+    column = VALUE_COLUMNS.get(config.get('tipo'))
+    if column is None:
+        return default_value
+
+    valor = config.get(column)
+    if valor is None:
+        return default_value
+    return VALUE_DECODERS[config['tipo']](valor)
+
 class ConfigRepository(BaseRepository):
     """Repositório de configurações"""
 
@@ -62,18 +94,16 @@ class ConfigRepository(BaseRepository):
 class ConfigManager:
     """Gerencia configurações do sistema"""
 
+    _watcher = None
+    _watcher_lock = threading.Lock()
+    _snapshot = None
+
     def __init__(self):
         pass
 
     def _get_valor_column(self, tipo: ConfigType) -> str:
         """Retorna o nome da coluna de valor baseado no tipo"""
-        mapping = {
-            ConfigType.BOOLEAN: 'valor_booleano',
-            ConfigType.INTEGER: 'valor_inteiro',
-            ConfigType.FLOAT: 'valor_real',
-            ConfigType.STRING: 'valor_string'
-        }
-        return mapping[tipo]
+        return VALUE_COLUMNS[tipo.value]
 
     def _convert_value(self, valor: Any, tipo: ConfigType) -> Any:
         """Converte valor para o tipo apropriado"""
@@ -114,7 +144,7 @@ class ConfigManager:
         coluna_valor = self._get_valor_column(tipo)
 
         # Verificar se já existe
-        existing = self.get_config(nome, tela, escopo, instance_id, user_id)
+        existing = self._fetch_config(nome, tela, escopo, instance_id, user_id)
 
         with DatabaseManager.get_cursor() as (cursor, conn):
             try:
@@ -170,14 +200,35 @@ class ConfigManager:
                         tipo.value, valor_convertido, descricao, criado_por, criado_por
                     ))
 
+                    # Registrar criação no histórico
+                    self._add_to_history(
+                        cursor,
+                        cursor.lastrowid,
+                        nome,
+                        tela,
+                        escopo,
+                        instance_id,
+                        user_id,
+                        tipo,
+                        None,
+                        valor_convertido,
+                        criado_por,
+                        operacao='INSERT'
+                    )
+
                 conn.commit()
-                return True
 
             except Error as e:
                 conn.rollback()
                 print(f"✗ Erro ao salvar configuração: {e}")
                 raise
 
+        # Manter o snapshot local coerente com a escrita deste processo
+        if self._snapshot is not None:
+            self._snapshot.put(self._fetch_config(nome, tela, escopo, instance_id, user_id))
+
+        return True
+
     def get_config(
         self,
         nome: str,
@@ -189,6 +240,36 @@ class ConfigManager:
     ) -> Optional[Dict]:
         """Busca uma configuração"""
 
+        # Snapshot local carregado: leitura sem ida ao banco
+        if self._snapshot is not None:
+            result = self._snapshot.get(nome, tela, escopo.value, instance_id, user_id)
+            if result:
+                return dict(result)
+
+        try:
+            result = self._fetch_config(nome, tela, escopo, instance_id, user_id)
+        except Error:
+            if self._snapshot is None:
+                raise
+            result = None
+
+        if result:
+            return result
+        elif default_value is not None:
+            return {'valor': default_value}
+        else:
+            return None
+
+    def _fetch_config(
+        self,
+        nome: str,
+        tela: str,
+        escopo: ConfigScope,
+        instance_id: Optional[str],
+        user_id: Optional[int]
+    ) -> Optional[Dict]:
+        """Busca uma configuração diretamente no banco"""
+
         query = """
         SELECT
             id, nome, tela, escopo, instance_id, user_id, tipo, descricao,
@@ -209,14 +290,7 @@ class ConfigManager:
                 instance_id, instance_id,
                 user_id, user_id
             ))
-            result = cursor.fetchone()
-
-            if result:
-                return result
-            elif default_value is not None:
-                return {'valor': default_value}
-            else:
-                return None
+            return cursor.fetchone()
 
     def get_config_value(
         self,
@@ -230,20 +304,14 @@ class ConfigManager:
         """Busca apenas o valor de uma configuração"""
 
         config = self.get_config(nome, tela, escopo, instance_id, user_id, default_value)
+        if not config:
+            return default_value
 
         # Retornar o valor correto baseado no tipo
-        tipo = config.get('tipo')
-
-        if tipo == 'BOOLEAN':
-            return config.get('valor_booleano')
-        elif tipo == 'INTEGER':
-            return config.get('valor_inteiro')
-        elif tipo == 'FLOAT':
-            return config.get('valor_real')
-        elif tipo == 'STRING':
-            return config.get('valor_string')
-        else:  # STRING
+        column = VALUE_COLUMNS.get(config.get('tipo'))
+        if column is None:
             return default_value
+        return config.get(column)
 
     def get_configs_by_screen(
         self,
@@ -284,6 +352,66 @@ class ConfigManager:
             cursor.execute(query, tuple(params))
             return cursor.fetchall()
 
+    def get_scoped_configs(
+        self,
+        tela: Optional[str] = None,
+        instance_id: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Busca as configurações que se aplicam a uma instância/usuário
+
+        Retorna as linhas GLOBAL mais as de INSTANCE/USER correspondentes;
+        a precedência (USER > INSTANCE > GLOBAL) fica a cargo do chamador.
+        """
+
+        if self._snapshot is not None:
+            return [
+                dict(row) for row in self._snapshot.rows()
+                if (tela is None or row['tela'] == tela) and (
+                    row['escopo'] == 'GLOBAL'
+                    or (row['escopo'] == 'INSTANCE' and instance_id and row['instance_id'] == instance_id)
+                    or (row['escopo'] == 'USER' and user_id and row['user_id'] == user_id)
+                )
+            ]
+
+        query = """
+        SELECT
+            id, nome, tela, escopo, instance_id, user_id, tipo,
+            valor_string, valor_inteiro, valor_real, valor_booleano
+        FROM configurations
+        WHERE (escopo = 'GLOBAL'
+               OR (escopo = 'INSTANCE' AND instance_id = %s)
+               OR (escopo = 'USER' AND user_id = %s))
+        """
+
+        params = [instance_id, user_id]
+
+        if tela:
+            query += " AND tela = %s"
+            params.append(tela)
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, tuple(params))
+            return cursor.fetchall()
+
+    def get_view(
+        self,
+        tela: Optional[str] = None,
+        instance_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        follow: bool = False
+    ):
+        """
+        Retorna uma ConfigView tipada para a tela/instância/usuário
+
+        Com follow=True a visão acompanha as alterações até close() (ou o fim
+        do bloco with)
+        """
+        from .config_view import ConfigView
+
+        return ConfigView(tela, instance_id, user_id, manager=self, follow=follow)
+
     def get_all_user_configs(self, user_id: int) -> List[Dict]:
         """Busca todas as configurações de um usuário"""
 
@@ -307,10 +435,13 @@ class ConfigManager:
         tela: str,
         escopo: ConfigScope = ConfigScope.GLOBAL,
         instance_id: Optional[str] = None,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        alterado_por: str = 'SYSTEM'
     ) -> bool:
         """Deleta uma configuração"""
 
+        existing = self._fetch_config(nome, tela, escopo, instance_id, user_id)
+
         query = """
         DELETE FROM configurations
         WHERE nome = %s
@@ -327,8 +458,32 @@ class ConfigManager:
                     instance_id, instance_id,
                     user_id, user_id
                 ))
+                deleted = cursor.rowcount > 0
+
+                # Registrar remoção no histórico
+                if deleted and existing:
+                    tipo = ConfigType(existing['tipo'])
+                    self._add_to_history(
+                        cursor,
+                        existing['id'],
+                        nome,
+                        tela,
+                        escopo,
+                        instance_id,
+                        user_id,
+                        tipo,
+                        existing.get(self._get_valor_column(tipo)),
+                        None,
+                        alterado_por,
+                        operacao='DELETE'
+                    )
+
                 conn.commit()
-                return cursor.rowcount > 0
+
+                if deleted and existing and self._snapshot is not None:
+                    self._snapshot.discard(existing)
+
+                return deleted
             except Error as e:
                 conn.rollback()
                 print(f"✗ Erro ao deletar configuração: {e}")
@@ -346,20 +501,24 @@ class ConfigManager:
         tipo: ConfigType,
         valor_antigo: Any,
         valor_novo: Any,
-        alterado_por: str
+        alterado_por: str,
+        operacao: str = 'UPDATE'
     ):
         """Adiciona registro no histórico"""
 
         query = """
         INSERT INTO configurations_history
-            (config_id, nome, tela, escopo, instance_id, user_id, tipo,
+            (config_id, nome, tela, escopo, instance_id, user_id, tipo, operacao,
              valor_antigo, valor_novo, alterado_por)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
 
         cursor.execute(query, (
             config_id, nome, tela, escopo.value, instance_id, user_id,
-            tipo.value, str(valor_antigo), str(valor_novo), alterado_por
+            tipo.value, operacao,
+            None if valor_antigo is None else str(valor_antigo),
+            None if valor_novo is None else str(valor_novo),
+            alterado_por
         ))
 
     def get_config_history(
@@ -373,13 +532,155 @@ class ConfigManager:
         query = """
         SELECT
             id, config_id, nome, tela, escopo, instance_id, user_id,
-            tipo, valor_antigo, valor_novo, alterado_em, alterado_por
+            tipo, operacao, valor_antigo, valor_novo, alterado_em, alterado_por
         FROM configurations_history
         WHERE nome = %s AND tela = %s
-        ORDER BY alterado_em DESC
+        ORDER BY alterado_em DESC, id DESC
         LIMIT %s
         """
 
         with DatabaseManager.get_cursor() as (cursor, conn):
             cursor.execute(query, (nome, tela, limit))
             return cursor.fetchall()
+
+    # =====================================================
+    # RECONSTRUÇÃO NO TEMPO
+    # =====================================================
+
+    def as_of(
+        self,
+        timestamp: datetime,
+        tela: Optional[str] = None,
+        instance_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Reconstrói o estado das configurações em um instante
+
+        Usa o checkpoint mais próximo e reaplica apenas o delta do histórico.
+        Com instance_id retorna a configuração efetiva da instância (uma linha
+        por nome/tela, INSTANCE sobrepondo GLOBAL). Instantes anteriores ao
+        horizonte de retenção (histórico compactado) levantam ConfigHistoryError.
+
+        Usage:
+            manager.as_of(datetime(2024, 5, 2, 3, 12), instance_id='server-001')
+        """
+        from .config_history_repository import ConfigHistoryRepository
+
+        return ConfigHistoryRepository().as_of(timestamp, tela, instance_id)
+
+    def create_checkpoint(self, criado_por: str = 'SYSTEM') -> int:
+        """Grava um checkpoint do estado atual (executar periodicamente)"""
+        from .config_history_repository import ConfigHistoryRepository
+
+        return ConfigHistoryRepository().create_checkpoint(criado_por)
+
+    # =====================================================
+    # ASSINATURAS DE ALTERAÇÕES
+    # =====================================================
+
+    @classmethod
+    def get_watcher(cls):
+        """Retorna o observador compartilhado, iniciando-o se necessário"""
+        from .config_watcher import ConfigWatcher
+
+        with cls._watcher_lock:
+            if cls._watcher is None:
+                cls._watcher = ConfigWatcher()
+            if not cls._watcher.running:
+                cls._watcher.start()
+            return cls._watcher
+
+    def subscribe(self, pattern: str, callback) -> int:
+        """
+        Assina alterações de configuração
+
+        Todas as assinaturas do processo compartilham uma única thread de
+        polling sobre configurations_history.
+
+        Args:
+            pattern: 'TELA.nome', aceita curingas ('SERVIDOR.*', '*.log_level')
+            callback: Função chamada com a linha do histórico de cada alteração
+
+        Returns:
+            ID da assinatura
+        """
+        return self.get_watcher().subscribe(pattern, callback)
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        """Cancela uma assinatura"""
+        if self._watcher is None:
+            return False
+        return self._watcher.unsubscribe(subscription_id)
+
+    # =====================================================
+    # SNAPSHOT LOCAL
+    # =====================================================
+
+    def export_snapshot(self, path: Optional[Union[str, Path]] = None) -> Path:
+        """
+        Exporta todas as configurações para um arquivo de snapshot
+
+        Returns:
+            Caminho do arquivo gerado
+        """
+        from .config_snapshot import ConfigSnapshot
+
+        snapshot = ConfigSnapshot.from_database()
+        path = snapshot.save(path or settings.CONFIG_SNAPSHOT_PATH)
+        logger.info(f"Snapshot de configurações exportado: {path} ({len(snapshot)} itens)")
+        return path
+
+    @classmethod
+    def load_snapshot(cls, path: Optional[str] = None, reconcile: bool = True):
+        """
+        Carrega o snapshot local para atender leituras sem o banco
+
+        Não acessa o banco: a reconciliação com configurations_history roda em
+        segundo plano e é repetida até o banco ficar disponível. Depois disso o
+        snapshot é mantido atualizado pelo ConfigWatcher.
+
+        Raises:
+            ConfigSnapshotError: Arquivo ausente, corrompido ou incompatível
+        """
+        from .config_snapshot import ConfigSnapshot
+
+        path = path or settings.CONFIG_SNAPSHOT_PATH
+        snapshot = ConfigSnapshot.load(path)
+        cls._snapshot = snapshot
+        logger.info(
+            f"Snapshot de configurações carregado: {path} "
+            f"({len(snapshot)} itens, histórico até id {snapshot.last_history_id})"
+        )
+
+        if reconcile:
+            threading.Thread(
+                target=cls._follow_snapshot, args=(snapshot,),
+                name='ConfigSnapshotReconcile', daemon=True
+            ).start()
+
+        return snapshot
+
+    @classmethod
+    def _follow_snapshot(cls, snapshot):
+        """Reconcilia o snapshot e passa a segui-lo pelo ConfigWatcher"""
+        subscription_id = None
+
+        while cls._snapshot is snapshot:
+            try:
+                watcher = cls.get_watcher()
+                if watcher.last_id is None:
+                    raise Error("Histórico de configurações indisponível")
+
+                # Assinar antes de reconciliar: nenhuma alteração fica entre os dois
+                if subscription_id is None:
+                    subscription_id = watcher.subscribe('*', snapshot.apply_change)
+                snapshot.reconcile()
+                return
+            except Error as e:
+                logger.warning(f"Aguardando banco para reconciliar snapshot: {e}")
+                time.sleep(settings.CONFIG_POLL_INTERVAL)
+
+    @classmethod
+    def unload_snapshot(cls):
+        """Descarta o snapshot local e volta a ler do banco"""
+        cls._snapshot = None
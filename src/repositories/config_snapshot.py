@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from loguru import logger
+from config.settings import settings
+from src.utils.database import DatabaseManager
+from src.utils.exceptions import ConfigSnapshotError
+from .config_repository import ConfigManager, ConfigType
+
+# =====================================================
+# SNAPSHOT DE CONFIGURAÇÕES
+# =====================================================
+
+SNAPSHOT_FORMAT = 'agv-config-snapshot'
+SNAPSHOT_VERSION = 1
+
+DATETIME_COLUMNS = ('criado_em', 'atualizado_em')
+
+ConfigKey = Tuple[str, str, str, Optional[str], Optional[int]]
+
+def config_key(row: Dict[str, Any]) -> ConfigKey:
+    """Chave única de uma configuração (mesma do uq_global_config)"""
+    return (row['nome'], row['tela'], row['escopo'], row.get('instance_id'), row.get('user_id'))
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _canonical(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(
+        payload, sort_keys=True, separators=(',', ':'),
+        ensure_ascii=False, default=_json_default
+    ).encode('utf-8')
+
+class ConfigSnapshot:
+    """
+    Cópia local de todas as configurações
+
+    O arquivo é um JSON versionado com checksum SHA-256 do conteúdo e o último
+    id de configurations_history incluído. Ao carregar, o processo atende
+    leituras sem depender do banco e depois aplica apenas as alterações do
+    histórico posteriores a esse id.
+
+    As alterações podem chegar fora da ordem de id (confirmação tardia
+    reentregue pelo ConfigWatcher): a deduplicação é por chave, e
+    last_history_id só avança pelos ids contíguos já vistos. Uma lacuna que
+    não aparece em CONFIG_GAP_TIMEOUT segundos (transação desfeita) é pulada.
+    """
+
+    def __init__(self, configs: Optional[List[Dict[str, Any]]] = None, last_history_id: int = 0):
+        self.last_history_id = last_history_id
+        self.gap_timeout = settings.CONFIG_GAP_TIMEOUT
+        self._lock = threading.Lock()
+        self._configs: Dict[ConfigKey, Dict[str, Any]] = {
+            config_key(row): row for row in (configs or [])
+        }
+        # Alterações até este id já estão no conteúdo carregado
+        self._base_id = last_history_id
+        # Último id do histórico aplicado por chave (torna a reaplicação idempotente)
+        self._applied: Dict[ConfigKey, int] = {}
+        # Ids vistos acima de last_history_id e desde quando a lacuna seguinte está aberta
+        self._ahead: Set[int] = set()
+        self._gap_since: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def get(
+        self,
+        nome: str,
+        tela: str,
+        escopo: str,
+        instance_id: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Busca uma configuração no snapshot"""
+        return self._configs.get((nome, tela, escopo, instance_id, user_id))
+
+    def put(self, row: Dict[str, Any]):
+        """Grava uma configuração lida do banco (leitura após escrita local)"""
+        with self._lock:
+            self._configs[config_key(row)] = dict(row)
+
+    def discard(self, row: Dict[str, Any]):
+        """Remove uma configuração do snapshot"""
+        with self._lock:
+            self._configs.pop(config_key(row), None)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Retorna todas as configurações do snapshot"""
+        with self._lock:
+            return list(self._configs.values())
+
+    # ----- Atualização incremental -----
+
+    def apply_change(self, change: Dict[str, Any]) -> bool:
+        """
+        Aplica uma linha de configurations_history ao snapshot
+
+        Returns:
+            True se a alteração foi aplicada, False se já estava incluída
+        """
+        key = config_key(change)
+
+        with self._lock:
+            if change['id'] > self.last_history_id:
+                self._ahead.add(change['id'])
+                self._advance()
+
+            if change['id'] <= max(self._base_id, self._applied.get(key, 0)):
+                return False
+
+            self._applied[key] = change['id']
+
+            if change.get('operacao') == 'DELETE':
+                self._configs.pop(key, None)
+                return True
+
+            tipo = ConfigType(change['tipo'])
+            row = self._configs.get(key)
+            if row is None:
+                row = {
+                    'id': change['config_id'],
+                    'nome': change['nome'],
+                    'tela': change['tela'],
+                    'escopo': change['escopo'],
+                    'instance_id': change.get('instance_id'),
+                    'user_id': change.get('user_id'),
+                    'descricao': None,
+                    'editavel': 1,
+                    'visivel': 1,
+                    'valor_padrao': None,
+                    'criado_em': change.get('alterado_em'),
+                    'criado_por': change.get('alterado_por'),
+                }
+                self._configs[key] = row
+
+            for column in ('valor_string', 'valor_inteiro', 'valor_real', 'valor_booleano'):
+                row[column] = None
+
+            valor = ConfigManager()._convert_value(change['valor_novo'], tipo)
+            if tipo == ConfigType.BOOLEAN:
+                valor = int(valor)  # Mesmo formato retornado pelo MySQL
+
+            row['tipo'] = tipo.value
+            row[ConfigManager()._get_valor_column(tipo)] = valor
+            row['atualizado_em'] = change.get('alterado_em')
+            row['atualizado_por'] = change.get('alterado_por')
+            return True
+
+    def _advance(self):
+        """Avança last_history_id pelos ids contíguos já vistos"""
+        ahead = self._ahead
+        while ahead:
+            if self.last_history_id + 1 in ahead:
+                ahead.discard(self.last_history_id + 1)
+                self.last_history_id += 1
+                self._gap_since = None
+            elif self._gap_since is None:
+                self._gap_since = time.monotonic()
+                return
+            elif time.monotonic() - self._gap_since >= self.gap_timeout:
+                # Lacuna vencida: o ConfigWatcher também desiste dela
+                self.last_history_id = min(ahead) - 1
+                self._gap_since = None
+            else:
+                return
+
+    def reconcile(self, batch_size: int = 1000) -> int:
+        """
+        Aplica as alterações do histórico posteriores ao snapshot
+
+        Returns:
+            Número de alterações aplicadas
+        """
+        query = """
+        SELECT
+            id, config_id, nome, tela, escopo, instance_id, user_id,
+            tipo, operacao, valor_antigo, valor_novo, alterado_em, alterado_por
+        FROM configurations_history
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+        """
+
+        applied = 0
+        after = self.last_history_id
+        while True:
+            with DatabaseManager.get_cursor() as (cursor, conn):
+                cursor.execute(query, (after, batch_size))
+                changes = cursor.fetchall()
+
+            for change in changes:
+                if self.apply_change(change):
+                    applied += 1
+
+            if changes:
+                after = changes[-1]['id']
+
+            if len(changes) < batch_size:
+                logger.info(f"Snapshot de configurações reconciliado ({applied} alterações)")
+                return applied
+
+    # ----- Persistência -----
+
+    @classmethod
+    def from_database(cls) -> 'ConfigSnapshot':
+        """Gera um snapshot com todas as configurações do banco"""
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            # O id é lido antes das linhas: alterações concorrentes são reaplicadas
+            # na reconciliação, o que é inofensivo
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS last_id FROM configurations_history")
+            last_history_id = cursor.fetchone()['last_id']
+
+            cursor.execute("""
+            SELECT
+                id, nome, tela, escopo, instance_id, user_id, tipo, descricao,
+                valor_string, valor_inteiro, valor_real, valor_booleano,
+                editavel, visivel, valor_padrao,
+                criado_em, atualizado_em, criado_por, atualizado_por
+            FROM configurations
+            """)
+            configs = cursor.fetchall()
+
+        return cls(configs, last_history_id)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Grava o snapshot de forma atômica (arquivo temporário + rename)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            payload = {
+                'last_history_id': self.last_history_id,
+                'configs': sorted(
+                    self._configs.values(),
+                    key=lambda row: (row['tela'], row['nome'], row['escopo'],
+                                     row.get('instance_id') or '', row.get('user_id') or 0)
+                )
+            }
+
+        body = _canonical(payload)
+        document = {
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'checksum': hashlib.sha256(body).hexdigest(),
+            'payload': payload
+        }
+
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ConfigSnapshot':
+        """
+        Carrega um snapshot validando formato, versão e checksum
+
+        Raises:
+            ConfigSnapshotError: Arquivo ausente, corrompido ou de versão incompatível
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ConfigSnapshotError(f"Não foi possível ler o snapshot {path}: {e}")
+
+        if document.get('format') != SNAPSHOT_FORMAT:
+            raise ConfigSnapshotError(f"Arquivo {path} não é um snapshot de configurações")
+
+        if document.get('version') != SNAPSHOT_VERSION:
+            raise ConfigSnapshotError(
+                f"Versão do snapshot incompatível: {document.get('version')} "
+                f"(esperada {SNAPSHOT_VERSION})"
+            )
+
+        payload = document.get('payload') or {}
+        if hashlib.sha256(_canonical(payload)).hexdigest() != document.get('checksum'):
+            raise ConfigSnapshotError(f"Checksum inválido no snapshot {path}")
+
+        configs = payload.get('configs', [])
+        for row in configs:
+            for column in DATETIME_COLUMNS:
+                if row.get(column):
+                    row[column] = datetime.fromisoformat(row[column])
+
+        return cls(configs, payload.get('last_history_id', 0))
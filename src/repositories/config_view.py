@@ -0,0 +1,198 @@
+import threading
+import weakref
+
+from typing import Any, Dict, Iterator, Optional
+from .config_repository import ConfigManager, ConfigType, decode_config_value
+
+# =====================================================
+# VISÃO TIPADA DE CONFIGURAÇÕES
+# =====================================================
+
+# Precedência entre escopos: o maior vence
+SCOPE_PRECEDENCE = {'GLOBAL': 0, 'INSTANCE': 1, 'USER': 2}
+
+class ConfigView:
+    """
+    Visão pré-compilada das configurações de uma tela/instância/usuário
+
+    Cada linha é decodificada uma única vez para o tipo Python nativo. As
+    leituras são consultas diretas a um dict, sem SQL nem despacho por tipo.
+    Com follow=True a visão assina o ConfigWatcher e recalcula apenas as
+    entradas alteradas. A assinatura guarda só uma referência fraca à visão
+    e é cancelada em close(), ao sair do with ou quando a visão é coletada.
+
+    Chaves: 'nome' quando a tela é informada, 'TELA.nome' caso contrário.
+
+    Usage:
+        view = ConfigManager().get_view('SERVIDOR', instance_id='server-001')
+        view.server_port        # 8080
+        view['server_port']     # 8080
+
+        with ConfigManager().get_view('SERVIDOR', follow=True) as view:
+            ...                 # acompanha as alterações até sair do bloco
+    """
+
+    def __init__(
+        self,
+        tela: Optional[str] = None,
+        instance_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        manager: Optional[ConfigManager] = None,
+        follow: bool = False
+    ):
+        # Atributos gravados via __dict__ para não conflitar com __getattr__
+        self.__dict__['tela'] = tela
+        self.__dict__['instance_id'] = instance_id
+        self.__dict__['user_id'] = user_id
+        self.__dict__['_manager'] = manager or ConfigManager()
+        self.__dict__['_lock'] = threading.Lock()
+        self.__dict__['_values'] = {}
+        # Valores por escopo de cada chave, para reavaliar a precedência
+        self.__dict__['_layers'] = {}
+        self.__dict__['_subscription_id'] = None
+        self.__dict__['_finalizer'] = None
+        # Alterações recebidas durante o reload (reaplicadas sobre a leitura)
+        self.__dict__['_pending'] = None
+
+        # Assina antes de carregar: alterações feitas durante a leitura não se perdem
+        if follow:
+            self._follow()
+        self.reload()
+
+    def _follow(self):
+        """Assina o ConfigWatcher sem manter a visão viva"""
+        method = weakref.WeakMethod(self.apply_change)
+
+        def callback(change: Dict[str, Any]):
+            apply_change = method()
+            if apply_change is not None:
+                apply_change(change)
+
+        pattern = f"{self.tela}.*" if self.tela else '*'
+        subscription_id = self._manager.subscribe(pattern, callback)
+        self.__dict__['_subscription_id'] = subscription_id
+        self.__dict__['_finalizer'] = weakref.finalize(self, self._manager.unsubscribe, subscription_id)
+
+    # ----- Acesso -----
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__['_values'][name]
+        except KeyError:
+            raise AttributeError(f"Configuração '{name}' não encontrada")
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("ConfigView é somente leitura; use ConfigManager.set_config")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._values))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retorna o valor ou o default"""
+        return self._values.get(key, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Retorna uma cópia dos valores"""
+        return dict(self._values)
+
+    # ----- Construção -----
+
+    def _key(self, row: Dict[str, Any]) -> str:
+        return row['nome'] if self.tela else f"{row['tela']}.{row['nome']}"
+
+    def _applies_to(self, row: Dict[str, Any]) -> bool:
+        """Verifica se a linha pertence a esta visão"""
+        if self.tela and row['tela'] != self.tela:
+            return False
+
+        escopo = row['escopo']
+        if escopo == 'GLOBAL':
+            return True
+        if escopo == 'INSTANCE':
+            return self.instance_id is not None and row.get('instance_id') == self.instance_id
+        return self.user_id is not None and row.get('user_id') == self.user_id
+
+    def _resolve(self, key: str):
+        """Recalcula o valor efetivo de uma chave a partir das camadas"""
+        layers = self._layers.get(key)
+        if not layers:
+            self._values.pop(key, None)
+            return
+        self._values[key] = layers[max(layers, key=SCOPE_PRECEDENCE.__getitem__)]
+
+    def reload(self):
+        """Recarrega todas as entradas"""
+        with self._lock:
+            self.__dict__['_pending'] = []
+        try:
+            rows = self._manager.get_scoped_configs(self.tela, self.instance_id, self.user_id)
+        except Exception:
+            with self._lock:
+                self.__dict__['_pending'] = None
+            raise
+
+        layers: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            layers.setdefault(self._key(row), {})[row['escopo']] = decode_config_value(row)
+
+        values = {
+            key: scopes[max(scopes, key=SCOPE_PRECEDENCE.__getitem__)]
+            for key, scopes in layers.items()
+        }
+
+        with self._lock:
+            self.__dict__['_layers'] = layers
+            self.__dict__['_values'] = values
+            # Reaplicar é idempotente: alterações já contidas na leitura não mudam nada
+            pending = self._pending
+            self.__dict__['_pending'] = None
+            for change in pending:
+                self._apply(change)
+
+    def apply_change(self, change: Dict[str, Any]):
+        """Aplica uma linha de configurations_history (callback do ConfigWatcher)"""
+        if not self._applies_to(change):
+            return
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(change)
+            else:
+                self._apply(change)
+
+    def _apply(self, change: Dict[str, Any]):
+        key = self._key(change)
+
+        if change.get('operacao') == 'DELETE':
+            self._layers.get(key, {}).pop(change['escopo'], None)
+        else:
+            tipo = ConfigType(change['tipo'])
+            valor = self._manager._convert_value(change['valor_novo'], tipo)
+            self._layers.setdefault(key, {})[change['escopo']] = valor
+
+        self._resolve(key)
+
+    def close(self):
+        """Cancela a assinatura de alterações"""
+        if self._finalizer is not None:
+            self._finalizer()
+            self.__dict__['_finalizer'] = None
+            self.__dict__['_subscription_id'] = None
+
+    def __enter__(self) -> 'ConfigView':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f"ConfigView(tela={self.tela!r}, instance_id={self.instance_id!r}, user_id={self.user_id!r}, {len(self)} itens)"
@@ -0,0 +1,271 @@
+import re
+import time
+import fnmatch
+import threading
+import itertools
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from src.utils.database import DatabaseManager
+from config.settings import settings
+
+# =====================================================
+# OBSERVADOR DE ALTERAÇÕES DE CONFIGURAÇÃO
+# =====================================================
+
+ConfigCallback = Callable[[Dict[str, Any]], None]
+
+class ConfigWatcher:
+    """
+    Observa a tabela configurations_history e notifica assinantes
+
+    Uma única thread lê o histórico de forma incremental (id > último id lido)
+    e distribui cada alteração aos callbacks cujo padrão casa com 'TELA.nome'.
+    O custo por intervalo é sempre uma consulta, independente do número de
+    assinantes.
+
+    Com escritores concorrentes, um id menor pode ser confirmado depois de um
+    maior (o AUTO_INCREMENT é reservado antes do commit). Ids pulados na
+    leitura ficam como lacunas e são consultados de novo a cada intervalo até
+    aparecerem ou passarem de gap_timeout segundos (transação desfeita);
+    essas alterações chegam fora da ordem de id.
+
+    Usage:
+        watcher.subscribe('SERVIDOR.*', lambda change: print(change['valor_novo']))
+    """
+
+    def __init__(
+        self,
+        poll_interval: Optional[float] = None,
+        batch_size: int = 500,
+        gap_timeout: Optional[float] = None,
+        max_gaps: int = 1000
+    ):
+        self.poll_interval = poll_interval or settings.CONFIG_POLL_INTERVAL
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout if gap_timeout is not None else settings.CONFIG_GAP_TIMEOUT
+        self.max_gaps = max_gaps
+        self.last_id: Optional[int] = None
+        # id ainda não visto -> instante em que a lacuna foi notada
+        self._gaps: Dict[int, float] = {}
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._exact: Dict[str, Dict[int, ConfigCallback]] = {}
+        self._wildcards: Dict[int, Tuple[str, Any, ConfigCallback]] = {}
+        self._match_cache: Dict[str, List[int]] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ----- Assinaturas -----
+
+    def subscribe(self, pattern: str, callback: ConfigCallback) -> int:
+        """
+        Registra um callback para alterações que casem com o padrão
+
+        Args:
+            pattern: 'TELA.nome', aceita curingas do fnmatch ('SERVIDOR.*', '*')
+            callback: Recebe a linha do histórico (dict) de cada alteração
+
+        Returns:
+            ID da assinatura (usado em unsubscribe)
+        """
+        subscription_id = next(self._ids)
+
+        with self._lock:
+            if any(char in pattern for char in '*?['):
+                regex = re.compile(fnmatch.translate(pattern))
+                self._wildcards[subscription_id] = (pattern, regex, callback)
+            else:
+                self._exact.setdefault(pattern, {})[subscription_id] = callback
+            self._match_cache.clear()
+
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        """Remove uma assinatura"""
+        with self._lock:
+            self._match_cache.clear()
+
+            if self._wildcards.pop(subscription_id, None):
+                return True
+
+            for pattern, callbacks in list(self._exact.items()):
+                if callbacks.pop(subscription_id, None):
+                    if not callbacks:
+                        del self._exact[pattern]
+                    return True
+
+        return False
+
+    def subscriber_count(self) -> int:
+        """Retorna o total de assinaturas ativas"""
+        with self._lock:
+            return len(self._wildcards) + sum(len(c) for c in self._exact.values())
+
+    def _callbacks_for(self, key: str) -> List[ConfigCallback]:
+        """Retorna os callbacks que casam com a chave 'TELA.nome'"""
+        with self._lock:
+            # Curingas são avaliados uma vez por chave e ficam em cache
+            wildcard_ids = self._match_cache.get(key)
+            if wildcard_ids is None:
+                wildcard_ids = [
+                    subscription_id
+                    for subscription_id, (_, regex, _) in self._wildcards.items()
+                    if regex.match(key)
+                ]
+                self._match_cache[key] = wildcard_ids
+
+            callbacks = list(self._exact.get(key, {}).values())
+            callbacks.extend(self._wildcards[i][2] for i in wildcard_ids)
+            return callbacks
+
+    # ----- Leitura do histórico -----
+
+    def _fetch_last_id(self) -> int:
+        """Retorna o maior id atual do histórico"""
+        query = "SELECT COALESCE(MAX(id), 0) AS last_id FROM configurations_history"
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query)
+            result = cursor.fetchone()
+            return result['last_id'] if result else 0
+
+    def _fetch_changes(self) -> List[Dict]:
+        """Busca alterações posteriores ao último id lido"""
+        query = """
+        SELECT
+            id, config_id, nome, tela, escopo, instance_id, user_id,
+            tipo, operacao, valor_antigo, valor_novo, alterado_em, alterado_por
+        FROM configurations_history
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (self.last_id, self.batch_size))
+            return cursor.fetchall()
+
+    def _fetch_by_ids(self, ids: List[int]) -> List[Dict]:
+        """Busca as alterações com os ids informados (lacunas)"""
+        placeholders = ', '.join(['%s'] * len(ids))
+        query = f"""
+        SELECT
+            id, config_id, nome, tela, escopo, instance_id, user_id,
+            tipo, operacao, valor_antigo, valor_novo, alterado_em, alterado_por
+        FROM configurations_history
+        WHERE id IN ({placeholders})
+        ORDER BY id
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, tuple(ids))
+            return cursor.fetchall()
+
+    def dispatch(self, change: Dict[str, Any]) -> int:
+        """Entrega uma alteração aos assinantes e retorna quantos foram notificados"""
+        callbacks = self._callbacks_for(f"{change['tela']}.{change['nome']}")
+
+        for callback in callbacks:
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"Erro no callback de configuração {change['tela']}.{change['nome']}: {e}")
+
+        return len(callbacks)
+
+    def poll_once(self) -> int:
+        """
+        Lê as alterações pendentes e notifica os assinantes
+
+        Returns:
+            Número de alterações processadas
+        """
+        if self.last_id is None:
+            self.last_id = self._fetch_last_id()
+            return 0
+
+        # Lacunas de leituras anteriores que foram confirmadas depois
+        processed = self._poll_gaps()
+        while True:
+            changes = self._fetch_changes()
+
+            for change in changes:
+                self._track_gaps(change['id'])
+                self.last_id = change['id']
+                self.dispatch(change)
+
+            processed += len(changes)
+
+            if len(changes) < self.batch_size:
+                return processed
+
+    def _track_gaps(self, change_id: int):
+        """Registra os ids entre o último lido e change_id como lacunas"""
+        if change_id <= self.last_id + 1:
+            return
+        now = time.monotonic()
+        # Salto muito grande (ex.: auto_increment_increment): guarda só os mais recentes
+        start = max(self.last_id + 1, change_id - self.max_gaps)
+        for missing in range(start, change_id):
+            self._gaps.setdefault(missing, now)
+        while len(self._gaps) > self.max_gaps:
+            del self._gaps[min(self._gaps)]
+
+    def _poll_gaps(self) -> int:
+        """Entrega as lacunas que apareceram e descarta as vencidas"""
+        if not self._gaps:
+            return 0
+
+        found = self._fetch_by_ids(sorted(self._gaps))
+        for change in found:
+            self._gaps.pop(change['id'], None)
+            self.dispatch(change)
+
+        expired = time.monotonic() - self.gap_timeout
+        for missing in [i for i, noticed in self._gaps.items() if noticed < expired]:
+            del self._gaps[missing]
+
+        return len(found)
+
+    # ----- Thread de polling -----
+
+    def start(self):
+        """Inicia a thread de polling"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        # Posiciona no fim do histórico já na partida, se o banco estiver acessível
+        if self.last_id is None:
+            try:
+                self.last_id = self._fetch_last_id()
+            except Exception as e:
+                logger.warning(f"Histórico de configurações indisponível: {e}")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='ConfigWatcher', daemon=True
+        )
+        self._thread.start()
+        logger.info(f"ConfigWatcher iniciado (intervalo: {self.poll_interval}s)")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Interrompe a thread de polling"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Erro ao ler histórico de configurações: {e}")
+
+            self._stop_event.wait(self.poll_interval)
@@ -0,0 +1,45 @@
+from typing import Optional, Dict, Any, List
+from .base_repository import BaseRepository
+from src.utils.database import DatabaseManager
+
+class LayoutRepository(BaseRepository):
+    """Repositório de layouts (estações e trechos)"""
+
+    def __init__(self):
+        super().__init__('layout')
+
+    def find_by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        """Busca layout por código"""
+        query = f"SELECT * FROM {self.table_name} WHERE code = %s"
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (code,))
+            return cursor.fetchone()
+
+    def get_stations(self, layout_id: int) -> List[Dict[str, Any]]:
+        """Estações do layout, em ordem de id"""
+        query = """
+        SELECT id, code, x, y
+        FROM station
+        WHERE layout_id = %s
+        ORDER BY id
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (layout_id,))
+            return cursor.fetchall()
+
+    def get_paths(self, layout_id: int) -> List[Dict[str, Any]]:
+        """Trechos do layout com origem e destino definidos"""
+        query = """
+        SELECT id, code, from_station_id, to_station_id, length, bidirectional
+        FROM path
+        WHERE layout_id = %s
+          AND from_station_id IS NOT NULL
+          AND to_station_id IS NOT NULL
+        ORDER BY id
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (layout_id,))
+            return cursor.fetchall()
@@ -0,0 +1,75 @@
+from typing import Dict, Any, List, Tuple
+from .agv_repository import AGV_BUSY, AGV_IDLE
+from .base_repository import BaseRepository
+from src.utils.database import DatabaseManager
+from mysql.connector import Error
+from loguru import logger
+
+MISSION_PENDING = 'pending'
+MISSION_ASSIGNED = 'assigned'
+
+class MissionRepository(BaseRepository):
+    """Repositório de missões de transporte"""
+
+    def __init__(self):
+        super().__init__('mission')
+
+    def find_pending(self, layout_id: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Missões pendentes do layout (maior prioridade e mais antigas primeiro)"""
+        query = f"""
+        SELECT id, code, pickup_station_id, dropoff_station_id, priority, created_at
+        FROM {self.table_name}
+        WHERE layout_id = %s AND status = %s
+        ORDER BY priority DESC, created_at, id
+        LIMIT %s
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (layout_id, MISSION_PENDING, limit))
+            return cursor.fetchall()
+
+    def assign_batch(self, assignments: List[Tuple[int, int]]) -> int:
+        """
+        Grava as atribuições (mission_id, agv_id) de um ciclo numa transação
+
+        Missões que deixaram de estar pendentes no meio do ciclo são
+        ignoradas, assim como seus AGVs. O mesmo vale para AGVs que deixaram
+        de estar livres (outro despachante, operador): a missão volta ao
+        estado anterior (savepoint) e continua pendente.
+
+        Returns:
+            Número de missões atribuídas
+        """
+        if not assignments:
+            return 0
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            try:
+                assigned = 0
+                for mission_id, agv_id in assignments:
+                    cursor.execute("SAVEPOINT assignment")
+                    cursor.execute(
+                        f"""
+                        UPDATE {self.table_name}
+                        SET status = %s, agv_id = %s, assigned_at = CURRENT_TIMESTAMP
+                        WHERE id = %s AND status = %s
+                        """,
+                        (MISSION_ASSIGNED, agv_id, mission_id, MISSION_PENDING)
+                    )
+                    if not cursor.rowcount:
+                        continue
+                    cursor.execute(
+                        "UPDATE agv SET status = %s WHERE id = %s AND status = %s",
+                        (AGV_BUSY, agv_id, AGV_IDLE)
+                    )
+                    if not cursor.rowcount:
+                        cursor.execute("ROLLBACK TO SAVEPOINT assignment")
+                        continue
+                    assigned += 1
+                conn.commit()
+                return assigned
+
+            except Error as e:
+                conn.rollback()
+                logger.error(f"✗ Erro ao gravar atribuições: {e}")
+                raise
@@ -0,0 +1,48 @@
+from typing import Optional, Dict, Any, List
+from .base_repository import BaseRepository
+from src.utils.database import DatabaseManager
+
+class TelemetryRepository(BaseRepository):
+    """Repositório de lotes comprimidos de telemetria dos AGVs"""
+
+    def __init__(self):
+        super().__init__('agv_telemetry')
+
+    def insert_batch(self, ts_start: float, ts_end: float, samples: int, codec: str, payload: bytes) -> int:
+        """Grava um lote (uma linha por flush, não por amostra)"""
+        query = f"""
+        INSERT INTO {self.table_name} (ts_start, ts_end, samples, codec, payload)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (ts_start, ts_end, samples, codec, payload))
+            conn.commit()
+            return cursor.lastrowid
+
+    def find_batches(self, since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Lotes que se sobrepõem ao intervalo [since, until), em ordem de gravação"""
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("ts_end >= %s")
+            params.append(since)
+        if until is not None:
+            conditions.append("ts_start < %s")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"SELECT codec, payload FROM {self.table_name} {where} ORDER BY id"
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, tuple(params))
+            return cursor.fetchall()
+
+    def delete_before(self, ts: float) -> int:
+        """Remove lotes inteiramente anteriores a ts (retenção)"""
+        query = f"DELETE FROM {self.table_name} WHERE ts_end < %s"
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (ts,))
+            conn.commit()
+            return cursor.rowcount
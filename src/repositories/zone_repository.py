@@ -0,0 +1,36 @@
+from typing import Dict, Any, List
+from .base_repository import BaseRepository
+from src.utils.database import DatabaseManager
+
+class ZoneRepository(BaseRepository):
+    """Repositório de zonas de intertravamento (cruzamentos, corredores)"""
+
+    def __init__(self):
+        super().__init__('zone')
+
+    def find_by_layout(self, layout_id: int) -> List[Dict[str, Any]]:
+        """Zonas do layout, em ordem de código"""
+        query = f"""
+        SELECT id, code, capacity, policy
+        FROM {self.table_name}
+        WHERE layout_id = %s
+        ORDER BY code
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (layout_id,))
+            return cursor.fetchall()
+
+    def get_stations(self, layout_id: int) -> List[Dict[str, Any]]:
+        """Pares (código da zona, estação) das zonas do layout"""
+        query = f"""
+        SELECT z.code AS zone_code, zs.station_id
+        FROM {self.table_name} z
+        JOIN zone_station zs ON zs.zone_id = z.id
+        WHERE z.layout_id = %s
+        ORDER BY z.code, zs.station_id
+        """
+
+        with DatabaseManager.get_cursor() as (cursor, conn):
+            cursor.execute(query, (layout_id,))
+            return cursor.fetchall()
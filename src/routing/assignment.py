@@ -0,0 +1,147 @@
+"""
+Atribuição de custo mínimo (linhas -> colunas) sobre uma matriz NumPy
+
+hungarian() é o algoritmo húngaro na forma de caminhos aumentantes mínimos
+(potenciais u/v), O(n² m): a cada linha inserida, cada passo atualiza
+todas as colunas de uma vez com NumPy. Matrizes retangulares são aceitas;
+com mais linhas que colunas resolve a transposta.
+
+greedy() é a heurística limitada para frotas grandes: considera só os
+candidates menores custos de cada linha (argpartition) e atribui os pares
+em ordem crescente de custo, O(n m) por passada.
+
+Custo inf marca pares impossíveis (ex.: sem rota) e nunca é atribuído.
+
+Usage:
+    rows, cols = hungarian(cost)           # cost[agv, missão]
+    total = cost[rows, cols].sum()
+"""
+import numpy as np
+
+from typing import Tuple
+
+def _finite(cost: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Troca inf por um custo maior que qualquer atribuição finita"""
+    finite = np.isfinite(cost)
+    if finite.all():
+        return cost, np.inf
+    largest = np.abs(cost[finite]).max() if finite.any() else 0.0
+    big = (2 * largest + 1.0) * (min(cost.shape) + 1)
+    return np.where(finite, cost, big), big
+
+def _pairs(cost: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pares ordenados por linha, sem os de custo inf"""
+    order = np.argsort(rows, kind='stable')
+    rows, cols = rows[order], cols[order]
+    keep = np.isfinite(cost[rows, cols])
+    return rows[keep], cols[keep]
+
+def hungarian(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Atribuição ótima: cada linha recebe no máximo uma coluna e vice-versa,
+    com o maior número possível de pares e, entre eles, custo total mínimo
+
+    Returns:
+        (linhas, colunas) atribuídas, ordenadas por linha
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.ndim != 2:
+        raise ValueError("A matriz de custos deve ter duas dimensões")
+    if cost.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = hungarian(cost.T)
+        return _pairs(cost, rows, cols)
+
+    matrix, _ = _finite(cost)
+    n, m = matrix.shape
+    # Índice 0 é a coluna/linha fictícia do algoritmo; as reais começam em 1
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.intp)      # coluna -> linha (0 = livre)
+    way = np.zeros(m + 1, dtype=np.intp)
+
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        while owner[column] != 0:
+            used[column] = True
+            current = owner[column]
+            reduced = matrix[current - 1] - u[current] - v[1:]
+
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = column
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            following = int(np.argmin(candidates)) + 1
+            delta = candidates[following - 1]
+
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_reduced[~used] -= delta
+            column = following
+
+        # Inverte o caminho aumentante até a coluna fictícia
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    cols = np.flatnonzero(owner[1:])
+    rows = owner[cols + 1] - 1
+    return _pairs(cost, rows, cols)
+
+def greedy(cost: np.ndarray, candidates: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Atribuição heurística: pares de menor custo primeiro, olhando só os
+    candidates melhores de cada linha (novas passadas para quem sobrar)
+
+    Returns:
+        (linhas, colunas) atribuídas, ordenadas por linha
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.ndim != 2:
+        raise ValueError("A matriz de custos deve ter duas dimensões")
+    n, m = cost.shape
+    row_free = np.ones(n, dtype=bool)
+    col_free = np.ones(m, dtype=bool)
+    assigned_rows, assigned_cols = [], []
+
+    while row_free.any() and col_free.any():
+        open_rows = np.flatnonzero(row_free)
+        open_cols = np.flatnonzero(col_free)
+        block = cost[np.ix_(open_rows, open_cols)]
+
+        k = min(candidates, len(open_cols))
+        if k < len(open_cols):
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(k), (len(open_rows), k))
+        pair_rows = np.repeat(np.arange(len(open_rows)), k)
+        pair_cols = nearest.ravel()
+        pair_costs = block[pair_rows, pair_cols]
+        keep = np.isfinite(pair_costs)
+        pair_rows, pair_cols, pair_costs = pair_rows[keep], pair_cols[keep], pair_costs[keep]
+        if not len(pair_costs):
+            break
+
+        progress = False
+        for position in np.argsort(pair_costs, kind='stable').tolist():
+            row = open_rows[pair_rows[position]]
+            col = open_cols[pair_cols[position]]
+            if row_free[row] and col_free[col]:
+                row_free[row] = col_free[col] = False
+                assigned_rows.append(row)
+                assigned_cols.append(col)
+                progress = True
+
+        # Sem progresso só quando todos os candidatos restantes são inf
+        if not progress:
+            break
+
+    return _pairs(cost, np.array(assigned_rows, dtype=np.intp), np.array(assigned_cols, dtype=np.intp))
@@ -0,0 +1,452 @@
+"""
+Planejamento de rotas sem conflito para a frota (planejamento priorizado)
+
+Os AGVs são planejados um a um, em ordem de prioridade, sobre uma tabela de
+reservas no tempo: cada rota planejada reserva as estações (da chegada até
+a saída + folga) e os trechos (durante a travessia + folga), e os AGVs
+seguintes desviam ou esperam. A busca de cada AGV é um A* espaço-tempo com
+intervalos seguros (SIPP): o estado é (estação, intervalo livre da estação)
+em vez de (estação, instante), o que mantém a busca pequena mesmo com tempo
+contínuo e esperas.
+
+Enquanto não são planejados, os AGVs do ciclo ficam parados na origem desde
+o instante atual do ciclo (now) até a partida, mesmo com start_time
+posterior; quem tem como destino a origem de outro é planejado logo depois
+dele. Conflitos
+sem solução são resolvidos por repriorização: os AGVs que falharam passam
+para o início da fila e a rodada é refeita (até max_rounds ou o orçamento
+de tempo do ciclo).
+
+Usage:
+    planner = FleetPlanner(graph, route_service=service, clearance=1.0)
+    result = planner.plan([
+        PlanRequest('AGV-01', 'EST-01', 'EST-42', priority=2),
+        PlanRequest('AGV-02', 'EST-42', 'EST-07'),
+    ])
+    result.plans['AGV-01'].waypoints
+"""
+import heapq
+import math
+import time
+
+import numpy as np
+
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+from .layout_graph import LayoutGraph
+from .reservation import ReservationTable
+from .shortest_path import heuristic_scale
+
+INF = math.inf
+
+class PlanRequest:
+    """Pedido de rota de um AGV (estações por código, tempo em segundos)"""
+
+    __slots__ = ('agv', 'origin', 'destination', 'start_time', 'priority', 'speed')
+
+    def __init__(
+        self,
+        agv: Hashable,
+        origin: str,
+        destination: str,
+        start_time: float = 0.0,
+        priority: int = 0,
+        speed: float = 1.0
+    ):
+        if speed <= 0:
+            raise ValueError(f"Velocidade inválida para {agv}: {speed}")
+        self.agv = agv
+        self.origin = origin
+        self.destination = destination
+        self.start_time = start_time
+        self.priority = priority
+        self.speed = speed
+
+    def __repr__(self):
+        return f"PlanRequest({self.agv}: {self.origin} -> {self.destination}, t={self.start_time:g})"
+
+class Waypoint:
+    """Passagem por uma estação: chegada e saída"""
+
+    __slots__ = ('station', 'arrive', 'depart')
+
+    def __init__(self, station: str, arrive: float, depart: float):
+        self.station = station
+        self.arrive = arrive
+        self.depart = depart
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'station': self.station, 'arrive': self.arrive, 'depart': self.depart}
+
+    def __repr__(self):
+        return f"Waypoint({self.station}, {self.arrive:g}-{self.depart:g})"
+
+class AgvPlan:
+    """Rota de um AGV no tempo"""
+
+    __slots__ = ('agv', 'waypoints', 'indices')
+
+    def __init__(self, agv: Hashable, waypoints: List[Waypoint], indices: List[int]):
+        self.agv = agv
+        self.waypoints = waypoints
+        self.indices = indices
+
+    @property
+    def stations(self) -> List[str]:
+        return [waypoint.station for waypoint in self.waypoints]
+
+    @property
+    def arrival(self) -> float:
+        return self.waypoints[-1].arrive
+
+    @property
+    def wait_time(self) -> float:
+        """Tempo parado em estações intermediárias (esperando reservas)"""
+        return sum(w.depart - w.arrive for w in self.waypoints[1:-1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'agv': self.agv, 'arrival': self.arrival, 'waypoints': [w.to_dict() for w in self.waypoints]}
+
+class PlanningResult:
+    """Resultado de um ciclo de planejamento"""
+
+    def __init__(self):
+        self.plans: Dict[Hashable, AgvPlan] = {}
+        self.failed: List[PlanRequest] = []
+        self.rounds = 0
+        self.expansions = 0
+        self.elapsed_ms = 0.0
+        self.budget_exceeded = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'planned': len(self.plans),
+            'failed': [request.agv for request in self.failed],
+            'rounds': self.rounds,
+            'expansions': self.expansions,
+            'elapsed_ms': round(self.elapsed_ms, 3),
+            'budget_exceeded': self.budget_exceeded,
+        }
+
+class FleetPlanner:
+    """
+    Planejador priorizado com tabela de reservas
+
+    A tabela persiste entre ciclos: rotas já em execução continuam
+    reservadas até release() (ou até serem replanejadas). O AGV que chega ao
+    destino fica estacionado lá por park_time (inf = até o próximo plano).
+    """
+
+    def __init__(
+        self,
+        graph: LayoutGraph,
+        route_service=None,
+        clearance: float = 1.0,
+        park_time: float = INF,
+        max_expansions: int = 50000,
+        max_rounds: int = 3
+    ):
+        # Intervalos de comprimento zero não são reservados: sem folga os AGVs se atravessariam
+        if clearance <= 0:
+            raise ValueError(f"Folga inválida: {clearance} (deve ser positiva)")
+        self.graph = graph
+        self.route_service = route_service
+        self.clearance = clearance
+        self.park_time = park_time
+        self.max_expansions = max_expansions
+        self.max_rounds = max_rounds
+        self.table = ReservationTable()
+
+    # ----- Ciclo de planejamento -----
+
+    def plan(
+        self,
+        requests: Iterable[PlanRequest],
+        time_budget: Optional[float] = None,
+        now: Optional[float] = None
+    ) -> PlanningResult:
+        """
+        Planeja os pedidos em ordem de prioridade (maior primeiro)
+
+        time_budget (segundos) limita o ciclo: AGVs não planejados a tempo
+        ficam em failed e continuam parados na origem. now é o instante
+        atual (padrão: o menor start_time do ciclo); a origem de cada AGV
+        fica reservada desde ele, não só a partir do start_time do pedido.
+        """
+        started = time.perf_counter()
+        deadline = started + time_budget if time_budget is not None else INF
+        requests = list(requests)
+        if now is None:
+            now = min((request.start_time for request in requests), default=0.0)
+        order = sorted(requests, key=lambda r: (-r.priority, r.start_time))
+        result = PlanningResult()
+        scale = heuristic_scale(self.graph)
+
+        cycle = {request.agv for request in requests}
+
+        for _ in range(self.max_rounds):
+            result.rounds += 1
+            result.plans.clear()
+            result.failed = []
+
+            # Todos os AGVs do ciclo começam parados na origem
+            for request in requests:
+                self.table.release(request.agv, after=request.start_time)
+            for request in requests:
+                self._park(request, now)
+
+            # AGV cujo destino está ocupado por outro do ciclo espera o plano dele
+            pending = deque(order)
+            waiting: Dict[Hashable, List[PlanRequest]] = {}
+            while pending:
+                request = pending.popleft()
+                if time.perf_counter() > deadline:
+                    result.budget_exceeded = True
+                    result.failed.append(request)
+                    continue
+                blockers = [
+                    agv for agv in self._parked_at(request.destination, request.agv)
+                    if agv in cycle and agv not in result.plans
+                ]
+                if blockers:
+                    waiting.setdefault(blockers[0], []).append(request)
+                    continue
+                plan = self._plan_one(request, scale, result)
+                if plan is None:
+                    result.failed.append(request)
+                    continue
+                self.table.release(request.agv, after=request.start_time)
+                self._reserve(request, plan, now)
+                result.plans[request.agv] = plan
+                pending.extendleft(reversed(waiting.pop(request.agv, [])))
+
+            # Ciclos de espera (ex.: dois AGVs trocando de posição) não têm solução
+            for dependents in waiting.values():
+                result.failed.extend(dependents)
+
+            if not result.failed or result.budget_exceeded:
+                break
+
+            # Repriorização: quem falhou passa à frente na próxima rodada
+            failed = {request.agv for request in result.failed}
+            order = result.failed + [request for request in order if request.agv not in failed]
+
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def plan_fleet(
+        self,
+        destinations: Dict[str, str],
+        start_time: float = 0.0,
+        priorities: Optional[Dict[str, int]] = None,
+        time_budget: Optional[float] = None,
+        repository=None
+    ) -> PlanningResult:
+        """
+        Planeja os AGVs do layout (tabela agv) para os destinos informados
+
+        destinations: código do AGV -> código da estação de destino. A origem
+        é a estação atual (station_id) e a velocidade vem de speed.
+        """
+        if repository is None:
+            from src.repositories.agv_repository import AgvRepository
+            repository = AgvRepository()
+
+        priorities = priorities or {}
+        requests = []
+        for row in repository.find_by_layout(self.graph.layout_id):
+            code = row['code']
+            if code not in destinations or row.get('station_id') is None:
+                continue
+            origin = self.graph.code_of(self.graph.index_of_id(row['station_id']))
+            requests.append(PlanRequest(
+                code, origin, destinations[code], start_time,
+                priorities.get(code, 0), row.get('speed') or 1.0
+            ))
+        return self.plan(requests, time_budget)
+
+    def _parked_at(self, station: str, agv: Hashable) -> List[Hashable]:
+        """AGVs (exceto agv) parados indefinidamente na estação"""
+        intervals = self.table.stations.get(self.graph.index_of(station))
+        if intervals is None:
+            return []
+        return [owner for owner, end in zip(intervals.owners, intervals.ends) if end == INF and owner != agv]
+
+    def release(self, agv: Hashable, after: float = -INF) -> int:
+        """Libera as reservas do AGV (missão cancelada, AGV fora de operação)"""
+        return self.table.release(agv, after)
+
+    def prune(self, now: float) -> int:
+        """Descarta reservas encerradas antes de now"""
+        return self.table.prune(now)
+
+    # ----- Reservas -----
+
+    def _occupied_since(self, origin: int, request: PlanRequest, now: float) -> float:
+        """Início da ocupação da origem: now, ou a partida se um plano antigo de outro AGV passa antes"""
+        since = min(now, request.start_time)
+        if self.table.station(origin).is_free(since, request.start_time, request.agv):
+            return since
+        return request.start_time
+
+    def _park(self, request: PlanRequest, now: float):
+        origin = self.graph.index_of(request.origin)
+        since = self._occupied_since(origin, request, now)
+        if self.table.station(origin).is_free(since, INF, request.agv):
+            self.table.reserve_station(origin, since, INF, request.agv)
+
+    def _reserve(self, request: PlanRequest, plan: AgvPlan, now: float):
+        clearance = self.clearance
+        owner = request.agv
+        waypoints = plan.waypoints
+
+        for k, (index, waypoint) in enumerate(zip(plan.indices, waypoints)):
+            leave = waypoint.depart + clearance if waypoint.depart < INF else INF
+            # O AGV já está na origem antes da partida
+            arrive = self._occupied_since(index, request, now) if k == 0 else waypoint.arrive
+            self.table.reserve_station(index, arrive, leave, owner)
+            if k + 1 < len(waypoints):
+                next_index = plan.indices[k + 1]
+                self.table.reserve_segment(
+                    index, next_index, waypoint.depart, waypoints[k + 1].arrive + clearance, owner
+                )
+
+    # ----- Busca SIPP -----
+
+    def _heuristic(self, goal: int, speed: float, scale: float) -> List[float]:
+        """Tempo mínimo até o destino: matriz de distâncias (exata) ou distância reta"""
+        matrix = getattr(self.route_service, 'matrix', None)
+        if matrix is not None:
+            distances = np.asarray(matrix.distances[:, goal])
+        else:
+            graph = self.graph
+            distances = scale * np.hypot(graph.x - graph.x[goal], graph.y - graph.y[goal])
+        return (distances / speed).tolist()
+
+    def _plan_one(self, request: PlanRequest, scale: float, result: PlanningResult) -> Optional[AgvPlan]:
+        graph = self.graph
+        table = self.table
+        indptr, indices, weights = graph.adjacency()
+        clearance = self.clearance
+        owner = request.agv
+        speed = request.speed
+        origin = graph.index_of(request.origin)
+        goal = graph.index_of(request.destination)
+        heuristic = self._heuristic(goal, speed, scale)
+        if heuristic[origin] == INF or not self._goal_available(goal, owner):
+            return None
+
+        # Intervalo livre da origem que contém o instante de partida
+        start_gap = next(table.station(origin).free_intervals(owner, request.start_time), None)
+        if start_gap is None or start_gap[0] > request.start_time:
+            return None
+
+        stations = table.stations
+        segments = table.segments
+        segment_key = table.segment_key
+
+        start = (origin, start_gap[1])
+        best = {start: request.start_time}
+        parents: Dict[Tuple[int, float], Tuple[Tuple[int, float], float]] = {}
+        heap = [(request.start_time + heuristic[origin], request.start_time, origin, start_gap[1])]
+        expansions = 0
+
+        while heap:
+            _, arrival, node, gap_end = heapq.heappop(heap)
+            state = (node, gap_end)
+            if best.get(state, INF) < arrival:
+                continue
+
+            if node == goal and self._can_park(arrival, gap_end):
+                result.expansions += expansions
+                return self._build_plan(request, state, arrival, parents, best)
+
+            expansions += 1
+            if expansions > self.max_expansions:
+                break
+
+            # Precisa sair da estação antes da próxima reserva dela (com folga)
+            latest_depart = gap_end - clearance
+
+            for position in range(indptr[node], indptr[node + 1]):
+                weight = weights[position]
+                if weight == INF:
+                    continue
+                neighbor = indices[position]
+                duration = weight / speed
+                segment = segments.get(segment_key(node, neighbor))
+                neighbor_intervals = stations.get(neighbor)
+                gaps = (
+                    neighbor_intervals.free_intervals(owner, arrival + duration)
+                    if neighbor_intervals is not None else ((0.0, INF),)
+                )
+
+                for gap_start, next_gap_end in gaps:
+                    if gap_start - duration > latest_depart:
+                        break
+                    depart = self._departure(
+                        segment, owner, max(arrival, gap_start - duration), duration, latest_depart, next_gap_end
+                    )
+                    if depart is None:
+                        continue
+
+                    successor = (neighbor, next_gap_end)
+                    reach = depart + duration
+                    if reach < best.get(successor, INF):
+                        best[successor] = reach
+                        parents[successor] = (state, depart)
+                        heapq.heappush(heap, (reach + heuristic[neighbor], reach, neighbor, next_gap_end))
+
+        result.expansions += expansions
+        return None
+
+    def _departure(
+        self, segment, owner: Hashable, depart: float, duration: float, latest_depart: float, gap_end: float
+    ) -> Optional[float]:
+        """
+        Primeira saída >= depart com o trecho livre durante a travessia e
+        chegada dentro do intervalo livre do destino (None se não houver)
+        """
+        clearance = self.clearance
+        while depart <= latest_depart:
+            reach = depart + duration
+            if reach + clearance > gap_end:
+                return None
+            conflict = segment.conflict(depart, reach + clearance, owner) if segment is not None else None
+            if conflict is None:
+                return depart
+            depart = segment.ends[conflict]
+        return None
+
+    def _goal_available(self, goal: int, owner: Hashable) -> bool:
+        """Sem espera indefinida, o destino ocupado para sempre por outro AGV é inalcançável"""
+        intervals = self.table.stations.get(goal)
+        if self.park_time != INF or intervals is None or not intervals.ends:
+            return True
+        return intervals.ends[-1] < INF or intervals.owners[-1] == owner
+
+    def _can_park(self, arrival: float, gap_end: float) -> bool:
+        if self.park_time == INF:
+            return gap_end == INF
+        return gap_end - arrival >= self.park_time + self.clearance
+
+    def _build_plan(self, request: PlanRequest, state, arrival: float, parents, best) -> AgvPlan:
+        indices = [state[0]]
+        arrivals = [arrival]
+        departs = [arrival + self.park_time]
+
+        while state in parents:
+            state, depart = parents[state]
+            indices.append(state[0])
+            arrivals.append(best[state])
+            departs.append(depart)
+
+        indices.reverse()
+        arrivals.reverse()
+        departs.reverse()
+
+        waypoints = [
+            Waypoint(self.graph.code_of(index), arrive, depart)
+            for index, arrive, depart in zip(indices, arrivals, departs)
+        ]
+        return AgvPlan(request.agv, waypoints, indices)
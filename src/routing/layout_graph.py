@@ -0,0 +1,382 @@
+"""
+Grafo do layout em arrays contíguos
+
+As estações de um layout viram índices 0..n-1 (na ordem de id) e os trechos
+viram arestas dirigidas em formato CSR: as arestas que saem da estação i
+ocupam as posições indptr[i]:indptr[i+1] de indices (destino), weights
+(comprimento) e path_ids (id do trecho em path). Trechos bidirecionais geram
+uma aresta em cada sentido. Trechos repetidos entre as mesmas estações
+viram uma única aresta com o peso do mais curto, mas cada trecho continua
+registrado: bloquear o mais curto faz a aresta passar para o próximo.
+
+A estrutura (indptr/indices) é fixa; os pesos podem mudar em tempo real:
+base_weights guarda o comprimento do trecho mais curto liberado e weights o
+peso efetivo (inf enquanto a aresta ou todos os seus trechos estiverem
+bloqueados).
+
+Usage:
+    graph = LayoutGraph.get('LAYOUT-01')         # carrega uma vez e reaproveita
+    origem = graph.index_of('EST-01')
+    destinos, comprimentos = graph.neighbors(origem)
+"""
+import hashlib
+import threading
+
+import numpy as np
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from src.routing.spatial_index import SpatialGrid
+from src.utils.exceptions import LayoutGraphError, RecordNotFoundError
+
+LayoutRef = Union[int, str]
+
+# Menor comprimento de aresta: trechos de comprimento zero (estações na mesma
+# posição) criariam ciclos de custo zero nas rotas
+MIN_LENGTH = 1e-6
+
+class LayoutGraph:
+    """Estações e trechos de um layout em CSR"""
+
+    _cache: Dict[int, 'LayoutGraph'] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(
+        self,
+        station_ids: np.ndarray,
+        station_codes: List[str],
+        x: np.ndarray,
+        y: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray,
+        path_ids: np.ndarray,
+        layout_id: Optional[int] = None,
+        layout_code: Optional[str] = None,
+        alternatives: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+    ):
+        self.layout_id = layout_id
+        self.layout_code = layout_code
+        self.station_ids = station_ids
+        self.station_codes = station_codes
+        self.x = x
+        self.y = y
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.base_weights = weights.copy()
+        self.blocked = np.zeros(len(indices), dtype=bool)
+        self.path_ids = path_ids
+        # Trechos de cada aresta (aresta, id do trecho, comprimento), ordenados por aresta
+        if alternatives is None:
+            alternatives = (np.arange(len(indices), dtype=np.int32), path_ids.copy(), weights.copy())
+        self._alt_edges, self._alt_path_ids, self._alt_lengths = alternatives
+        self._alt_blocked = np.zeros(len(self._alt_edges), dtype=bool)
+        self._alt_indptr = np.zeros(len(indices) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self._alt_edges, minlength=len(indices)), out=self._alt_indptr[1:])
+        self._index_by_code = {code: i for i, code in enumerate(station_codes)}
+        self._index_by_id = {int(station_id): i for i, station_id in enumerate(station_ids)}
+        self._adjacency = None
+        self._station_index = None
+
+    # ----- Construção -----
+
+    @classmethod
+    def from_rows(
+        cls,
+        stations: Iterable[Dict[str, Any]],
+        paths: Iterable[Dict[str, Any]],
+        layout: Optional[Dict[str, Any]] = None
+    ) -> 'LayoutGraph':
+        """
+        Monta o grafo a partir das linhas de station e path
+
+        stations: id, code, x, y
+        paths: id, from_station_id, to_station_id, length (None = euclidiana),
+               bidirectional
+        """
+        stations = sorted(stations, key=lambda row: row['id'])
+        station_ids = np.fromiter((row['id'] for row in stations), dtype=np.int64, count=len(stations))
+        station_codes = [row['code'] for row in stations]
+        x = np.fromiter((row.get('x') or 0.0 for row in stations), dtype=np.float64, count=len(stations))
+        y = np.fromiter((row.get('y') or 0.0 for row in stations), dtype=np.float64, count=len(stations))
+
+        if len(set(station_codes)) != len(station_codes):
+            raise LayoutGraphError("Códigos de estação repetidos no layout")
+
+        index_by_id = {int(station_id): i for i, station_id in enumerate(station_ids)}
+        sources, targets, lengths, path_ids = [], [], [], []
+
+        for row in paths:
+            try:
+                source = index_by_id[row['from_station_id']]
+                target = index_by_id[row['to_station_id']]
+            except KeyError:
+                raise LayoutGraphError(f"Trecho {row.get('code', row['id'])} liga estação fora do layout")
+
+            length = row.get('length')
+            if length is not None and length < 0:
+                raise LayoutGraphError(f"Trecho {row.get('code', row['id'])} com comprimento negativo")
+
+            sources.append(source)
+            targets.append(target)
+            lengths.append(np.nan if length is None else float(length))
+            path_ids.append(row['id'])
+
+            if row.get('bidirectional', True):
+                sources.append(target)
+                targets.append(source)
+                lengths.append(lengths[-1])
+                path_ids.append(row['id'])
+
+        indptr, indices, weights, edge_paths, alternatives = cls._build_csr(
+            len(stations),
+            np.asarray(sources, dtype=np.int32),
+            np.asarray(targets, dtype=np.int32),
+            np.asarray(lengths, dtype=np.float64),
+            np.asarray(path_ids, dtype=np.int64),
+            x, y
+        )
+
+        layout = layout or {}
+        return cls(
+            station_ids, station_codes, x, y, indptr, indices, weights, edge_paths,
+            layout_id=layout.get('id'), layout_code=layout.get('code'), alternatives=alternatives
+        )
+
+    @staticmethod
+    def _build_csr(
+        n: int,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        lengths: np.ndarray,
+        path_ids: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        # Comprimento ausente = distância entre as estações
+        missing = np.isnan(lengths)
+        if missing.any():
+            dx = x[targets[missing]] - x[sources[missing]]
+            dy = y[targets[missing]] - y[sources[missing]]
+            lengths[missing] = np.hypot(dx, dy)
+        np.maximum(lengths, MIN_LENGTH, out=lengths)
+
+        keep = sources != targets
+        sources, targets, lengths, path_ids = sources[keep], targets[keep], lengths[keep], path_ids[keep]
+
+        # Ordena por origem, destino e comprimento; a primeira de cada par é a menor
+        order = np.lexsort((lengths, targets, sources))
+        sources, targets, lengths, path_ids = sources[order], targets[order], lengths[order], path_ids[order]
+        first = np.ones(len(sources), dtype=bool)
+        first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        # Todos os trechos ficam como alternativas da aresta do seu par
+        alternatives = (np.cumsum(first, dtype=np.int32) - 1, path_ids.copy(), lengths.copy())
+        sources, targets, lengths, path_ids = sources[first], targets[first], lengths[first], path_ids[first]
+
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        return indptr, targets, lengths, path_ids, alternatives
+
+    @classmethod
+    def load(cls, layout: LayoutRef, repository=None) -> 'LayoutGraph':
+        """Carrega o layout (id ou código) do banco"""
+        if repository is None:
+            from src.repositories.layout_repository import LayoutRepository
+            repository = LayoutRepository()
+
+        if isinstance(layout, str):
+            row = repository.find_by_code(layout)
+            if not row:
+                raise RecordNotFoundError(f"Layout '{layout}' não encontrado")
+        else:
+            row = repository.find_by_id(layout)
+
+        return cls.from_rows(repository.get_stations(row['id']), repository.get_paths(row['id']), layout=row)
+
+    @classmethod
+    def get(cls, layout: LayoutRef, repository=None, reload: bool = False) -> 'LayoutGraph':
+        """Grafo do layout, carregado do banco apenas na primeira chamada"""
+        with cls._cache_lock:
+            if not reload:
+                for graph in cls._cache.values():
+                    if layout in (graph.layout_id, graph.layout_code):
+                        return graph
+
+            graph = cls.load(layout, repository)
+            cls._cache[graph.layout_id] = graph
+            return graph
+
+    @classmethod
+    def invalidate(cls, layout: Optional[LayoutRef] = None):
+        """Descarta o grafo em cache (todos, se layout for None)"""
+        with cls._cache_lock:
+            if layout is None:
+                cls._cache.clear()
+                return
+            for layout_id, graph in list(cls._cache.items()):
+                if layout in (graph.layout_id, graph.layout_code):
+                    del cls._cache[layout_id]
+
+    # ----- Consulta -----
+
+    @property
+    def num_stations(self) -> int:
+        return len(self.station_codes)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    def index_of(self, code: str) -> int:
+        """Índice da estação pelo código"""
+        try:
+            return self._index_by_code[code]
+        except KeyError:
+            raise LayoutGraphError(f"Estação '{code}' não pertence ao layout")
+
+    def index_of_id(self, station_id: int) -> int:
+        """Índice da estação pelo id da tabela station"""
+        try:
+            return self._index_by_id[station_id]
+        except KeyError:
+            raise LayoutGraphError(f"Estação {station_id} não pertence ao layout")
+
+    def code_of(self, index: int) -> str:
+        return self.station_codes[index]
+
+    def neighbors(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Destinos e comprimentos das arestas que saem da estação (views, sem cópia)"""
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def edge_index(self, source: int, target: int) -> int:
+        """Posição da aresta source -> target nos arrays CSR (-1 se não existir)"""
+        start, end = self.indptr[source], self.indptr[source + 1]
+        position = start + int(np.searchsorted(self.indices[start:end], target))
+        if position < end and self.indices[position] == target:
+            return position
+        return -1
+
+    def edge_sources(self) -> np.ndarray:
+        """Origem de cada aresta (complementa indices)"""
+        return np.repeat(np.arange(self.num_stations, dtype=np.int32), np.diff(self.indptr))
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=self.num_stations)
+
+    def path_edges(self, path_id: int) -> np.ndarray:
+        """Arestas (posições CSR) de um trecho: uma ou duas, conforme o sentido"""
+        return np.unique(self._alt_edges[self._path_rows(path_id)])
+
+    def _path_rows(self, path_id: int) -> np.ndarray:
+        rows = np.flatnonzero(self._alt_path_ids == path_id)
+        if not len(rows):
+            raise LayoutGraphError(f"Trecho {path_id} não pertence ao layout")
+        return rows
+
+    def copy(self) -> 'LayoutGraph':
+        """
+        Cópia com pesos próprios
+
+        Estrutura, coordenadas e índice espacial são compartilhados (nunca
+        mudam); pesos, bloqueios e trechos escolhidos são copiados, então
+        bloquear na cópia não altera o grafo em cache de LayoutGraph.get.
+        """
+        graph = object.__new__(LayoutGraph)
+        graph.__dict__.update(self.__dict__)
+        for name in ('weights', 'base_weights', 'blocked', 'path_ids', '_alt_lengths', '_alt_blocked'):
+            setattr(graph, name, getattr(self, name).copy())
+        graph._adjacency = None
+        return graph
+
+    # ----- Pesos dinâmicos -----
+
+    def block_edges(self, edges: np.ndarray):
+        """Bloqueia as arestas (peso efetivo inf)"""
+        self.blocked[edges] = True
+        self.weights[edges] = np.inf
+        self._adjacency = None
+
+    def unblock_edges(self, edges: np.ndarray):
+        """Libera as arestas, voltando ao comprimento cadastrado"""
+        self.blocked[edges] = False
+        self.weights[edges] = self.base_weights[edges]
+        self._adjacency = None
+
+    def set_edge_lengths(self, edges: np.ndarray, lengths):
+        """Altera o comprimento das arestas, em todos os seus trechos (bloqueadas continuam com inf)"""
+        edges = np.asarray(edges)
+        lengths = np.broadcast_to(np.maximum(lengths, MIN_LENGTH), edges.shape)
+        for edge, length in zip(edges.tolist(), lengths.tolist()):
+            self._alt_lengths[self._alt_indptr[edge]:self._alt_indptr[edge + 1]] = length
+        self._refresh(edges)
+
+    def block_path(self, path_id: int) -> np.ndarray:
+        """Bloqueia um trecho; a aresta passa para o trecho paralelo mais curto, se houver"""
+        rows = self._path_rows(path_id)
+        self._alt_blocked[rows] = True
+        return self._refresh(np.unique(self._alt_edges[rows]))
+
+    def unblock_path(self, path_id: int) -> np.ndarray:
+        """Libera um trecho bloqueado com block_path"""
+        rows = self._path_rows(path_id)
+        self._alt_blocked[rows] = False
+        return self._refresh(np.unique(self._alt_edges[rows]))
+
+    def set_path_length(self, path_id: int, length: float) -> np.ndarray:
+        """Altera o comprimento de um trecho"""
+        rows = self._path_rows(path_id)
+        self._alt_lengths[rows] = max(length, MIN_LENGTH)
+        return self._refresh(np.unique(self._alt_edges[rows]))
+
+    def _refresh(self, edges: np.ndarray) -> np.ndarray:
+        """Recalcula peso e trecho das arestas a partir dos trechos liberados"""
+        for edge in np.asarray(edges).tolist():
+            start, end = self._alt_indptr[edge], self._alt_indptr[edge + 1]
+            lengths = np.where(self._alt_blocked[start:end], np.inf, self._alt_lengths[start:end])
+            best = int(np.argmin(lengths)) if np.isfinite(lengths).any() else int(np.argmin(self._alt_lengths[start:end]))
+            self.base_weights[edge] = lengths[best]
+            self.path_ids[edge] = self._alt_path_ids[start + best]
+            self.weights[edge] = np.inf if self.blocked[edge] else lengths[best]
+        self._adjacency = None
+        return edges
+
+    def adjacency(self) -> Tuple[List[int], List[int], List[float]]:
+        """indptr, indices e weights como listas Python (laços de busca evitam escalares NumPy)"""
+        if self._adjacency is None:
+            self._adjacency = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        return self._adjacency
+
+    def fingerprint(self) -> str:
+        """Hash da topologia e dos pesos (identifica matrizes pré-calculadas)"""
+        digest = hashlib.sha1()
+        for array in (self.station_ids, self.indptr, self.indices, self.weights):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update('\0'.join(self.station_codes).encode('utf-8'))
+        return digest.hexdigest()
+
+    def station_index(self) -> SpatialGrid:
+        """Índice espacial das estações (ids = índices do grafo), montado na primeira chamada"""
+        if self._station_index is None:
+            self._station_index = SpatialGrid.from_points(range(self.num_stations), self.x, self.y)
+        return self._station_index
+
+    def nearest_station(self, x: float, y: float) -> int:
+        """Índice da estação mais próxima do ponto (x, y)"""
+        found = self.station_index().nearest(x, y)
+        if not found:
+            raise LayoutGraphError("Layout sem estações")
+        return found[0][0]
+
+    def distance(self, source: int, target: int) -> float:
+        """Distância euclidiana entre duas estações"""
+        return float(np.hypot(self.x[target] - self.x[source], self.y[target] - self.y[source]))
+
+    def __repr__(self):
+        return (
+            f"LayoutGraph(layout={self.layout_code or self.layout_id}, "
+            f"stations={self.num_stations}, edges={self.num_edges})"
+        )
@@ -0,0 +1,207 @@
+"""
+Tabela de reservas no tempo (estações e trechos)
+
+Cada recurso (estação ou trecho) tem um IntervalSet: intervalos [início, fim)
+ordenados e sem sobreposição entre donos diferentes, em listas paralelas.
+Verificar conflito é uma busca binária (bisect) em O(log n); inserir usa
+list.insert, que só desloca ponteiros.
+
+Trechos são reservados pelo par de estações, sem sentido: AGVs em sentidos
+opostos no mesmo trecho (ou em dois trechos de mão única entre as mesmas
+estações) disputam a mesma reserva e nunca se cruzam de frente.
+
+Usage:
+    table = ReservationTable()
+    table.reserve_station(3, 10.0, 12.5, 'AGV-01')
+    table.reserve_segment(3, 4, 12.0, 15.0, 'AGV-01')
+    table.station(3).is_free(11.0, 11.5, 'AGV-02')     # False
+    table.release('AGV-01')
+"""
+import math
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+INF = math.inf
+
+class IntervalSet:
+    """Intervalos [início, fim) de um recurso, cada um com seu dono"""
+
+    __slots__ = ('starts', 'ends', 'owners')
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.owners: List[Hashable] = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, Hashable]]:
+        return iter(zip(self.starts, self.ends, self.owners))
+
+    def conflict(self, start: float, end: float, owner: Hashable = None) -> Optional[int]:
+        """
+        Posição do primeiro intervalo de outro dono que sobrepõe [start, end)
+
+        Returns:
+            Índice do intervalo em conflito, ou None
+        """
+        # Primeiro intervalo que termina depois de start
+        i = bisect_right(self.ends, start)
+        while i < len(self.starts) and self.starts[i] < end:
+            if self.owners[i] != owner:
+                return i
+            i += 1
+        return None
+
+    def is_free(self, start: float, end: float, owner: Hashable = None) -> bool:
+        return self.conflict(start, end, owner) is None
+
+    def earliest_free(self, start: float, duration: float, owner: Hashable = None) -> float:
+        """Menor instante >= start em que o recurso fica livre por duration"""
+        while True:
+            i = self.conflict(start, start + duration, owner)
+            if i is None:
+                return start
+            start = self.ends[i]
+
+    def add(self, start: float, end: float, owner: Hashable):
+        """Reserva [start, end); intervalos do mesmo dono que se tocam são unidos"""
+        if end <= start:
+            return
+        i = self.conflict(start, end, owner)
+        if i is not None:
+            raise ValueError(
+                f"Reserva [{start:g}, {end:g}) conflita com {self.owners[i]} "
+                f"[{self.starts[i]:g}, {self.ends[i]:g})"
+            )
+
+        # Une com intervalos do mesmo dono sobrepostos ou adjacentes (os de
+        # outros donos nessa faixa apenas encostam no novo intervalo)
+        i = bisect_left(self.ends, start)
+        while i < len(self.starts) and self.starts[i] <= end:
+            if self.owners[i] != owner:
+                i += 1
+                continue
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[i])
+            del self.starts[i], self.ends[i], self.owners[i]
+
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.owners.insert(i, owner)
+
+    def remove_owner(self, owner: Hashable, after: float = -INF) -> int:
+        """Remove as reservas do dono (apenas as que terminam após after)"""
+        keep = [
+            k for k, (e, o) in enumerate(zip(self.ends, self.owners))
+            if o != owner or e <= after
+        ]
+        removed = len(self.starts) - len(keep)
+        if removed:
+            self.starts = [self.starts[k] for k in keep]
+            self.ends = [self.ends[k] for k in keep]
+            self.owners = [self.owners[k] for k in keep]
+        return removed
+
+    def prune(self, before: float) -> int:
+        """Descarta intervalos que terminaram antes de before"""
+        i = bisect_right(self.ends, before)
+        if i:
+            del self.starts[:i], self.ends[:i], self.owners[:i]
+        return i
+
+    def free_intervals(self, owner: Hashable = None, since: float = 0.0) -> Iterator[Tuple[float, float]]:
+        """
+        Intervalos livres (para o dono informado) que terminam depois de since
+
+        O primeiro pode começar antes de since; o fim identifica o intervalo
+        (é o início da próxima reserva, ou inf).
+        """
+        i = bisect_right(self.ends, since)
+        # O intervalo livre começa no fim da última reserva de outro dono
+        previous = i - 1
+        while previous >= 0 and self.owners[previous] == owner:
+            previous -= 1
+        cursor = self.ends[previous] if previous >= 0 else 0.0
+
+        for start, end, interval_owner in zip(self.starts[i:], self.ends[i:], self.owners[i:]):
+            if interval_owner == owner:
+                continue
+            if start > cursor:
+                yield cursor, start
+            cursor = max(cursor, end)
+        if cursor < INF:
+            yield cursor, INF
+
+class ReservationTable:
+    """Reservas de estações e trechos (par de estações) no tempo"""
+
+    def __init__(self):
+        self.stations: Dict[int, IntervalSet] = {}
+        self.segments: Dict[Tuple[int, int], IntervalSet] = {}
+        # Recursos com reservas de cada dono (release não percorre a tabela toda)
+        self._owned: Dict[Hashable, Dict[int, IntervalSet]] = {}
+
+    @staticmethod
+    def segment_key(source: int, target: int) -> Tuple[int, int]:
+        return (source, target) if source < target else (target, source)
+
+    def station(self, index: int) -> IntervalSet:
+        intervals = self.stations.get(index)
+        if intervals is None:
+            intervals = self.stations[index] = IntervalSet()
+        return intervals
+
+    def segment(self, source: int, target: int) -> IntervalSet:
+        key = self.segment_key(source, target)
+        intervals = self.segments.get(key)
+        if intervals is None:
+            intervals = self.segments[key] = IntervalSet()
+        return intervals
+
+    def _add(self, intervals: IntervalSet, start: float, end: float, owner: Hashable):
+        intervals.add(start, end, owner)
+        self._owned.setdefault(owner, {})[id(intervals)] = intervals
+
+    def reserve_station(self, index: int, start: float, end: float, owner: Hashable):
+        self._add(self.station(index), start, end, owner)
+
+    def reserve_segment(self, source: int, target: int, start: float, end: float, owner: Hashable):
+        self._add(self.segment(source, target), start, end, owner)
+
+    def release(self, owner: Hashable, after: float = -INF) -> int:
+        """Remove as reservas do dono (apenas as que terminam após after)"""
+        owned = self._owned.get(owner)
+        if not owned:
+            return 0
+        removed = sum(intervals.remove_owner(owner, after) for intervals in owned.values())
+        self._forget(owner)
+        return removed
+
+    def _forget(self, owner: Hashable):
+        """Tira do índice os recursos em que o dono não tem mais reservas"""
+        owned = {
+            key: intervals for key, intervals in self._owned.get(owner, {}).items()
+            if owner in intervals.owners
+        }
+        if owned:
+            self._owned[owner] = owned
+        else:
+            self._owned.pop(owner, None)
+
+    def prune(self, before: float) -> int:
+        """Descarta reservas já encerradas"""
+        removed = sum(
+            intervals.prune(before)
+            for table in (self.stations, self.segments)
+            for intervals in table.values()
+        )
+        for owner in list(self._owned):
+            self._forget(owner)
+        return removed
+
+    def __len__(self):
+        return sum(len(i) for table in (self.stations, self.segments) for i in table.values())
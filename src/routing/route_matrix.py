@@ -0,0 +1,245 @@
+"""
+Matriz pré-calculada de distâncias e próximo salto entre todas as estações
+
+distances[i, j] é o comprimento da menor rota de i até j (inf se não houver)
+e next_hop[i, j] a estação seguinte a i nessa rota (-1 se não houver). Uma
+rota é reconstruída seguindo next_hop até o destino, em O(tamanho da rota).
+
+As distâncias vêm de um Floyd-Warshall vetorizado (uma operação NumPy n x n
+por estação intermediária) e os próximos saltos são derivados delas. O
+resultado é gravado em dois .npy e reaberto com mmap: vários processos
+compartilham as mesmas páginas e o carregamento não lê o arquivo inteiro.
+
+Mudança de peso de uma aresta u -> v é reparada sem recalcular tudo:
+- redução (ou desbloqueio): dist[s, t] = min(dist[s, t], dist[s, u] + w + dist[v, t]),
+  uma única operação n x n;
+- aumento (ou bloqueio): só os pares com alguma rota mínima passando pela
+  aresta são invalidados e recalculados, a partir dos pares ainda válidos.
+A matriz reparada fica em memória; a gravada em disco continua a do grafo
+original.
+"""
+import os
+
+import numpy as np
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+from .layout_graph import LayoutGraph
+
+# Tolerância relativa para decidir se uma rota mínima passa pela aresta
+PATH_TOLERANCE = 1e-9
+
+# Elementos do array temporário usado no reparo (linhas x arestas)
+REPAIR_CHUNK = 4_000_000
+
+class RouteMatrix:
+    """Distâncias e próximos saltos entre todas as estações de um layout"""
+
+    def __init__(self, distances: np.ndarray, next_hop: np.ndarray, fingerprint: Optional[str] = None):
+        self.distances = distances
+        self.next_hop = next_hop
+        self.fingerprint = fingerprint
+
+    @property
+    def num_stations(self) -> int:
+        return self.distances.shape[0]
+
+    # ----- Cálculo -----
+
+    @classmethod
+    def compute(cls, graph: LayoutGraph) -> 'RouteMatrix':
+        """Floyd-Warshall vetorizado: O(n³) operações, O(n²) memória"""
+        n = graph.num_stations
+        diagonal = np.arange(n)
+
+        distances = np.full((n, n), np.inf, dtype=np.float64)
+        distances[graph.edge_sources(), graph.indices] = graph.weights
+        distances[diagonal, diagonal] = 0.0
+
+        through = np.empty_like(distances)
+        for k in range(n):
+            np.add(distances[:, k:k + 1], distances[k:k + 1, :], out=through)
+            np.minimum(distances, through, out=distances)
+
+        return cls(distances, cls._next_hops(graph, distances), graph.fingerprint())
+
+    @staticmethod
+    def _next_hops(
+        graph: LayoutGraph,
+        distances: np.ndarray,
+        rows: Optional[np.ndarray] = None,
+        next_hop: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Próximo salto de cada par a partir das distâncias finais
+
+        O salto de i para j é o vizinho v que minimiza weight(i, v) + dist(v, j);
+        uma operação (grau x n) por estação, mais barato que acompanhar os
+        saltos dentro do Floyd-Warshall. Com rows, refaz só essas linhas.
+        """
+        n = graph.num_stations
+        if next_hop is None:
+            next_hop = np.full((n, n), -1, dtype=np.int32)
+        if rows is None:
+            rows = range(n)
+
+        for source in rows:
+            start, end = graph.indptr[source], graph.indptr[source + 1]
+            next_hop[source] = -1
+            if start < end:
+                neighbors = graph.indices[start:end]
+                through = distances[neighbors] + graph.weights[start:end, None]
+                best = neighbors[np.argmin(through, axis=0)]
+                next_hop[source] = np.where(np.isfinite(distances[source]), best, -1)
+            next_hop[source, source] = source
+
+        return next_hop
+
+    # ----- Reparo incremental -----
+
+    def _make_writable(self):
+        """Troca os arrays mapeados (somente leitura) por cópias em memória"""
+        if not self.distances.flags.writeable or isinstance(self.distances, np.memmap):
+            self.distances = np.array(self.distances)
+        if not self.next_hop.flags.writeable or isinstance(self.next_hop, np.memmap):
+            self.next_hop = np.array(self.next_hop)
+
+    def _repair_rows(self, graph: LayoutGraph, rows: np.ndarray, invalid: np.ndarray):
+        """
+        Recalcula as distâncias invalidadas das linhas rows
+
+        Os pares válidos continuam exatos e servem de ponto de partida; os
+        inválidos recomeçam em inf e são relaxados (Bellman-Ford vetorizado,
+        várias origens por vez) só pelas arestas que chegam a colunas
+        invalidadas, até estabilizar.
+        """
+        columns = invalid.any(axis=0)
+        edges = np.flatnonzero(columns[graph.indices])
+        edges = edges[np.argsort(graph.indices[edges], kind='stable')]
+        edge_sources = graph.edge_sources()[edges]
+        edge_targets = graph.indices[edges]
+        edge_weights = graph.weights[edges]
+        targets, starts = np.unique(edge_targets, return_index=True)
+
+        # Limita o array temporário (linhas x arestas) a ~REPAIR_CHUNK elementos
+        chunk = max(1, REPAIR_CHUNK // max(1, len(edges)))
+        for begin in range(0, len(rows), chunk):
+            block_rows = rows[begin:begin + chunk]
+            block = self.distances[block_rows]
+            block[invalid[begin:begin + chunk]] = np.inf
+
+            if len(edges):
+                while True:
+                    best = np.minimum.reduceat(block[:, edge_sources] + edge_weights, starts, axis=1)
+                    current = block[:, targets]
+                    if not (best < current).any():
+                        break
+                    block[:, targets] = np.minimum(current, best)
+
+            self.distances[block_rows] = block
+
+    def update_edge(self, graph: LayoutGraph, source: int, target: int, old_weight: float) -> np.ndarray:
+        """
+        Repara a matriz após a aresta source -> target mudar de old_weight
+        para o peso atual em graph.weights
+
+        Returns:
+            Máscara n x n dos pares cuja distância mudou
+        """
+        self._make_writable()
+        distances, next_hop = self.distances, self.next_hop
+        new_weight = float(graph.weights[graph.edge_index(source, target)])
+
+        if new_weight < old_weight:
+            through = distances[:, source:source + 1] + new_weight + distances[target:target + 1, :]
+            changed = through < distances
+            # Rotas melhoradas seguem até source pelo caminho antigo e então usam a aresta
+            first = np.array(next_hop[:, source])
+            first[source] = target
+            np.copyto(distances, through, where=changed)
+            np.copyto(next_hop, np.broadcast_to(first[:, None], next_hop.shape), where=changed)
+
+        elif new_weight > old_weight:
+            through = distances[:, source:source + 1] + old_weight + distances[target:target + 1, :]
+            used = np.isfinite(distances) & (through <= distances * (1 + PATH_TOLERANCE))
+            rows = np.flatnonzero(used.any(axis=1))
+
+            previous = distances[rows].copy()
+            self._repair_rows(graph, rows, used[rows])
+            self._next_hops(graph, distances, rows, next_hop)
+
+            changed = np.zeros(distances.shape, dtype=bool)
+            changed[rows] = distances[rows] != previous
+
+        else:
+            changed = np.zeros(distances.shape, dtype=bool)
+
+        self.fingerprint = graph.fingerprint()
+        return changed
+
+    # ----- Persistência -----
+
+    @staticmethod
+    def file_paths(directory, fingerprint: str) -> Tuple[Path, Path]:
+        base = Path(directory) / f'route_matrix_{fingerprint[:16]}'
+        return base.with_name(base.name + '.dist.npy'), base.with_name(base.name + '.next.npy')
+
+    def save(self, directory) -> Tuple[Path, Path]:
+        """Grava os dois arrays (tmp + os.replace)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = self.file_paths(directory, self.fingerprint)
+
+        for path, array in zip(paths, (self.distances, self.next_hop)):
+            tmp = path.with_name(path.name + '.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp, path)
+        return paths
+
+    @classmethod
+    def open(cls, directory, fingerprint: str) -> Optional['RouteMatrix']:
+        """Abre a matriz gravada (somente leitura, com mmap); None se não existir"""
+        distances_path, next_hop_path = cls.file_paths(directory, fingerprint)
+        if not distances_path.exists() or not next_hop_path.exists():
+            return None
+        distances = np.load(distances_path, mmap_mode='r')
+        next_hop = np.load(next_hop_path, mmap_mode='r')
+        if distances.shape != next_hop.shape:
+            return None
+        return cls(distances, next_hop, fingerprint)
+
+    @classmethod
+    def for_graph(cls, graph: LayoutGraph, directory=None) -> 'RouteMatrix':
+        """Reaproveita a matriz gravada do mesmo grafo ou calcula (e grava) uma nova"""
+        fingerprint = graph.fingerprint()
+        if directory is not None:
+            matrix = cls.open(directory, fingerprint)
+            if matrix is not None and matrix.num_stations == graph.num_stations:
+                return matrix
+
+        matrix = cls.compute(graph)
+        if directory is not None:
+            matrix.save(directory)
+            matrix = cls.open(directory, fingerprint)
+        return matrix
+
+    # ----- Consulta -----
+
+    def distance(self, source: int, target: int) -> float:
+        return float(self.distances[source, target])
+
+    def path(self, source: int, target: int) -> List[int]:
+        """Estações da rota (vazia se não houver), em O(tamanho da rota)"""
+        if self.next_hop[source, target] < 0:
+            return []
+        path = [source]
+        next_hop = self.next_hop
+        while source != target:
+            source = int(next_hop[source, target])
+            path.append(source)
+        return path
+
+    def distances_for(self, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Distâncias de vários pares origem/destino de uma vez"""
+        return np.asarray(self.distances[np.asarray(sources), np.asarray(targets)])
@@ -0,0 +1,125 @@
+"""
+Caminho mínimo no LayoutGraph (Dijkstra e A* com heap binário)
+
+Usados nas consultas avulsas e quando a matriz pré-calculada não está
+disponível. Trabalham com índices de estação; a conversão de/para códigos
+fica no RouteService.
+"""
+import heapq
+import math
+
+import numpy as np
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from .layout_graph import LayoutGraph
+
+INF = math.inf
+
+def build_path(predecessors: Dict[int, int], source: int, target: int) -> List[int]:
+    """Reconstrói a sequência de estações a partir dos predecessores"""
+    path = [target]
+    while path[-1] != source:
+        path.append(predecessors[path[-1]])
+    path.reverse()
+    return path
+
+def dijkstra(
+    graph: LayoutGraph,
+    source: int,
+    targets: Optional[Iterable[int]] = None
+) -> Tuple[Dict[int, float], Dict[int, int]]:
+    """
+    Distâncias a partir de source
+
+    Com targets, para assim que todos forem definidos (útil em lote: uma
+    única busca por origem atende vários destinos).
+
+    Returns:
+        (distâncias, predecessores) apenas das estações alcançadas
+    """
+    indptr, indices, weights = graph.adjacency()
+    pending = set(targets) if targets is not None else None
+
+    distances = {source: 0.0}
+    predecessors: Dict[int, int] = {}
+    settled = set()
+    heap = [(0.0, source)]
+
+    while heap:
+        distance, node = heapq.heappop(heap)
+        if node in settled:
+            continue
+        settled.add(node)
+
+        if pending is not None:
+            pending.discard(node)
+            if not pending:
+                break
+
+        for position in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[position]
+            candidate = distance + weights[position]
+            if candidate < distances.get(neighbor, INF):
+                distances[neighbor] = candidate
+                predecessors[neighbor] = node
+                heapq.heappush(heap, (candidate, neighbor))
+
+    # Distâncias provisórias (não definidas) não são resultado
+    return {node: distances[node] for node in settled}, predecessors
+
+def heuristic_scale(graph: LayoutGraph) -> float:
+    """
+    Fator que torna a distância euclidiana admissível no A*
+
+    Trechos cadastrados com comprimento menor que a distância entre as
+    estações reduziriam o custo real abaixo da heurística; o fator é a menor
+    razão comprimento/distância entre todas as arestas (no máximo 1).
+    """
+    sources = graph.edge_sources()
+    straight = np.hypot(graph.x[graph.indices] - graph.x[sources], graph.y[graph.indices] - graph.y[sources])
+    valid = straight > 0
+    if not valid.any():
+        return 0.0
+    return float(min(1.0, np.min(graph.weights[valid] / straight[valid])))
+
+def astar(
+    graph: LayoutGraph,
+    source: int,
+    target: int,
+    scale: Optional[float] = None
+) -> Tuple[float, List[int]]:
+    """
+    Menor rota entre duas estações com A* (heurística euclidiana)
+
+    Returns:
+        (distância, estações); (inf, []) se não houver rota
+    """
+    if scale is None:
+        scale = heuristic_scale(graph)
+
+    indptr, indices, weights = graph.adjacency()
+    # Heurística de todas as estações de uma vez (vetorizado)
+    heuristic = (scale * np.hypot(graph.x - graph.x[target], graph.y - graph.y[target])).tolist()
+
+    distances = {source: 0.0}
+    predecessors: Dict[int, int] = {}
+    settled = set()
+    heap = [(0.0, 0.0, source)]
+
+    while heap:
+        _, distance, node = heapq.heappop(heap)
+        if node == target:
+            return distance, build_path(predecessors, source, target)
+        if node in settled:
+            continue
+        settled.add(node)
+
+        for position in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[position]
+            candidate = distance + weights[position]
+            if candidate < distances.get(neighbor, INF):
+                distances[neighbor] = candidate
+                predecessors[neighbor] = node
+                heapq.heappush(heap, (candidate + heuristic[neighbor], candidate, neighbor))
+
+    return INF, []
@@ -0,0 +1,298 @@
+"""
+Índice espacial em grade uniforme (posições de AGVs e estações)
+
+O plano é dividido em células quadradas de cell_size metros; cada célula
+guarda o conjunto de pontos dentro dela. Mover um ponto é O(1) (só troca de
+célula quando cruza a borda), então o índice acompanha a telemetria em tempo
+real sem reconstrução. As consultas visitam apenas as células próximas:
+
+- radius(): pontos a até r metros, ordenados por distância
+- nearest(): k mais próximos, expandindo anéis de células até que nenhum
+  ponto não visitado possa ser mais próximo que o k-ésimo encontrado
+
+Cada ponto tem um estado (ex.: estado da telemetria) para filtrar nas
+consultas, ex.: AGV livre mais próximo da coleta.
+
+Usage:
+    agvs = SpatialGrid(cell_size=5.0)
+    agvs.update(7, x=12.5, y=3.0, state=1)
+    agvs.radius(10.0, 4.0, 5.0)                     # [(7, 2.69...)]
+    agvs.nearest(10.0, 4.0, k=3, states=[1])        # 3 AGVs no estado 1 mais próximos
+
+    stations = graph.station_index()                # ids = índices do grafo
+    graph.code_of(stations.nearest(12.5, 3.0)[0][0])
+"""
+import math
+import threading
+
+import numpy as np
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config.settings import settings
+
+Cell = Tuple[int, int]
+
+class SpatialGrid:
+    """Pontos (id -> x, y, estado) indexados por célula de uma grade uniforme"""
+
+    def __init__(self, cell_size: Optional[float] = None, capacity: int = 64):
+        self.cell_size = float(cell_size or settings.SPATIAL_CELL_SIZE)
+        if self.cell_size <= 0:
+            raise ValueError(f"Tamanho de célula inválido: {self.cell_size}")
+
+        # Pontos em arrays contíguos (slot 0..n-1) para o cálculo vetorizado das distâncias
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.states = np.zeros(capacity, dtype=np.uint8)
+        self._slots: Dict[int, int] = {}
+        self._cell_of: List[Cell] = []
+        self._cells: Dict[Cell, Set[int]] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_points(
+        cls,
+        ids: Iterable[int],
+        x: Iterable[float],
+        y: Iterable[float],
+        states: Optional[Iterable[int]] = None,
+        cell_size: Optional[float] = None
+    ) -> 'SpatialGrid':
+        """Índice montado de uma vez (ex.: estações do layout)"""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        grid = cls(cell_size, capacity=max(len(ids), 1))
+        x = np.asarray(list(x), dtype=np.float64)
+        y = np.asarray(list(y), dtype=np.float64)
+        states = np.zeros(len(ids), dtype=np.uint8) if states is None else np.asarray(list(states), dtype=np.uint8)
+        if len(np.unique(ids)) != len(ids):
+            raise ValueError("Ids repetidos no índice espacial")
+
+        n = len(ids)
+        grid.ids[:n], grid.x[:n], grid.y[:n], grid.states[:n] = ids, x, y, states
+        cx = np.floor(x / grid.cell_size).astype(np.int64).tolist()
+        cy = np.floor(y / grid.cell_size).astype(np.int64).tolist()
+        grid._cell_of = list(zip(cx, cy))
+        grid._slots = {point_id: slot for slot, point_id in enumerate(ids.tolist())}
+        for slot, cell in enumerate(grid._cell_of):
+            grid._cells.setdefault(cell, set()).add(slot)
+        return grid
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, point_id: int) -> bool:
+        return point_id in self._slots
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    # ----- Atualização -----
+
+    def update(self, point_id: int, x: float, y: float, state: Optional[int] = None):
+        """Insere ou move o ponto (state None mantém o estado atual)"""
+        cell = self._cell(x, y)
+        with self._lock:
+            slot = self._slots.get(point_id)
+            if slot is None:
+                slot = len(self._slots)
+                if slot == len(self.ids):
+                    self._grow()
+                self._slots[point_id] = slot
+                self._cell_of.append(cell)
+                self._cells.setdefault(cell, set()).add(slot)
+                self.ids[slot] = point_id
+                self.states[slot] = state or 0
+            else:
+                previous = self._cell_of[slot]
+                if previous != cell:
+                    self._discard(previous, slot)
+                    self._cells.setdefault(cell, set()).add(slot)
+                    self._cell_of[slot] = cell
+                if state is not None:
+                    self.states[slot] = state
+            self.x[slot] = x
+            self.y[slot] = y
+
+    def set_state(self, point_id: int, state: int):
+        with self._lock:
+            self.states[self._slots[point_id]] = state
+
+    def remove(self, point_id: int) -> bool:
+        """Retira o ponto; o último slot ocupa o lugar dele"""
+        with self._lock:
+            slot = self._slots.pop(point_id, None)
+            if slot is None:
+                return False
+            self._discard(self._cell_of[slot], slot)
+
+            last = len(self._slots)
+            if slot != last:
+                last_cell = self._cell_of[last]
+                self._cells[last_cell].discard(last)
+                self._cells[last_cell].add(slot)
+                self._cell_of[slot] = last_cell
+                for array in (self.ids, self.x, self.y, self.states):
+                    array[slot] = array[last]
+                self._slots[int(self.ids[slot])] = slot
+            self._cell_of.pop()
+            return True
+
+    def position(self, point_id: int) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            slot = self._slots.get(point_id)
+            if slot is None:
+                return None
+            return float(self.x[slot]), float(self.y[slot])
+
+    def _discard(self, cell: Cell, slot: int):
+        members = self._cells[cell]
+        members.discard(slot)
+        if not members:
+            del self._cells[cell]
+
+    def _grow(self):
+        capacity = 2 * len(self.ids)
+        for name in ('ids', 'x', 'y', 'states'):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    # ----- Consultas -----
+
+    @staticmethod
+    def _allowed(states: Optional[Iterable[int]]) -> Optional[np.ndarray]:
+        """Tabela estado -> permitido (filtro por indexação, sem np.isin)"""
+        if states is None:
+            return None
+        allowed = np.zeros(256, dtype=bool)
+        allowed[list(states)] = True
+        return allowed
+
+    def _select(
+        self, slots: List[int], x: float, y: float, allowed: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Slots (já filtrados por estado) e suas distâncias até (x, y)"""
+        slots = np.fromiter(slots, dtype=np.intp, count=len(slots))
+        if allowed is not None:
+            slots = slots[allowed[self.states[slots]]]
+        return slots, np.hypot(self.x[slots] - x, self.y[slots] - y)
+
+    def _result(self, slots: np.ndarray, distances: np.ndarray) -> List[Tuple[int, float]]:
+        return list(zip(self.ids[slots].tolist(), distances.tolist()))
+
+    def radius(
+        self, x: float, y: float, radius: float, states: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """(id, distância) dos pontos a até radius de (x, y), do mais próximo ao mais distante"""
+        x_min, y_min = self._cell(x - radius, y - radius)
+        x_max, y_max = self._cell(x + radius, y + radius)
+        with self._lock:
+            slots: List[int] = []
+            # Raio grande: mais barato percorrer só as células ocupadas
+            if (x_max - x_min + 1) * (y_max - y_min + 1) > len(self._cells):
+                for (cx, cy), members in self._cells.items():
+                    if x_min <= cx <= x_max and y_min <= cy <= y_max:
+                        slots.extend(members)
+            else:
+                cells = self._cells
+                for cx in range(x_min, x_max + 1):
+                    for cy in range(y_min, y_max + 1):
+                        members = cells.get((cx, cy))
+                        if members:
+                            slots.extend(members)
+
+            slots, distances = self._select(slots, x, y, self._allowed(states))
+            keep = distances <= radius
+            slots, distances = slots[keep], distances[keep]
+            order = np.argsort(distances, kind='stable')
+            return self._result(slots[order], distances[order])
+
+    def _ring(self, cx: int, cy: int, ring: int, slots: List[int]):
+        """Acrescenta a slots os pontos das células à distância ring (Chebyshev) de (cx, cy)"""
+        cells = self._cells
+        if ring == 0:
+            members = cells.get((cx, cy))
+            if members:
+                slots.extend(members)
+            return
+        for dx in range(-ring, ring + 1):
+            for dy in (-ring, ring):
+                members = cells.get((cx + dx, cy + dy))
+                if members:
+                    slots.extend(members)
+        for dy in range(-ring + 1, ring):
+            for dx in (-ring, ring):
+                members = cells.get((cx + dx, cy + dy))
+                if members:
+                    slots.extend(members)
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        k: int = 1,
+        states: Optional[Iterable[int]] = None,
+        max_distance: float = math.inf
+    ) -> List[Tuple[int, float]]:
+        """(id, distância) dos k pontos mais próximos de (x, y), opcionalmente até max_distance"""
+        if k <= 0:
+            return []
+        allowed = self._allowed(states)
+        size = self.cell_size
+        cx, cy = self._cell(x, y)
+        # Distância de (x, y) até as bordas da sua célula
+        margin = min(x - cx * size, (cx + 1) * size - x, y - cy * size, (cy + 1) * size - y)
+
+        with self._lock:
+            cells = self._cells
+            if not cells:
+                return []
+
+            # Primeiro alcance (em anéis) estimado pela densidade das células ocupadas:
+            # quase sempre basta uma passada; se não, amplia um anel por vez
+            per_cell = len(self._slots) / len(cells)
+            reach = math.ceil(math.sqrt(k / (math.pi * per_cell)))
+            found: List[Tuple[np.ndarray, np.ndarray]] = []
+            count = 0
+            ring = 0
+            while True:
+                # Alcance maior que a grade ocupada: percorre as células ocupadas de uma vez
+                if 8 * reach > len(cells):
+                    slots = [slot for members in cells.values() for slot in members]
+                    found = [self._select(slots, x, y, allowed)]
+                    break
+
+                slots: List[int] = []
+                while ring <= reach:
+                    self._ring(cx, cy, ring, slots)
+                    ring += 1
+                if slots:
+                    found.append(self._select(slots, x, y, allowed))
+                    count += len(found[-1][0])
+
+                # Pontos fora dos anéis visitados estão a pelo menos bound de (x, y)
+                bound = reach * size + margin
+                if bound >= max_distance:
+                    break
+                if count >= k:
+                    distances = found[0][1] if len(found) == 1 else np.concatenate([d for _, d in found])
+                    if np.partition(distances, k - 1)[k - 1] <= bound:
+                        break
+                reach += 1
+
+            if not found:
+                return []
+            candidates = np.concatenate([slots for slots, _ in found])
+            distances = np.concatenate([distances for _, distances in found])
+            keep = distances <= max_distance
+            candidates, distances = candidates[keep], distances[keep]
+            if len(candidates) > k:
+                top = np.argpartition(distances, k - 1)[:k]
+                candidates, distances = candidates[top], distances[top]
+            order = np.argsort(distances, kind='stable')
+            return self._result(candidates[order], distances[order])
+
+    def __repr__(self):
+        return f"SpatialGrid(points={len(self)}, cells={len(self._cells)}, cell_size={self.cell_size:g})"
@@ -0,0 +1,362 @@
+"""
+Detecção e resolução de impasses (deadlocks) da frota
+
+Mantém o grafo de espera vivo entre AGVs e zonas: AGV -> zona que ele
+espera, zona -> AGV que a ocupa e AGV -> AGV que o bloqueia no caminho
+(trechos bidirecionais). Cada alteração de aresta passa pela detecção
+incremental do WaitForGraph, que só percorre a região afetada em vez do
+grafo inteiro. Quando uma aresta fecha um ciclo, o serviço propõe uma
+resolução: qual AGV do ciclo recua (menor prioridade, com menor recuo) e
+para qual estação, pela estação livre mais próxima no grafo do layout que
+fica fora das zonas do ciclo.
+
+O serviço só propõe; quem executa é o controle de tráfego (ex.: o AGV
+libera as zonas com ZoneLockManager.release_all e segue o caminho de recuo).
+Com ZoneLockManager(deadlock_service=...), esperas e concessões de zonas
+alimentam o grafo automaticamente.
+
+Usage:
+    deadlocks = DeadlockService.from_layout('LAYOUT-01', locate=ingestor.positions.position,
+                                            on_deadlock=lambda resolution: ...)
+    locks = ZoneLockManager.from_layout('LAYOUT-01', deadlock_service=deadlocks)
+    deadlocks.block(7, 12)             # AGV 7 parado atrás do AGV 12
+    deadlocks.deadlocks()              # [Resolution(...)] impasses abertos
+    deadlocks.stats()['detect_us']     # latência da detecção
+"""
+import heapq
+import math
+import threading
+import time
+
+import numpy as np
+
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from src.routing.layout_graph import LayoutGraph, LayoutRef
+from src.traffic.wait_for import Edge, WaitForGraph
+from config.settings import settings
+from loguru import logger
+
+NODE_AGV = 'agv'
+NODE_ZONE = 'zone'
+
+Node = Tuple[str, Hashable]
+
+def _latency(samples: Iterable[float]) -> Dict[str, float]:
+    """Média, p50, p99 e máximo em microssegundos (zeros sem amostras)"""
+    values = np.fromiter(samples, dtype=np.float64)
+    if not len(values):
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+    p50, p99 = np.percentile(values, [50, 99])
+    return {
+        'count': len(values),
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(p50), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+class Resolution:
+    """Impasse detectado e o recuo proposto"""
+
+    __slots__ = ('cycle', 'agv', 'release', 'cancel', 'target', 'path', 'distance', 'detected_at', 'latency_us')
+
+    def __init__(
+        self,
+        cycle: List[Node],
+        agv: Hashable,
+        release: List[str],
+        cancel: List[str],
+        target: Optional[str] = None,
+        path: Optional[List[str]] = None,
+        distance: float = math.inf,
+        detected_at: float = 0.0,
+        latency_us: float = 0.0
+    ):
+        self.cycle = cycle
+        self.agv = agv
+        self.release = release
+        self.cancel = cancel
+        self.target = target
+        self.path = path or []
+        self.distance = distance
+        self.detected_at = detected_at
+        self.latency_us = latency_us
+
+    @property
+    def agvs(self) -> List[Hashable]:
+        return [key for kind, key in self.cycle if kind == NODE_AGV]
+
+    @property
+    def zones(self) -> List[str]:
+        return [key for kind, key in self.cycle if kind == NODE_ZONE]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'agvs': self.agvs,
+            'zones': self.zones,
+            'back_off': self.agv,
+            'release': self.release,
+            'cancel': self.cancel,
+            'target': self.target,
+            'path': self.path,
+            'distance': None if self.distance == math.inf else round(self.distance, 3),
+            'latency_us': round(self.latency_us, 3),
+        }
+
+    def __repr__(self):
+        return f"Resolution({' -> '.join(str(key) for _, key in self.cycle)}: {self.agv} recua para {self.target})"
+
+class DeadlockService:
+    """
+    Grafo de espera da frota com detecção incremental e proposta de recuo
+
+    graph: LayoutGraph para calcular o recuo (None = só indica quem recua).
+    zone_stations: zona -> índices das estações dela no grafo.
+    locate: AGV -> (x, y) atual ou None (ex.: SpatialGrid.position).
+    priority: AGV -> prioridade (o de menor prioridade recua primeiro).
+    on_deadlock: chamado com a Resolution de cada impasse detectado.
+    """
+
+    def __init__(
+        self,
+        graph: Optional[LayoutGraph] = None,
+        zone_stations: Optional[Dict[str, Iterable[int]]] = None,
+        locate: Optional[Callable[[Hashable], Optional[Tuple[float, float]]]] = None,
+        priority: Optional[Callable[[Hashable], int]] = None,
+        on_deadlock: Optional[Callable[[Resolution], None]] = None,
+        max_retreat: Optional[float] = None,
+        latency_samples: Optional[int] = None
+    ):
+        self.graph = graph
+        self.zone_stations = {zone: set(stations) for zone, stations in (zone_stations or {}).items()}
+        self.locate = locate
+        self.priority = priority
+        self.on_deadlock = on_deadlock
+        self.max_retreat = max_retreat if max_retreat is not None else settings.DEADLOCK_MAX_RETREAT
+
+        self.waits = WaitForGraph()
+        self.held: Dict[Hashable, Set[str]] = {}
+        self._active: Dict[Edge, Resolution] = {}
+        self._lock = threading.RLock()
+
+        samples = latency_samples or settings.DEADLOCK_LATENCY_SAMPLES
+        self._update_us = deque(maxlen=samples)
+        self._detect_us = deque(maxlen=samples)
+        self._resolve_us = deque(maxlen=samples)
+        self.changes = 0
+        self.detected = 0
+        self.resolved = 0
+
+    @classmethod
+    def from_layout(cls, layout: LayoutRef, zone_repository=None, **kwargs) -> 'DeadlockService':
+        """Serviço com o grafo do layout e as estações de cada zona"""
+        if zone_repository is None:
+            from src.repositories.zone_repository import ZoneRepository
+            zone_repository = ZoneRepository()
+
+        graph = LayoutGraph.get(layout)
+        zone_stations: Dict[str, Set[int]] = {}
+        for row in zone_repository.get_stations(graph.layout_id):
+            zone_stations.setdefault(row['zone_code'], set()).add(graph.index_of_id(row['station_id']))
+        return cls(graph, zone_stations, **kwargs)
+
+    # ----- Arestas -----
+
+    def wait(self, agv: Hashable, zone: str):
+        """AGV entrou na fila da zona"""
+        self._add((NODE_AGV, agv), (NODE_ZONE, zone))
+
+    def stop_waiting(self, agv: Hashable, zone: str):
+        """AGV saiu da fila da zona (recebeu ou desistiu)"""
+        self._remove((NODE_AGV, agv), (NODE_ZONE, zone))
+
+    def hold(self, agv: Hashable, zone: str):
+        """AGV recebeu a zona"""
+        with self._lock:
+            self.held.setdefault(agv, set()).add(zone)
+            self._add((NODE_ZONE, zone), (NODE_AGV, agv))
+
+    def release(self, agv: Hashable, zone: str):
+        """AGV liberou a zona"""
+        with self._lock:
+            zones = self.held.get(agv)
+            if zones is not None:
+                zones.discard(zone)
+                if not zones:
+                    del self.held[agv]
+            self._remove((NODE_ZONE, zone), (NODE_AGV, agv))
+
+    def block(self, agv: Hashable, blocker: Hashable):
+        """AGV parado esperando blocker sair do caminho"""
+        self._add((NODE_AGV, agv), (NODE_AGV, blocker))
+
+    def unblock(self, agv: Hashable, blocker: Hashable):
+        self._remove((NODE_AGV, agv), (NODE_AGV, blocker))
+
+    def remove_agv(self, agv: Hashable):
+        """AGV fora de operação: retira todas as arestas dele"""
+        with self._lock:
+            started = time.perf_counter()
+            self.held.pop(agv, None)
+            resolved = self.waits.remove_node((NODE_AGV, agv))
+            self._changed(started, resolved)
+
+    def _add(self, source: Node, target: Node):
+        with self._lock:
+            started = time.perf_counter()
+            cycle = self.waits.add_edge(source, target)
+            detected = time.perf_counter()
+            self.changes += 1
+            self._update_us.append((detected - started) * 1e6)
+            if cycle is None or (source, target) in self._active:
+                return
+
+            self.detected += 1
+            self._detect_us.append((detected - started) * 1e6)
+            resolution = self.propose(cycle)
+            resolution.latency_us = (time.perf_counter() - started) * 1e6
+            self._resolve_us.append(resolution.latency_us)
+            self._active[(source, target)] = resolution
+            logger.warning(f"✗ Impasse detectado: {resolution}")
+        self._notify(resolution)
+
+    def _remove(self, source: Node, target: Node):
+        with self._lock:
+            started = time.perf_counter()
+            resolved = self.waits.remove_edge(source, target)
+            self._changed(started, resolved)
+
+    def _changed(self, started: float, resolved: List[Edge]):
+        """Contabiliza a remoção e descarta os impasses desfeitos"""
+        self.changes += 1
+        self._update_us.append((time.perf_counter() - started) * 1e6)
+        for edge in resolved:
+            resolution = self._active.pop(edge, None)
+            if resolution is not None:
+                self.resolved += 1
+                logger.info(f"✓ Impasse desfeito: {' -> '.join(str(key) for _, key in resolution.cycle)}")
+
+        # Ciclos que continuam abertos por outro caminho ganham nova proposta
+        for edge, cycle in self.waits.pending().items():
+            resolution = self._active.get(edge)
+            if resolution is not None and resolution.cycle != cycle:
+                self._active[edge] = self.propose(cycle)
+
+    def _notify(self, resolution: Resolution):
+        if self.on_deadlock is None:
+            return
+        try:
+            self.on_deadlock(resolution)
+        except Exception as e:
+            logger.error(f"✗ Erro no aviso de impasse ({resolution.agv}): {e}")
+
+    # ----- Resolução -----
+
+    def propose(self, cycle: List[Node]) -> Resolution:
+        """Escolhe quem recua no ciclo e para onde"""
+        with self._lock:
+            agvs = [key for kind, key in cycle if kind == NODE_AGV]
+            zones = {key for kind, key in cycle if kind == NODE_ZONE}
+
+            best = None
+            for agv in agvs:
+                retreat = self._retreat(agv, agvs, zones)
+                priority = self.priority(agv) if self.priority is not None else 0
+                distance = retreat[2] if retreat is not None else math.inf
+                key = (retreat is None, priority, distance, str(agv))
+                if best is None or key < best[0]:
+                    best = (key, agv, retreat)
+            _, agv, retreat = best
+
+            # Zonas do ciclo que o AGV ocupa (liberar) e que ele espera (desistir)
+            size = len(cycle)
+            release = [cycle[k - 1][1] for k in range(size) if cycle[k] == (NODE_AGV, agv) and cycle[k - 1][0] == NODE_ZONE]
+            cancel = [cycle[(k + 1) % size][1] for k in range(size)
+                      if cycle[k] == (NODE_AGV, agv) and cycle[(k + 1) % size][0] == NODE_ZONE]
+
+            resolution = Resolution(cycle, agv, release, cancel, detected_at=time.time())
+            if retreat is not None:
+                resolution.target, resolution.path, resolution.distance = retreat
+            return resolution
+
+    def _station(self, agv: Hashable) -> Optional[int]:
+        position = self.locate(agv) if self.locate is not None else None
+        return self.graph.nearest_station(*position) if position is not None else None
+
+    def _retreat(
+        self, agv: Hashable, agvs: List[Hashable], zones: Set[str]
+    ) -> Optional[Tuple[str, List[str], float]]:
+        """
+        Estação de recuo do AGV: a mais próxima (pelo grafo, até max_retreat)
+        fora das zonas do ciclo, sem passar pelas zonas dos outros nem pelas
+        estações onde os outros AGVs do ciclo estão parados
+        """
+        if self.graph is None:
+            return None
+        source = self._station(agv)
+        if source is None:
+            return None
+
+        inside: Set[int] = set()
+        for zone in zones:
+            inside |= self.zone_stations.get(zone, set())
+        own: Set[int] = set()
+        for zone in self.held.get(agv, ()):
+            own |= self.zone_stations.get(zone, set())
+        blocked = inside - own
+        for other in agvs:
+            if other != agv:
+                station = self._station(other)
+                if station is not None:
+                    blocked.add(station)
+
+        indptr, indices, weights = self.graph.adjacency()
+        distances = {source: 0.0}
+        predecessors: Dict[int, int] = {}
+        settled = set()
+        heap = [(0.0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if node != source and node not in inside:
+                path = [node]
+                while path[-1] != source:
+                    path.append(predecessors[path[-1]])
+                return self.graph.code_of(node), [self.graph.code_of(k) for k in reversed(path)], distance
+
+            for position in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[position]
+                candidate = distance + weights[position]
+                if neighbor in blocked or candidate > self.max_retreat:
+                    continue
+                if candidate < distances.get(neighbor, math.inf):
+                    distances[neighbor] = candidate
+                    predecessors[neighbor] = node
+                    heapq.heappush(heap, (candidate, neighbor))
+        return None
+
+    # ----- Consultas -----
+
+    def deadlocks(self) -> List[Resolution]:
+        """Impasses ainda abertos, do mais antigo ao mais recente"""
+        with self._lock:
+            return list(self._active.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'nodes': len(self.waits),
+                'edges': self.waits.num_edges,
+                'changes': self.changes,
+                'detected': self.detected,
+                'resolved': self.resolved,
+                'open': len(self._active),
+                'searches': self.waits.searches,
+                'visited': self.waits.visited,
+                'update_us': _latency(self._update_us),
+                'detect_us': _latency(self._detect_us),
+                'resolve_us': _latency(self._resolve_us),
+            }
@@ -0,0 +1,317 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from src.routing.layout_graph import LayoutGraph, LayoutRef
+from src.routing.route_matrix import RouteMatrix
+from src.routing.shortest_path import astar, build_path, dijkstra, heuristic_scale
+from src.utils.exceptions import RouteNotFoundError
+from config.settings import settings
+from loguru import logger
+
+METHOD_MATRIX = 'matrix'
+METHOD_ASTAR = 'astar'
+METHOD_DIJKSTRA = 'dijkstra'
+
+class Route:
+    """Rota entre duas estações"""
+
+    __slots__ = ('stations', 'indices', 'distance')
+
+    def __init__(self, stations: List[str], indices: List[int], distance: float):
+        self.stations = stations
+        self.indices = indices
+        self.distance = distance
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stations': self.stations, 'distance': self.distance}
+
+    def __repr__(self):
+        return f"Route({' -> '.join(self.stations)}, distance={self.distance:g})"
+
+class RouteService:
+    """
+    Serviço de rotas de um layout
+
+    Com a matriz pré-calculada (padrão para layouts de até
+    ROUTE_MATRIX_MAX_STATIONS estações) a consulta estação-estação apenas
+    segue os próximos saltos; sem ela usa A*.
+
+    As rotas entregues por route() ficam em cache (LRU, ROUTE_CACHE_SIZE),
+    indexadas pelas arestas que percorrem. Bloquear, liberar ou alterar um
+    trecho repara a matriz de forma incremental e retorna os pares
+    (origem, destino) das rotas em cache afetadas, que saem do cache.
+
+    O serviço trabalha sobre uma cópia dos pesos do grafo (LayoutGraph.copy):
+    bloqueios e comprimentos alterados valem só para ele, e o grafo
+    compartilhado de LayoutGraph.get, usado por outros serviços e pelo
+    planejador, continua com os comprimentos cadastrados.
+
+    Usage:
+        service = RouteService('LAYOUT-01')
+        route = service.route('EST-01', 'EST-42')
+        distances = service.distances([('EST-01', 'EST-42'), ('EST-03', 'EST-07')])
+        affected = service.block_path(17)      # {('EST-01', 'EST-42'), ...}
+    """
+
+    def __init__(
+        self,
+        layout: Optional[LayoutRef] = None,
+        graph: Optional[LayoutGraph] = None,
+        use_matrix: Optional[bool] = None,
+        matrix_dir: Optional[str] = None,
+        repository=None
+    ):
+        self.graph = (graph if graph is not None else LayoutGraph.get(layout, repository)).copy()
+        self.matrix: Optional[RouteMatrix] = None
+        self._scale = heuristic_scale(self.graph)
+        self._lock = threading.RLock()
+        self._cache_size = settings.ROUTE_CACHE_SIZE
+        self._routes: 'OrderedDict[Tuple[int, int], Route]' = OrderedDict()
+        self._routes_by_edge: Dict[int, Set[Tuple[int, int]]] = {}
+
+        if use_matrix is None:
+            use_matrix = self.graph.num_stations <= settings.ROUTE_MATRIX_MAX_STATIONS
+        if use_matrix:
+            self.matrix = self._load_matrix(matrix_dir or settings.ROUTE_MATRIX_DIR)
+
+    def _load_matrix(self, matrix_dir: str) -> RouteMatrix:
+        started = time.perf_counter()
+        matrix = RouteMatrix.for_graph(self.graph, matrix_dir)
+        logger.info(
+            f"✓ Matriz de rotas pronta: {self.graph!r} "
+            f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+        )
+        return matrix
+
+    def _route(self, indices: List[int], distance: float) -> Route:
+        return Route([self.graph.code_of(i) for i in indices], indices, distance)
+
+    def _not_found(self, origin: str, destination: str) -> RouteNotFoundError:
+        return RouteNotFoundError(f"Não existe rota de '{origin}' para '{destination}'")
+
+    # ----- Consulta individual -----
+
+    def route(self, origin: str, destination: str, method: Optional[str] = None) -> Route:
+        """
+        Menor rota entre duas estações (códigos)
+
+        Raises:
+            RouteNotFoundError: Destino inalcançável a partir da origem
+        """
+        source = self.graph.index_of(origin)
+        target = self.graph.index_of(destination)
+
+        with self._lock:
+            cached = self._routes.get((source, target))
+            if cached is not None and method is None:
+                self._routes.move_to_end((source, target))
+                return cached
+
+            route = self._compute_route(source, target, method)
+            if route is None:
+                raise self._not_found(origin, destination)
+            self._cache_route(source, target, route)
+            return route
+
+    def _compute_route(self, source: int, target: int, method: Optional[str]) -> Optional[Route]:
+        method = method or (METHOD_MATRIX if self.matrix is not None else METHOD_ASTAR)
+
+        if method == METHOD_MATRIX:
+            if self.matrix is None:
+                raise ValueError("Matriz de rotas não carregada")
+            indices = self.matrix.path(source, target)
+            distance = self.matrix.distance(source, target)
+        elif method == METHOD_ASTAR:
+            distance, indices = astar(self.graph, source, target, self._scale)
+        elif method == METHOD_DIJKSTRA:
+            distances, predecessors = dijkstra(self.graph, source, [target])
+            distance = distances.get(target, math.inf)
+            indices = build_path(predecessors, source, target) if target in distances else []
+        else:
+            raise ValueError(f"Método inválido: {method}")
+
+        return self._route(indices, distance) if indices else None
+
+    def distance(self, origin: str, destination: str) -> float:
+        """Comprimento da menor rota (inf se não houver)"""
+        source = self.graph.index_of(origin)
+        target = self.graph.index_of(destination)
+        with self._lock:
+            if self.matrix is not None:
+                return self.matrix.distance(source, target)
+            distance, _ = astar(self.graph, source, target, self._scale)
+            return distance
+
+    # ----- Consultas em lote -----
+
+    def _pair_indices(self, pairs: Iterable[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+        pairs = list(pairs)
+        sources = np.fromiter((self.graph.index_of(o) for o, _ in pairs), dtype=np.int32, count=len(pairs))
+        targets = np.fromiter((self.graph.index_of(d) for _, d in pairs), dtype=np.int32, count=len(pairs))
+        return sources, targets
+
+    def distances(self, pairs: Iterable[Tuple[str, str]]) -> np.ndarray:
+        """Distâncias de vários pares (origem, destino); inf quando não há rota"""
+        sources, targets = self._pair_indices(pairs)
+        with self._lock:
+            if self.matrix is not None:
+                return self.matrix.distances_for(sources, targets)
+
+            result = np.full(len(sources), np.inf)
+            for source, positions in self._group_by_source(sources).items():
+                found, _ = dijkstra(self.graph, source, targets[positions].tolist())
+                result[positions] = [found.get(int(t), np.inf) for t in targets[positions]]
+            return result
+
+    def routes(self, pairs: Iterable[Tuple[str, str]]) -> List[Optional[Route]]:
+        """Rotas de vários pares (origem, destino); None quando não há rota (entram no cache)"""
+        sources, targets = self._pair_indices(pairs)
+        result: List[Optional[Route]] = [None] * len(sources)
+
+        with self._lock:
+            if self.matrix is not None:
+                distances = self.matrix.distances_for(sources, targets)
+                for position in np.flatnonzero(np.isfinite(distances)):
+                    source, target = int(sources[position]), int(targets[position])
+                    result[position] = self._route(self.matrix.path(source, target), float(distances[position]))
+                    self._cache_route(source, target, result[position])
+                return result
+
+            # Sem matriz: uma busca por origem atende todos os seus destinos
+            for source, positions in self._group_by_source(sources).items():
+                found, predecessors = dijkstra(self.graph, source, targets[positions].tolist())
+                for position in positions:
+                    target = int(targets[position])
+                    if target in found:
+                        result[position] = self._route(build_path(predecessors, source, target), found[target])
+                        self._cache_route(source, target, result[position])
+            return result
+
+    @staticmethod
+    def _group_by_source(sources: np.ndarray) -> Dict[int, np.ndarray]:
+        order = np.argsort(sources, kind='stable')
+        unique, starts = np.unique(sources[order], return_index=True)
+        return {int(source): group for source, group in zip(unique, np.split(order, starts[1:]))}
+
+    # ----- Cache de rotas -----
+
+    def _route_edges(self, route: Route) -> List[int]:
+        return [self.graph.edge_index(u, v) for u, v in zip(route.indices, route.indices[1:])]
+
+    def _cache_route(self, source: int, target: int, route: Route):
+        key = (source, target)
+        if key in self._routes:
+            self._uncache_route(key)
+        self._routes[key] = route
+        for edge in self._route_edges(route):
+            self._routes_by_edge.setdefault(edge, set()).add(key)
+
+        while len(self._routes) > self._cache_size:
+            self._uncache_route(next(iter(self._routes)))
+
+    def _uncache_route(self, key: Tuple[int, int]):
+        route = self._routes.pop(key)
+        for edge in self._route_edges(route):
+            keys = self._routes_by_edge.get(edge)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._routes_by_edge[edge]
+
+    def cached_routes(self) -> Dict[Tuple[str, str], Route]:
+        """Rotas em cache por (origem, destino)"""
+        with self._lock:
+            return {
+                (self.graph.code_of(source), self.graph.code_of(target)): route
+                for (source, target), route in self._routes.items()
+            }
+
+    # ----- Bloqueio e alteração de trechos -----
+
+    def block_path(self, path_id: int) -> Set[Tuple[str, str]]:
+        """
+        Bloqueia um trecho (manutenção, obstáculo)
+
+        Returns:
+            Pares (origem, destino) das rotas em cache que passavam pelo trecho
+        """
+        return self._update_path(path_id, 'bloqueado', self.graph.block_path)
+
+    def unblock_path(self, path_id: int) -> Set[Tuple[str, str]]:
+        """
+        Libera um trecho bloqueado
+
+        Returns:
+            Pares (origem, destino) das rotas em cache que ficam mais curtas
+        """
+        return self._update_path(path_id, 'liberado', self.graph.unblock_path)
+
+    def update_path_length(self, path_id: int, length: float) -> Set[Tuple[str, str]]:
+        """Altera o comprimento (custo) de um trecho, ex.: congestionamento"""
+        return self._update_path(
+            path_id, f'com comprimento {length:g}',
+            lambda path: self.graph.set_path_length(path, length)
+        )
+
+    def _update_path(self, path_id: int, description: str, apply) -> Set[Tuple[str, str]]:
+        started = time.perf_counter()
+
+        with self._lock:
+            edges = self.graph.path_edges(path_id)
+            old_weights = self.graph.weights[edges].copy()
+            apply(path_id)
+            self._scale = heuristic_scale(self.graph)
+
+            sources = self.graph.edge_sources()
+            affected: Set[Tuple[int, int]] = set()
+
+            for edge, old_weight in zip(edges.tolist(), old_weights.tolist()):
+                new_weight = float(self.graph.weights[edge])
+                source, target = int(sources[edge]), int(self.graph.indices[edge])
+
+                if new_weight > old_weight:
+                    affected.update(self._routes_by_edge.get(edge, ()))
+                changed = None
+                if self.matrix is not None:
+                    changed = self.matrix.update_edge(self.graph, source, target, old_weight)
+                if new_weight < old_weight:
+                    affected.update(self._improvable_routes(source, target, new_weight, changed))
+
+            affected_codes = set()
+            for key in affected:
+                if key in self._routes:
+                    self._uncache_route(key)
+                    affected_codes.add((self.graph.code_of(key[0]), self.graph.code_of(key[1])))
+
+        logger.info(
+            f"Trecho {path_id} {description}: {len(affected_codes)} rotas afetadas "
+            f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+        )
+        return affected_codes
+
+    def _improvable_routes(
+        self, source: int, target: int, weight: float, changed: Optional[np.ndarray]
+    ) -> List[Tuple[int, int]]:
+        """Rotas em cache que podem ficar mais curtas com a aresta source -> target"""
+        keys = list(self._routes)
+        if not keys:
+            return []
+        origins = np.array([key[0] for key in keys])
+        destinations = np.array([key[1] for key in keys])
+
+        if changed is not None:
+            return [keys[i] for i in np.flatnonzero(changed[origins, destinations])]
+
+        # Sem matriz: limite inferior pela heurística (distância reta escalada)
+        x, y = self.graph.x, self.graph.y
+        lower_bound = self._scale * (
+            np.hypot(x[source] - x[origins], y[source] - y[origins])
+            + np.hypot(x[destinations] - x[target], y[destinations] - y[target])
+        ) + weight
+        current = np.array([self._routes[key].distance for key in keys])
+        return [keys[i] for i in np.flatnonzero(lower_bound < current)]
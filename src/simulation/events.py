@@ -0,0 +1,38 @@
+"""
+Fila de eventos da simulação (heap por instante)
+
+Eventos no mesmo instante saem na ordem em que foram agendados (número de
+sequência no desempate), o que torna a simulação determinística.
+
+Usage:
+    queue = EventQueue()
+    queue.push(12.5, EVENT_ARRIVE, agv)
+    time, kind, data = queue.pop()
+"""
+import heapq
+import itertools
+
+from typing import Any, List, Optional, Tuple
+
+class EventQueue:
+    """Eventos (instante, tipo, dados) em ordem de instante"""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str, Any]] = []
+        self._sequence = itertools.count()
+        self.pushed = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, time: float, kind: str, data: Any = None):
+        heapq.heappush(self._heap, (time, next(self._sequence), kind, data))
+        self.pushed += 1
+
+    def peek_time(self) -> Optional[float]:
+        """Instante do próximo evento (None com a fila vazia)"""
+        return self._heap[0][0] if self._heap else None
+
+    def pop(self) -> Tuple[float, str, Any]:
+        time, _, kind, data = heapq.heappop(self._heap)
+        return time, kind, data
@@ -0,0 +1,89 @@
+"""
+Cinemática vetorizada dos AGVs simulados
+
+Cada AGV segue uma trajetória linear por partes (instante, x, y): as
+passagens do plano por estação, com as esperas como trechos parados. Para
+calcular a posição de toda a frota num instante, cada AGV guarda só o
+trecho atual (t0, t1, x0, y0, x1, y1) em arrays; a posição é uma
+interpolação NumPy sobre todos os AGVs de uma vez, e apenas os AGVs que
+passaram do fim do trecho avançam o cursor na sua trajetória.
+
+Usage:
+    kinematics = Kinematics(x, y)                      # posições iniciais
+    kinematics.follow(3, [0.0, 4.0], [0.0, 4.0], [0.0, 0.0])
+    x, y, heading, speed = kinematics.positions(2.0)   # AGV 3 em (2, 0)
+"""
+import numpy as np
+
+from typing import List, Optional, Sequence, Tuple
+
+class Kinematics:
+    """Posição, orientação e velocidade de todos os AGVs num instante"""
+
+    def __init__(self, x: Sequence[float], y: Sequence[float]):
+        self.x0 = np.asarray(x, dtype=np.float64).copy()
+        self.y0 = np.asarray(y, dtype=np.float64).copy()
+        self.x1 = self.x0.copy()
+        self.y1 = self.y0.copy()
+        self.t0 = np.zeros(len(self.x0))
+        self.t1 = np.zeros(len(self.x0))
+        self._tracks: List[Optional[Tuple[List[float], List[float], List[float]]]] = [None] * len(self.x0)
+        self._cursor = [0] * len(self.x0)
+
+    def __len__(self):
+        return len(self.x0)
+
+    def follow(self, slot: int, times: Sequence[float], xs: Sequence[float], ys: Sequence[float]):
+        """Passa o AGV a seguir a trajetória (instantes não decrescentes)"""
+        if not len(times) == len(xs) == len(ys) or not len(times):
+            raise ValueError("Trajetória inválida")
+        self._tracks[slot] = (list(times), list(xs), list(ys))
+        self._segment(slot, 0)
+
+    def _segment(self, slot: int, k: int):
+        """Trecho k da trajetória (após o último ponto, o AGV fica parado nele)"""
+        times, xs, ys = self._tracks[slot]
+        self._cursor[slot] = k
+        last = len(times) - 1
+        if k >= last:
+            self.t0[slot] = self.t1[slot] = times[last]
+            self.x0[slot] = self.x1[slot] = xs[last]
+            self.y0[slot] = self.y1[slot] = ys[last]
+            return
+        self.t0[slot], self.t1[slot] = times[k], times[k + 1]
+        self.x0[slot], self.x1[slot] = xs[k], xs[k + 1]
+        self.y0[slot], self.y1[slot] = ys[k], ys[k + 1]
+
+    def _advance(self, now: float):
+        """Avança o cursor dos AGVs que já passaram do fim do trecho atual"""
+        for slot in np.nonzero(now > self.t1)[0].tolist():
+            track = self._tracks[slot]
+            if track is None:
+                continue
+            times = track[0]
+            k = self._cursor[slot]
+            last = len(times) - 1
+            if k >= last:
+                continue
+            while k < last and times[k + 1] < now:
+                k += 1
+            self._segment(slot, k)
+
+    def positions(self, now: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """x, y, orientação (graus) e velocidade de todos os AGVs em now"""
+        self._advance(now)
+        span = self.t1 - self.t0
+        moving = span > 0
+        fraction = np.zeros(len(self.x0))
+        np.divide(now - self.t0, span, out=fraction, where=moving)
+        np.clip(fraction, 0.0, 1.0, out=fraction)
+
+        dx = self.x1 - self.x0
+        dy = self.y1 - self.y0
+        x = self.x0 + dx * fraction
+        y = self.y0 + dy * fraction
+        distance = np.hypot(dx, dy)
+        speed = np.zeros(len(self.x0))
+        np.divide(distance, span, out=speed, where=moving & (now >= self.t0) & (now < self.t1))
+        heading = np.degrees(np.arctan2(dy, dx))
+        return x, y, heading, speed
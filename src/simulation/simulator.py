@@ -0,0 +1,502 @@
+"""
+Simulador de eventos discretos da frota (teste de carga de rotas e atribuição)
+
+AGVs virtuais circulam pelo grafo de um layout (tabelas layout/station/path)
+e usam os mesmos componentes da operação real:
+
+- DispatchService atribui as missões pendentes aos AGVs livres a cada
+  dispatch_interval (a planta virtual faz o papel dos repositórios agv e
+  mission, sem banco). Missão cuja coleta ou entrega é estação de outra
+  missão em andamento (ou ocupada por AGV em movimento) espera: dois AGVs
+  ocupados nunca disputam a mesma estação, o que levaria a trocas de
+  posição sem solução e ao travamento da frota;
+- FleetPlanner planeja cada trecho sem conflito (até a coleta, depois até a
+  entrega); AGV livre parado no destino de outro é deslocado para a estação
+  livre mais próxima;
+- TelemetryIngestor (opcional) recebe a posição de todos os AGVs a cada
+  telemetry_interval, calculada de forma vetorizada (Kinematics).
+
+O tempo avança de evento em evento (chegada de missão, ciclo de atribuição,
+chegada a estação, fim de carga/descarga, amostra de telemetria), muito mais
+rápido que o tempo real. Com a mesma semente, a simulação é determinística.
+
+Usage:
+    simulator = FleetSimulator.from_layout('LAYOUT-01', agvs=50, missions_per_hour=600)
+    report = simulator.run(hours=8)
+    report.to_dict()    # missões/hora, congestionamento, latência do planejador
+"""
+import math
+import time
+
+import numpy as np
+
+from typing import Any, Dict, List, Optional, Sequence
+from src.routing.fleet_planner import FleetPlanner, PlanRequest
+from src.routing.layout_graph import LayoutGraph, LayoutRef
+from src.services.dispatch_service import DispatchService
+from src.services.route_service import RouteService
+from loguru import logger
+from .events import EventQueue
+from .kinematics import Kinematics
+
+EVENT_MISSION = 'mission'
+EVENT_DISPATCH = 'dispatch'
+EVENT_PLAN = 'plan'
+EVENT_ARRIVE = 'arrive'
+EVENT_DONE = 'done'
+EVENT_TELEMETRY = 'telemetry'
+
+# Intervalo (segundos simulados) entre as limpezas da tabela de reservas
+PRUNE_INTERVAL = 60.0
+
+# Estado do AGV simulado (também o campo state da telemetria)
+AGV_IDLE = 0
+AGV_TO_PICKUP = 1
+AGV_TO_DROPOFF = 2
+AGV_RELOCATING = 3
+
+def _stats(values: Sequence[float]) -> Dict[str, float]:
+    """Média, p50, p95 e máximo (zeros sem valores)"""
+    if not len(values):
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    values = np.asarray(values, dtype=np.float64)
+    p50, p95 = np.percentile(values, [50, 95])
+    return {
+        'count': len(values),
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+class VirtualPlant:
+    """AGVs e missões da simulação, com a interface dos repositórios usada pelo DispatchService"""
+
+    def __init__(self, graph: LayoutGraph):
+        self.graph = graph
+        self.agvs: List[Dict[str, Any]] = []
+        self.missions: Dict[int, Dict[str, Any]] = {}
+        self.pending: Dict[int, Dict[str, Any]] = {}
+
+    def find_idle(self, layout_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [agv for agv in self.agvs if agv['state'] == AGV_IDLE]
+
+    def find_pending(self, layout_id: Optional[int] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        pending = sorted(self.pending.values(), key=lambda m: (-m['priority'], m['created'], m['id']))
+        return pending[:limit]
+
+    def assign_batch(self, assignments) -> int:
+        for mission_id, agv_id in assignments:
+            mission = self.pending.pop(mission_id)
+            mission['agv_id'] = agv_id
+        return len(assignments)
+
+class SimulationReport:
+    """Indicadores de uma execução do simulador"""
+
+    def __init__(self, simulator: 'FleetSimulator', wall_seconds: float):
+        sim = simulator
+        hours = sim.now / 3600 if sim.now else 0.0
+        completed = [m for m in sim.plant.missions.values() if 'completed' in m]
+        busy = sum(sim.busy_seconds) + sum(
+            sim.now - started for started in sim.busy_since if started is not None
+        )
+
+        self.agvs = len(sim.plant.agvs)
+        self.stations = sim.graph.num_stations
+        self.sim_seconds = sim.now
+        self.wall_seconds = wall_seconds
+        self.events = sim.events_processed
+        self.missions_created = len(sim.plant.missions)
+        self.missions_completed = len(completed)
+        self.missions_pending = len(sim.plant.pending)
+        self.missions_per_hour = len(completed) / hours if hours else 0.0
+        self.cycle_time = _stats([m['completed'] - m['created'] for m in completed])
+        self.assignment_wait = _stats([
+            m['assigned'] - m['created'] for m in sim.plant.missions.values() if 'assigned' in m
+        ])
+        self.utilization = busy / (self.agvs * sim.now) if self.agvs and sim.now else 0.0
+
+        free_flow = sum(sim.free_flow_seconds)
+        self.wait_seconds = sum(sim.station_wait.values())
+        self.delay_factor = sum(sim.travel_seconds) / free_flow if free_flow else 1.0
+        self.plan_failures = sim.plan_failures
+        self.relocations = sim.relocations
+        self.hot_stations = [
+            (sim.graph.code_of(index), round(seconds, 1))
+            for index, seconds in sorted(sim.station_wait.items(), key=lambda item: -item[1])[:5]
+        ]
+        self.planner_ms = _stats(sim.planner_ms)
+        self.dispatch_ms = _stats(sim.dispatch_ms)
+
+    @property
+    def speedup(self) -> float:
+        """Segundos simulados por segundo real"""
+        return self.sim_seconds / self.wall_seconds if self.wall_seconds else math.inf
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'agvs': self.agvs,
+            'stations': self.stations,
+            'sim_seconds': round(self.sim_seconds, 1),
+            'wall_seconds': round(self.wall_seconds, 3),
+            'speedup': round(self.speedup, 1),
+            'events': self.events,
+            'events_per_second': round(self.events / self.wall_seconds, 1) if self.wall_seconds else 0.0,
+            'missions': {
+                'created': self.missions_created,
+                'completed': self.missions_completed,
+                'pending': self.missions_pending,
+                'per_hour': round(self.missions_per_hour, 1),
+            },
+            'cycle_time': self.cycle_time,
+            'assignment_wait': self.assignment_wait,
+            'utilization': round(self.utilization, 3),
+            'congestion': {
+                'wait_seconds': round(self.wait_seconds, 1),
+                'delay_factor': round(self.delay_factor, 3),
+                'plan_failures': self.plan_failures,
+                'relocations': self.relocations,
+                'hot_stations': self.hot_stations,
+            },
+            'planner_ms': self.planner_ms,
+            'dispatch_ms': self.dispatch_ms,
+        }
+
+class FleetSimulator:
+    """
+    Simulação determinística da frota num layout
+
+    missions_per_hour: chegada de missões (processo de Poisson) com coleta e
+    entrega sorteadas entre stations (todas as estações, por padrão).
+    handling_time: segundos parado na coleta e na entrega.
+    retry_delay: espera antes de replanejar um trecho que não teve rota livre.
+    """
+
+    def __init__(
+        self,
+        graph: LayoutGraph,
+        agvs: int,
+        missions_per_hour: float,
+        route_service: Optional[RouteService] = None,
+        ingestor=None,
+        stations: Optional[Sequence[str]] = None,
+        speed: float = 1.0,
+        handling_time: float = 10.0,
+        dispatch_interval: float = 5.0,
+        telemetry_interval: float = 1.0,
+        retry_delay: float = 2.0,
+        clearance: float = 1.0,
+        seed: int = 1
+    ):
+        if agvs <= 0 or agvs > graph.num_stations:
+            raise ValueError(f"Número de AGVs inválido para {graph.num_stations} estações: {agvs}")
+        if missions_per_hour <= 0:
+            raise ValueError(f"Taxa de missões inválida: {missions_per_hour}")
+
+        self.graph = graph
+        self.route_service = route_service if route_service is not None else RouteService(graph=graph)
+        self.planner = FleetPlanner(graph, route_service=self.route_service, clearance=clearance)
+        self.plant = VirtualPlant(graph)
+        self.dispatcher = DispatchService(
+            route_service=self.route_service, agv_repository=self.plant, mission_repository=self.plant
+        )
+        self.ingestor = ingestor
+        self.rng = np.random.default_rng(seed)
+
+        self.missions_per_hour = missions_per_hour
+        self.handling_time = handling_time
+        self.dispatch_interval = dispatch_interval
+        self.telemetry_interval = telemetry_interval
+        self.retry_delay = retry_delay
+        self.stations = np.array(
+            [graph.index_of(code) for code in stations] if stations is not None else range(graph.num_stations),
+            dtype=np.intp
+        )
+        if len(self.stations) < 2:
+            raise ValueError("São necessárias ao menos 2 estações para as missões")
+
+        # Frota em estações distintas sorteadas
+        starts = self.rng.choice(graph.num_stations, size=agvs, replace=False).tolist()
+        for slot, index in enumerate(starts):
+            self.plant.agvs.append({
+                'id': slot + 1,
+                'code': f'AGV-{slot + 1:03d}',
+                'slot': slot,
+                'station_id': int(graph.station_ids[index]),
+                'station': index,
+                'speed': speed,
+                'state': AGV_IDLE,
+                'mission': None,
+            })
+        self._by_code = {agv['code']: agv for agv in self.plant.agvs}
+        # Estação -> AGV parado nela ou a caminho dela
+        self.occupant: Dict[int, Dict[str, Any]] = {agv['station']: agv for agv in self.plant.agvs}
+        self.kinematics = Kinematics(graph.x[starts], graph.y[starts])
+
+        self.queue = EventQueue()
+        self.now = 0.0
+        self.events_processed = 0
+        self.wall_seconds = 0.0
+        self._pruned = 0.0
+        self.planner_ms: List[float] = []
+        self.dispatch_ms: List[float] = []
+        self.travel_seconds: List[float] = []
+        self.free_flow_seconds: List[float] = []
+        self.station_wait: Dict[int, float] = {}
+        self.busy_seconds: List[float] = []
+        self.busy_since: List[Optional[float]] = [None] * agvs
+        self.plan_failures = 0
+        self.relocations = 0
+
+        self._handlers = {
+            EVENT_MISSION: self._on_mission,
+            EVENT_DISPATCH: self._on_dispatch,
+            EVENT_PLAN: self._on_plan,
+            EVENT_ARRIVE: self._on_arrive,
+            EVENT_DONE: self._on_done,
+            EVENT_TELEMETRY: self._on_telemetry,
+        }
+        self.queue.push(self._next_arrival(0.0), EVENT_MISSION)
+        self.queue.push(0.0, EVENT_DISPATCH)
+        if ingestor is not None:
+            self.queue.push(0.0, EVENT_TELEMETRY)
+
+    @classmethod
+    def from_layout(cls, layout: LayoutRef, agvs: int, missions_per_hour: float, **kwargs) -> 'FleetSimulator':
+        """Simulador sobre um layout carregado do banco (id ou código)"""
+        return cls(LayoutGraph.get(layout), agvs, missions_per_hour, **kwargs)
+
+    # ----- Execução -----
+
+    def run(self, seconds: Optional[float] = None, hours: Optional[float] = None) -> SimulationReport:
+        """Processa os eventos até now + duração e retorna os indicadores acumulados"""
+        duration = seconds if seconds is not None else (hours or 0.0) * 3600
+        end = self.now + duration
+        started = time.perf_counter()
+
+        queue = self.queue
+        handlers = self._handlers
+        while queue and queue.peek_time() <= end:
+            self.now, kind, data = queue.pop()
+            handlers[kind](data)
+            self.events_processed += 1
+        self.now = end
+
+        self.wall_seconds += time.perf_counter() - started
+        report = SimulationReport(self, self.wall_seconds)
+        logger.info(
+            f"✓ Simulação: {report.sim_seconds / 3600:.2f} h com {report.agvs} AGVs em "
+            f"{report.wall_seconds:.1f} s ({report.speedup:.0f}x), "
+            f"{report.missions_completed} missões ({report.missions_per_hour:.0f}/h)"
+        )
+        return report
+
+    # ----- Eventos -----
+
+    def _next_arrival(self, now: float) -> float:
+        return now + self.rng.exponential(3600.0 / self.missions_per_hour)
+
+    def _on_mission(self, _):
+        pickup, dropoff = self.rng.choice(self.stations, size=2, replace=False).tolist()
+        mission_id = len(self.plant.missions) + 1
+        mission = {
+            'id': mission_id,
+            'code': f'M-{mission_id:06d}',
+            'pickup_station_id': int(self.graph.station_ids[pickup]),
+            'dropoff_station_id': int(self.graph.station_ids[dropoff]),
+            'pickup': pickup,
+            'dropoff': dropoff,
+            'priority': int(self.rng.random() < 0.1),
+            'created': self.now,
+        }
+        self.plant.missions[mission_id] = mission
+        self.plant.pending[mission_id] = mission
+        self.queue.push(self._next_arrival(self.now), EVENT_MISSION)
+
+    def _on_dispatch(self, _):
+        # Reservas encerradas só ocupam memória; descartá-las custa uma volta na tabela
+        if self.now - self._pruned >= PRUNE_INTERVAL:
+            self.planner.prune(self.now)
+            self._pruned = self.now
+        held = self._held_stations()
+        # AGV livre parado em estação de missão em andamento espera ser deslocado
+        agvs = [agv for agv in self.plant.find_idle() if agv['station'] not in held]
+        missions = self._dispatchable(self.plant.find_pending(), held)
+        if agvs and missions:
+            result = self.dispatcher.assign(agvs, missions)
+            self.dispatch_ms.append(result.build_ms + result.solve_ms)
+            assignments = self._without_conflicts(result.assignments)
+            self.plant.assign_batch([(a.mission['id'], a.agv['id']) for a in assignments])
+
+            for assignment in assignments:
+                self._assign(assignment.agv, assignment.mission)
+            self._plan([assignment.agv for assignment in assignments])
+        self.queue.push(self.now + self.dispatch_interval, EVENT_DISPATCH)
+
+    def _held_stations(self) -> set:
+        """Estações das missões em andamento e as ocupadas (ou por ocupar) por AGVs que não estão livres"""
+        held = set()
+        for agv in self.plant.agvs:
+            if agv['state'] == AGV_IDLE:
+                continue
+            held.add(agv['station'])
+            mission = agv['mission']
+            if mission is not None:
+                held.update((mission['pickup'], mission['dropoff']))
+        return held
+
+    @staticmethod
+    def _dispatchable(missions: List[Dict[str, Any]], held: set) -> List[Dict[str, Any]]:
+        """Missões pendentes (em ordem de prioridade) sem estação em comum com as em andamento nem entre si"""
+        held = set(held)
+        selected = []
+        for mission in missions:
+            stations = (mission['pickup'], mission['dropoff'])
+            if held.isdisjoint(stations):
+                held.update(stations)
+                selected.append(mission)
+        return selected
+
+    @staticmethod
+    def _without_conflicts(assignments) -> list:
+        """
+        Descarta a atribuição cujo AGV está parado em estação de outra missão
+        do lote: ocupado, ele não poderia mais ser deslocado dali
+        """
+        stations = {}
+        for assignment in assignments:
+            for station in (assignment.mission['pickup'], assignment.mission['dropoff']):
+                stations[station] = assignment.mission
+        return [
+            assignment for assignment in assignments
+            if stations.get(assignment.agv['station'], assignment.mission) is assignment.mission
+        ]
+
+    def _assign(self, agv: Dict[str, Any], mission: Dict[str, Any]):
+        mission['assigned'] = self.now
+        agv['mission'] = mission
+        agv['state'] = AGV_TO_PICKUP
+        self.busy_since[agv['slot']] = self.now
+
+    def _on_plan(self, agv: Dict[str, Any]):
+        self._plan([agv])
+
+    def _on_arrive(self, agv: Dict[str, Any]):
+        state = agv['state']
+        if state == AGV_RELOCATING:
+            agv['state'] = AGV_IDLE
+        elif state == AGV_TO_PICKUP:
+            # Carga; em seguida planeja o trecho até a entrega
+            agv['state'] = AGV_TO_DROPOFF
+            self.queue.push(self.now + self.handling_time, EVENT_PLAN, agv)
+        else:
+            self.queue.push(self.now + self.handling_time, EVENT_DONE, agv)
+
+    def _on_done(self, agv: Dict[str, Any]):
+        agv['mission']['completed'] = self.now
+        agv['mission'] = None
+        agv['state'] = AGV_IDLE
+        slot = agv['slot']
+        self.busy_seconds.append(self.now - self.busy_since[slot])
+        self.busy_since[slot] = None
+
+    def _on_telemetry(self, _):
+        x, y, heading, speed = self.kinematics.positions(self.now)
+        record = self.ingestor.record
+        now = self.now
+        for agv, xi, yi, hi, si in zip(self.plant.agvs, x.tolist(), y.tolist(), heading.tolist(), speed.tolist()):
+            record(agv['id'], now, xi, yi, speed=si, battery=100.0, state=agv['state'], heading=hi)
+        self.queue.push(self.now + self.telemetry_interval, EVENT_TELEMETRY)
+
+    # ----- Planejamento -----
+
+    def _goal(self, agv: Dict[str, Any]) -> int:
+        mission = agv['mission']
+        return mission['pickup'] if agv['state'] == AGV_TO_PICKUP else mission['dropoff']
+
+    def _relocation_target(self, agv: Dict[str, Any], taken: set) -> Optional[int]:
+        """Estação livre mais próxima do AGV (sem ocupante e fora dos destinos do lote)"""
+        graph = self.graph
+        x, y = graph.x[agv['station']], graph.y[agv['station']]
+        k = 8
+        while True:
+            found = graph.station_index().nearest(x, y, k=k)
+            for index, _ in found:
+                if index not in self.occupant and index not in taken:
+                    return index
+            if len(found) < k:
+                return None
+            k *= 4
+
+    def _plan(self, agvs: List[Dict[str, Any]]):
+        """Planeja os AGVs até o próximo destino (e desloca AGVs livres que estejam no caminho)"""
+        if not agvs:
+            return
+        graph = self.graph
+        goals = {agv['code']: self._goal(agv) for agv in agvs}
+        taken = set(goals.values())
+
+        requests = []
+        for agv in agvs:
+            goal = goals[agv['code']]
+            requests.append(PlanRequest(
+                agv['code'], graph.code_of(agv['station']), graph.code_of(goal),
+                self.now, priority=agv['mission']['priority'], speed=agv['speed']
+            ))
+            parked = self.occupant.get(goal)
+            if parked is not None and parked is not agv and parked['state'] == AGV_IDLE:
+                target = self._relocation_target(parked, taken)
+                if target is not None:
+                    taken.add(target)
+                    goals[parked['code']] = target
+                    requests.append(PlanRequest(
+                        parked['code'], graph.code_of(parked['station']), graph.code_of(target),
+                        self.now, priority=-1, speed=parked['speed']
+                    ))
+
+        result = self.planner.plan(requests, now=self.now)
+        self.planner_ms.append(result.elapsed_ms)
+
+        for request in requests:
+            agv = self._by_code[request.agv]
+            plan = result.plans.get(request.agv)
+            relocation = agv['state'] == AGV_IDLE
+            if plan is None:
+                if not relocation:
+                    self.plan_failures += 1
+                    self.queue.push(self.now + self.retry_delay, EVENT_PLAN, agv)
+                continue
+
+            if relocation:
+                agv['state'] = AGV_RELOCATING
+                self.relocations += 1
+            self._start(agv, plan, goals[request.agv], request.speed)
+
+    def _start(self, agv: Dict[str, Any], plan, goal: int, speed: float):
+        """AGV parte seguindo o plano; chega ao destino em plan.arrival"""
+        graph = self.graph
+        origin = agv['station']
+        if self.occupant.get(origin) is agv:
+            del self.occupant[origin]
+        self.occupant[goal] = agv
+        agv['station'] = goal
+        agv['station_id'] = int(graph.station_ids[goal])
+
+        times, xs, ys = [], [], []
+        last = len(plan.waypoints) - 1
+        for k, (index, waypoint) in enumerate(zip(plan.indices, plan.waypoints)):
+            times.append(waypoint.arrive)
+            xs.append(graph.x[index])
+            ys.append(graph.y[index])
+            if 0 < k < last and waypoint.depart > waypoint.arrive:
+                self.station_wait[index] = self.station_wait.get(index, 0.0) + waypoint.depart - waypoint.arrive
+            if k < last:
+                times.append(waypoint.depart)
+                xs.append(graph.x[index])
+                ys.append(graph.y[index])
+        self.kinematics.follow(agv['slot'], times, xs, ys)
+
+        self.travel_seconds.append(plan.arrival - self.now)
+        self.free_flow_seconds.append(self.route_service.distance(graph.code_of(origin), graph.code_of(goal)) / speed)
+        self.queue.push(plan.arrival, EVENT_ARRIVE, agv)
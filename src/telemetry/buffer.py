@@ -0,0 +1,159 @@
+"""
+Buffers de telemetria em memória
+
+Cada AGV tem um RingBuffer pré-alocado (array estruturado NumPy de tamanho
+fixo): gravar uma amostra é uma atribuição de linha, sem alocação. O
+flusher retira as amostras ainda não gravadas em lote (drain); se ele
+atrasar, as mais antigas são sobrescritas e contadas em overwritten.
+
+LatestStateTable guarda a última amostra de cada AGV numa tabela (uma
+linha por AGV) para consultas vetorizadas, ex.: AGVs com bateria baixa.
+"""
+import threading
+
+import numpy as np
+
+from typing import Any, Dict, Iterable, List, Optional
+
+# Uma amostra: posição, orientação, velocidade, bateria (%) e estado
+SAMPLE_DTYPE = np.dtype([
+    ('ts', '<f8'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('heading', '<f4'),
+    ('speed', '<f4'),
+    ('battery', '<f4'),
+    ('state', 'u1'),
+])
+
+# Amostra com o id do AGV (lotes gravados e tabela de estado atual)
+RECORD_DTYPE = np.dtype([('agv', '<i4')] + SAMPLE_DTYPE.descr)
+
+class RingBuffer:
+    """Amostras recentes de um AGV em um array circular de tamanho fixo"""
+
+    __slots__ = ('data', 'capacity', 'overwritten', '_head', '_flushed', '_lock')
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Capacidade inválida: {capacity}")
+        self.data = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        self.capacity = capacity
+        self.overwritten = 0
+        self._head = 0          # Total de amostras gravadas
+        self._flushed = 0       # Total já entregue por drain()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._head, self.capacity)
+
+    @property
+    def pending(self) -> int:
+        """Amostras ainda não retiradas por drain()"""
+        return self._head - self._flushed
+
+    def append(self, ts: float, x: float, y: float, heading: float, speed: float, battery: float, state: int):
+        with self._lock:
+            self.data[self._head % self.capacity] = (ts, x, y, heading, speed, battery, state)
+            self._head += 1
+            if self._head - self._flushed > self.capacity:
+                self._flushed += 1
+                self.overwritten += 1
+
+    def _range(self, start: int, end: int) -> np.ndarray:
+        """Cópia das amostras [start, end) em ordem de gravação"""
+        first, last = start % self.capacity, end % self.capacity
+        if end - start == 0:
+            return self.data[:0].copy()
+        if first < last:
+            return self.data[first:last].copy()
+        return np.concatenate((self.data[first:], self.data[:last]))
+
+    def drain(self) -> np.ndarray:
+        """Retira as amostras pendentes (cópia, em ordem)"""
+        with self._lock:
+            samples = self._range(self._flushed, self._head)
+            self._flushed = self._head
+            return samples
+
+    def recent(self, count: Optional[int] = None) -> np.ndarray:
+        """Últimas count amostras em memória (já gravadas ou não)"""
+        with self._lock:
+            available = min(self._head, self.capacity)
+            count = available if count is None else min(count, available)
+            return self._range(self._head - count, self._head)
+
+class LatestStateTable:
+    """Última amostra de cada AGV, uma linha por AGV (cresce por duplicação)"""
+
+    def __init__(self, capacity: int = 64):
+        self._rows = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self._slots: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _slot(self, agv: int) -> int:
+        """Linha do AGV (chamado com o lock)"""
+        slot = self._slots.get(agv)
+        if slot is None:
+            slot = len(self._slots)
+            if slot == len(self._rows):
+                rows = np.zeros(2 * len(self._rows), dtype=RECORD_DTYPE)
+                rows[:slot] = self._rows
+                self._rows = rows
+            self._rows['ts'][slot] = -np.inf
+            self._slots[agv] = slot
+        return slot
+
+    def update(
+        self, agv: int, ts: float, x: float, y: float, heading: float, speed: float, battery: float, state: int
+    ) -> bool:
+        """Grava a amostra como estado atual; False se ela for mais antiga que a atual"""
+        with self._lock:
+            slot = self._slot(agv)
+            # Amostras fora de ordem não voltam o estado atual no tempo
+            if ts < self._rows['ts'][slot]:
+                return False
+            self._rows[slot] = (agv, ts, x, y, heading, speed, battery, state)
+            return True
+
+    def get(self, agv: int) -> Optional[Dict[str, Any]]:
+        """Estado atual do AGV (None se nunca reportou)"""
+        with self._lock:
+            slot = self._slots.get(agv)
+            if slot is None:
+                return None
+            row = self._rows[slot].copy()
+        return {name: row[name].item() for name in RECORD_DTYPE.names}
+
+    def snapshot(self) -> np.ndarray:
+        """Cópia da tabela (uma linha por AGV)"""
+        with self._lock:
+            return self._rows[:len(self._slots)].copy()
+
+    def select(
+        self,
+        states: Optional[Iterable[int]] = None,
+        battery_below: Optional[float] = None,
+        stale_before: Optional[float] = None,
+        within: Optional[tuple] = None
+    ) -> List[int]:
+        """
+        Ids dos AGVs que atendem a todos os filtros informados
+
+        within: retângulo (x_min, y_min, x_max, y_max)
+        """
+        rows = self.snapshot()
+        mask = np.ones(len(rows), dtype=bool)
+        if states is not None:
+            mask &= np.isin(rows['state'], list(states))
+        if battery_below is not None:
+            mask &= rows['battery'] < battery_below
+        if stale_before is not None:
+            mask &= rows['ts'] < stale_before
+        if within is not None:
+            x_min, y_min, x_max, y_max = within
+            mask &= (rows['x'] >= x_min) & (rows['x'] <= x_max) & (rows['y'] >= y_min) & (rows['y'] <= y_max)
+        return rows['agv'][mask].tolist()
@@ -0,0 +1,208 @@
+"""
+Ingestão de telemetria dos AGVs (10-50 Hz por veículo)
+
+record() só grava a amostra no RingBuffer do AGV e atualiza a tabela de
+estado atual: nenhuma E/S no caminho de quem recebe a telemetria. A thread
+TelemetryFlusher junta, a cada flush_interval, as amostras pendentes de
+todos os AGVs em um único lote comprimido e o entrega ao destino (arquivos
+de segmento ou banco). Se o destino falhar, o lote é guardado e reenviado
+no flush seguinte (até max_unsent amostras; acima disso as mais antigas
+são descartadas).
+
+Com spatial_index (SpatialGrid), a posição e o estado de cada AGV também
+são mantidos no índice a cada amostra, para consultas de proximidade.
+
+Usage:
+    ingestor = TelemetryIngestor()
+    ingestor.start()
+    ingestor.record(7, time.time(), x=12.5, y=3.0, speed=1.2, battery=87.0, state=1)
+    ingestor.state(7)                       # última amostra do AGV 7
+    ingestor.latest.select(battery_below=20)
+"""
+import atexit
+import threading
+import time
+
+import numpy as np
+
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from loguru import logger
+from .buffer import RECORD_DTYPE, SAMPLE_DTYPE, LatestStateTable, RingBuffer
+from .storage import DatabaseSink, SegmentFileSink
+
+SINK_FILE = 'file'
+SINK_DATABASE = 'database'
+
+def create_sink(kind: Optional[str] = None):
+    """Destino configurado em TELEMETRY_SINK"""
+    kind = kind or settings.TELEMETRY_SINK
+    if kind == SINK_FILE:
+        return SegmentFileSink(settings.TELEMETRY_DIR, settings.TELEMETRY_SEGMENT_MB * 1024 * 1024)
+    if kind == SINK_DATABASE:
+        return DatabaseSink()
+    raise ValueError(f"Destino de telemetria inválido: {kind}")
+
+class TelemetryIngestor:
+    """Buffers por AGV, estado atual e gravação em lote em segundo plano"""
+
+    def __init__(
+        self,
+        sink=None,
+        buffer_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_unsent: int = 1_000_000,
+        spatial_index=None
+    ):
+        self.sink = sink if sink is not None else create_sink()
+        self.buffer_size = buffer_size or settings.TELEMETRY_BUFFER_SIZE
+        self.flush_interval = flush_interval or settings.TELEMETRY_FLUSH_INTERVAL
+        self.max_unsent = max_unsent
+
+        self.buffers: Dict[int, RingBuffer] = {}
+        self.latest = LatestStateTable()
+        self.positions = spatial_index
+        self._buffers_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._unsent: Optional[np.ndarray] = None
+
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.received = 0
+        self.flushed = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+
+    # ----- Caminho de escrita -----
+
+    def _buffer(self, agv: int) -> RingBuffer:
+        buffer = self.buffers.get(agv)
+        if buffer is None:
+            with self._buffers_lock:
+                buffer = self.buffers.get(agv)
+                if buffer is None:
+                    buffer = self.buffers[agv] = RingBuffer(self.buffer_size)
+        return buffer
+
+    def record(
+        self,
+        agv: int,
+        ts: float,
+        x: float,
+        y: float,
+        speed: float = 0.0,
+        battery: float = 0.0,
+        state: int = 0,
+        heading: float = 0.0
+    ):
+        """Registra uma amostra do AGV (id da tabela agv)"""
+        self._buffer(agv).append(ts, x, y, heading, speed, battery, state)
+        if self.latest.update(agv, ts, x, y, heading, speed, battery, state) and self.positions is not None:
+            self.positions.update(agv, x, y, state)
+        self.received += 1
+
+    # ----- Consultas -----
+
+    def state(self, agv: int) -> Optional[Dict[str, Any]]:
+        """Última amostra do AGV"""
+        return self.latest.get(agv)
+
+    def recent(self, agv: int, count: Optional[int] = None) -> np.ndarray:
+        """Amostras recentes do AGV ainda em memória"""
+        buffer = self.buffers.get(agv)
+        return buffer.recent(count) if buffer is not None else np.zeros(0, dtype=SAMPLE_DTYPE)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'agvs': len(self.buffers),
+            'received': self.received,
+            'flushed': self.flushed,
+            'pending': sum(buffer.pending for buffer in list(self.buffers.values())),
+            'overwritten': sum(buffer.overwritten for buffer in list(self.buffers.values())),
+            'unsent': 0 if self._unsent is None else len(self._unsent),
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'bytes_written': self.bytes_written,
+            'flush_errors': self.flush_errors,
+            'last_flush_ms': round(self.last_flush_ms, 3),
+        }
+
+    # ----- Gravação -----
+
+    def _collect(self) -> np.ndarray:
+        """Amostras pendentes de todos os AGVs em um lote (RECORD_DTYPE)"""
+        drained: List[tuple] = []
+        for agv, buffer in list(self.buffers.items()):
+            if buffer.pending:
+                drained.append((agv, buffer.drain()))
+
+        batch = np.empty(sum(len(samples) for _, samples in drained), dtype=RECORD_DTYPE)
+        position = 0
+        for agv, samples in drained:
+            end = position + len(samples)
+            batch['agv'][position:end] = agv
+            for name in SAMPLE_DTYPE.names:
+                batch[name][position:end] = samples[name]
+            position = end
+        return batch
+
+    def flush(self) -> int:
+        """Grava as amostras pendentes (e as de flushes que falharam)"""
+        with self._flush_lock:
+            started = time.perf_counter()
+            batch = self._collect()
+            if self._unsent is not None:
+                batch = np.concatenate((self._unsent, batch))
+                self._unsent = None
+            if not len(batch):
+                return 0
+
+            try:
+                self.bytes_written += self.sink.write(batch)
+            except Exception as e:
+                self.flush_errors += 1
+                if len(batch) > self.max_unsent:
+                    self.dropped += len(batch) - self.max_unsent
+                    batch = batch[-self.max_unsent:]
+                self._unsent = batch
+                logger.error(f"✗ Erro ao gravar telemetria ({len(batch)} amostras aguardando): {e}")
+                return 0
+
+            self.flushed += len(batch)
+            self.batches += 1
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return len(batch)
+
+    # ----- Thread de gravação -----
+
+    def start(self):
+        """Inicia a thread que grava a cada flush_interval"""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._wakeup.clear()
+        self._thread = threading.Thread(target=self._run, name='TelemetryFlusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """Grava o que restou e encerra a thread"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        atexit.unregister(self.stop)
+        self.flush()
+        self.sink.close()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self.flush()
@@ -0,0 +1,231 @@
+"""
+Gravação de lotes de telemetria comprimidos
+
+Um lote (array RECORD_DTYPE) é ordenado por AGV e instante e serializado
+com os bytes transpostos (byte shuffle: todos os 1ºs bytes, depois todos
+os 2ºs...), o que deixa os campos numéricos bem mais compressíveis, e então
+comprimido com zstd (se instalado) ou zlib.
+
+Destinos:
+- SegmentFileSink: arquivos append-only telemetry_{data}_{n}.seg; cada lote
+  é um frame com cabeçalho (magic, codec, amostras, intervalo de tempo,
+  tamanho, crc32). Um frame truncado no fim (queda do processo) é ignorado
+  na leitura.
+- DatabaseSink: uma linha por lote na tabela agv_telemetry (payload BLOB).
+
+Usage:
+    sink = SegmentFileSink('data/telemetry')
+    sink.write(batch)
+    for batch in read_segments('data/telemetry', agv=7, since=t0):
+        ...
+"""
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+from .buffer import RECORD_DTYPE
+
+try:
+    import zstandard
+except ImportError:  # Opcional: compressão zstd
+    zstandard = None
+
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+
+FRAME_MAGIC = b'TLM1'
+# magic, codec, amostras, ts inicial, ts final, tamanho do payload, crc32
+FRAME_HEADER = struct.Struct('<4s4sIddII')
+
+SEGMENT_PREFIX = 'telemetry_'
+SEGMENT_SUFFIX = '.seg'
+
+def default_codec() -> str:
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+def encode_batch(batch: np.ndarray, codec: Optional[str] = None) -> Tuple[str, bytes]:
+    """Ordena, transpõe os bytes e comprime um lote"""
+    codec = codec or default_codec()
+    batch = np.sort(batch, order=('agv', 'ts'))
+    shuffled = batch.view(np.uint8).reshape(len(batch), RECORD_DTYPE.itemsize).T.tobytes()
+
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Codec zstd indisponível (pacote zstandard não instalado)")
+        return codec, zstandard.ZstdCompressor(level=3).compress(shuffled)
+    if codec == CODEC_ZLIB:
+        return codec, zlib.compress(shuffled, 6)
+    raise ValueError(f"Codec inválido: {codec}")
+
+def decode_batch(codec: str, payload: bytes) -> np.ndarray:
+    """Inverso de encode_batch"""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Codec zstd indisponível (pacote zstandard não instalado)")
+        shuffled = zstandard.ZstdDecompressor().decompress(payload)
+    elif codec == CODEC_ZLIB:
+        shuffled = zlib.decompress(payload)
+    else:
+        raise ValueError(f"Codec inválido: {codec}")
+
+    count = len(shuffled) // RECORD_DTYPE.itemsize
+    columns = np.frombuffer(shuffled, dtype=np.uint8).reshape(RECORD_DTYPE.itemsize, count)
+    return np.ascontiguousarray(columns.T).view(RECORD_DTYPE).reshape(count)
+
+def _filter(batch: np.ndarray, agv: Optional[int], since: Optional[float], until: Optional[float]) -> np.ndarray:
+    mask = np.ones(len(batch), dtype=bool)
+    if agv is not None:
+        mask &= batch['agv'] == agv
+    if since is not None:
+        mask &= batch['ts'] >= since
+    if until is not None:
+        mask &= batch['ts'] < until
+    return batch[mask]
+
+# =====================================================
+# ARQUIVOS DE SEGMENTO
+# =====================================================
+
+class SegmentFileSink:
+    """Grava lotes em arquivos append-only, trocando de arquivo por tamanho"""
+
+    def __init__(self, directory, segment_bytes: int = 64 * 1024 * 1024, codec: Optional[str] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.codec = codec or default_codec()
+        self._file = None
+        self._path: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.close()
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        sequence = 0
+        while True:
+            path = self.directory / f'{SEGMENT_PREFIX}{stamp}_{sequence}{SEGMENT_SUFFIX}'
+            if not path.exists():
+                break
+            sequence += 1
+        self._path = path
+        # Sem buffer: um frame que falha no meio pode ser desfeito por truncate
+        self._file = open(path, 'ab', buffering=0)
+
+    def write(self, batch: np.ndarray) -> int:
+        """Grava um lote como um frame; retorna os bytes gravados"""
+        if not len(batch):
+            return 0
+        codec, payload = encode_batch(batch, self.codec)
+        header = FRAME_HEADER.pack(
+            FRAME_MAGIC, codec.encode('ascii').ljust(4), len(batch),
+            float(batch['ts'].min()), float(batch['ts'].max()), len(payload), zlib.crc32(payload)
+        )
+
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.segment_bytes:
+                self._open_segment()
+            start = self._file.tell()
+            try:
+                frame = memoryview(header + payload)
+                while frame:
+                    frame = frame[self._file.write(frame):]
+            except OSError:
+                self._discard_partial(start)
+                raise
+        return len(header) + len(payload)
+
+    def _discard_partial(self, start: int):
+        """Remove o frame incompleto; sem isso o lote reenviado ficaria ilegível atrás dele"""
+        try:
+            self._file.truncate(start)
+            self._file.seek(start)
+        except OSError:
+            # Sem truncate, o segmento é encerrado: o frame incompleto fica no fim dele
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def read_frames(path) -> Iterator[Tuple[dict, bytes]]:
+    """Frames íntegros de um segmento (para no primeiro truncado ou corrompido)"""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            magic, codec, count, ts_start, ts_end, size, crc = FRAME_HEADER.unpack(header)
+            if magic != FRAME_MAGIC:
+                return
+            payload = f.read(size)
+            if len(payload) < size or zlib.crc32(payload) != crc:
+                return
+            yield {
+                'codec': codec.decode('ascii').strip(), 'samples': count,
+                'ts_start': ts_start, 'ts_end': ts_end,
+            }, payload
+
+def read_segments(
+    directory,
+    agv: Optional[int] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None
+) -> Iterator[np.ndarray]:
+    """Lotes gravados em directory, filtrados por AGV e intervalo [since, until)"""
+    for path in sorted(Path(directory).glob(f'{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}')):
+        for frame, payload in read_frames(path):
+            # O intervalo do cabeçalho evita descomprimir lotes fora da janela
+            if since is not None and frame['ts_end'] < since:
+                continue
+            if until is not None and frame['ts_start'] >= until:
+                continue
+            batch = _filter(decode_batch(frame['codec'], payload), agv, since, until)
+            if len(batch):
+                yield batch
+
+# =====================================================
+# BANCO DE DADOS
+# =====================================================
+
+class DatabaseSink:
+    """Grava cada lote como uma linha comprimida em agv_telemetry"""
+
+    def __init__(self, repository=None, codec: Optional[str] = None):
+        if repository is None:
+            from src.repositories.telemetry_repository import TelemetryRepository
+            repository = TelemetryRepository()
+        self.repository = repository
+        self.codec = codec or default_codec()
+
+    def write(self, batch: np.ndarray) -> int:
+        if not len(batch):
+            return 0
+        codec, payload = encode_batch(batch, self.codec)
+        self.repository.insert_batch(
+            float(batch['ts'].min()), float(batch['ts'].max()), len(batch), codec, payload
+        )
+        return len(payload)
+
+    def close(self):
+        pass
+
+def read_database(
+    repository,
+    agv: Optional[int] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None
+) -> Iterator[np.ndarray]:
+    """Lotes gravados no banco, filtrados por AGV e intervalo [since, until)"""
+    for row in repository.find_batches(since, until):
+        batch = _filter(decode_batch(row['codec'], row['payload']), agv, since, until)
+        if len(batch):
+            yield batch
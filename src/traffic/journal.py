@@ -0,0 +1,90 @@
+"""
+Journal write-ahead do gerenciador de zonas
+
+Cada alteração de estado é gravada como uma linha JSON antes de ser
+aplicada em memória; ao reiniciar, as linhas são reaplicadas em ordem e o
+estado volta a ser o do momento da queda. Uma última linha incompleta
+(queda no meio da gravação) é ignorada e removida do arquivo.
+
+compact() reescreve o arquivo só com os registros que recriam o estado
+atual (tmp + os.replace), para o journal não crescer sem limite.
+
+Usage:
+    journal = ZoneJournal('data/zone_locks/LAYOUT-01.wal')
+    journal.append([{'op': 'grant', 'zone': 'CRUZ-01', 'agv': 'AGV-07', 'expires': 1712.5}])
+    for record in journal.replay():
+        ...
+"""
+import json
+import os
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+class ZoneJournal:
+    """Arquivo append-only de registros JSON (um por linha)"""
+
+    def __init__(self, path, fsync: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.records = 0
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def append(self, records: List[Dict[str, Any]]):
+        """Grava os registros de uma operação de uma vez (antes de aplicá-los)"""
+        data = b''.join(
+            json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n' for record in records
+        )
+        f = self._open()
+        f.write(data)
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        self.records += len(records)
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """Registros gravados, em ordem (para na primeira linha inválida)"""
+        if not self.path.exists():
+            return
+        valid = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid += len(line)
+                self.records += 1
+                yield record
+
+        # Descarta o final inválido para que os próximos registros não fiquem depois dele
+        if valid < self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid)
+
+    def compact(self, records: Iterable[Dict[str, Any]]):
+        """Substitui o journal pelos registros informados (estado atual)"""
+        self.close()
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        count = 0
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.records = count
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,227 @@
+"""
+Grafo de espera com detecção incremental de ciclos
+
+Nós são AGVs e zonas (ou qualquer valor hashable); uma aresta u -> v diz
+que u espera v (AGV espera a zona, zona ocupada pelo AGV, AGV bloqueado
+por outro AGV). O grafo mantém uma ordem topológica das arestas aceitas
+(algoritmo de Pearce-Kelly): inserir u -> v com ordem[u] < ordem[v] não
+exige busca nenhuma; caso contrário a busca fica restrita aos nós com
+ordem entre ordem[v] e ordem[u]. Se v alcança u, a aresta fecha um ciclo:
+ela fica guardada à parte (pendente) junto com o ciclo encontrado, e o
+resto do grafo continua acíclico. Remover arestas nunca invalida a ordem;
+as pendentes são testadas de novo e saem quando o ciclo se desfaz.
+
+Usage:
+    graph = WaitForGraph()
+    graph.add_edge('AGV-1', 'CRUZ-01')
+    graph.add_edge('CRUZ-01', 'AGV-2')
+    graph.add_edge('AGV-2', 'AGV-1')        # ['AGV-2', 'AGV-1', 'CRUZ-01']
+    graph.cycles()                          # ciclos ainda abertos
+    graph.remove_edge('AGV-1', 'CRUZ-01')   # [('AGV-2', 'AGV-1')] pendente desfeita
+"""
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+Edge = Tuple[Hashable, Hashable]
+
+class WaitForGraph:
+    """Arestas de espera em ordem topológica dinâmica, mais as que fecham ciclos"""
+
+    def __init__(self):
+        self._out: Dict[Hashable, Set[Hashable]] = {}
+        self._in: Dict[Hashable, Set[Hashable]] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._first = 0
+        self._last = 0
+        # Arestas que fecham ciclo -> ciclo (nós, começando pela origem da aresta)
+        self._pending: Dict[Edge, List[Hashable]] = {}
+
+        self.visited = 0
+        self.searches = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self._order
+
+    def has_edge(self, source: Hashable, target: Hashable) -> bool:
+        return target in self._out.get(source, ()) or (source, target) in self._pending
+
+    def successors(self, node: Hashable) -> Set[Hashable]:
+        """Destinos das arestas (aceitas e pendentes) que saem do nó"""
+        targets = set(self._out.get(node, ()))
+        targets.update(target for source, target in self._pending if source == node)
+        return targets
+
+    @property
+    def num_edges(self) -> int:
+        return sum(len(targets) for targets in self._out.values()) + len(self._pending)
+
+    # ----- Alteração -----
+
+    def add_edge(self, source: Hashable, target: Hashable) -> Optional[List[Hashable]]:
+        """Insere source -> target; retorna o ciclo que ela fecha (None se não fecha)"""
+        if self.has_edge(source, target):
+            return self._pending.get((source, target))
+
+        # Nós novos entram nas pontas da ordem: a aresta já nasce ordenada
+        order = self._order
+        if source not in order:
+            self._first -= 1
+            order[source] = self._first
+        if target not in order:
+            self._last += 1
+            order[target] = self._last
+
+        cycle = self._insert(source, target)
+        if cycle is not None:
+            self._pending[(source, target)] = cycle
+        return cycle
+
+    def remove_edge(self, source: Hashable, target: Hashable) -> List[Edge]:
+        """Retira source -> target; retorna as arestas pendentes cujo ciclo se desfez"""
+        if self._pending.pop((source, target), None) is not None:
+            self._forget(source)
+            self._forget(target)
+            return [(source, target)]
+        targets = self._out.get(source)
+        if targets is None or target not in targets:
+            return []
+        targets.discard(target)
+        self._in[target].discard(source)
+        resolved = self._retry()
+        self._forget(source)
+        self._forget(target)
+        return resolved
+
+    def remove_node(self, node: Hashable) -> List[Edge]:
+        """Retira o nó e todas as suas arestas; retorna as pendentes desfeitas"""
+        if node not in self._order:
+            return []
+        resolved = [edge for edge in self._pending if node in edge]
+        for edge in resolved:
+            del self._pending[edge]
+        neighbors = set()
+        for target in self._out.pop(node, ()):
+            self._in[target].discard(node)
+            neighbors.add(target)
+        for source in self._in.pop(node, ()):
+            self._out[source].discard(node)
+            neighbors.add(source)
+        del self._order[node]
+        resolved += self._retry()
+        for edge in resolved:
+            neighbors.update(edge)
+        for neighbor in neighbors:
+            self._forget(neighbor)
+        return resolved
+
+    def _forget(self, node: Hashable):
+        """Descarta o nó que ficou sem nenhuma aresta"""
+        if node not in self._order or self._out.get(node) or self._in.get(node):
+            return
+        if any(node in edge for edge in self._pending):
+            return
+        self._out.pop(node, None)
+        self._in.pop(node, None)
+        del self._order[node]
+
+    def _retry(self) -> List[Edge]:
+        """Tenta aceitar as arestas pendentes (depois de uma remoção)"""
+        resolved = []
+        for edge in list(self._pending):
+            cycle = self._insert(*edge)
+            if cycle is None:
+                del self._pending[edge]
+                resolved.append(edge)
+            else:
+                self._pending[edge] = cycle
+        return resolved
+
+    # ----- Ordem topológica (Pearce-Kelly) -----
+
+    def _insert(self, source: Hashable, target: Hashable) -> Optional[List[Hashable]]:
+        order = self._order
+        upper, lower = order[source], order[target]
+        if upper < lower:
+            self._link(source, target)
+            return None
+
+        self.searches += 1
+        # Para frente a partir do destino, só entre os nós com ordem <= ordem da origem
+        parents: Dict[Hashable, Hashable] = {target: None}
+        stack = [target]
+        forward = []
+        while stack:
+            node = stack.pop()
+            forward.append(node)
+            if node == source:
+                path = [node]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                self.visited += len(parents)
+                return path[:1] + path[:0:-1]
+            for nxt in self._out.get(node, ()):
+                if nxt not in parents and order[nxt] <= upper:
+                    parents[nxt] = node
+                    stack.append(nxt)
+
+        # Para trás a partir da origem, só entre os nós com ordem > ordem do destino
+        seen = {source}
+        stack = [source]
+        backward = []
+        while stack:
+            node = stack.pop()
+            backward.append(node)
+            for previous in self._in.get(node, ()):
+                if previous not in seen and order[previous] > lower:
+                    seen.add(previous)
+                    stack.append(previous)
+        self.visited += len(forward) + len(backward)
+
+        # Quem leva à origem passa a vir antes de quem sai do destino, reaproveitando as mesmas posições
+        backward.sort(key=order.__getitem__)
+        forward.sort(key=order.__getitem__)
+        slots = sorted(order[node] for node in backward + forward)
+        for node, slot in zip(backward + forward, slots):
+            order[node] = slot
+
+        self._link(source, target)
+        return None
+
+    def _link(self, source: Hashable, target: Hashable):
+        self._out.setdefault(source, set()).add(target)
+        self._in.setdefault(target, set()).add(source)
+
+    # ----- Consultas -----
+
+    def cycles(self) -> List[List[Hashable]]:
+        """Ciclos abertos, um por aresta pendente"""
+        return list(self._pending.values())
+
+    def pending(self) -> Dict[Edge, List[Hashable]]:
+        return dict(self._pending)
+
+    def has_path(self, source: Hashable, target: Hashable) -> bool:
+        """source alcança target pelas arestas aceitas (a ordem poda a busca)"""
+        order = self._order
+        if source not in order or target not in order:
+            return False
+        if source == target:
+            return True
+        limit = order[target]
+        if order[source] > limit:
+            return False
+        seen = {source}
+        stack = [source]
+        while stack:
+            for nxt in self._out.get(stack.pop(), ()):
+                if nxt == target:
+                    return True
+                if nxt not in seen and order[nxt] < limit:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return False
+
+    def __repr__(self):
+        return f"WaitForGraph(nodes={len(self)}, edges={self.num_edges}, cycles={len(self._pending)})"
@@ -0,0 +1,477 @@
+"""
+Intertravamento de zonas (cruzamentos, corredores estreitos) em memória
+
+Cada zona do layout admite até capacity AGVs ao mesmo tempo; os demais
+esperam numa fila FIFO ou por prioridade (maior primeiro, FIFO no empate).
+Conceder e liberar não tocam no banco: são operações em dicionários e numa
+fila com remoção preguiçosa (entradas canceladas são descartadas quando
+chegam à frente), O(1) em FIFO e O(log n) por prioridade.
+
+- Concessões têm prazo (lease): AGV que não libera nem renova a zona até o
+  vencimento perde a concessão, e a zona passa ao próximo da fila.
+- Antes de entrar na fila, procura um ciclo no grafo de espera (AGV espera
+  a zona -> AGVs que a ocupam -> zonas que eles esperam...). Se a espera
+  fecharia um ciclo, acquire levanta DeadlockError e nada muda.
+- Toda alteração é gravada no journal (ZoneJournal) antes de ser aplicada;
+  ao reiniciar, o journal é reaplicado e concessões e filas voltam como
+  estavam.
+- Com deadlock_service (DeadlockService), cada espera e concessão também
+  vira aresta do grafo de espera da frota (impasses que surgem depois da
+  entrada na fila, ex.: AGV em duas filas ou bloqueado por outro AGV).
+
+Usage:
+    locks = ZoneLockManager.from_layout('LAYOUT-01')
+    if locks.acquire('CRUZ-01', 'AGV-07'):
+        ...                                   # pode entrar no cruzamento
+    granted = locks.release('CRUZ-01', 'AGV-07')   # [('CRUZ-01', 'AGV-03')]
+"""
+import heapq
+import math
+import threading
+import time
+
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from config.settings import settings
+from loguru import logger
+from src.utils.exceptions import DeadlockError, RecordNotFoundError, ZoneLockError
+from .journal import ZoneJournal
+
+POLICY_FIFO = 'fifo'
+POLICY_PRIORITY = 'priority'
+POLICIES = (POLICY_FIFO, POLICY_PRIORITY)
+
+class Zone:
+    """Ocupantes (com vencimento) e fila de espera de uma zona"""
+
+    __slots__ = ('code', 'capacity', 'policy', 'holders', 'waiting', '_queue')
+
+    def __init__(self, code: str, capacity: int = 1, policy: str = POLICY_FIFO):
+        if capacity <= 0:
+            raise ZoneLockError(f"Capacidade inválida para a zona '{code}': {capacity}")
+        if policy not in POLICIES:
+            raise ZoneLockError(f"Política inválida para a zona '{code}': {policy}")
+        self.code = code
+        self.capacity = capacity
+        self.policy = policy
+        self.holders: Dict[Hashable, Optional[float]] = {}
+        # AGV -> (prioridade, sequência) de quem está na fila
+        self.waiting: Dict[Hashable, Tuple[int, int]] = {}
+        self._queue = deque() if policy == POLICY_FIFO else []
+
+    @property
+    def free(self) -> bool:
+        return len(self.holders) < self.capacity
+
+    def push(self, agv: Hashable, priority: int, sequence: int):
+        self.waiting[agv] = (priority, sequence)
+        if self.policy == POLICY_FIFO:
+            self._queue.append((sequence, agv))
+        else:
+            heapq.heappush(self._queue, (-priority, sequence, agv))
+
+    def _valid(self, entry) -> bool:
+        agv, sequence = entry[-1], entry[-2]
+        waiting = self.waiting.get(agv)
+        return waiting is not None and waiting[1] == sequence
+
+    def head(self) -> Optional[Hashable]:
+        """Primeiro da fila (descarta as entradas canceladas ou já atendidas)"""
+        queue = self._queue
+        if self.policy == POLICY_FIFO:
+            while queue and not self._valid(queue[0]):
+                queue.popleft()
+        else:
+            while queue and not self._valid(queue[0]):
+                heapq.heappop(queue)
+        return queue[0][-1] if queue else None
+
+    def next_waiters(self, count: int) -> List[Hashable]:
+        """Os count próximos da fila, na ordem em que seriam atendidos"""
+        if count <= 0:
+            return []
+        if count == 1:
+            head = self.head()
+            return [] if head is None else [head]
+        entries = [entry for entry in self._queue if self._valid(entry)]
+        if self.policy == POLICY_PRIORITY:
+            entries.sort()
+        return [entry[-1] for entry in entries[:count]]
+
+    def rebuild(self, policy: str):
+        """Troca a política mantendo a ordem de chegada dos que esperam"""
+        self.policy = policy
+        waiting = sorted(self.waiting.items(), key=lambda item: item[1][1])
+        self.waiting = {}
+        self._queue = deque() if policy == POLICY_FIFO else []
+        for agv, (priority, sequence) in waiting:
+            self.push(agv, priority, sequence)
+
+class ZoneLockManager:
+    """
+    Exclusão mútua de AGVs por zona, com filas, prazos e journal
+
+    zones: linhas com code, capacity e policy (ex.: ZoneRepository).
+    AGVs são identificados por str ou int (gravados no journal em JSON).
+    lease_time: prazo padrão das concessões em segundos (inf = sem prazo).
+    journal: caminho ou ZoneJournal (None = sem persistência).
+    on_grant: chamado com (zona, AGV) quando alguém da fila recebe a zona.
+    deadlock_service: recebe as esperas e concessões (wait, stop_waiting,
+    hold, release), ex.: DeadlockService.
+    """
+
+    def __init__(
+        self,
+        zones: Optional[Iterable[Dict[str, Any]]] = None,
+        lease_time: Optional[float] = None,
+        journal=None,
+        clock: Callable[[], float] = time.time,
+        on_grant: Optional[Callable[[str, Hashable], None]] = None,
+        compact_every: int = 100_000,
+        deadlock_service=None
+    ):
+        self.lease_time = lease_time if lease_time is not None else settings.ZONE_LEASE_SECONDS
+        self.clock = clock
+        self.on_grant = on_grant
+        self.compact_every = compact_every
+        self.deadlock_service = deadlock_service
+
+        self.zones: Dict[str, Zone] = {}
+        self.held: Dict[Hashable, Set[str]] = {}
+        self.waits: Dict[Hashable, Set[str]] = {}
+        self._expiry: List[Tuple[float, int, str, Hashable]] = []
+        self._sequence = 0
+        self._lock = threading.RLock()
+
+        self.grants = 0
+        self.expired = 0
+        self.deadlocks = 0
+
+        self.journal = ZoneJournal(journal) if isinstance(journal, (str, Path)) else journal
+        if self.journal is not None:
+            replayed = 0
+            for record in self.journal.replay():
+                self._apply(record)
+                replayed += 1
+            if replayed:
+                logger.info(
+                    f"✓ Zonas restauradas do journal: {len(self.zones)} zonas, "
+                    f"{sum(len(z.holders) for z in self.zones.values())} concessões, "
+                    f"{sum(len(z.waiting) for z in self.zones.values())} na fila"
+                )
+
+        for row in zones or []:
+            self.define_zone(row['code'], row.get('capacity') or 1, row.get('policy') or POLICY_FIFO)
+
+    @classmethod
+    def from_layout(cls, layout, repository=None, layout_repository=None, **kwargs) -> 'ZoneLockManager':
+        """Zonas do layout (id ou código), com journal em ZONE_JOURNAL_DIR/<layout>.wal"""
+        if layout_repository is None:
+            from src.repositories.layout_repository import LayoutRepository
+            layout_repository = LayoutRepository()
+        if repository is None:
+            from src.repositories.zone_repository import ZoneRepository
+            repository = ZoneRepository()
+
+        if isinstance(layout, str):
+            row = layout_repository.find_by_code(layout)
+            if not row:
+                raise RecordNotFoundError(f"Layout '{layout}' não encontrado")
+        else:
+            row = layout_repository.find_by_id(layout)
+
+        kwargs.setdefault('journal', Path(settings.ZONE_JOURNAL_DIR) / f"{row['code']}.wal")
+        return cls(repository.find_by_layout(row['id']), **kwargs)
+
+    # ----- Zonas -----
+
+    def define_zone(self, code: str, capacity: int = 1, policy: str = POLICY_FIFO):
+        """Cria ou altera uma zona (aumentar a capacidade já atende a fila)"""
+        with self._lock:
+            zone = self.zones.get(code)
+            if zone is not None and zone.capacity == capacity and zone.policy == policy:
+                return
+            Zone(code, capacity, policy)        # Valida antes de gravar
+            self._commit([{'op': 'zone', 'zone': code, 'capacity': capacity, 'policy': policy}])
+            granted = self._commit(self._grant_records(code, free=self._free_slots(code)))
+        self._notify(granted)
+
+    def _zone(self, code: str) -> Zone:
+        zone = self.zones.get(code)
+        if zone is None:
+            raise ZoneLockError(f"Zona '{code}' não definida")
+        return zone
+
+    # ----- Concessão e liberação -----
+
+    def acquire(self, zone: str, agv: Hashable, priority: int = 0, lease: Optional[float] = None) -> bool:
+        """
+        Pede a zona para o AGV
+
+        Returns:
+            True se concedida (ou renovada, se o AGV já a ocupa); False se o
+            AGV ficou na fila (será avisado por on_grant)
+
+        Raises:
+            DeadlockError: a espera fecharia um ciclo no grafo de espera
+        """
+        granted = self._expire_due()
+        try:
+            with self._lock:
+                target = self._zone(zone)
+                if agv in target.holders or (target.free and target.head() is None):
+                    self._commit([self._grant(zone, agv, lease)])
+                    return True
+                if agv in target.waiting:
+                    return False
+
+                cycle = self.find_cycle(agv, zone)
+                if cycle is not None:
+                    self.deadlocks += 1
+                    logger.warning(f"✗ Impasse evitado: {agv} esperando '{zone}' fecharia o ciclo {cycle}")
+                    raise DeadlockError(cycle)
+
+                self._sequence += 1
+                self._commit([{'op': 'wait', 'zone': zone, 'agv': agv, 'priority': priority, 'seq': self._sequence}])
+                return False
+        finally:
+            self._notify(granted)
+
+    def release(self, zone: str, agv: Hashable) -> List[Tuple[str, Hashable]]:
+        """Libera a zona (ou tira o AGV da fila); retorna as concessões feitas à fila"""
+        granted = self._expire_due()
+        with self._lock:
+            target = self._zone(zone)
+            if agv in target.holders:
+                granted += self._commit(
+                    [{'op': 'release', 'zone': zone, 'agv': agv}] + self._grant_records(zone, free=1)
+                )
+            elif agv in target.waiting:
+                self._commit([{'op': 'cancel', 'zone': zone, 'agv': agv}])
+        self._notify(granted)
+        return granted
+
+    def release_all(self, agv: Hashable) -> List[Tuple[str, Hashable]]:
+        """Libera todas as zonas do AGV e o tira de todas as filas (AGV fora de operação)"""
+        granted = self._expire_due()
+        with self._lock:
+            records = [{'op': 'cancel', 'zone': zone, 'agv': agv} for zone in sorted(self.waits.get(agv, ()))]
+            held = sorted(self.held.get(agv, ()))
+            records += [{'op': 'release', 'zone': zone, 'agv': agv} for zone in held]
+            if records:
+                self._commit(records)
+            for zone in held:
+                granted += self._commit(self._grant_records(zone, free=self._free_slots(zone)))
+        self._notify(granted)
+        return granted
+
+    def expire(self) -> List[Tuple[str, Hashable]]:
+        """Retira as concessões vencidas; retorna as concessões feitas à fila"""
+        granted = self._expire_due()
+        self._notify(granted)
+        return granted
+
+    def _grant(self, zone: str, agv: Hashable, lease: Optional[float] = None) -> Dict[str, Any]:
+        lease = self.lease_time if lease is None else lease
+        expires = self.clock() + lease if lease != math.inf else None
+        return {'op': 'grant', 'zone': zone, 'agv': agv, 'expires': expires}
+
+    def _free_slots(self, zone: str) -> int:
+        target = self.zones[zone]
+        return target.capacity - len(target.holders)
+
+    def _grant_records(self, zone: str, free: int) -> List[Dict[str, Any]]:
+        """Concessões aos próximos da fila para as vagas que vão abrir"""
+        target = self.zones.get(zone)
+        if target is None:
+            return []
+        return [self._grant(zone, agv) for agv in target.next_waiters(free)]
+
+    def _expire_due(self) -> List[Tuple[str, Hashable]]:
+        granted: List[Tuple[str, Hashable]] = []
+        expiry = self._expiry
+        if not expiry or expiry[0][0] > self.clock():
+            return granted
+
+        with self._lock:
+            now = self.clock()
+            while expiry and expiry[0][0] <= now:
+                expires, _, zone, agv = heapq.heappop(expiry)
+                target = self.zones.get(zone)
+                # Entradas de concessões renovadas ou liberadas ficam para trás
+                if target is None or target.holders.get(agv) != expires:
+                    continue
+                self.expired += 1
+                logger.warning(f"✗ Concessão vencida: {agv} em '{zone}' (sem liberar nem renovar)")
+                granted += self._commit(
+                    [{'op': 'release', 'zone': zone, 'agv': agv, 'reason': 'expired'}]
+                    + self._grant_records(zone, free=1)
+                )
+        return granted
+
+    def _notify(self, granted: List[Tuple[str, Hashable]]):
+        if self.on_grant is None:
+            return
+        for zone, agv in granted:
+            try:
+                self.on_grant(zone, agv)
+            except Exception as e:
+                logger.error(f"✗ Erro no aviso de concessão ({agv} em '{zone}'): {e}")
+
+    # ----- Journal e estado -----
+
+    def _commit(self, records: List[Dict[str, Any]]) -> List[Tuple[str, Hashable]]:
+        """Grava no journal e aplica; retorna as concessões a AGVs que estavam na fila"""
+        if not records:
+            return []
+        if self.journal is not None:
+            self.journal.append(records)
+
+        granted = []
+        for record in records:
+            if record['op'] == 'grant':
+                self.grants += 1
+                if record['agv'] in self.zones[record['zone']].waiting:
+                    granted.append((record['zone'], record['agv']))
+            self._apply(record)
+
+        if self.journal is not None and self.journal.records > self.compact_every:
+            self.compact()
+        return granted
+
+    def _apply(self, record: Dict[str, Any]):
+        op = record['op']
+        code = record['zone']
+        if op == 'zone':
+            zone = self.zones.get(code)
+            if zone is None:
+                self.zones[code] = Zone(code, record['capacity'], record['policy'])
+            else:
+                zone.capacity = record['capacity']
+                if zone.policy != record['policy']:
+                    zone.rebuild(record['policy'])
+            return
+
+        zone = self.zones[code]
+        agv = record['agv']
+        deadlocks = self.deadlock_service
+        if op == 'grant':
+            renewal = agv in zone.holders
+            if zone.waiting.pop(agv, None) is not None:
+                self._discard(self.waits, agv, code)
+                if deadlocks is not None:
+                    deadlocks.stop_waiting(agv, code)
+            expires = record['expires']
+            zone.holders[agv] = expires
+            self.held.setdefault(agv, set()).add(code)
+            if expires is not None:
+                self._sequence += 1
+                heapq.heappush(self._expiry, (expires, self._sequence, code, agv))
+            if deadlocks is not None and not renewal:
+                deadlocks.hold(agv, code)
+        elif op == 'wait':
+            zone.push(agv, record['priority'], record['seq'])
+            self.waits.setdefault(agv, set()).add(code)
+            self._sequence = max(self._sequence, record['seq'])
+            if deadlocks is not None:
+                deadlocks.wait(agv, code)
+        elif op == 'release':
+            zone.holders.pop(agv, None)
+            self._discard(self.held, agv, code)
+            if deadlocks is not None:
+                deadlocks.release(agv, code)
+        elif op == 'cancel':
+            zone.waiting.pop(agv, None)
+            self._discard(self.waits, agv, code)
+            if deadlocks is not None:
+                deadlocks.stop_waiting(agv, code)
+        else:
+            raise ZoneLockError(f"Registro de journal inválido: {record}")
+
+    @staticmethod
+    def _discard(index: Dict[Hashable, Set[str]], agv: Hashable, code: str):
+        zones = index.get(agv)
+        if zones is not None:
+            zones.discard(code)
+            if not zones:
+                del index[agv]
+
+    def _state_records(self) -> Iterable[Dict[str, Any]]:
+        """Registros mínimos que recriam o estado atual"""
+        for code, zone in self.zones.items():
+            yield {'op': 'zone', 'zone': code, 'capacity': zone.capacity, 'policy': zone.policy}
+            for agv, expires in zone.holders.items():
+                yield {'op': 'grant', 'zone': code, 'agv': agv, 'expires': expires}
+            for agv, (priority, sequence) in sorted(zone.waiting.items(), key=lambda item: item[1][1]):
+                yield {'op': 'wait', 'zone': code, 'agv': agv, 'priority': priority, 'seq': sequence}
+
+    def compact(self):
+        """Reescreve o journal só com o estado atual"""
+        with self._lock:
+            if self.journal is not None:
+                self.journal.compact(self._state_records())
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+
+    # ----- Grafo de espera -----
+
+    def find_cycle(self, agv: Hashable, zone: str) -> Optional[List[Tuple[Hashable, str]]]:
+        """
+        Ciclo que a espera de agv por zone fecharia, como pares (AGV, zona
+        esperada): [(agv, zone), (ocupante, zona que ele espera), ...]
+        """
+        with self._lock:
+            zones = self.zones
+            waits = self.waits
+            stack = [(holder, [(agv, zone)]) for holder in zones[zone].holders]
+            visited = set()
+            while stack:
+                node, path = stack.pop()
+                if node == agv:
+                    return path
+                if node in visited:
+                    continue
+                visited.add(node)
+                for waited in waits.get(node, ()):
+                    for holder in zones[waited].holders:
+                        stack.append((holder, path + [(node, waited)]))
+            return None
+
+    def wait_for_graph(self) -> Dict[Hashable, Set[Hashable]]:
+        """AGV -> AGVs que ocupam as zonas que ele espera"""
+        with self._lock:
+            return {
+                agv: {holder for zone in zones for holder in self.zones[zone].holders}
+                for agv, zones in self.waits.items()
+            }
+
+    # ----- Consultas -----
+
+    def holders(self, zone: str) -> List[Hashable]:
+        with self._lock:
+            return list(self._zone(zone).holders)
+
+    def waiters(self, zone: str) -> List[Hashable]:
+        """Fila da zona, na ordem de atendimento"""
+        with self._lock:
+            target = self._zone(zone)
+            return target.next_waiters(len(target.waiting))
+
+    def held_by(self, agv: Hashable) -> Set[str]:
+        with self._lock:
+            return set(self.held.get(agv, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'zones': len(self.zones),
+                'held': sum(len(zone.holders) for zone in self.zones.values()),
+                'waiting': sum(len(zone.waiting) for zone in self.zones.values()),
+                'grants': self.grants,
+                'expired': self.expired,
+                'deadlocks': self.deadlocks,
+                'journal_records': self.journal.records if self.journal is not None else 0,
+            }
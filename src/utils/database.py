@@ -36,7 +36,13 @@ class DatabaseManager:
     def get_connection(cls) -> Generator:
         """Context manager para obter conexão do pool"""
         if cls._pool is None:
-            cls.initialize_pool()
+            try:
+                cls.initialize_pool()
+            except Error as e:
+                raise type(e)(
+                    msg=f"Banco indisponível: connection pool não foi criado ({e})",
+                    errno=e.errno, sqlstate=e.sqlstate
+                ) from e
 
         connection = None
         try:
@@ -60,5 +66,10 @@ class DatabaseManager:
             finally:
                 cursor.close()
 
-# Inicializa o pool ao importar
-DatabaseManager.initialize_pool()
\ No newline at end of file
+# Inicializa o pool ao importar; se o banco estiver indisponível (ex.: leitura
+# só pelo snapshot) o import segue e o pool é criado no primeiro get_connection,
+# que falha com o erro original se o banco continuar fora
+try:
+    DatabaseManager.initialize_pool()
+except Error as e:
+    logger.warning(f"Connection pool não criado na importação, nova tentativa no primeiro uso: {e}")
@@ -45,3 +45,36 @@ class PermissionDeniedError(AuthorizationError):
 class InsufficientPermissionsError(AuthorizationError):
     """Permissões insuficientes"""
     pass
+
+# ===== Exceções de Configuração =====
+
+class ConfigSnapshotError(Exception):
+    """Snapshot de configurações inválido ou corrompido"""
+    pass
+
+class ConfigHistoryError(Exception):
+    """Instante anterior ao histórico de configurações retido"""
+    pass
+
+# ===== Exceções de Roteamento =====
+
+class LayoutGraphError(Exception):
+    """Layout inválido ou inconsistente para montar o grafo"""
+    pass
+
+class RouteNotFoundError(Exception):
+    """Não existe rota entre as estações"""
+    pass
+
+# ===== Exceções de Tráfego =====
+
+class ZoneLockError(Exception):
+    """Zona inexistente ou operação inválida no intertravamento"""
+    pass
+
+class DeadlockError(ZoneLockError):
+    """A espera pela zona fecharia um ciclo no grafo de espera"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(" -> ".join(f"{agv} espera '{zone}'" for agv, zone in cycle))
@@ -464,6 +464,413 @@ class TestConfigHistory:
 
         assert len(history) >= 4  # 4 updates (primeira não gera histórico)
 
+# =====================================================
+# TESTES DE ASSINATURAS
+# =====================================================
+
+class TestConfigSubscriptions:
+    """Testes de assinaturas de alterações"""
+
+    @pytest.fixture
+    def watcher(self):
+        """Observador isolado, sem thread de polling"""
+        from src.repositories.config_watcher import ConfigWatcher
+
+        watcher = ConfigWatcher(poll_interval=0.1)
+        watcher.poll_once()  # Posiciona no fim do histórico
+        return watcher
+
+    def test_subscribe_exact_key(self, config_manager, watcher):
+        """Teste: Assinatura exata recebe a alteração"""
+        received = []
+        watcher.subscribe('TEST.watch_exact', received.append)
+
+        config_manager.set_config('watch_exact', 'TEST', 'a', ConfigType.STRING)
+        config_manager.set_config('watch_exact', 'TEST', 'b', ConfigType.STRING)
+        watcher.poll_once()
+
+        assert [c['valor_novo'] for c in received][-1] == 'b'
+        assert all(c['nome'] == 'watch_exact' for c in received)
+
+    def test_subscribe_wildcard(self, config_manager, watcher):
+        """Teste: Assinatura com curinga recebe alterações da tela"""
+        received = []
+        watcher.subscribe('WATCHSCREEN.*', received.append)
+
+        config_manager.set_config('a', 'WATCHSCREEN', 1, ConfigType.INTEGER)
+        config_manager.set_config('b', 'WATCHSCREEN', 2, ConfigType.INTEGER)
+        config_manager.set_config('c', 'OTHER', 3, ConfigType.INTEGER)
+        watcher.poll_once()
+
+        assert {c['nome'] for c in received} == {'a', 'b'}
+
+    def test_unsubscribe(self, config_manager, watcher):
+        """Teste: Assinatura cancelada não recebe alterações"""
+        received = []
+        subscription_id = watcher.subscribe('TEST.watch_unsub', received.append)
+
+        assert watcher.unsubscribe(subscription_id) is True
+        config_manager.set_config('watch_unsub', 'TEST', 'x', ConfigType.STRING)
+        watcher.poll_once()
+
+        assert received == []
+
+    def test_many_subscribers_single_poll(self, config_manager, watcher):
+        """Teste: Milhares de assinantes são atendidos por uma leitura"""
+        counter = []
+        for _ in range(2000):
+            watcher.subscribe('TEST.watch_many', lambda change: counter.append(1))
+
+        config_manager.set_config('watch_many', 'TEST', 'v', ConfigType.STRING)
+        processed = watcher.poll_once()
+
+        assert processed >= 1
+        assert len(counter) == 2000
+
+    def test_delete_is_notified(self, config_manager, watcher):
+        """Teste: Remoção de configuração gera evento DELETE"""
+        received = []
+        config_manager.set_config('watch_delete', 'TEST', 'x', ConfigType.STRING)
+        watcher.poll_once()
+        watcher.subscribe('TEST.watch_delete', received.append)
+
+        config_manager.delete_config('watch_delete', 'TEST')
+        watcher.poll_once()
+
+        assert received[-1]['operacao'] == 'DELETE'
+
+    def test_late_commit_is_delivered(self):
+        """Teste: Linha com id menor confirmada depois da leitura não é perdida"""
+        from src.repositories.config_watcher import ConfigWatcher
+
+        committed = {}
+        watcher = ConfigWatcher(batch_size=10, gap_timeout=60)
+        watcher._fetch_last_id = lambda: 0
+        watcher._fetch_changes = lambda: [
+            committed[i] for i in sorted(committed) if i > watcher.last_id
+        ][:watcher.batch_size]
+        watcher._fetch_by_ids = lambda ids: [committed[i] for i in ids if i in committed]
+        received = []
+        watcher.subscribe('TEST.*', lambda change: received.append(change['id']))
+        watcher.poll_once()
+
+        def commit(change_id):
+            committed[change_id] = {'id': change_id, 'tela': 'TEST', 'nome': f'late_{change_id}'}
+
+        # Id 2 foi reservado antes do 3, mas confirmado depois da leitura
+        commit(1)
+        commit(3)
+        assert watcher.poll_once() == 2
+        commit(2)
+        commit(4)
+        assert watcher.poll_once() == 2
+        watcher.poll_once()
+
+        assert received == [1, 3, 2, 4]
+
+        # Lacuna de transação desfeita expira
+        commit(6)
+        watcher.gap_timeout = 0
+        watcher.poll_once()
+        watcher.poll_once()
+        assert watcher._gaps == {}
+
+# =====================================================
+# TESTES DE SNAPSHOT
+# =====================================================
+
+class TestConfigSnapshot:
+    """Testes do snapshot local de configurações"""
+
+    @pytest.fixture(autouse=True)
+    def unload_snapshot(self):
+        yield
+        ConfigManager.unload_snapshot()
+
+    def test_export_and_load(self, config_manager, tmp_path):
+        """Teste: Snapshot exportado contém as configurações"""
+        config_manager.set_config('snap_port', 'SNAPSHOT', 8080, ConfigType.INTEGER)
+
+        path = config_manager.export_snapshot(str(tmp_path / 'snapshot.json'))
+        assert path == tmp_path / 'snapshot.json'
+        snapshot = ConfigManager.load_snapshot(path, reconcile=False)
+
+        row = snapshot.get('snap_port', 'SNAPSHOT', 'GLOBAL')
+        assert row['valor_inteiro'] == 8080
+
+    def test_reads_served_from_snapshot(self, config_manager, tmp_path):
+        """Teste: Leitura usa o snapshot carregado"""
+        from src.repositories.config_snapshot import ConfigSnapshot
+
+        snapshot = ConfigSnapshot([{
+            'id': 1, 'nome': 'offline', 'tela': 'SNAPSHOT', 'escopo': 'GLOBAL',
+            'instance_id': None, 'user_id': None, 'tipo': 'STRING',
+            'valor_string': 'from-file', 'valor_inteiro': None,
+            'valor_real': None, 'valor_booleano': None
+        }])
+        snapshot.save(tmp_path / 'snapshot.json')
+        ConfigManager.load_snapshot(tmp_path / 'snapshot.json', reconcile=False)
+
+        assert config_manager.get_config_value('offline', 'SNAPSHOT') == 'from-file'
+
+    def test_corrupted_snapshot_rejected(self, config_manager, tmp_path):
+        """Teste: Snapshot alterado falha na verificação do checksum"""
+        from src.utils.exceptions import ConfigSnapshotError
+
+        path = config_manager.export_snapshot(tmp_path / 'snapshot.json')
+        content = path.read_text(encoding='utf-8')
+        path.write_text(content.replace('"configs":[', '"configs":[{"x":1},', 1), encoding='utf-8')
+
+        with pytest.raises(ConfigSnapshotError):
+            ConfigManager.load_snapshot(path, reconcile=False)
+
+    def test_reconcile_applies_history(self, config_manager, tmp_path):
+        """Teste: Reconciliação aplica alterações posteriores ao snapshot"""
+        config_manager.set_config('snap_reconcile', 'SNAPSHOT', 'v1', ConfigType.STRING)
+        path = config_manager.export_snapshot(tmp_path / 'snapshot.json')
+
+        config_manager.set_config('snap_reconcile', 'SNAPSHOT', 'v2', ConfigType.STRING)
+
+        snapshot = ConfigManager.load_snapshot(path, reconcile=False)
+        assert snapshot.get('snap_reconcile', 'SNAPSHOT', 'GLOBAL')['valor_string'] == 'v1'
+
+        assert snapshot.reconcile() >= 1
+        assert snapshot.get('snap_reconcile', 'SNAPSHOT', 'GLOBAL')['valor_string'] == 'v2'
+
+    def test_late_commit_is_applied(self):
+        """Teste: Alteração com id menor confirmada depois não é descartada"""
+        from src.repositories.config_snapshot import ConfigSnapshot
+
+        def change(change_id, nome, valor):
+            return {
+                'id': change_id, 'config_id': change_id, 'nome': nome, 'tela': 'SNAPSHOT',
+                'escopo': 'GLOBAL', 'tipo': 'STRING', 'operacao': 'UPDATE', 'valor_novo': valor
+            }
+
+        snapshot = ConfigSnapshot(last_history_id=10)
+        assert snapshot.apply_change(change(12, 'late_b', 'b'))
+        assert snapshot.last_history_id == 10
+        assert snapshot.apply_change(change(11, 'late_a', 'a'))
+        assert snapshot.last_history_id == 12
+
+        assert snapshot.get('late_a', 'SNAPSHOT', 'GLOBAL')['valor_string'] == 'a'
+        assert snapshot.get('late_b', 'SNAPSHOT', 'GLOBAL')['valor_string'] == 'b'
+        # Reentrega e alteração mais antiga da mesma chave são ignoradas
+        assert not snapshot.apply_change(change(12, 'late_b', 'b'))
+        assert not snapshot.apply_change(change(9, 'late_a', 'old'))
+
+        # Lacuna de transação desfeita é pulada depois do timeout
+        snapshot.gap_timeout = 0
+        snapshot.apply_change(change(14, 'late_a', 'c'))
+        snapshot.apply_change(change(15, 'late_b', 'd'))
+        assert snapshot.last_history_id == 15
+
+# =====================================================
+# TESTES DE VISÃO TIPADA
+# =====================================================
+
+class TestConfigView:
+    """Testes da ConfigView"""
+
+    def test_view_decodes_native_types(self, config_manager):
+        """Teste: Valores da visão já vêm no tipo nativo"""
+        tela = 'VIEWTEST'
+        config_manager.set_config('enabled', tela, True, ConfigType.BOOLEAN)
+        config_manager.set_config('retries', tela, 3, ConfigType.INTEGER)
+        config_manager.set_config('ratio', tela, 0.5, ConfigType.FLOAT)
+
+        view = config_manager.get_view(tela, follow=False)
+
+        assert view.enabled is True
+        assert view['retries'] == 3
+        assert isinstance(view.ratio, float)
+
+    def test_view_scope_precedence(self, config_manager):
+        """Teste: Configuração de instância sobrepõe a global"""
+        tela = 'VIEWSCOPE'
+        config_manager.set_config('port', tela, 80, ConfigType.INTEGER, ConfigScope.GLOBAL)
+        config_manager.set_config(
+            'port', tela, 8080, ConfigType.INTEGER,
+            ConfigScope.INSTANCE, instance_id='view-server'
+        )
+
+        assert config_manager.get_view(tela, follow=False).port == 80
+        assert config_manager.get_view(tela, instance_id='view-server', follow=False).port == 8080
+
+    def test_view_applies_changes(self, config_manager):
+        """Teste: Visão atualiza apenas a entrada alterada"""
+        from src.repositories.config_watcher import ConfigWatcher
+
+        tela = 'VIEWCHANGE'
+        config_manager.set_config('mode', tela, 'a', ConfigType.STRING)
+        view = config_manager.get_view(tela, follow=False)
+
+        watcher = ConfigWatcher()
+        watcher.poll_once()
+        watcher.subscribe(f'{tela}.*', view.apply_change)
+
+        config_manager.set_config('mode', tela, 'b', ConfigType.STRING)
+        watcher.poll_once()
+
+        assert view.mode == 'b'
+
+    def test_view_is_read_only(self, config_manager):
+        """Teste: Visão não aceita atribuição"""
+        view = config_manager.get_view('VIEWTEST', follow=False)
+
+        with pytest.raises(AttributeError):
+            view.enabled = False
+
+    def test_follow_is_released(self):
+        """Teste: Visão que acompanha alterações não vaza a assinatura; nada se perde no reload"""
+        import gc
+        from src.repositories.config_view import ConfigView
+
+        class _FakeManager:
+            """Assinaturas e leitura em memória (sem MySQL)"""
+            _convert_value = ConfigManager._convert_value
+
+            def __init__(self):
+                self.callbacks = {}
+                self.rows = [{'nome': 'mode', 'tela': 'VIEWFOLLOW', 'escopo': 'GLOBAL',
+                              'tipo': 'STRING', 'valor_string': 'a'}]
+
+            def subscribe(self, pattern, callback):
+                self.callbacks[len(self.callbacks) + 1] = callback
+                return len(self.callbacks)
+
+            def unsubscribe(self, subscription_id):
+                return self.callbacks.pop(subscription_id, None) is not None
+
+            def get_scoped_configs(self, tela, instance_id, user_id):
+                rows = [dict(row) for row in self.rows]
+                # Alteração confirmada depois da leitura e entregue antes do fim do reload
+                for callback in list(self.callbacks.values()):
+                    callback({'nome': 'level', 'tela': 'VIEWFOLLOW', 'escopo': 'GLOBAL',
+                              'tipo': 'INTEGER', 'operacao': 'INSERT', 'valor_novo': '3'})
+                return rows
+
+        manager = _FakeManager()
+        with ConfigView('VIEWFOLLOW', manager=manager, follow=True) as view:
+            assert (view.mode, view.level) == ('a', 3)
+            assert len(manager.callbacks) == 1
+        assert manager.callbacks == {}
+
+        ConfigView('VIEWFOLLOW', manager=manager, follow=True)
+        gc.collect()
+        assert manager.callbacks == {}
+        assert ConfigView('VIEWFOLLOW', manager=manager).get('level') is None
+
+# =====================================================
+# TESTES DE RECONSTRUÇÃO NO TEMPO
+# =====================================================
+
+class TestConfigAsOf:
+    """Testes de reconstrução do estado em um instante"""
+
+    def _value(self, state, nome):
+        return next(row['valor'] for row in state if row['nome'] == nome)
+
+    def test_as_of_before_update(self, config_manager):
+        """Teste: Estado anterior à alteração devolve o valor antigo"""
+        import time
+
+        tela = 'ASOF'
+        config_manager.set_config('speed', tela, 10, ConfigType.INTEGER)
+        time.sleep(1.1)
+        instante = datetime.now()
+        time.sleep(1.1)
+        config_manager.set_config('speed', tela, 20, ConfigType.INTEGER)
+
+        assert self._value(config_manager.as_of(instante, tela=tela), 'speed') == 10
+        assert self._value(config_manager.as_of(datetime.now(), tela=tela), 'speed') == 20
+
+    def test_as_of_with_checkpoint(self, config_manager):
+        """Teste: Reconstrução a partir de checkpoint e delta"""
+        import time
+
+        tela = 'ASOFCP'
+        config_manager.set_config('mode', tela, 'a', ConfigType.STRING)
+        config_manager.create_checkpoint()
+        time.sleep(1.1)
+        config_manager.set_config('mode', tela, 'b', ConfigType.STRING)
+        time.sleep(1.1)
+        instante = datetime.now()
+        time.sleep(1.1)
+        config_manager.set_config('mode', tela, 'c', ConfigType.STRING)
+
+        assert self._value(config_manager.as_of(instante, tela=tela), 'mode') == 'b'
+
+    def test_as_of_instance_filter(self, config_manager):
+        """Teste: Configuração efetiva da instância: INSTANCE sobrepõe GLOBAL"""
+        tela = 'ASOFINST'
+        config_manager.set_config('limit', tela, 1, ConfigType.INTEGER)
+        config_manager.set_config(
+            'limit', tela, 2, ConfigType.INTEGER,
+            ConfigScope.INSTANCE, instance_id='asof-server-001'
+        )
+        config_manager.set_config(
+            'limit', tela, 3, ConfigType.INTEGER,
+            ConfigScope.INSTANCE, instance_id='asof-server-002'
+        )
+
+        config_manager.set_config('only_global', tela, 'g', ConfigType.STRING)
+
+        state = config_manager.as_of(datetime.now(), tela=tela, instance_id='asof-server-001')
+
+        assert [(row['nome'], row['escopo'], row['valor']) for row in state] == [
+            ('limit', 'INSTANCE', 2), ('only_global', 'GLOBAL', 'g')
+        ]
+
+# =====================================================
+# TESTES DE MANUTENÇÃO DO HISTÓRICO
+# =====================================================
+
+class TestConfigHistoryMaintenance:
+    """Testes da manutenção de configurations_history"""
+
+    @pytest.fixture
+    def history_repo(self):
+        from src.repositories.config_history_repository import ConfigHistoryRepository
+        return ConfigHistoryRepository()
+
+    def test_ensure_checkpoint_respects_interval(self, history_repo):
+        """Teste: Checkpoint só é criado quando o último está vencido"""
+        from datetime import timedelta
+
+        history_repo.ensure_checkpoint(timedelta(seconds=0))
+
+        assert history_repo.ensure_checkpoint(timedelta(hours=1)) is None
+
+    def test_compact_dry_run_counts_only_covered_rows(self, config_manager, history_repo):
+        """Teste: Dry run não remove linhas"""
+        config_manager.set_config('maint', 'MAINT', 'a', ConfigType.STRING)
+        config_manager.create_checkpoint()
+        covered = history_repo.count()
+        # Alteração posterior ao checkpoint: não é elegível
+        config_manager.set_config('maint', 'MAINT', 'b', ConfigType.STRING)
+        total_before = history_repo.count()
+
+        elegiveis = history_repo.compact(datetime.now(), dry_run=True)
+
+        assert elegiveis == covered
+        assert history_repo.count() == total_before
+
+    def test_as_of_before_retention_horizon_raises(self):
+        """Teste: as_of recusa instantes anteriores ao horizonte de retenção"""
+        from datetime import timedelta
+        from src.repositories.config_history_repository import ConfigHistoryRepository
+        from src.utils.exceptions import ConfigHistoryError
+
+        horizon = datetime(2024, 1, 1, 12, 0, 0)
+
+        class _FakeHistoryRepository(ConfigHistoryRepository):
+            def retention_horizon(self):
+                return horizon
+
+        with pytest.raises(ConfigHistoryError):
+            _FakeHistoryRepository().as_of(horizon - timedelta(seconds=1))
+
 # =====================================================
 # TESTES DE DELEÇÃO
 # =====================================================
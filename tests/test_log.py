@@ -32,8 +32,12 @@ from src.log.log import (
     AppLogger,
     log_function_call,
     log_execution_time,
-    LoggedOperation
+    LogDecoratorConfig,
+    LoggedOperation,
+    get_timing_report
 )
+from src.log.timing import LatencyHistogram, TimingRegistry
+from src.log.tracing import Tracer, export_chrome_trace, instrument_database, instrument_services, uninstrument
 
 # =====================================================
 # FIXTURES
@@ -157,6 +161,38 @@ class TestUserContext:
         assert results[1] == 'user_1'
         assert results[2] == 'user_2'
 
+    def test_user_context_isolated_between_tasks(self, clear_user_context):
+        """Teste: Cada task asyncio tem seu próprio usuário"""
+        import asyncio
+
+        user_filter = UserContextFilter()
+
+        async def handle_request(user_id):
+            UserContext.set_user(username=f'user_{user_id}', user_id=user_id, session_id=f's{user_id}')
+            await asyncio.sleep(0)  # Ceder o loop para as outras tasks
+            record = logging.makeLogRecord({'msg': 'req'})
+            user_filter.filter(record)
+            return record.username, record.user_id, record.session_id
+
+        async def main():
+            return await asyncio.gather(*(handle_request(i) for i in range(1, 501)))
+
+        results = asyncio.run(main())
+
+        assert results == [(f'user_{i}', i, f's{i}') for i in range(1, 501)]
+        assert UserContext.get_user() == 'SYSTEM'
+
+    def test_scoped_user(self, clear_user_context):
+        """Teste: UserContext.user restaura o usuário anterior"""
+        UserContext.set_user(username='outer', user_id=1)
+
+        with UserContext.user('inner', user_id=2, role='op'):
+            assert UserContext.get_user() == 'inner'
+            assert UserContext.get_context().role == 'op'
+
+        assert UserContext.get_user() == 'outer'
+        assert UserContext.get_user_id() == 1
+
 # =====================================================
 # TESTES DE FILTROS
 # =====================================================
@@ -312,6 +348,72 @@ class TestJSONFormatter:
         assert 'ValueError' in log_data['exception']
         assert 'Test error' in log_data['exception']
 
+    def test_fast_mode_matches_default(self, clear_user_context, sample_user):
+        """Teste: Modo rápido gera os mesmos campos do modo padrão"""
+        UserContext.set_user(**sample_user)
+        filter = UserContextFilter()
+
+        default_formatter = JSONFormatter()
+        fast_formatter = JSONFormatter(fast=True)
+
+        for lineno, msg in [(42, 'Mensagem com acentuação ç'), (42, 'Outra "citação"'), (7, 'Linha %d')]:
+            record = logging.LogRecord(
+                name='test', level=logging.INFO, pathname='/path/to/test.py',
+                lineno=lineno, msg=msg, args=(1,) if '%d' in msg else (),
+                exc_info=None, func='test_function'
+            )
+            record.created = 1700000000.25
+            filter.filter(record)
+
+            expected = json.loads(default_formatter.format(record))
+            fast = json.loads(fast_formatter.format_bytes(record))
+
+            assert fast['timestamp'] == datetime.fromtimestamp(1700000000.25).strftime('%Y-%m-%dT%H:%M:%S.250000')
+            expected.pop('timestamp')
+            fast.pop('timestamp')
+            assert fast == expected
+
+        # Mesmo ponto de chamada reaproveita o fragmento
+        assert len(fast_formatter._callsites) == 2
+
+    def test_fast_mode_with_exception(self, clear_user_context):
+        """Teste: Modo rápido inclui a exceção"""
+        try:
+            raise ValueError("Test error")
+        except ValueError:
+            exc_info = sys.exc_info()
+
+        record = logging.LogRecord(
+            name='test', level=logging.ERROR, pathname='test.py', lineno=1,
+            msg='Error occurred', args=(), exc_info=exc_info, func='test_func'
+        )
+
+        log_data = json.loads(JSONFormatter(fast=True).format(record))
+
+        assert 'ValueError' in log_data['exception']
+        assert log_data['user']['username'] == 'SYSTEM'
+
+    def test_json_file_handler_writes_lines(self, temp_log_dir, clean_logger, clear_user_context):
+        """Teste: json_fast grava uma linha JSON por registro"""
+        AppLogger.setup_logging(
+            log_dir=temp_log_dir,
+            app_name='fast_json',
+            console_output=False,
+            json_output=True,
+            json_fast=True
+        )
+
+        UserContext.set_user(username='fast_user', user_id=5)
+        logger = AppLogger.get_logger('fast')
+        logger.info("Registro %d", 1)
+        logger.warning("Registro %d", 2)
+
+        json_file = list(Path(temp_log_dir).glob('fast_json_*.json'))[0]
+        entries = [json.loads(line) for line in json_file.read_text(encoding='utf-8').splitlines()]
+
+        assert [e['message'] for e in entries[-2:]] == ['Registro 1', 'Registro 2']
+        assert entries[-1]['user']['username'] == 'fast_user'
+
 class TestColoredFormatter:
     """Testes do formatter com cores"""
 
@@ -460,7 +562,7 @@ class TestDecorators:
         assert result == 30
 
         # Verificar que logs foram criados
-        log_file = list(Path(temp_log_dir).glob('*.log'))[0]
+        log_file = [f for f in Path(temp_log_dir).glob('*.log') if '_errors' not in f.name][0]
         log_content = log_file.read_text(encoding='utf-8')
 
         assert 'test_function' in log_content
@@ -505,7 +607,7 @@ class TestDecorators:
         assert result == "done"
 
         # Verificar que tempo foi logado
-        log_file = list(Path(temp_log_dir).glob('*.log'))[0]
+        log_file = [f for f in Path(temp_log_dir).glob('*.log') if '_errors' not in f.name][0]
         log_content = log_file.read_text(encoding='utf-8')
 
         assert 'slow_function executado em' in log_content
@@ -530,13 +632,232 @@ class TestDecorators:
 
         assert result == 10
 
-        log_file = list(Path(temp_log_dir).glob('*.log'))[0]
+        log_file = [f for f in Path(temp_log_dir).glob('*.log') if '_errors' not in f.name][0]
         log_content = log_file.read_text(encoding='utf-8')
 
         assert 'Iniciando combined_function' in log_content
         assert 'executado em' in log_content
         assert 'Concluído combined_function' in log_content
 
+class _ListHandler(logging.Handler):
+    """Handler que guarda as mensagens formatadas em memória"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+@pytest.fixture
+def decorator_logger():
+    """Logger isolado para os decorators, com estado global restaurado"""
+    logger = logging.getLogger('decorator_test')
+    handler = _ListHandler()
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    yield logger, handler
+
+    logger.removeHandler(handler)
+    logger.propagate = True
+    logger.setLevel(logging.NOTSET)
+    LogDecoratorConfig.set_enabled(True)
+    LogDecoratorConfig.clear_sample_rates()
+
+class TestDecoratorOverhead:
+    """Testes de nível, kill switch e amostragem dos decorators"""
+
+    def _decorate(self, decorator, func):
+        func.__module__ = 'decorator_test'
+        return decorator(func)
+
+    def test_disabled_level_skips_formatting(self, decorator_logger):
+        """Teste: Nível desligado não formata argumentos"""
+        logger, handler = decorator_logger
+
+        class Spy:
+            calls = 0
+
+            def __repr__(self):
+                Spy.calls += 1
+                return 'Spy()'
+
+        traced = self._decorate(log_function_call(level=logging.DEBUG), lambda x: x)
+        traced(Spy())
+        assert Spy.calls == 0
+        assert handler.messages == []
+
+        logger.setLevel(logging.DEBUG)
+        traced(Spy())
+        assert Spy.calls > 0
+        assert handler.messages[0] == '→ Iniciando <lambda>(Spy())'
+
+    def test_kill_switch(self, decorator_logger):
+        """Teste: Kill switch desliga os dois decorators"""
+        logger, handler = decorator_logger
+        LogDecoratorConfig.set_enabled(False)
+
+        traced = self._decorate(log_function_call(), lambda: 1)
+        timed = self._decorate(log_execution_time, lambda: 2)
+
+        assert traced() == 1
+        assert timed() == 2
+        assert handler.messages == []
+
+        LogDecoratorConfig.set_enabled(True)
+        timed()
+        assert 'executado em' in handler.messages[0]
+
+    def test_sample_rate_per_module(self, decorator_logger):
+        """Teste: Amostragem por módulo, com erros sempre registrados"""
+        logger, handler = decorator_logger
+        LogDecoratorConfig.set_sample_rate('decorator_test', 0.0)
+
+        traced = self._decorate(log_function_call(), lambda: 1)
+        for _ in range(20):
+            traced()
+        assert handler.messages == []
+
+        def failing():
+            raise ValueError("falha")
+
+        failing = self._decorate(log_function_call(), failing)
+        with pytest.raises(ValueError):
+            failing()
+        assert handler.messages == ['✗ Erro em failing: ValueError: falha']
+
+    def test_sample_rate_inherited_from_parent(self):
+        """Teste: Submódulo herda a taxa do pacote pai"""
+        try:
+            LogDecoratorConfig.set_sample_rate('services', 0.25)
+            assert LogDecoratorConfig.get_sample_rate('services.dispatch') == 0.25
+            assert LogDecoratorConfig.get_sample_rate('servicesx') == 1.0
+            with pytest.raises(ValueError):
+                LogDecoratorConfig.set_sample_rate('services', 2)
+        finally:
+            LogDecoratorConfig.clear_sample_rates()
+
+class TestTimingHistograms:
+    """Testes dos histogramas de log_execution_time"""
+
+    @pytest.fixture(autouse=True)
+    def reset_registry(self):
+        TimingRegistry.reset()
+        yield
+        TimingRegistry.reset()
+
+    def test_percentiles_within_bucket_error(self):
+        """Teste: Percentis com erro relativo limitado pela faixa"""
+        histogram = LatencyHistogram()
+        for value in range(1, 100001):
+            histogram.record(value * 1000)
+
+        for quantile, expected in [(0.5, 50000000), (0.9, 90000000), (0.99, 99000000)]:
+            assert abs(histogram.percentile(quantile) - expected) / expected < 0.0625
+
+        summary = histogram.summary()
+        assert summary['count'] == 100000
+        assert summary['max_ms'] == 100.0
+
+    def test_merge(self):
+        """Teste: merge equivale a registrar tudo em um único histograma"""
+        a, b, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for value in range(1, 5000):
+            (a if value % 2 else b).record(value * 997)
+            combined.record(value * 997)
+
+        a.merge(b)
+
+        assert a.summary() == combined.summary()
+
+    def test_concurrent_record(self):
+        """Teste: Registro concorrente não perde contagens"""
+        histogram = LatencyHistogram()
+
+        def worker():
+            for value in range(10000):
+                histogram.record(value)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert histogram.count == 40000
+
+    def test_decorator_without_per_call_line(self, decorator_logger):
+        """Teste: log_each_call=False só alimenta o histograma"""
+        logger, handler = decorator_logger
+
+        def dispatch():
+            return 'ok'
+
+        dispatch.__module__ = 'decorator_test'
+        dispatch = log_execution_time(log_each_call=False)(dispatch)
+        for _ in range(10):
+            dispatch()
+
+        report = get_timing_report()
+        name = [key for key in report if key.endswith('dispatch')][0]
+
+        assert handler.messages == []
+        assert report[name]['count'] == 10
+        assert report[name]['p50_ms'] <= report[name]['p99_ms'] <= report[name]['max_ms']
+
+    def test_dump_writes_metrics_to_json(self, decorator_logger):
+        """Teste: Resumo periódico vai para o campo 'metrics' do JSON"""
+        logger, handler = decorator_logger
+        records = []
+        handler.emit = records.append
+
+        TimingRegistry.histogram('services.dispatch.assign').record(2000000)
+        TimingRegistry.dump(logger)
+
+        for formatter in (JSONFormatter(), JSONFormatter(fast=True)):
+            log_data = json.loads(formatter.format(records[0]))
+            assert log_data['metrics']['function'] == 'services.dispatch.assign'
+            assert log_data['metrics']['count'] == 1
+            assert log_data['metrics']['max_ms'] == 2.0
+
+    def test_reset_keeps_decorated_functions_recording(self, decorator_logger):
+        """Teste: reset zera os histogramas sem desligar os decoradores já criados"""
+        def dispatch():
+            return 'ok'
+
+        dispatch.__module__ = 'decorator_test'
+        dispatch = log_execution_time(log_each_call=False)(dispatch)
+        dispatch()
+        TimingRegistry.reset()
+        dispatch()
+        dispatch()
+
+        report = get_timing_report()
+        name = [key for key in report if 'test_reset_keeps' in key][0]
+
+        assert report[name]['count'] == 2
+
+    def test_dump_reports_interval(self, decorator_logger):
+        """Teste: Cada dump mostra só as durações desde o anterior; o relatório segue cumulativo"""
+        logger, handler = decorator_logger
+        records = []
+        handler.emit = records.append
+        histogram = TimingRegistry.histogram('services.dispatch.assign')
+
+        histogram.record(5000000)
+        TimingRegistry.dump(logger)
+        histogram.record(1000000)
+        histogram.record(1000000)
+        TimingRegistry.dump(logger)
+        TimingRegistry.dump(logger)
+
+        assert len(records) == 2
+        assert records[1].metrics['count'] == 2
+        assert records[1].metrics['max_ms'] == 1.0
+        assert get_timing_report()['services.dispatch.assign']['count'] == 3
+
 # =====================================================
 # TESTES DE CONTEXT MANAGER
 # =====================================================
@@ -560,7 +881,7 @@ class TestLoggedOperation:
             # Operação bem-sucedida
             pass
 
-        log_file = list(Path(temp_log_dir).glob('*.log'))[0]
+        log_file = [f for f in Path(temp_log_dir).glob('*.log') if '_errors' not in f.name][0]
         log_content = log_file.read_text(encoding='utf-8')
 
         assert 'Iniciando operação: Test Operation' in log_content
@@ -581,7 +902,7 @@ class TestLoggedOperation:
             with LoggedOperation("Failing Operation", logger):
                 raise ValueError("Test error")
 
-        log_file = list(Path(temp_log_dir).glob('*.log'))[0]
+        log_file = [f for f in Path(temp_log_dir).glob('*.log') if '_errors' not in f.name][0]
         log_content = log_file.read_text(encoding='utf-8')
 
         assert 'Iniciando operação: Failing Operation' in log_content
@@ -601,11 +922,807 @@ class TestLoggedOperation:
         with LoggedOperation("Default Logger Operation"):
             pass
 
-        log_file = list(Path(temp_log_dir).glob('*.log'))[0]
+        log_file = [f for f in Path(temp_log_dir).glob('*.log') if '_errors' not in f.name][0]
         log_content = log_file.read_text(encoding='utf-8')
 
         assert 'Default Logger Operation' in log_content
 
+# =====================================================
+# TESTES DE ROTAÇÃO
+# =====================================================
+
+class TestRotation:
+    """Testes da rotação por data/tamanho com compressão em segundo plano"""
+
+    def _record(self, msg, created=None):
+        record = logging.makeLogRecord({'msg': msg, 'levelno': logging.INFO, 'levelname': 'INFO'})
+        if created is not None:
+            record.created = created
+        return record
+
+    def test_size_rollover_compresses_in_background(self, temp_log_dir):
+        """Teste: Ultrapassar max_bytes abre novo segmento e comprime o anterior"""
+        import gzip
+        from src.log.rotation import LogMaintenance, RotatingLogHandler
+
+        handler = RotatingLogHandler(temp_log_dir, 'size', '.log', max_bytes=200)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        for i in range(30):
+            handler.emit(self._record(f'linha {i:02d} ' + 'x' * 20))
+        handler.close()
+        LogMaintenance.wait()
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        compressed = sorted(Path(temp_log_dir).glob(f'size_{today}*.log.gz'))
+        active = Path(handler.baseFilename)
+
+        assert compressed
+        assert active.exists() and not active.name.endswith('.gz')
+        assert all(p.stat().st_size <= 200 for p in Path(temp_log_dir).glob('*.log'))
+
+        lines = []
+        for path in compressed:
+            lines += gzip.decompress(path.read_bytes()).decode('utf-8').splitlines()
+        lines += active.read_text(encoding='utf-8').splitlines()
+        assert sorted(lines) == [f'linha {i:02d} ' + 'x' * 20 for i in range(30)]
+
+    def test_daily_rollover(self, temp_log_dir):
+        """Teste: Registro do dia seguinte abre o segmento da nova data"""
+        from src.log.rotation import LogMaintenance, RotatingLogHandler
+
+        handler = RotatingLogHandler(temp_log_dir, 'daily', '.json', compression=None)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.emit(self._record('hoje'))
+
+        tomorrow = datetime.now().timestamp() + 86400
+        handler.emit(self._record('amanhã', created=tomorrow))
+        handler.close()
+        LogMaintenance.wait()
+
+        next_day = datetime.fromtimestamp(tomorrow).strftime('%Y-%m-%d')
+        assert Path(handler.baseFilename).name == f'daily_{next_day}.json'
+        assert Path(handler.baseFilename).read_text(encoding='utf-8') == 'amanhã\n'
+
+    def test_retention_prunes_old_segments(self, temp_log_dir):
+        """Teste: Segmentos mais antigos que a retenção são removidos"""
+        from src.log.rotation import LogMaintenance, RotatingLogHandler
+
+        old = Path(temp_log_dir) / 'ret_2020-01-01.log.gz'
+        old.write_bytes(b'')
+        os.utime(old, (0, 0))
+        other = Path(temp_log_dir) / 'ret_errors_2020-01-01.log.gz'
+        other.write_bytes(b'')
+        os.utime(other, (0, 0))
+
+        handler = RotatingLogHandler(temp_log_dir, 'ret', '.log', retention_days=7)
+        LogMaintenance.wait()
+        handler.close()
+
+        assert not old.exists()
+        assert other.exists()  # Pertence ao handler de erros
+
+    def test_setup_logging_rotates_errors_file(self, temp_log_dir, clean_logger):
+        """Teste: _errors também usa segmentos por data"""
+        AppLogger.setup_logging(log_dir=temp_log_dir, app_name='rot', console_output=False, rotate=True)
+        AppLogger.get_logger('rot').error("falha")
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        assert 'falha' in (Path(temp_log_dir) / f'rot_errors_{today}.log').read_text(encoding='utf-8')
+
+    def test_shutdown_closes_sync_handlers(self, temp_log_dir, clean_logger):
+        """Teste: No modo síncrono o shutdown também fecha os arquivos"""
+        AppLogger.setup_logging(log_dir=temp_log_dir, app_name='sync', console_output=False, file_output=True)
+        handlers = list(logging.getLogger().handlers)
+        AppLogger.get_logger('sync').info("antes")
+        AppLogger.shutdown()
+
+        assert handlers and all(handler.stream is None for handler in handlers)
+        assert not any(handler in logging.getLogger().handlers for handler in handlers)
+        assert AppLogger._configured is False
+
+    def test_rotation_and_retention_are_opt_in(self, temp_log_dir, clean_logger):
+        """Teste: Sem rotate nem retention_days, nomes e arquivos antigos ficam como antes"""
+        old = Path(temp_log_dir) / 'plain_2020-01-01.log'
+        old.write_text('antigo\n', encoding='utf-8')
+        os.utime(old, (0, 0))
+
+        AppLogger.setup_logging(log_dir=temp_log_dir, app_name='plain', console_output=False, file_output=True)
+        AppLogger.get_logger('plain').error("falha")
+        AppLogger.shutdown()
+
+        assert 'falha' in (Path(temp_log_dir) / 'plain_errors.log').read_text(encoding='utf-8')
+        assert old.exists()
+
+    def test_invalid_compression(self, temp_log_dir):
+        """Teste: Compressão desconhecida é rejeitada"""
+        from src.log.rotation import RotatingLogHandler
+
+        with pytest.raises(ValueError):
+            RotatingLogHandler(temp_log_dir, 'x', compression='rar')
+
+# =====================================================
+# TESTES DE BUSCA INDEXADA
+# =====================================================
+
+class TestLogIndex:
+    """Testes do índice lateral e da busca em logs JSON"""
+
+    BASE_TIME = datetime(2026, 10, 19, 2, 0).timestamp()
+
+    def _write_log(self, path, start, count):
+        """Um registro por segundo; usuário, nível e módulo variam"""
+        formatter = JSONFormatter(fast=True)
+        with open(path, 'ab') as f:
+            for i in range(start, start + count):
+                level = logging.WARNING if i % 7 == 0 else logging.INFO
+                record = logging.LogRecord(
+                    name='agv', level=level, pathname=f'/app/mod_{i % 3}.py', lineno=1,
+                    msg='evento %d', args=(i,), exc_info=None, func='run'
+                )
+                record.created = self.BASE_TIME + i
+                record.username = f'user_{i % 5}'
+                record.user_id = i % 5
+                record.session_id = f'sess_{i // 1000}'
+                f.write(formatter.format_bytes(record) + b'\n')
+
+    def _brute_force(self, path, query):
+        entries = [json.loads(line) for line in Path(path).read_text(encoding='utf-8').splitlines()]
+        return [e for e in entries if query.matches(e)]
+
+    def test_query_skips_blocks(self, temp_log_dir):
+        """Teste: Filtro por horário lê só os blocos do intervalo"""
+        from src.log.log_index import LogQuery, build_index
+
+        path = Path(temp_log_dir) / 'agv_2026-10-19.json'
+        self._write_log(path, 0, 5000)
+        build_index(path, block_lines=100)
+
+        query = LogQuery(
+            user_id=3, min_level='WARNING',
+            since=datetime.fromtimestamp(self.BASE_TIME + 3600).isoformat(),
+            until=datetime.fromtimestamp(self.BASE_TIME + 3600 + 900).isoformat()
+        )
+        results = list(query.search([path]))
+
+        assert results == self._brute_force(path, query)
+        assert results and all(e['level'] == 'WARNING' and e['user']['user_id'] == 3 for e in results)
+        assert query.blocks_total == 50
+        assert query.blocks_scanned <= 11
+
+    def test_incremental_index(self, temp_log_dir):
+        """Teste: Conteúdo acrescentado é indexado sem refazer blocos completos"""
+        from src.log.log_index import LogQuery, build_index
+
+        path = Path(temp_log_dir) / 'inc.json'
+        self._write_log(path, 0, 250)
+        first = build_index(path, block_lines=100)
+        assert [b['lines'] for b in first['blocks']] == [100, 100, 50]
+
+        self._write_log(path, 250, 100)
+        # Linha parcial (registro em gravação) fica fora do índice
+        with open(path, 'ab') as f:
+            f.write(b'{"timestamp": "2026')
+
+        second = build_index(path)
+        assert second['blocks'][:2] == first['blocks'][:2]
+        assert [b['lines'] for b in second['blocks']] == [100, 100, 100, 50]
+        assert second['indexed_bytes'] < path.stat().st_size
+
+        query = LogQuery(session_id='sess_0', contains='evento 349')
+        assert [e['message'] for e in query.search([path])] == ['evento 349']
+
+    def test_compressed_segment(self, temp_log_dir):
+        """Teste: Segmento comprimido usa o índice criado antes da compressão"""
+        from src.log.log_index import LogQuery, build_index, index_path_for
+        from src.log.rotation import compress_file
+
+        path = Path(temp_log_dir) / 'seg_2026-10-18.json'
+        self._write_log(path, 0, 300)
+        build_index(path, block_lines=100)
+        compress_file(path, 'gzip')
+
+        compressed = path.with_name(path.name + '.gz')
+        assert index_path_for(compressed).exists()
+
+        query = LogQuery(module='mod_1', min_level='WARNING')
+        results = list(query.search([compressed]))
+
+        assert len(results) == len([i for i in range(300) if i % 3 == 1 and i % 7 == 0])
+        assert query.blocks_total == 3
+
+    def test_compressed_segment_streamed(self, temp_log_dir, monkeypatch):
+        """Teste: Segmento comprimido sem índice é indexado e lido em fluxo"""
+        from src.log import log_index
+        from src.log.log_index import LogQuery, build_index, index_path_for
+        from src.log.rotation import compress_file
+
+        # Pedaços pequenos: linhas e blocos atravessam os limites de leitura
+        monkeypatch.setattr(log_index, 'READ_CHUNK', 1000)
+        path = Path(temp_log_dir) / 'seg_2026-10-17.json'
+        self._write_log(path, 0, 300)
+        query = LogQuery(user_id=2, min_level='WARNING')
+        expected = self._brute_force(path, query)
+        compress_file(path, 'gzip')
+        compressed = path.with_name(path.name + '.gz')
+        index_path_for(compressed).unlink(missing_ok=True)
+
+        index = build_index(compressed, block_lines=100)
+
+        assert [b['lines'] for b in index['blocks']] == [100, 100, 100]
+        assert list(query.search([compressed])) == expected
+        assert list(LogQuery(user_id=2, min_level='WARNING').search([compressed], use_index=False)) == expected
+
+    def test_until_includes_whole_minute(self, temp_log_dir):
+        """Teste: until sem segundos inclui os registros daquele minuto"""
+        from src.log.log_index import LogQuery
+
+        path = Path(temp_log_dir) / 'min.json'
+        self._write_log(path, 0, 300)
+
+        query = LogQuery(since='2026-10-19T02:01', until='2026-10-19T02:02')
+        timestamps = [e['timestamp'] for e in query.search([path])]
+
+        assert len(timestamps) == 120
+        assert timestamps[0].startswith('2026-10-19T02:01:00') and timestamps[-1].startswith('2026-10-19T02:02:59')
+
+    def test_contains_matches_escaped_text(self, temp_log_dir):
+        """Teste: contains encontra aspas, barras e acentos escapados no JSON"""
+        from src.log.log_index import LogQuery
+
+        path = Path(temp_log_dir) / 'esc.json'
+        message = 'rota "A\\1" concluída'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'timestamp': '2026-10-19T02:00:00', 'message': message}, ensure_ascii=False) + '\n')
+            f.write(json.dumps({'timestamp': '2026-10-19T02:00:01', 'message': message}) + '\n')
+            f.write(json.dumps({'timestamp': '2026-10-19T02:00:02', 'message': 'outra'}) + '\n')
+
+        results = list(LogQuery(contains='"A\\1" concluída').search([path]))
+
+        assert [e['timestamp'] for e in results] == ['2026-10-19T02:00:00', '2026-10-19T02:00:01']
+
+# =====================================================
+# TESTES DE LIMITAÇÃO POR PONTO DE CHAMADA
+# =====================================================
+
+class TestRateLimit:
+    """Testes do token bucket por (logger, linha, nível)"""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        from src.log import rate_limit
+
+        now = [1000.0]
+        monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+        return now
+
+    def _record(self, lineno=10, level=logging.WARNING, name='agv.loop'):
+        return logging.LogRecord(name, level, 'loop.py', lineno, 'sensor travado', (), None)
+
+    def test_burst_then_refill(self, clock):
+        """Teste: Rajada passa, excesso é suprimido e o bucket recarrega"""
+        from src.log.rate_limit import CallsiteRateLimitFilter
+
+        rate_filter = CallsiteRateLimitFilter(rate=2.0, burst=5)
+        passed = [rate_filter.filter(self._record()) for _ in range(20)]
+
+        assert passed.count(True) == 5
+        assert rate_filter.filter(self._record(lineno=11))  # Outro ponto de chamada
+        assert rate_filter.filter(self._record(level=logging.CRITICAL))  # Nível isento
+
+        clock[0] += 1.0
+        passed = [rate_filter.filter(self._record()) for _ in range(5)]
+        assert passed.count(True) == 2
+        assert rate_filter.stats() == {'callsites': 2, 'suppressed': 18}
+        rate_filter.close()
+
+    def test_single_token_across_handlers(self, clock):
+        """Teste: Mesmo registro em vários handlers consome um único token"""
+        from src.log.rate_limit import CallsiteRateLimitFilter
+
+        rate_filter = CallsiteRateLimitFilter(rate=0.0, burst=1)
+        record = self._record()
+
+        assert all(rate_filter.filter(record) for _ in range(3))
+        assert not rate_filter.filter(self._record())
+        rate_filter.close()
+
+    def test_sampling_when_empty(self, clock):
+        """Teste: Com amostragem, mantém 1 a cada N após esgotar o bucket"""
+        from src.log.rate_limit import CallsiteRateLimitFilter
+
+        rate_filter = CallsiteRateLimitFilter(rate=0.0, burst=0, sample_rate=10)
+        passed = [rate_filter.filter(self._record()) for _ in range(100)]
+
+        assert passed.count(True) == 10
+        rate_filter.close()
+
+    def test_summary_record(self, clock, decorator_logger):
+        """Teste: Resumo de suprimidas sai pelo logger original e não é limitado"""
+        from src.log.rate_limit import CallsiteRateLimitFilter
+
+        logger, handler = decorator_logger
+        rate_filter = CallsiteRateLimitFilter(rate=0.0, burst=1)
+        handler.addFilter(rate_filter)
+        rate_filter._ensure_summary_thread = lambda: None
+
+        for _ in range(50):
+            logger.warning("sensor travado")
+
+        assert rate_filter.emit_summaries() == 1
+        assert handler.messages[0] == 'sensor travado'
+        assert handler.messages[1].startswith('⚠️ 49 mensagens semelhantes suprimidas')
+        assert rate_filter.emit_summaries() == 0
+
+    def test_bind_config_updates_at_runtime(self, clock):
+        """Teste: Parâmetros vêm da tela LOGGING e mudam com o histórico"""
+        from src.log.rate_limit import CallsiteRateLimitFilter
+        from src.repositories.config_repository import ConfigManager
+        from src.repositories.config_view import ConfigView
+
+        class FakeManager(ConfigManager):
+            def __init__(self):
+                self.callbacks = []
+
+            def get_scoped_configs(self, tela, instance_id=None, user_id=None):
+                return [{'tela': 'LOGGING', 'nome': 'rate_limit_burst', 'escopo': 'GLOBAL',
+                         'tipo': 'INTEGER', 'valor_inteiro': 2}]
+
+            def get_view(self, tela=None, instance_id=None, user_id=None, follow=True):
+                return ConfigView(tela, instance_id, user_id, manager=self, follow=follow)
+
+            def subscribe(self, pattern, callback):
+                self.callbacks.append((pattern, callback))
+                return 1
+
+            def unsubscribe(self, subscription_id):
+                return True
+
+        manager = FakeManager()
+        rate_filter = CallsiteRateLimitFilter(rate=0.0, burst=100)
+        rate_filter.bind_config(manager)
+
+        assert rate_filter.burst == 2
+        assert manager.callbacks[0][0] == 'LOGGING.rate_limit_*'
+
+        manager.callbacks[0][1]({'tela': 'LOGGING', 'nome': 'rate_limit_enabled', 'escopo': 'GLOBAL',
+                                 'tipo': 'BOOLEAN', 'valor_novo': 'False', 'operacao': 'INSERT'})
+        assert rate_filter.enabled is False
+        assert all(rate_filter.filter(self._record()) for _ in range(10))
+
+        manager.callbacks[0][1]({'tela': 'LOGGING', 'nome': 'rate_limit_burst', 'escopo': 'GLOBAL',
+                                 'tipo': 'INTEGER', 'valor_novo': None, 'operacao': 'DELETE'})
+        assert rate_filter.burst == 100
+        rate_filter.close()
+
+    def test_bind_config_keeps_change_made_while_loading(self, clock):
+        """Teste: Alteração confirmada durante a leitura inicial não se perde"""
+        from src.log.rate_limit import CallsiteRateLimitFilter
+        from src.repositories.config_repository import ConfigManager
+        from src.repositories.config_view import ConfigView
+
+        class FakeManager(ConfigManager):
+            def __init__(self):
+                self.callbacks = []
+
+            def get_scoped_configs(self, tela, instance_id=None, user_id=None):
+                # Alteração entregue pelo watcher enquanto a leitura está em curso
+                for pattern, callback in self.callbacks:
+                    callback({'tela': 'LOGGING', 'nome': 'rate_limit_sample_rate', 'escopo': 'GLOBAL',
+                              'tipo': 'INTEGER', 'valor_novo': '5', 'operacao': 'INSERT'})
+                return [{'tela': 'LOGGING', 'nome': 'rate_limit_burst', 'escopo': 'GLOBAL',
+                         'tipo': 'INTEGER', 'valor_inteiro': 2}]
+
+            def get_view(self, tela=None, instance_id=None, user_id=None, follow=True):
+                return ConfigView(tela, instance_id, user_id, manager=self, follow=follow)
+
+            def subscribe(self, pattern, callback):
+                self.callbacks.append((pattern, callback))
+                return 1
+
+            def unsubscribe(self, subscription_id):
+                return True
+
+        rate_filter = CallsiteRateLimitFilter(rate=0.0, burst=100)
+        assert rate_filter.bind_config(FakeManager())
+
+        assert rate_filter.burst == 2
+        assert rate_filter.sample_rate == 5
+        rate_filter.close()
+
+    def test_bind_config_without_database(self):
+        """Teste: Banco indisponível mantém os valores padrão e a ligação é refeita depois"""
+        from src.log.rate_limit import CallsiteRateLimitFilter
+        from src.repositories.config_repository import ConfigManager
+        from src.repositories.config_view import ConfigView
+
+        class FakeManager(ConfigManager):
+            def __init__(self):
+                self.available = threading.Event()
+                self.subscriptions = set()
+
+            def get_scoped_configs(self, tela, instance_id=None, user_id=None):
+                if not self.available.is_set():
+                    raise ConnectionError("Banco indisponível")
+                return [{'tela': 'LOGGING', 'nome': 'rate_limit_burst', 'escopo': 'GLOBAL',
+                         'tipo': 'INTEGER', 'valor_inteiro': 3}]
+
+            def get_view(self, tela=None, instance_id=None, user_id=None, follow=True):
+                return ConfigView(tela, instance_id, user_id, manager=self, follow=follow)
+
+            def subscribe(self, pattern, callback):
+                self.subscriptions.add(len(self.subscriptions) + 1)
+                return len(self.subscriptions)
+
+            def unsubscribe(self, subscription_id):
+                self.subscriptions.discard(subscription_id)
+                return True
+
+        manager = FakeManager()
+        rate_filter = CallsiteRateLimitFilter(rate=0.0, burst=100)
+        assert not rate_filter.bind_config(manager, retry_interval=0.01)
+        assert rate_filter.burst == 100
+        assert manager.subscriptions == set()
+
+        manager.available.set()
+        deadline = time.time() + 5
+        while rate_filter.burst != 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert rate_filter.burst == 3
+        assert len(manager.subscriptions) == 1
+        rate_filter.close()
+        assert manager.subscriptions == set()
+
+# =====================================================
+# TESTES DE LOGGING ASSÍNCRONO
+# =====================================================
+
+class TestAsyncLogging:
+    """Testes do modo assíncrono (fila + thread de gravação)"""
+
+    def test_async_mode_writes_on_shutdown(self, temp_log_dir, clean_logger, clear_user_context):
+        """Teste: Registros enfileirados são gravados com o contexto da thread de origem"""
+        AppLogger.setup_logging(
+            log_dir=temp_log_dir,
+            app_name='async_test',
+            console_output=False,
+            file_output=True,
+            async_mode=True
+        )
+
+        def worker(thread_id):
+            UserContext.set_user(username=f'async_user_{thread_id}', user_id=thread_id)
+            logger = AppLogger.get_logger(f'async_{thread_id}')
+            for i in range(50):
+                logger.info("Mensagem %d", i)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = AppLogger.get_queue_stats()
+        AppLogger.shutdown()
+
+        log_file = [f for f in Path(temp_log_dir).glob('*.log') if 'async_test_2' in f.name][0]
+        log_content = log_file.read_text(encoding='utf-8')
+
+        assert stats['dropped'] == 0
+        assert log_content.count('Mensagem') == 200
+        for i in range(4):
+            assert f'async_user_{i}' in log_content
+        assert AppLogger.get_queue_stats() == {}
+
+    def test_drop_oldest_policy(self):
+        """Teste: drop_oldest mantém os registros mais recentes"""
+        from src.log.async_logging import BoundedLogQueue
+
+        queue = BoundedLogQueue(capacity=10, overflow_policy='drop_oldest')
+        for i in range(25):
+            queue.put(logging.makeLogRecord({'msg': str(i), 'levelno': logging.INFO}))
+
+        batch = queue.get_batch(100)
+
+        assert [r.msg for r in batch] == [str(i) for i in range(15, 25)]
+        assert queue.stats()['dropped'] == 15
+
+    def test_sample_policy_keeps_errors(self):
+        """Teste: sample descarta parte dos registros comuns mas preserva erros"""
+        from src.log.async_logging import BoundedLogQueue
+
+        queue = BoundedLogQueue(capacity=100, overflow_policy='sample', sample_rate=10, high_watermark=0.5)
+        for i in range(90):
+            queue.put(logging.makeLogRecord({'msg': str(i), 'levelno': logging.INFO}))
+        queue.put(logging.makeLogRecord({'msg': 'erro', 'levelno': logging.ERROR}))
+
+        stats = queue.stats()
+
+        assert stats['sampled_out'] == 36
+        assert stats['size'] == 55
+        assert queue.get_batch(100)[-1].msg == 'erro'
+
+    def test_block_policy_timeout_counts_drop(self):
+        """Teste: block com timeout contabiliza o registro não enfileirado"""
+        from src.log.async_logging import BoundedLogQueue
+
+        queue = BoundedLogQueue(capacity=2, overflow_policy='block', block_timeout=0.01)
+        results = [queue.put(logging.makeLogRecord({'msg': str(i)})) for i in range(3)]
+
+        assert results == [True, True, False]
+        assert queue.stats()['dropped'] == 1
+
+    def test_block_policy_never_waits_on_listener_thread(self):
+        """Teste: Handler que loga de volta na fila cheia descarta em vez de travar a gravação"""
+        from src.log.async_logging import AsyncLogHandler, BoundedLogQueue, LogListener
+
+        queue = BoundedLogQueue(capacity=1, overflow_policy='block', block_timeout=None)
+
+        class EchoHandler(logging.Handler):
+            def emit(self, record):
+                if record.msg == 'origem':
+                    for i in range(5):
+                        async_handler.emit(logging.makeLogRecord({'msg': f'eco {i}', 'levelno': logging.INFO}))
+
+        listener = LogListener(queue, [EchoHandler()], batch_size=1)
+        async_handler = AsyncLogHandler(queue, listener)
+        listener.start()
+        async_handler.emit(logging.makeLogRecord({'msg': 'origem', 'levelno': logging.INFO}))
+        listener.stop(timeout=2.0)
+
+        assert queue.stats()['dropped'] >= 4
+        assert len(queue) <= 1
+
+    def test_block_policy_without_listener_does_not_wait(self):
+        """Teste: Sem thread de gravação viva o produtor descarta na hora"""
+        from src.log.async_logging import AsyncLogHandler, BoundedLogQueue, LogListener
+
+        queue = BoundedLogQueue(capacity=1, overflow_policy='block', block_timeout=None)
+        async_handler = AsyncLogHandler(queue, LogListener(queue, []))
+        for i in range(3):
+            async_handler.emit(logging.makeLogRecord({'msg': str(i)}))
+
+        assert queue.stats()['enqueued'] == 1
+        assert queue.stats()['dropped'] == 2
+
+    def test_invalid_policy(self):
+        """Teste: Política desconhecida é rejeitada"""
+        from src.log.async_logging import BoundedLogQueue
+
+        with pytest.raises(ValueError):
+            BoundedLogQueue(overflow_policy='invalida')
+
+# =====================================================
+# TESTES DE RASTREAMENTO (SPANS)
+# =====================================================
+
+class TestTracing:
+    """Testes de spans, auto-instrumentação e exportação"""
+
+    @pytest.fixture(autouse=True)
+    def reset_tracer(self):
+        Tracer.clear()
+        yield
+        uninstrument()
+        Tracer.clear()
+
+    def test_nested_operations_link_parent(self):
+        """Teste: LoggedOperation aninhada registra o span pai"""
+        logger = logging.getLogger('trace_test')
+
+        with LoggedOperation("Pedido", logger, pedido_id=7) as outer:
+            with LoggedOperation("Reserva", logger) as inner:
+                assert Tracer.current_span() is inner.span
+            assert Tracer.current_span() is outer.span
+        assert Tracer.current_span() is None
+
+        spans = {span.name: span for span in Tracer.get_finished_spans()}
+
+        assert spans['Reserva'].parent_id == spans['Pedido'].span_id
+        assert spans['Reserva'].trace_id == spans['Pedido'].trace_id
+        assert spans['Pedido'].parent_id is None
+        assert spans['Pedido'].attributes == {'pedido_id': 7}
+        assert spans['Pedido'].duration_ns >= spans['Reserva'].duration_ns > 0
+
+    def test_failed_span_records_error(self):
+        """Teste: Exceção marca o span com status ERROR"""
+        with pytest.raises(ValueError):
+            with Tracer.start_span('falha'):
+                raise ValueError("sem rota")
+
+        span = Tracer.get_finished_spans()[0]
+
+        assert span.status == 'ERROR'
+        assert span.attributes['error.type'] == 'ValueError'
+
+    def test_spans_isolated_between_threads(self):
+        """Teste: Cada thread tem sua própria pilha de spans"""
+        parents = []
+
+        def worker():
+            with Tracer.start_span('worker'):
+                parents.append(Tracer.current_span().parent_id)
+
+        with Tracer.start_span('main'):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        assert parents == [None]
+
+    def test_instrument_services(self):
+        """Teste: Métodos públicos do serviço viram spans"""
+
+        class FakeService:
+            def login(self, email):
+                return self._check(email)
+
+            def _check(self, email):
+                return email.upper()
+
+        instrument_services(FakeService)
+        assert FakeService().login('a@b.com') == 'A@B.COM'
+        assert [span.name for span in Tracer.get_finished_spans()] == ['FakeService.login']
+
+        uninstrument()
+        FakeService().login('a@b.com')
+        assert len(Tracer.get_finished_spans()) == 1
+
+    def test_instrument_database(self, monkeypatch):
+        """Teste: get_cursor e cada query viram spans aninhados"""
+        from src.utils.database import DatabaseManager
+
+        class FakeCursor:
+            rowcount = 1
+
+            def __init__(self):
+                self.calls = []
+
+            def execute(self, *args, **kwargs):
+                self.calls.append((args, kwargs))
+
+            def fetchone(self):
+                return {'id': 1}
+
+            def close(self):
+                pass
+
+        class FakeConnection:
+            def cursor(self, dictionary=True):
+                return FakeCursor()
+
+            def is_connected(self):
+                return False
+
+        class FakePool:
+            def get_connection(self):
+                return FakeConnection()
+
+        monkeypatch.setattr(DatabaseManager, '_pool', FakePool())
+        instrument_database()
+
+        with Tracer.start_span('AuthService.login'):
+            with DatabaseManager.get_cursor() as (cursor, conn):
+                cursor.execute("SELECT * FROM users WHERE email = %s", ('a@b.com',))
+                assert cursor.fetchone() == {'id': 1}
+                # Sem params nada é repassado: '%' do LIKE não vira marcador
+                cursor.execute("SELECT * FROM users WHERE email LIKE 'a%'")
+                assert cursor.calls == [
+                    (("SELECT * FROM users WHERE email = %s", ('a@b.com',)), {}),
+                    (("SELECT * FROM users WHERE email LIKE 'a%'",), {}),
+                ]
+
+        spans = {span.name: span for span in Tracer.get_finished_spans()}
+
+        assert spans['db.query'].parent_id == spans['db.cursor'].span_id
+        assert spans['db.cursor'].parent_id == spans['AuthService.login'].span_id
+        assert spans['db.query'].attributes['sql'].startswith('SELECT * FROM users')
+
+    def test_export_chrome_trace(self, temp_log_dir):
+        """Teste: Exportação gera eventos 'X' em microssegundos"""
+        with Tracer.start_span('AuthService.login', email='a@b.com'):
+            with Tracer.start_span('db.query'):
+                pass
+
+        path = export_chrome_trace(Path(temp_log_dir) / 'trace.json')
+        data = json.loads(path.read_text(encoding='utf-8'))
+        events = [e for e in data['traceEvents'] if e['ph'] == 'X']
+
+        assert [e['name'] for e in events] == ['AuthService.login', 'db.query']
+        assert events[0]['args']['email'] == 'a@b.com'
+        assert events[1]['args']['parent_id'] == events[0]['args']['span_id']
+        assert events[0]['ts'] <= events[1]['ts']
+        assert events[0]['dur'] >= events[1]['dur']
+
+# =====================================================
+# TESTES DE LOGGING MULTIPROCESSO
+# =====================================================
+
+def _collector_worker(address, worker_id, count):
+    """Worker (processo filho) que envia registros ao coletor"""
+    AppLogger._configured = False
+    AppLogger.setup_logging(app_name='mp', console_output=False, collector_address=address)
+    UserContext.set_user(username=f'worker_{worker_id}', user_id=worker_id)
+    logger = logging.getLogger(f'worker_{worker_id}')
+    for i in range(count):
+        logger.info("Registro %d do worker %d", i, worker_id)
+    AppLogger.shutdown()
+
+class TestMultiprocessLogging:
+    """Testes do coletor de logs para múltiplos processos"""
+
+    def test_frame_roundtrip(self):
+        """Teste: Frame com prefixo de tamanho preserva mensagem e exceção"""
+        from src.log.multiprocess import FRAME_HEADER, decode_batch, encode_batch
+
+        try:
+            raise KeyError('rota')
+        except KeyError:
+            record = logging.LogRecord('x', logging.ERROR, 'a.py', 1, 'AGV %s', ('A1',), sys.exc_info())
+
+        frame = encode_batch([record, record])
+        (size,) = FRAME_HEADER.unpack(frame[:FRAME_HEADER.size])
+        records = decode_batch(frame[FRAME_HEADER.size:])
+
+        assert size == len(frame) - FRAME_HEADER.size
+        assert [r.getMessage() for r in records] == ['AGV A1', 'AGV A1']
+        assert 'KeyError' in records[0].exc_text
+
+    def test_frame_is_json(self):
+        """Teste: Frame é JSON; conteúdo que não é lote de registros é recusado"""
+        import pickle
+        from src.log.multiprocess import FRAME_HEADER, decode_batch, encode_batch
+
+        record = logging.LogRecord('x', logging.INFO, 'a.py', 1, 'rota "%s" ção', ('A\\1',), None)
+        payload = encode_batch([record])[FRAME_HEADER.size:]
+
+        assert json.loads(payload)[0]['msg'] == 'rota "A\\1" ção'
+        for invalid in (pickle.dumps([{'msg': 'x'}]), b'{"msg": "x"}', b'[1, 2]'):
+            with pytest.raises(ValueError):
+                decode_batch(invalid)
+
+    def test_collector_refuses_remote_address(self):
+        """Teste: Coletor só escuta em socket Unix ou loopback"""
+        from src.log.multiprocess import LogCollector
+
+        for address in (('0.0.0.0', 0), ('192.168.0.10', 0), ('', 0)):
+            with pytest.raises(ValueError):
+                LogCollector(address, [])
+
+        collector = LogCollector(('127.0.0.1', 0), [])
+        collector.server.server_close()
+
+    def test_workers_write_through_collector(self, temp_log_dir, clean_logger):
+        """Teste: Vários processos gravam JSON íntegro por um único coletor"""
+        import multiprocessing
+        from src.log.multiprocess import LogCollector
+
+        address = os.path.join(temp_log_dir, 'collector.sock')
+        collector = LogCollector(address, AppLogger.build_handlers(
+            log_dir=temp_log_dir, app_name='mp', json_output=True, json_fast=True
+        ))
+        collector.start()
+
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_collector_worker, args=(address, i, 300)) for i in range(1, 4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+
+        deadline = time.time() + 10
+        while collector.received < 903 and time.time() < deadline:
+            time.sleep(0.05)
+        collector.stop()
+
+        json_file = list(Path(temp_log_dir).glob('mp_2*.json'))[0]
+        entries = [json.loads(line) for line in json_file.read_text(encoding='utf-8').splitlines()]
+        messages = [e for e in entries if e['message'].startswith('Registro')]
+
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert len(messages) == 900
+        assert {e['user']['username'] for e in messages} == {'worker_1', 'worker_2', 'worker_3'}
+
 # =====================================================
 # TESTES DE INTEGRAÇÃO
 # =====================================================
@@ -669,7 +1786,7 @@ class TestIntegration:
         assert len(json_files) >= 1
 
         # 10. Verificar conteúdo
-        log_file = [f for f in log_files if 'integration_test' in f.name][0]
+        log_file = [f for f in log_files if 'integration_test' in f.name and '_errors' not in f.name][0]
         log_content = log_file.read_text(encoding='utf-8')
 
         # Verificar presença de elementos chave
@@ -0,0 +1,1087 @@
+import sys
+import os
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+pytest tests/test_routing.py -v
+"""
+
+import itertools
+import pytest
+import numpy as np
+
+from src.routing.assignment import greedy, hungarian
+from src.routing.fleet_planner import FleetPlanner, PlanRequest
+from src.routing.layout_graph import LayoutGraph
+from src.routing.reservation import IntervalSet, ReservationTable
+from src.routing.route_matrix import RouteMatrix
+from src.routing.shortest_path import astar, build_path, dijkstra, heuristic_scale
+from src.routing.spatial_index import SpatialGrid
+from src.services.dispatch_service import DispatchService
+from src.services.route_service import RouteService
+from src.utils.exceptions import LayoutGraphError, RecordNotFoundError, RouteNotFoundError
+
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+def grid_rows(width: int, height: int, spacing: float = 1.0):
+    """Linhas de station/path de uma grade width x height (trechos bidirecionais)"""
+    stations = []
+    paths = []
+    for row in range(height):
+        for col in range(width):
+            station_id = row * width + col + 1
+            stations.append({'id': station_id, 'code': f'S{row}_{col}', 'x': col * spacing, 'y': row * spacing})
+            if col + 1 < width:
+                paths.append({
+                    'id': len(paths) + 1, 'code': f'P{len(paths) + 1}',
+                    'from_station_id': station_id, 'to_station_id': station_id + 1,
+                    'length': None, 'bidirectional': True
+                })
+            if row + 1 < height:
+                paths.append({
+                    'id': len(paths) + 1, 'code': f'P{len(paths) + 1}',
+                    'from_station_id': station_id, 'to_station_id': station_id + width,
+                    'length': None, 'bidirectional': True
+                })
+    return stations, paths
+
+@pytest.fixture
+def small_layout():
+    """A -> B (2) e B <-> C (1), A -> C (5), D isolada"""
+    stations = [
+        {'id': 10, 'code': 'A', 'x': 0.0, 'y': 0.0},
+        {'id': 11, 'code': 'B', 'x': 2.0, 'y': 0.0},
+        {'id': 12, 'code': 'C', 'x': 3.0, 'y': 0.0},
+        {'id': 13, 'code': 'D', 'x': 9.0, 'y': 9.0},
+    ]
+    paths = [
+        {'id': 1, 'code': 'AB', 'from_station_id': 10, 'to_station_id': 11, 'length': 2.0, 'bidirectional': False},
+        {'id': 2, 'code': 'BC', 'from_station_id': 11, 'to_station_id': 12, 'length': None, 'bidirectional': True},
+        {'id': 3, 'code': 'AC', 'from_station_id': 10, 'to_station_id': 12, 'length': 5.0, 'bidirectional': False},
+    ]
+    return LayoutGraph.from_rows(stations, paths, layout={'id': 1, 'code': 'L1'})
+
+
+# =====================================================
+# LAYOUT GRAPH
+# =====================================================
+
+class TestLayoutGraph:
+    """Testes do grafo CSR do layout"""
+
+    def test_csr_structure(self, small_layout):
+        """Teste: Arrays CSR com arestas ordenadas por destino"""
+        graph = small_layout
+
+        assert graph.num_stations == 4
+        assert graph.num_edges == 4
+        assert graph.indptr.tolist() == [0, 2, 3, 4, 4]
+
+        targets, weights = graph.neighbors(graph.index_of('A'))
+        assert [graph.code_of(i) for i in targets] == ['B', 'C']
+        assert weights.tolist() == [2.0, 5.0]
+
+    def test_missing_length_uses_euclidean_distance(self, small_layout):
+        """Teste: Comprimento ausente vira a distância entre as estações"""
+        graph = small_layout
+        b, c = graph.index_of('B'), graph.index_of('C')
+
+        assert graph.weights[graph.edge_index(b, c)] == pytest.approx(1.0)
+        assert graph.weights[graph.edge_index(c, b)] == pytest.approx(1.0)
+
+    def test_edge_index_and_path_ids(self, small_layout):
+        """Teste: Aresta inexistente retorna -1 e cada aresta guarda o trecho"""
+        graph = small_layout
+        a, b, c = graph.index_of('A'), graph.index_of('B'), graph.index_of('C')
+
+        assert graph.edge_index(b, a) == -1
+        assert graph.path_ids[graph.edge_index(a, c)] == 3
+        assert graph.path_ids[graph.edge_index(c, b)] == 2
+
+    def test_degrees(self, small_layout):
+        """Teste: Graus de entrada e saída"""
+        graph = small_layout
+
+        assert graph.out_degree().tolist() == [2, 1, 1, 0]
+        assert graph.in_degree().tolist() == [0, 2, 2, 0]
+        assert graph.edge_sources().tolist() == [0, 0, 1, 2]
+
+    def test_parallel_paths_keep_shortest(self):
+        """Teste: Trechos repetidos ficam com o menor comprimento"""
+        stations = [{'id': 1, 'code': 'A', 'x': 0, 'y': 0}, {'id': 2, 'code': 'B', 'x': 1, 'y': 0}]
+        paths = [
+            {'id': 1, 'from_station_id': 1, 'to_station_id': 2, 'length': 4.0, 'bidirectional': False},
+            {'id': 2, 'from_station_id': 1, 'to_station_id': 2, 'length': 3.0, 'bidirectional': False},
+            {'id': 3, 'from_station_id': 1, 'to_station_id': 1, 'length': 1.0, 'bidirectional': False},
+        ]
+        graph = LayoutGraph.from_rows(stations, paths)
+
+        assert graph.num_edges == 1
+        assert graph.weights.tolist() == [3.0]
+        assert graph.path_ids.tolist() == [2]
+        assert graph.path_edges(1).tolist() == [0]
+
+    def test_blocking_shortest_parallel_path_keeps_alternative(self):
+        """Teste: Bloquear o trecho mais curto passa a aresta para o paralelo"""
+        stations = [{'id': 1, 'code': 'A', 'x': 0, 'y': 0}, {'id': 2, 'code': 'B', 'x': 1, 'y': 0}]
+        paths = [
+            {'id': 1, 'from_station_id': 1, 'to_station_id': 2, 'length': 4.0, 'bidirectional': True},
+            {'id': 2, 'from_station_id': 1, 'to_station_id': 2, 'length': 3.0, 'bidirectional': False},
+        ]
+        graph = LayoutGraph.from_rows(stations, paths)
+        a, b = graph.index_of('A'), graph.index_of('B')
+        forward = graph.edge_index(a, b)
+
+        graph.block_path(2)
+        assert graph.weights[forward] == 4.0 and graph.path_ids[forward] == 1
+
+        graph.set_path_length(1, 5.0)
+        graph.block_path(1)
+        assert np.isinf(graph.weights).all()
+
+        graph.unblock_path(2)
+        assert graph.weights[forward] == 3.0 and graph.path_ids[forward] == 2
+        assert np.isinf(graph.weights[graph.edge_index(b, a)])
+
+        graph.unblock_path(1)
+        assert graph.weights[graph.edge_index(b, a)] == 5.0
+
+    def test_invalid_layouts(self):
+        """Teste: Trecho para estação de outro layout e código repetido"""
+        stations = [{'id': 1, 'code': 'A', 'x': 0, 'y': 0}]
+
+        with pytest.raises(LayoutGraphError):
+            LayoutGraph.from_rows(stations, [{'id': 1, 'from_station_id': 1, 'to_station_id': 99}])
+
+        with pytest.raises(LayoutGraphError):
+            LayoutGraph.from_rows(stations + [{'id': 2, 'code': 'A'}], [])
+
+        with pytest.raises(LayoutGraphError):
+            LayoutGraph.from_rows(stations, []).index_of('Z')
+
+    def test_grid_layout(self):
+        """Teste: Grade 30x30 com dtypes compactos"""
+        graph = LayoutGraph.from_rows(*grid_rows(30, 30))
+
+        assert graph.num_stations == 900
+        # 2 * (29 * 30) trechos, dois sentidos cada
+        assert graph.num_edges == 4 * 29 * 30
+        assert graph.indices.dtype == np.int32
+        assert graph.weights.dtype == np.float64
+        assert np.all(graph.weights == 1.0)
+
+
+class _FakeLayoutRepository:
+    """Repositório em memória com a mesma interface do LayoutRepository"""
+
+    def __init__(self):
+        self.loads = 0
+        self.stations, self.paths = grid_rows(3, 3)
+
+    def find_by_code(self, code):
+        return {'id': 7, 'code': 'L7'} if code == 'L7' else None
+
+    def find_by_id(self, id):
+        if id != 7:
+            raise RecordNotFoundError(f"Registro com ID {id} não encontrado")
+        return {'id': 7, 'code': 'L7'}
+
+    def get_stations(self, layout_id):
+        self.loads += 1
+        return self.stations
+
+    def get_paths(self, layout_id):
+        return self.paths
+
+
+class TestLayoutGraphLoading:
+    """Testes de carga do grafo via repositório"""
+
+    def setup_method(self):
+        LayoutGraph.invalidate()
+
+    def teardown_method(self):
+        LayoutGraph.invalidate()
+
+    def test_load_by_code_or_id(self):
+        """Teste: Carrega pelo código ou pelo id"""
+        repository = _FakeLayoutRepository()
+
+        graph = LayoutGraph.load('L7', repository)
+        assert graph.layout_id == 7
+        assert graph.num_stations == 9
+
+        assert LayoutGraph.load(7, repository).layout_code == 'L7'
+
+        with pytest.raises(RecordNotFoundError):
+            LayoutGraph.load('L8', repository)
+
+    def test_get_caches_graph(self):
+        """Teste: get carrega uma única vez até invalidate/reload"""
+        repository = _FakeLayoutRepository()
+
+        graph = LayoutGraph.get('L7', repository)
+        assert LayoutGraph.get(7, repository) is graph
+        assert repository.loads == 1
+
+        assert LayoutGraph.get('L7', repository, reload=True) is not graph
+        LayoutGraph.invalidate('L7')
+        LayoutGraph.get('L7', repository)
+        assert repository.loads == 3
+
+
+# =====================================================
+# ROTAS
+# =====================================================
+
+def random_graph(seed: int = 7, width: int = 12, height: int = 10):
+    """Grade com comprimentos aleatórios e alguns trechos de mão única"""
+    rng = np.random.default_rng(seed)
+    stations, paths = grid_rows(width, height, spacing=2.0)
+    for path in paths:
+        path['length'] = float(rng.uniform(2.0, 6.0))
+        path['bidirectional'] = bool(rng.random() > 0.2)
+    return LayoutGraph.from_rows(stations, paths, layout={'id': 1, 'code': 'L1'})
+
+
+class TestShortestPath:
+    """Testes de Dijkstra e A*"""
+
+    def test_astar_matches_dijkstra(self):
+        """Teste: A* encontra a mesma distância que o Dijkstra"""
+        graph = random_graph()
+        distances, _ = dijkstra(graph, 0)
+
+        for target in range(graph.num_stations):
+            distance, path = astar(graph, 0, target)
+            if target in distances:
+                assert distance == pytest.approx(distances[target])
+                assert path[0] == 0 and path[-1] == target
+            else:
+                assert path == [] and distance == float('inf')
+
+    def test_heuristic_scale_keeps_astar_admissible(self, small_layout):
+        """Teste: Trecho mais curto que a distância reta reduz a heurística"""
+        stations = [{'id': 1, 'code': 'A', 'x': 0, 'y': 0}, {'id': 2, 'code': 'B', 'x': 10, 'y': 0}]
+        paths = [{'id': 1, 'from_station_id': 1, 'to_station_id': 2, 'length': 5.0}]
+        graph = LayoutGraph.from_rows(stations, paths)
+
+        assert heuristic_scale(graph) == pytest.approx(0.5)
+        assert heuristic_scale(small_layout) == pytest.approx(1.0)
+
+    def test_dijkstra_stops_at_targets(self, small_layout):
+        """Teste: Busca com destinos para assim que todos são definidos"""
+        graph = small_layout
+        a, b, c = graph.index_of('A'), graph.index_of('B'), graph.index_of('C')
+
+        distances, predecessors = dijkstra(graph, a, [b])
+        assert distances[b] == 2.0
+        assert build_path(predecessors, a, b) == [a, b]
+
+        distances, predecessors = dijkstra(graph, a, [c])
+        assert distances[c] == 3.0
+        assert build_path(predecessors, a, c) == [a, b, c]
+
+
+class TestRouteMatrix:
+    """Testes da matriz de distâncias/próximo salto"""
+
+    def test_matrix_matches_dijkstra(self):
+        """Teste: Floyd-Warshall vetorizado igual ao Dijkstra de cada origem"""
+        graph = random_graph()
+        matrix = RouteMatrix.compute(graph)
+
+        for source in range(0, graph.num_stations, 7):
+            distances, _ = dijkstra(graph, source)
+            expected = np.full(graph.num_stations, np.inf)
+            expected[list(distances)] = list(distances.values())
+            np.testing.assert_allclose(matrix.distances[source], expected)
+
+    def test_next_hop_path(self):
+        """Teste: Rota pelos próximos saltos soma a distância da matriz"""
+        graph = random_graph()
+        matrix = RouteMatrix.compute(graph)
+
+        for source, target in [(0, 119), (5, 64), (119, 0), (33, 33)]:
+            path = matrix.path(source, target)
+            assert path[0] == source and path[-1] == target
+            length = sum(graph.weights[graph.edge_index(u, v)] for u, v in zip(path, path[1:]))
+            assert length == pytest.approx(matrix.distance(source, target))
+
+    def test_unreachable(self, small_layout):
+        """Teste: Par sem rota tem distância inf e rota vazia"""
+        matrix = RouteMatrix.compute(small_layout)
+        d, a = small_layout.index_of('D'), small_layout.index_of('A')
+
+        assert matrix.path(a, d) == []
+        assert matrix.distance(a, d) == float('inf')
+        assert matrix.path(small_layout.index_of('B'), a) == []
+
+    def test_persisted_matrix_is_memory_mapped(self, tmp_path):
+        """Teste: Matriz gravada é reaberta com mmap e recalculada se o grafo mudar"""
+        graph = random_graph()
+        matrix = RouteMatrix.for_graph(graph, tmp_path)
+
+        assert isinstance(matrix.distances, np.memmap)
+        assert len(list(tmp_path.glob('*.npy'))) == 2
+
+        reopened = RouteMatrix.open(tmp_path, graph.fingerprint())
+        np.testing.assert_array_equal(reopened.next_hop, matrix.next_hop)
+
+        other = random_graph(seed=8)
+        assert RouteMatrix.open(tmp_path, other.fingerprint()) is None
+
+
+class TestRouteService:
+    """Testes do serviço de rotas"""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        return RouteService(graph=random_graph(), matrix_dir=str(tmp_path))
+
+    def test_methods_agree(self, service):
+        """Teste: Matriz, A* e Dijkstra retornam a mesma distância"""
+        routes = [service.route('S0_0', 'S9_11', method=method) for method in ('matrix', 'astar', 'dijkstra')]
+
+        assert routes[0].stations[0] == 'S0_0' and routes[0].stations[-1] == 'S9_11'
+        for route in routes[1:]:
+            assert route.distance == pytest.approx(routes[0].distance)
+
+    def test_route_not_found(self, small_layout, tmp_path):
+        """Teste: Destino inalcançável levanta RouteNotFoundError"""
+        service = RouteService(graph=small_layout, matrix_dir=str(tmp_path))
+
+        for method in ('matrix', 'astar', 'dijkstra'):
+            with pytest.raises(RouteNotFoundError):
+                service.route('A', 'D', method=method)
+        assert service.distance('A', 'D') == float('inf')
+
+    def test_batch_queries(self, service):
+        """Teste: Consultas em lote com e sem matriz"""
+        pairs = [('S0_0', 'S9_11'), ('S3_4', 'S0_0'), ('S0_0', 'S5_5'), ('S3_4', 'S3_4')]
+        without_matrix = RouteService(graph=service.graph, use_matrix=False)
+
+        np.testing.assert_allclose(service.distances(pairs), without_matrix.distances(pairs))
+
+        routes = service.routes(pairs)
+        assert [route.distance for route in routes] == pytest.approx(
+            [route.distance for route in without_matrix.routes(pairs)]
+        )
+        assert routes[3].stations == ['S3_4']
+
+
+# =====================================================
+# BLOQUEIO DE TRECHOS
+# =====================================================
+
+class TestDynamicWeights:
+    """Testes de bloqueio/alteração de trechos e reparo incremental"""
+
+    def test_graph_block_and_unblock(self, small_layout):
+        """Teste: Bloqueio deixa o peso inf e a liberação volta ao cadastrado"""
+        graph = small_layout
+        edges = graph.path_edges(2)
+        assert len(edges) == 2
+
+        graph.block_edges(edges)
+        assert np.all(np.isinf(graph.weights[edges]))
+        assert graph.adjacency()[2][edges[0]] == float('inf')
+
+        graph.set_edge_lengths(edges, 4.0)
+        assert np.all(np.isinf(graph.weights[edges]))
+
+        graph.unblock_edges(edges)
+        assert graph.weights[edges].tolist() == [4.0, 4.0]
+
+        with pytest.raises(LayoutGraphError):
+            graph.path_edges(99)
+
+    def test_incremental_repair_matches_full_recompute(self):
+        """Teste: Matriz reparada igual à recalculada do zero"""
+        graph = random_graph()
+        matrix = RouteMatrix.compute(graph)
+        rng = np.random.default_rng(3)
+        sources = graph.edge_sources()
+
+        for step in range(25):
+            edge = int(rng.integers(graph.num_edges))
+            old_weight = float(graph.weights[edge])
+            choice = step % 3
+            if choice == 0:
+                graph.block_edges([edge])
+            elif choice == 1:
+                graph.unblock_edges([edge])
+            else:
+                graph.set_edge_lengths([edge], float(rng.uniform(0.5, 8.0)))
+
+            changed = matrix.update_edge(graph, int(sources[edge]), int(graph.indices[edge]), old_weight)
+            expected = RouteMatrix.compute(graph)
+
+            np.testing.assert_allclose(matrix.distances, expected.distances)
+            assert changed.dtype == bool and changed.shape == matrix.distances.shape
+
+            for source, target in [(0, 119), (119, 0), (40, 77)]:
+                path = matrix.path(source, target)
+                length = sum(graph.weights[graph.edge_index(u, v)] for u, v in zip(path, path[1:]))
+                assert length == pytest.approx(expected.distance(source, target))
+
+    def test_repair_copies_memory_mapped_matrix(self, tmp_path):
+        """Teste: Reparo não altera a matriz gravada em disco"""
+        graph = random_graph()
+        matrix = RouteMatrix.for_graph(graph, tmp_path)
+        original_fingerprint = matrix.fingerprint
+        edge = graph.edge_index(0, 1)
+
+        old_weight = float(graph.weights[edge])
+        graph.block_edges([edge])
+        matrix.update_edge(graph, 0, 1, old_weight)
+
+        assert not isinstance(matrix.distances, np.memmap)
+        assert matrix.fingerprint == graph.fingerprint() != original_fingerprint
+        on_disk = RouteMatrix.open(tmp_path, original_fingerprint)
+        assert on_disk.distance(0, 1) == pytest.approx(old_weight)
+
+
+class TestRouteServiceBlocking:
+    """Testes do bloqueio de trechos pelo serviço de rotas"""
+
+    @pytest.fixture(params=[True, False], ids=['matrix', 'astar'])
+    def service(self, request, tmp_path):
+        stations, paths = grid_rows(4, 3)
+        graph = LayoutGraph.from_rows(stations, paths)
+        return RouteService(graph=graph, use_matrix=request.param, matrix_dir=str(tmp_path))
+
+    @staticmethod
+    def _path_between(service, origin, destination):
+        graph = service.graph
+        edge = graph.edge_index(graph.index_of(origin), graph.index_of(destination))
+        return int(graph.path_ids[edge])
+
+    def test_block_returns_affected_cached_routes(self, service):
+        """Teste: Bloqueio retorna só as rotas em cache que usavam o trecho"""
+        straight = service.route('S0_0', 'S0_3')
+        other = service.route('S2_0', 'S2_3')
+        assert straight.distance == 3.0
+
+        affected = service.block_path(self._path_between(service, 'S0_1', 'S0_2'))
+
+        assert affected == {('S0_0', 'S0_3')}
+        assert ('S2_0', 'S2_3') in service.cached_routes()
+        assert service.route('S2_0', 'S2_3') is other
+
+        detour = service.route('S0_0', 'S0_3')
+        assert detour.distance == 5.0
+        assert ('S0_1', 'S0_2') not in set(zip(detour.stations, detour.stations[1:]))
+
+    def test_unblock_returns_improved_routes(self, service):
+        """Teste: Liberação retorna as rotas em cache que ficam mais curtas"""
+        path_id = self._path_between(service, 'S0_1', 'S0_2')
+        service.block_path(path_id)
+        service.route('S0_0', 'S0_3')
+        service.route('S2_0', 'S2_3')
+
+        affected = service.unblock_path(path_id)
+
+        assert affected == {('S0_0', 'S0_3')}
+        assert service.route('S0_0', 'S0_3').distance == 3.0
+
+    def test_block_disconnects_station(self, service):
+        """Teste: Estação isolada pelo bloqueio fica sem rota"""
+        service.block_path(self._path_between(service, 'S0_0', 'S0_1'))
+        service.block_path(self._path_between(service, 'S0_0', 'S1_0'))
+
+        with pytest.raises(RouteNotFoundError):
+            service.route('S0_0', 'S2_3')
+        assert service.distance('S2_3', 'S0_0') == float('inf')
+
+    def test_length_update(self, service):
+        """Teste: Aumento de comprimento desvia a rota; redução a traz de volta"""
+        path_id = self._path_between(service, 'S0_1', 'S0_2')
+        service.route('S0_0', 'S0_3')
+
+        assert service.update_path_length(path_id, 10.0) == {('S0_0', 'S0_3')}
+        assert service.route('S0_0', 'S0_3').distance == 5.0
+
+        assert service.update_path_length(path_id, 1.0) == {('S0_0', 'S0_3')}
+        assert service.route('S0_0', 'S0_3').distance == 3.0
+
+    def test_block_does_not_touch_shared_graph(self, tmp_path):
+        """Teste: Bloqueio em um serviço não altera o grafo nem outros serviços do layout"""
+        stations, paths = grid_rows(4, 3)
+        graph = LayoutGraph.from_rows(stations, paths)
+        weights = graph.weights.copy()
+        service = RouteService(graph=graph, use_matrix=True, matrix_dir=str(tmp_path))
+        other = RouteService(graph=graph, use_matrix=False)
+
+        service.block_path(self._path_between(service, 'S0_1', 'S0_2'))
+
+        assert service.route('S0_0', 'S0_3').distance == 5.0
+        assert other.route('S0_0', 'S0_3').distance == 3.0
+        np.testing.assert_array_equal(graph.weights, weights)
+        assert graph.adjacency()[2] == weights.tolist()
+
+
+class TestReservationTable:
+    """Testes da tabela de reservas no tempo"""
+
+    def test_conflict_ignores_own_intervals(self):
+        """Teste: Conflito só com intervalos de outros donos"""
+        intervals = IntervalSet()
+        intervals.add(2.0, 4.0, 'A')
+        intervals.add(6.0, 8.0, 'B')
+
+        assert intervals.conflict(3.0, 5.0, 'B') == 0
+        assert intervals.conflict(3.0, 5.0, 'A') is None
+        assert intervals.is_free(4.0, 6.0, 'C')
+        assert intervals.earliest_free(1.0, 3.0, 'C') == 8.0
+        with pytest.raises(ValueError):
+            intervals.add(7.0, 9.0, 'A')
+
+    def test_add_merges_same_owner(self):
+        """Teste: Intervalos do mesmo dono que se tocam são unidos"""
+        intervals = IntervalSet()
+        intervals.add(0.0, 1.0, 'A')
+        intervals.add(1.0, 2.0, 'B')
+        intervals.add(2.0, 3.0, 'A')
+        intervals.add(3.0, 5.0, 'A')
+
+        assert list(intervals) == [(0.0, 1.0, 'A'), (1.0, 2.0, 'B'), (2.0, 5.0, 'A')]
+
+    def test_free_intervals(self):
+        """Teste: Intervalos livres a partir de um instante"""
+        intervals = IntervalSet()
+        intervals.add(2.0, 4.0, 'A')
+        intervals.add(6.0, 8.0, 'B')
+
+        assert list(intervals.free_intervals('C')) == [(0.0, 2.0), (4.0, 6.0), (8.0, float('inf'))]
+        assert list(intervals.free_intervals('C', since=5.0)) == [(4.0, 6.0), (8.0, float('inf'))]
+        assert list(intervals.free_intervals('A', since=5.0)) == [(0.0, 6.0), (8.0, float('inf'))]
+
+    def test_segments_are_undirected(self):
+        """Teste: Os dois sentidos de um trecho compartilham a reserva"""
+        table = ReservationTable()
+        table.reserve_segment(3, 4, 0.0, 2.0, 'A')
+
+        assert not table.segment(4, 3).is_free(1.0, 3.0, 'B')
+
+    def test_release_and_prune(self):
+        """Teste: Liberação por dono (a partir de um instante) e descarte do passado"""
+        table = ReservationTable()
+        table.reserve_station(1, 0.0, 2.0, 'A')
+        table.reserve_station(2, 5.0, 6.0, 'A')
+        table.reserve_segment(1, 2, 2.0, 5.0, 'A')
+        table.reserve_station(2, 0.0, 1.0, 'B')
+
+        assert table.release('A', after=3.0) == 2
+        assert list(table.station(1)) == [(0.0, 2.0, 'A')]
+        assert table.prune(2.0) == 2
+        assert len(table) == 0
+        assert table.release('A') == 0
+
+
+class _FakeAgvRepository:
+    """Repositório de AGVs em memória (sem MySQL)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def find_by_layout(self, layout_id):
+        return [row for row in self.rows if row['layout_id'] == layout_id]
+
+
+def assert_conflict_free(plans, graph, clearance):
+    """Nenhum par de AGVs ocupa a mesma estação ou trecho ao mesmo tempo"""
+    stations, segments = [], []
+    for plan in plans.values():
+        waypoints = plan.waypoints
+        for k, waypoint in enumerate(waypoints):
+            stations.append((waypoint.station, waypoint.arrive, waypoint.depart + clearance, plan.agv))
+            if k + 1 < len(waypoints):
+                following = waypoints[k + 1]
+                length = graph.distance(plan.indices[k], plan.indices[k + 1])
+                assert following.arrive == pytest.approx(waypoint.depart + length)
+                key = tuple(sorted((waypoint.station, following.station)))
+                segments.append((key, waypoint.depart, following.arrive + clearance, plan.agv))
+
+    for occupations in (stations, segments):
+        by_resource = {}
+        for resource, start, end, agv in occupations:
+            by_resource.setdefault(resource, []).append((start, end, agv))
+        for resource, intervals in by_resource.items():
+            intervals.sort()
+            for (_, end, agv), (start, _, other) in zip(intervals, intervals[1:]):
+                assert agv == other or end <= start, f"{agv} e {other} em {resource}"
+
+
+class TestFleetPlanner:
+    """Testes do planejamento sem conflito da frota"""
+
+    @pytest.fixture
+    def graph(self):
+        return LayoutGraph.from_rows(*grid_rows(3, 3))
+
+    def test_crossing_agv_waits(self, graph):
+        """Teste: AGV de menor prioridade espera o cruzamento liberar"""
+        planner = FleetPlanner(graph, clearance=1.0)
+        result = planner.plan([
+            PlanRequest('A', 'S1_0', 'S1_2', priority=1),
+            PlanRequest('B', 'S0_1', 'S2_1'),
+        ])
+
+        assert not result.failed
+        first, second = result.plans['A'], result.plans['B']
+        assert first.stations == ['S1_0', 'S1_1', 'S1_2']
+        assert first.arrival == 2.0
+        assert second.stations == ['S0_1', 'S1_1', 'S2_1']
+        assert second.waypoints[0].depart == 1.0
+        assert second.arrival == 3.0
+        assert_conflict_free(result.plans, graph, 1.0)
+
+    def test_priority_decides_who_waits(self, graph):
+        """Teste: Invertendo a prioridade, o outro AGV espera"""
+        result = FleetPlanner(graph).plan([
+            PlanRequest('A', 'S1_0', 'S1_2'),
+            PlanRequest('B', 'S0_1', 'S2_1', priority=1),
+        ])
+
+        assert result.plans['B'].arrival == 2.0
+        assert result.plans['A'].arrival == 3.0
+
+    @staticmethod
+    def _corridor(bypass: bool) -> LayoutGraph:
+        """Corredor P0..P4 com estações laterais nas pontas (e desvio P1-Q-P3)"""
+        points = {
+            'SA': (-1, 0), 'TB': (-1, -1), 'P0': (0, 0), 'P1': (1, 0), 'P2': (2, 0),
+            'P3': (3, 0), 'P4': (4, 0), 'SB': (4, -1), 'TA': (5, 0), 'Q': (2, 2),
+        }
+        links = [('SA', 'P0'), ('TB', 'P0'), ('P0', 'P1'), ('P1', 'P2'), ('P2', 'P3'),
+                 ('P3', 'P4'), ('P4', 'SB'), ('P4', 'TA')]
+        if bypass:
+            links += [('P1', 'Q'), ('Q', 'P3')]
+        ids = {code: k + 1 for k, code in enumerate(points)}
+        stations = [{'id': ids[c], 'code': c, 'x': x, 'y': y} for c, (x, y) in points.items()]
+        paths = [
+            {'id': k + 1, 'code': f'{u}{v}', 'from_station_id': ids[u], 'to_station_id': ids[v],
+             'length': None, 'bidirectional': True}
+            for k, (u, v) in enumerate(links)
+        ]
+        return LayoutGraph.from_rows(stations, paths)
+
+    @pytest.mark.parametrize('bypass', [False, True])
+    def test_head_on_agvs_never_share_segment(self, bypass):
+        """Teste: AGVs em sentidos opostos no corredor esperam ou desviam"""
+        graph = self._corridor(bypass)
+        result = FleetPlanner(graph).plan([
+            PlanRequest('A', 'SA', 'TA', priority=1),
+            PlanRequest('B', 'SB', 'TB'),
+        ])
+
+        assert not result.failed
+        assert result.plans['A'].stations == ['SA', 'P0', 'P1', 'P2', 'P3', 'P4', 'TA']
+        second = result.plans['B']
+        if bypass:
+            assert 'Q' in second.stations
+        else:
+            assert second.waypoints[0].depart >= 5.0
+        assert_conflict_free(result.plans, graph, 1.0)
+
+    def test_agv_parked_at_destination_is_planned_first(self):
+        """Teste: AGV parado no destino de outro é planejado antes dele"""
+        graph = LayoutGraph.from_rows(*grid_rows(3, 2))
+        result = FleetPlanner(graph).plan([
+            PlanRequest('A', 'S0_0', 'S0_2', priority=1),
+            PlanRequest('B', 'S0_2', 'S1_0'),
+        ])
+
+        assert result.rounds == 1
+        assert not result.failed
+        departure = next(w.depart for w in result.plans['B'].waypoints if w.station == 'S0_2')
+        assert result.plans['A'].arrival >= departure + 1.0
+        assert_conflict_free(result.plans, graph, 1.0)
+
+    def test_later_start_keeps_origin_reserved(self, graph):
+        """Teste: AGV com partida futura ocupa a origem desde agora"""
+        result = FleetPlanner(graph, clearance=0.5).plan([
+            PlanRequest('A', 'S0_1', 'S2_2', start_time=5.0, priority=5),
+            PlanRequest('B', 'S0_0', 'S0_2'),
+        ])
+
+        assert not result.failed
+        leave = result.plans['A'].waypoints[0].depart + 0.5
+        assert leave >= 5.5
+        for waypoint in result.plans['B'].waypoints:
+            if waypoint.station == 'S0_1':
+                assert waypoint.arrive >= leave
+        assert_conflict_free(result.plans, graph, 0.5)
+
+    def test_clearance_must_be_positive(self, graph):
+        """Teste: Folga zero ou negativa é recusada"""
+        for clearance in (0.0, -1.0):
+            with pytest.raises(ValueError):
+                FleetPlanner(graph, clearance=clearance)
+
+    def test_position_swap_fails(self):
+        """Teste: Dois AGVs trocando de posição ficam em failed após as rodadas"""
+        graph = LayoutGraph.from_rows(*grid_rows(3, 2))
+        result = FleetPlanner(graph, max_rounds=2).plan([
+            PlanRequest('A', 'S0_0', 'S0_2'),
+            PlanRequest('B', 'S0_2', 'S0_0'),
+        ])
+
+        assert result.rounds == 2
+        assert not result.plans
+        assert {request.agv for request in result.failed} == {'A', 'B'}
+
+    def test_unreachable_destination_fails(self, small_layout):
+        """Teste: Destino sem rota fica em failed sem afetar os demais"""
+        result = FleetPlanner(small_layout, max_rounds=1).plan([
+            PlanRequest('A', 'A', 'D'),
+            PlanRequest('B', 'B', 'C'),
+        ])
+
+        assert [request.agv for request in result.failed] == ['A']
+        assert result.plans['B'].stations == ['B', 'C']
+
+    def test_time_budget(self, graph):
+        """Teste: Orçamento de tempo esgotado deixa os AGVs em failed"""
+        result = FleetPlanner(graph).plan([PlanRequest('A', 'S0_0', 'S2_2')], time_budget=0.0)
+
+        assert result.budget_exceeded
+        assert [request.agv for request in result.failed] == ['A']
+
+    def test_existing_reservations_are_kept_between_cycles(self, graph):
+        """Teste: Rotas de ciclos anteriores continuam reservadas"""
+        planner = FleetPlanner(graph)
+        planner.plan([PlanRequest('A', 'S1_0', 'S1_2')])
+        result = planner.plan([PlanRequest('B', 'S0_1', 'S2_1')])
+
+        assert result.plans['B'].arrival == 3.0
+
+        planner.release('A')
+        result = planner.plan([PlanRequest('B', 'S0_1', 'S2_1')])
+        assert result.plans['B'].arrival == 2.0
+
+    def test_plan_fleet_from_agv_table(self, graph):
+        """Teste: Origem e velocidade vêm da tabela agv"""
+        repository = _FakeAgvRepository([
+            {'id': 1, 'layout_id': None, 'code': 'AGV-01', 'station_id': 1, 'speed': 2.0},
+            {'id': 2, 'layout_id': None, 'code': 'AGV-02', 'station_id': 9, 'speed': 1.0},
+            {'id': 3, 'layout_id': None, 'code': 'AGV-03', 'station_id': None, 'speed': 1.0},
+        ])
+        result = FleetPlanner(graph).plan_fleet(
+            {'AGV-01': 'S0_2', 'AGV-03': 'S1_1'}, repository=repository
+        )
+
+        assert list(result.plans) == ['AGV-01']
+        assert result.plans['AGV-01'].stations[0] == 'S0_0'
+        assert result.plans['AGV-01'].arrival == 1.0
+
+    def test_large_fleet(self):
+        """Teste: Centenas de AGVs numa grade de 900 estações, sem conflitos"""
+        graph = LayoutGraph.from_rows(*grid_rows(30, 30))
+        codes = list(graph.station_codes)
+        rng = np.random.default_rng(3)
+        origins = rng.choice(codes, 120, replace=False)
+        destinations = rng.choice(codes, 120, replace=False)
+        requests = [
+            PlanRequest(f'AGV-{k}', origin, destination, priority=int(rng.integers(3)))
+            for k, (origin, destination) in enumerate(zip(origins, destinations))
+        ]
+
+        result = FleetPlanner(graph).plan(requests, time_budget=30.0)
+
+        assert len(result.plans) >= 115
+        assert_conflict_free(result.plans, graph, 1.0)
+
+
+def brute_force_assignment(cost):
+    """(pares, custo) ótimos por enumeração: mais pares primeiro, depois menor custo"""
+    if cost.shape[0] > cost.shape[1]:
+        cost = cost.T
+    n, m = cost.shape
+    best = None
+    for cols in itertools.permutations(range(m), n):
+        pairs = [(i, j) for i, j in enumerate(cols) if np.isfinite(cost[i, j])]
+        value = (-len(pairs), sum(cost[i, j] for i, j in pairs))
+        best = value if best is None or value < best else best
+    return -best[0], best[1]
+
+
+class TestAssignment:
+    """Testes dos algoritmos de atribuição"""
+
+    def test_hungarian_matches_brute_force(self):
+        """Teste: Húngaro ótimo em matrizes retangulares, com pares impossíveis"""
+        rng = np.random.default_rng(5)
+        for trial in range(150):
+            n, m = int(rng.integers(1, 6)), int(rng.integers(1, 6))
+            cost = rng.integers(-5, 20, (n, m)).astype(float)
+            if trial % 3 == 0:
+                cost[rng.random((n, m)) < 0.3] = np.inf
+
+            rows, cols = hungarian(cost)
+
+            assert len(set(rows.tolist())) == len(rows) and len(set(cols.tolist())) == len(cols)
+            assert list(rows) == sorted(rows)
+            count, total = brute_force_assignment(cost)
+            assert len(rows) == count
+            assert cost[rows, cols].sum() == pytest.approx(total)
+
+    def test_greedy_is_valid_and_bounded(self):
+        """Teste: Heurística atribui pares distintos e finitos, sem superar o ótimo"""
+        rng = np.random.default_rng(6)
+        cost = rng.random((60, 80)) * 100
+        cost[rng.random(cost.shape) < 0.1] = np.inf
+
+        rows, cols = greedy(cost, candidates=3)
+        best_rows, best_cols = hungarian(cost)
+
+        assert len(rows) == 60
+        assert len(set(cols.tolist())) == 60
+        assert np.isfinite(cost[rows, cols]).all()
+        assert cost[rows, cols].sum() >= cost[best_rows, best_cols].sum() - 1e-9
+
+    def test_empty_and_all_impossible(self):
+        """Teste: Matriz vazia ou só com inf não gera atribuições"""
+        assert len(hungarian(np.empty((0, 3)))[0]) == 0
+        assert len(hungarian(np.full((2, 2), np.inf))[0]) == 0
+        assert len(greedy(np.full((2, 2), np.inf))[0]) == 0
+
+
+class _FakeMissionRepository:
+    """Missões em memória (sem MySQL)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.assigned = []
+
+    def find_pending(self, layout_id, limit=1000):
+        return [row for row in self.rows if row['id'] not in dict(self.assigned)][:limit]
+
+    def assign_batch(self, assignments):
+        self.assigned.extend(assignments)
+        return len(assignments)
+
+
+class _FakeAssignmentCursor:
+    """Cursor em memória para as tabelas mission e agv (status por id)"""
+
+    def __init__(self, missions, agvs):
+        self.tables = {'mission': missions, 'agv': agvs}
+        self.savepoint = None
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        self.rowcount = 0
+        if query == 'SAVEPOINT assignment':
+            self.savepoint = {name: dict(rows) for name, rows in self.tables.items()}
+        elif query == 'ROLLBACK TO SAVEPOINT assignment':
+            self.tables = {name: dict(rows) for name, rows in self.savepoint.items()}
+        else:
+            table = 'agv' if query.startswith('UPDATE agv') else 'mission'
+            status, row_id, expected = params[0], params[-2], params[-1]
+            if self.tables[table].get(row_id) == expected:
+                self.tables[table][row_id] = status
+                self.rowcount = 1
+
+
+class _FakeConnection:
+
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class _FakeIdleAgvRepository(_FakeAgvRepository):
+
+    def find_idle(self, layout_id):
+        return [row for row in self.find_by_layout(layout_id) if row.get('status', 'idle') == 'idle']
+
+
+class TestDispatchService:
+    """Testes da atribuição em lote de missões"""
+
+    @pytest.fixture(params=[True, False], ids=['matrix', 'dijkstra'])
+    def route_service(self, request, tmp_path):
+        graph = LayoutGraph.from_rows(*grid_rows(10, 1))
+        return RouteService(graph=graph, use_matrix=request.param, matrix_dir=str(tmp_path))
+
+    @staticmethod
+    def _agv(agv_id, station_id, speed=1.0):
+        return {'id': agv_id, 'layout_id': None, 'code': f'AGV-{agv_id}', 'station_id': station_id, 'speed': speed}
+
+    @staticmethod
+    def _mission(mission_id, pickup, priority=0):
+        return {'id': mission_id, 'code': f'M-{mission_id}', 'pickup_station_id': pickup, 'priority': priority}
+
+    def test_batch_beats_nearest_first(self, route_service):
+        """Teste: Lote minimiza o total onde "o mais próximo primeiro" não minimiza"""
+        agvs = [self._agv(1, 5), self._agv(2, 1)]
+        missions = [self._mission(1, 4), self._mission(2, 8)]
+        dispatcher = DispatchService(
+            route_service=route_service, agv_repository=_FakeIdleAgvRepository(agvs),
+            mission_repository=_FakeMissionRepository(missions), priority_weight=0.0
+        )
+
+        result = dispatcher.assign(agvs, missions)
+
+        # AGV-1 pegaria M-1 (distância 1) e AGV-2 iria até M-2 (7): total 8
+        assert {(a.agv['code'], a.mission['code']) for a in result.assignments} == {
+            ('AGV-1', 'M-2'), ('AGV-2', 'M-1')
+        }
+        assert result.total_cost == pytest.approx(6.0)
+        assert result.method == 'hungarian'
+
+    def test_cost_uses_speed_and_priority(self, route_service):
+        """Teste: Custo é o tempo até a coleta menos o bônus de prioridade"""
+        dispatcher = DispatchService(
+            route_service=route_service, agv_repository=_FakeIdleAgvRepository([]),
+            mission_repository=_FakeMissionRepository([]), priority_weight=2.0
+        )
+        cost = dispatcher.cost_matrix(
+            [self._agv(1, 1, speed=2.0)], [self._mission(1, 5), self._mission(2, 3, priority=1)]
+        )
+
+        assert cost.tolist() == [[2.0, -1.0]]
+
+    def test_more_missions_than_agvs(self, route_service):
+        """Teste: Missões sem AGV livre ficam pendentes; prioridade decide quais"""
+        agvs = [self._agv(1, 1)]
+        missions = [self._mission(1, 2), self._mission(2, 9, priority=1)]
+        dispatcher = DispatchService(
+            route_service=route_service, agv_repository=_FakeIdleAgvRepository(agvs),
+            mission_repository=_FakeMissionRepository(missions), priority_weight=10.0
+        )
+
+        result = dispatcher.assign(agvs, missions)
+
+        assert [a.mission['code'] for a in result.assignments] == ['M-2']
+        assert [m['code'] for m in result.unassigned] == ['M-1']
+
+    def test_dispatch_cycle_persists_assignments(self, route_service):
+        """Teste: Ciclo grava (missão, AGV) e usa a heurística acima do limite"""
+        agvs = [self._agv(k, k) for k in range(1, 6)]
+        missions = [self._mission(k, 11 - k) for k in range(1, 6)]
+        mission_repo = _FakeMissionRepository(missions)
+        dispatcher = DispatchService(
+            route_service=route_service, agv_repository=_FakeIdleAgvRepository(agvs),
+            mission_repository=mission_repo, max_optimal=3
+        )
+
+        result = dispatcher.dispatch_cycle()
+
+        assert result.method == 'greedy'
+        assert len(result.assignments) == 5
+        assert sorted(mission_repo.assigned) == sorted(
+            (a.mission['id'], a.agv['id']) for a in result.assignments
+        )
+        assert result.solve_ms >= 0.0
+
+    def test_assign_batch_skips_agv_no_longer_idle(self, monkeypatch):
+        """Teste: AGV que deixou de estar livre não recebe a missão, que continua pendente"""
+        from contextlib import contextmanager
+        from src.repositories.mission_repository import MissionRepository
+        from src.utils.database import DatabaseManager
+
+        cursor = _FakeAssignmentCursor({1: 'pending', 2: 'pending', 3: 'assigned'}, {10: 'idle', 20: 'busy', 30: 'idle'})
+        conn = _FakeConnection()
+
+        @contextmanager
+        def get_cursor(dictionary=True):
+            yield cursor, conn
+
+        monkeypatch.setattr(DatabaseManager, 'get_cursor', get_cursor)
+
+        assigned = MissionRepository().assign_batch([(1, 10), (2, 20), (3, 30)])
+
+        assert assigned == 1
+        assert cursor.tables['mission'] == {1: 'assigned', 2: 'pending', 3: 'assigned'}
+        assert cursor.tables['agv'] == {10: 'busy', 20: 'busy', 30: 'idle'}
+        assert conn.commits == 1
+
+
+# =====================================================
+# ÍNDICE ESPACIAL
+# =====================================================
+
+def brute_force_nearest(points, x, y, k=None, radius=None, states=None):
+    """Ids ordenados por distância varrendo todos os pontos"""
+    found = sorted(
+        (float(np.hypot(px - x, py - y)), point_id)
+        for point_id, (px, py, state) in points.items()
+        if states is None or state in states
+    )
+    if radius is not None:
+        found = [item for item in found if item[0] <= radius]
+    if k is not None:
+        found = found[:k]
+    return [point_id for _, point_id in found]
+
+class TestSpatialGrid:
+    """Testes do índice espacial em grade"""
+
+    def test_radius_and_nearest(self):
+        """Teste: Consultas simples com filtro por estado"""
+        grid = SpatialGrid(cell_size=5.0)
+        grid.update(1, 0.0, 0.0, state=0)
+        grid.update(2, 3.0, 4.0, state=1)
+        grid.update(3, 40.0, 0.0, state=0)
+
+        assert grid.radius(0.0, 0.0, 5.0) == [(1, 0.0), (2, 5.0)]
+        assert grid.radius(0.0, 0.0, 5.0, states=[1]) == [(2, 5.0)]
+        assert [p for p, _ in grid.nearest(30.0, 0.0, k=2)] == [3, 2]
+        assert grid.nearest(30.0, 0.0, states=[1]) == [(2, pytest.approx(27.29, abs=0.01))]
+        assert grid.nearest(0.0, 0.0, k=3, max_distance=10.0) == [(1, 0.0), (2, 5.0)]
+        assert SpatialGrid(cell_size=1.0).nearest(0.0, 0.0) == []
+
+    def test_matches_brute_force_with_moves_and_removals(self):
+        """Teste: Após movimentos, trocas de estado e remoções, igual à varredura completa"""
+        rng = np.random.default_rng(3)
+        grid = SpatialGrid(cell_size=4.0, capacity=2)
+        points = {}
+        for step in range(2000):
+            point_id = int(rng.integers(300))
+            if step % 7 == 0 and point_id in points:
+                assert grid.remove(point_id)
+                del points[point_id]
+                continue
+            x, y = rng.random(2) * (120.0, 60.0) - 10.0
+            state = int(rng.integers(3))
+            grid.update(point_id, x, y, state)
+            points[point_id] = (x, y, state)
+
+        assert len(grid) == len(points)
+        assert not grid.remove(10_000)
+        for x, y in rng.random((30, 2)) * (120.0, 60.0):
+            assert [p for p, _ in grid.nearest(x, y, k=5)] == brute_force_nearest(points, x, y, k=5)
+            assert [p for p, _ in grid.nearest(x, y, k=3, states=[2])] == \
+                brute_force_nearest(points, x, y, k=3, states=[2])
+            assert [p for p, _ in grid.radius(x, y, 9.0)] == brute_force_nearest(points, x, y, radius=9.0)
+            assert [p for p, _ in grid.radius(x, y, 200.0)] == brute_force_nearest(points, x, y)
+
+    def test_invalid_points(self):
+        """Teste: Célula de tamanho zero e ids repetidos são rejeitados"""
+        with pytest.raises(ValueError):
+            SpatialGrid(cell_size=-1.0)
+        with pytest.raises(ValueError):
+            SpatialGrid.from_points([1, 1], [0.0, 1.0], [0.0, 1.0])
+
+    def test_layout_station_index(self):
+        """Teste: Estação mais próxima de um ponto do layout"""
+        stations, paths = grid_rows(10, 10, spacing=3.0)
+        graph = LayoutGraph.from_rows(stations, paths)
+
+        assert graph.code_of(graph.nearest_station(7.4, 13.0)) == 'S4_2'
+        near = graph.station_index().radius(0.0, 0.0, 3.0)
+        assert sorted(graph.code_of(i) for i, _ in near) == ['S0_0', 'S0_1', 'S1_0']
@@ -0,0 +1,195 @@
+import sys
+import os
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+pytest tests/test_simulation.py -v
+"""
+
+import pytest
+import numpy as np
+
+from src.routing.layout_graph import LayoutGraph
+from src.services.route_service import RouteService
+from src.simulation.events import EventQueue
+from src.simulation.kinematics import Kinematics
+from src.simulation.simulator import AGV_IDLE, FleetSimulator
+
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+def grid_graph(width: int, height: int, spacing: float = 3.0) -> LayoutGraph:
+    """Grade width x height de trechos bidirecionais"""
+    stations, paths = [], []
+    for row in range(height):
+        for col in range(width):
+            station_id = row * width + col + 1
+            stations.append({'id': station_id, 'code': f'S{row}_{col}', 'x': col * spacing, 'y': row * spacing})
+            if col + 1 < width:
+                paths.append({'id': len(paths) + 1, 'from_station_id': station_id, 'to_station_id': station_id + 1})
+            if row + 1 < height:
+                paths.append({'id': len(paths) + 1, 'from_station_id': station_id, 'to_station_id': station_id + width})
+    return LayoutGraph.from_rows(stations, paths)
+
+@pytest.fixture
+def graph():
+    return grid_graph(8, 8)
+
+def make_simulator(graph, **kwargs) -> FleetSimulator:
+    kwargs.setdefault('route_service', RouteService(graph=graph, use_matrix=False))
+    return FleetSimulator(graph, kwargs.pop('agvs', 6), kwargs.pop('missions_per_hour', 300), **kwargs)
+
+class _FakeIngestor:
+    """Guarda as amostras recebidas"""
+
+    def __init__(self):
+        self.samples = []
+
+    def record(self, agv, ts, x, y, speed=0.0, battery=0.0, state=0, heading=0.0):
+        self.samples.append((agv, ts, x, y, speed, state))
+
+
+# =====================================================
+# EVENTOS E CINEMÁTICA
+# =====================================================
+
+class TestEventQueue:
+    """Testes da fila de eventos"""
+
+    def test_order_and_ties(self):
+        """Teste: Sai por instante; no mesmo instante, na ordem de agendamento"""
+        queue = EventQueue()
+        queue.push(5.0, 'b', 1)
+        queue.push(1.0, 'a')
+        queue.push(5.0, 'c', 2)
+
+        assert queue.peek_time() == 1.0
+        assert [queue.pop() for _ in range(3)] == [(1.0, 'a', None), (5.0, 'b', 1), (5.0, 'c', 2)]
+        assert queue.peek_time() is None
+        assert queue.pushed == 3
+
+
+class TestKinematics:
+    """Testes da cinemática vetorizada"""
+
+    def test_positions_along_track(self):
+        """Teste: Interpola no trecho, fica parado nas esperas e no fim"""
+        kinematics = Kinematics([0.0, 10.0], [0.0, 10.0])
+        # Anda 4 m em x (0-4 s), espera 2 s, anda 3 m em y (6-9 s)
+        kinematics.follow(0, [0.0, 4.0, 6.0, 9.0], [0.0, 4.0, 4.0, 4.0], [0.0, 0.0, 0.0, 3.0])
+
+        x, y, heading, speed = kinematics.positions(2.0)
+        assert (x.tolist(), y.tolist()) == ([2.0, 10.0], [0.0, 10.0])
+        assert speed.tolist() == [1.0, 0.0]
+        assert heading[0] == 0.0
+
+        x, y, _, speed = kinematics.positions(5.0)
+        assert (x[0], y[0], speed[0]) == (4.0, 0.0, 0.0)
+
+        x, y, heading, _ = kinematics.positions(7.5)
+        assert (x[0], y[0], heading[0]) == (4.0, 1.5, 90.0)
+
+        x, y, _, speed = kinematics.positions(100.0)
+        assert (x[0], y[0], speed[0]) == (4.0, 3.0, 0.0)
+
+    def test_invalid_track(self):
+        """Teste: Trajetória vazia ou com tamanhos diferentes é rejeitada"""
+        with pytest.raises(ValueError):
+            Kinematics([0.0], [0.0]).follow(0, [0.0, 1.0], [0.0], [0.0, 1.0])
+
+
+# =====================================================
+# SIMULADOR
+# =====================================================
+
+class TestFleetSimulator:
+    """Testes do simulador de eventos discretos"""
+
+    def test_missions_are_completed(self, graph):
+        """Teste: Missões chegam, são atribuídas, planejadas e concluídas"""
+        simulator = make_simulator(graph)
+        report = simulator.run(hours=0.5)
+        data = report.to_dict()
+
+        assert data['missions']['created'] > 100
+        assert data['missions']['completed'] > 0.9 * data['missions']['created']
+        assert data['missions']['per_hour'] == pytest.approx(2 * data['missions']['completed'])
+        assert data['planner_ms']['count'] > 0
+        assert data['dispatch_ms']['count'] > 0
+        assert data['congestion']['delay_factor'] >= 1.0
+        assert 0.0 < data['utilization'] <= 1.0
+        assert report.speedup > 1.0
+
+    def test_agvs_never_share_a_station(self, graph):
+        """Teste: Cada estação tem no máximo um AGV parado ou a caminho"""
+        simulator = make_simulator(graph, agvs=10, missions_per_hour=600)
+        simulator.run(seconds=600)
+
+        stations = [agv['station'] for agv in simulator.plant.agvs]
+        assert len(set(stations)) == len(stations)
+        assert all(simulator.occupant[agv['station']] is agv for agv in simulator.plant.agvs)
+
+    def test_deterministic_with_same_seed(self, graph):
+        """Teste: Mesma semente, mesmos resultados (exceto tempos de execução)"""
+        def run(seed):
+            data = make_simulator(graph, seed=seed).run(seconds=900).to_dict()
+            return data['missions'], data['cycle_time'], data['congestion']
+
+        assert run(3) == run(3)
+        assert run(3) != run(4)
+
+    def test_run_continues_and_feeds_telemetry(self, graph):
+        """Teste: run() retoma de onde parou; telemetria de todos os AGVs a cada intervalo"""
+        ingestor = _FakeIngestor()
+        simulator = make_simulator(graph, agvs=4, ingestor=ingestor, telemetry_interval=2.0)
+        simulator.run(seconds=60)
+        report = simulator.run(seconds=60)
+
+        assert report.sim_seconds == 120.0
+        times = sorted({sample[1] for sample in ingestor.samples})
+        assert times == [float(t) for t in range(0, 121, 2)]
+        assert len(ingestor.samples) == 4 * len(times)
+        xs = np.array([sample[2] for sample in ingestor.samples])
+        assert xs.min() >= 0.0 and xs.max() <= 21.0
+
+    def test_idle_agv_on_goal_is_relocated(self):
+        """Teste: AGV livre parado na coleta dá lugar ao AGV da missão"""
+        graph = grid_graph(3, 3)
+        simulator = make_simulator(graph, agvs=2, missions_per_hour=0.001)
+        first, second = simulator.plant.agvs
+        pickup, dropoff = second['station'], first['station']
+
+        mission = {'id': 1, 'code': 'M-000001', 'priority': 0, 'created': 0.0, 'pickup': pickup, 'dropoff': dropoff}
+        simulator.plant.missions[1] = mission
+        simulator._assign(first, mission)
+        simulator._plan([first])
+        simulator.run(seconds=120)
+
+        assert simulator.relocations == 1
+        assert mission['completed'] > 0.0
+        assert first['state'] == AGV_IDLE and first['station'] == dropoff
+        assert second['state'] == AGV_IDLE and second['station'] not in (pickup, dropoff)
+
+    @pytest.mark.parametrize('size, agvs, seed', [(5, 3, 0), (20, 20, 1)])
+    def test_throughput_does_not_collapse(self, size, agvs, seed):
+        """Teste: Horas seguidas de operação sem travamento da frota"""
+        simulator = make_simulator(grid_graph(size, size), agvs=agvs, missions_per_hour=600, seed=seed)
+        hourly, completed = [], 0
+        for _ in range(4):
+            report = simulator.run(seconds=3600)
+            hourly.append(report.missions_completed - completed)
+            completed = report.missions_completed
+
+        assert min(hourly[1:]) >= 0.8 * hourly[0]
+        assert report.plan_failures < completed
+
+    def test_invalid_parameters(self, graph):
+        """Teste: Frota maior que o número de estações e taxa nula são rejeitadas"""
+        with pytest.raises(ValueError):
+            make_simulator(graph, agvs=graph.num_stations + 1)
+        with pytest.raises(ValueError):
+            make_simulator(graph, missions_per_hour=0)
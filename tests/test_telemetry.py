@@ -0,0 +1,328 @@
+import sys
+import os
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+pytest tests/test_telemetry.py -v
+"""
+
+import threading
+
+import pytest
+import numpy as np
+
+from src.routing.spatial_index import SpatialGrid
+from src.telemetry import storage
+from src.telemetry.buffer import RECORD_DTYPE, LatestStateTable, RingBuffer
+from src.telemetry.ingest import TelemetryIngestor
+from src.telemetry.storage import (
+    DatabaseSink, SegmentFileSink, decode_batch, encode_batch, read_database, read_segments
+)
+
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+def make_batch(agvs: int = 4, samples: int = 250, start: float = 1000.0, hz: float = 20.0):
+    """Lote com trajetórias suaves (como telemetria real) de vários AGVs"""
+    batch = np.zeros(agvs * samples, dtype=RECORD_DTYPE)
+    t = np.arange(samples) / hz
+    for agv in range(agvs):
+        rows = slice(agv * samples, (agv + 1) * samples)
+        batch['agv'][rows] = agv + 1
+        batch['ts'][rows] = start + t
+        batch['x'][rows] = 10.0 * agv + 1.5 * t
+        batch['y'][rows] = 5.0
+        batch['speed'][rows] = 1.5
+        batch['battery'][rows] = 90.0 - 0.01 * t
+        batch['state'][rows] = 1
+    return batch
+
+class _FakeTelemetryRepository:
+    """Tabela agv_telemetry em memória (sem MySQL)"""
+
+    def __init__(self):
+        self.rows = []
+
+    def insert_batch(self, ts_start, ts_end, samples, codec, payload):
+        self.rows.append({
+            'ts_start': ts_start, 'ts_end': ts_end, 'samples': samples, 'codec': codec, 'payload': payload
+        })
+        return len(self.rows)
+
+    def find_batches(self, since=None, until=None):
+        return [
+            row for row in self.rows
+            if (since is None or row['ts_end'] >= since) and (until is None or row['ts_start'] < until)
+        ]
+
+class _FlakySink:
+    """Destino que falha nas primeiras gravações"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.batches = []
+
+    def write(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise IOError("destino indisponível")
+        self.batches.append(batch.copy())
+        return batch.nbytes
+
+    def close(self):
+        pass
+
+class _FakeFullDisk:
+    """Arquivo que grava só parte do próximo frame e falha (disco cheio)"""
+
+    def __init__(self, file, written: int):
+        self.file = file
+        self.written = written
+
+    def write(self, data):
+        if self.written is not None:
+            self.file.write(bytes(data[:self.written]))
+            self.written = None
+            raise OSError(28, "No space left on device")
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+# =====================================================
+# BUFFERS
+# =====================================================
+
+class TestRingBuffer:
+    """Testes do buffer circular por AGV"""
+
+    def test_drain_returns_pending_in_order(self):
+        """Teste: drain entrega só as amostras novas, em ordem, inclusive após a volta"""
+        buffer = RingBuffer(4)
+        for k in range(3):
+            buffer.append(k, k, 0, 0, 0, 100, 1)
+        assert buffer.drain()['ts'].tolist() == [0, 1, 2]
+
+        for k in range(3, 6):
+            buffer.append(k, k, 0, 0, 0, 100, 1)
+        assert buffer.pending == 3
+        assert buffer.drain()['ts'].tolist() == [3, 4, 5]
+        assert len(buffer.drain()) == 0
+
+    def test_overwrite_when_flusher_lags(self):
+        """Teste: Sem drain, as amostras mais antigas são sobrescritas e contadas"""
+        buffer = RingBuffer(4)
+        for k in range(10):
+            buffer.append(k, 0, 0, 0, 0, 0, 0)
+
+        assert buffer.overwritten == 6
+        assert buffer.drain()['ts'].tolist() == [6, 7, 8, 9]
+        assert buffer.recent(2)['ts'].tolist() == [8, 9]
+        assert len(buffer) == 4
+
+    def test_invalid_capacity(self):
+        """Teste: Capacidade deve ser positiva"""
+        with pytest.raises(ValueError):
+            RingBuffer(0)
+
+
+class TestLatestStateTable:
+    """Testes da tabela de estado atual"""
+
+    def test_update_and_get(self):
+        """Teste: Guarda a amostra mais recente e ignora as fora de ordem"""
+        table = LatestStateTable(capacity=2)
+        table.update(7, 10.0, 1.0, 2.0, 0.0, 1.0, 80.0, 1)
+        table.update(7, 9.0, 5.0, 5.0, 0.0, 1.0, 81.0, 1)
+
+        state = table.get(7)
+        assert state['ts'] == 10.0
+        assert state['x'] == 1.0
+        assert table.get(8) is None
+
+    def test_grows_and_selects(self):
+        """Teste: Cresce além da capacidade inicial; select filtra vetorizado"""
+        table = LatestStateTable(capacity=2)
+        for agv in range(1, 11):
+            table.update(agv, 100.0 + agv, float(agv), 0.0, 0.0, 1.0, 10.0 * agv, agv % 3)
+
+        assert len(table) == 10
+        assert table.select(battery_below=35) == [1, 2, 3]
+        assert table.select(states=[0]) == [3, 6, 9]
+        assert table.select(stale_before=103.0) == [1, 2]
+        assert table.select(within=(4.0, -1.0, 6.0, 1.0), states=[1, 2]) == [4, 5]
+
+
+# =====================================================
+# GRAVAÇÃO
+# =====================================================
+
+class TestStorage:
+    """Testes da compressão e dos destinos dos lotes"""
+
+    def test_encode_round_trip(self):
+        """Teste: Lote comprimido volta idêntico (ordenado por AGV e instante)"""
+        batch = make_batch()
+        shuffled = batch[np.random.default_rng(1).permutation(len(batch))]
+
+        codec, payload = encode_batch(shuffled, storage.CODEC_ZLIB)
+        decoded = decode_batch(codec, payload)
+
+        assert np.array_equal(decoded, np.sort(batch, order=('agv', 'ts')))
+        assert len(payload) * 3 < batch.nbytes
+
+    def test_invalid_codec(self):
+        """Teste: Codec desconhecido é rejeitado"""
+        with pytest.raises(ValueError):
+            encode_batch(make_batch(1, 2), 'lz4')
+
+    def test_segment_files(self, tmp_path):
+        """Teste: Frames em segmentos append-only, com troca por tamanho e filtros"""
+        sink = SegmentFileSink(tmp_path, segment_bytes=1)
+        sink.write(make_batch(start=1000.0))
+        sink.write(make_batch(start=2000.0))
+        sink.close()
+
+        assert len(list(tmp_path.glob('telemetry_*.seg'))) == 2
+        everything = np.concatenate(list(read_segments(tmp_path)))
+        assert len(everything) == 2 * 4 * 250
+
+        window = np.concatenate(list(read_segments(tmp_path, agv=2, since=2000.0, until=2005.0)))
+        assert set(window['agv'].tolist()) == {2}
+        assert window['ts'].min() >= 2000.0 and window['ts'].max() < 2005.0
+        assert len(window) == 100
+
+    def test_truncated_frame_is_ignored(self, tmp_path):
+        """Teste: Frame incompleto no fim do segmento (queda) não impede a leitura"""
+        sink = SegmentFileSink(tmp_path)
+        sink.write(make_batch(start=1000.0))
+        sink.write(make_batch(start=2000.0))
+        sink.close()
+
+        path = next(tmp_path.glob('telemetry_*.seg'))
+        with open(path, 'r+b') as f:
+            f.truncate(path.stat().st_size - 10)
+
+        batches = list(read_segments(tmp_path))
+        assert len(batches) == 1
+        assert batches[0]['ts'].max() < 2000.0
+
+    def test_failed_write_leaves_no_partial_frame(self, tmp_path):
+        """Teste: Frame gravado pela metade é desfeito e o lote reenviado continua legível"""
+        sink = SegmentFileSink(tmp_path)
+        sink.write(make_batch(start=1000.0))
+        sink._file = _FakeFullDisk(sink._file, written=100)
+
+        with pytest.raises(OSError):
+            sink.write(make_batch(start=2000.0))
+        sink.write(make_batch(start=2000.0))
+        sink.write(make_batch(start=3000.0))
+        sink.close()
+
+        assert len(list(tmp_path.glob('telemetry_*.seg'))) == 1
+        starts = [batch['ts'].min() for batch in read_segments(tmp_path)]
+        assert starts == [1000.0, 2000.0, 3000.0]
+
+    def test_database_sink(self):
+        """Teste: Um lote por linha no banco, lido de volta com filtros"""
+        repository = _FakeTelemetryRepository()
+        sink = DatabaseSink(repository, codec=storage.CODEC_ZLIB)
+        sink.write(make_batch(start=1000.0))
+        sink.write(make_batch(start=2000.0))
+
+        assert len(repository.rows) == 2
+        assert repository.rows[0]['samples'] == 1000
+        found = np.concatenate(list(read_database(repository, agv=3, since=2000.0)))
+        assert len(found) == 250
+
+
+# =====================================================
+# INGESTÃO
+# =====================================================
+
+class TestTelemetryIngestor:
+    """Testes da ingestão com gravação em lote"""
+
+    def test_record_and_flush(self, tmp_path):
+        """Teste: Amostras de todos os AGVs viram um único lote por flush"""
+        ingestor = TelemetryIngestor(SegmentFileSink(tmp_path), buffer_size=100)
+        for k in range(50):
+            for agv in (1, 2, 3):
+                ingestor.record(agv, 1000.0 + k / 20, x=k, y=agv, speed=1.0, battery=90.0, state=1)
+
+        assert ingestor.state(2)['x'] == 49.0
+        assert len(ingestor.recent(2, 10)) == 10
+        assert ingestor.flush() == 150
+        assert ingestor.flush() == 0
+
+        stats = ingestor.stats()
+        assert stats['batches'] == 1
+        assert stats['pending'] == 0
+        batches = list(read_segments(tmp_path, agv=3))
+        assert batches[0]['x'].tolist() == list(range(50))
+
+    def test_failed_flush_is_retried(self):
+        """Teste: Lote não gravado é reenviado no flush seguinte"""
+        sink = _FlakySink(failures=1)
+        ingestor = TelemetryIngestor(sink, buffer_size=100)
+        for k in range(10):
+            ingestor.record(1, float(k), 0.0, 0.0)
+
+        assert ingestor.flush() == 0
+        assert ingestor.stats()['unsent'] == 10
+        ingestor.record(1, 10.0, 0.0, 0.0)
+        assert ingestor.flush() == 11
+        assert sink.batches[0]['ts'].tolist() == [float(k) for k in range(11)]
+        assert ingestor.stats()['flush_errors'] == 1
+
+    def test_unsent_is_bounded(self):
+        """Teste: Com o destino fora do ar, guarda no máximo max_unsent amostras"""
+        ingestor = TelemetryIngestor(_FlakySink(failures=10), buffer_size=100, max_unsent=5)
+        for k in range(8):
+            ingestor.record(1, float(k), 0.0, 0.0)
+
+        ingestor.flush()
+        stats = ingestor.stats()
+        assert stats['unsent'] == 5
+        assert stats['dropped'] == 3
+
+    def test_spatial_index_follows_latest_position(self):
+        """Teste: Índice espacial recebe a posição atual (amostras antigas ignoradas)"""
+        positions = SpatialGrid(cell_size=5.0)
+        ingestor = TelemetryIngestor(_FlakySink(failures=0), buffer_size=10, spatial_index=positions)
+        ingestor.record(1, 10.0, x=0.0, y=0.0, state=1)
+        ingestor.record(2, 10.0, x=50.0, y=0.0, state=2)
+        ingestor.record(1, 11.0, x=48.0, y=0.0, state=1)
+        ingestor.record(1, 9.0, x=0.0, y=0.0, state=1)
+
+        assert positions.position(1) == (48.0, 0.0)
+        assert [agv for agv, _ in positions.radius(50.0, 0.0, 5.0)] == [2, 1]
+        assert positions.nearest(0.0, 0.0, states=[2])[0][0] == 2
+
+    def test_background_flusher_with_concurrent_producers(self):
+        """Teste: Produtores concorrentes e thread de gravação não perdem amostras"""
+        sink = _FlakySink(failures=0)
+        ingestor = TelemetryIngestor(sink, buffer_size=10000, flush_interval=0.01)
+        ingestor.start()
+
+        def produce(agv):
+            for k in range(2000):
+                ingestor.record(agv, float(k), float(k), 0.0, battery=50.0)
+
+        threads = [threading.Thread(target=produce, args=(agv,)) for agv in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ingestor.stop()
+
+        written = np.concatenate(sink.batches)
+        assert len(written) == 8 * 2000
+        for agv in range(1, 9):
+            assert np.sort(written['ts'][written['agv'] == agv]).tolist() == [float(k) for k in range(2000)]
+        assert sorted(ingestor.latest.select(battery_below=60)) == list(range(1, 9))
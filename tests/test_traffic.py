@@ -0,0 +1,372 @@
+import sys
+import os
+
+# Adicionar o diretório raiz ao Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+pytest tests/test_traffic.py -v
+"""
+
+import math
+import random
+
+import pytest
+
+from src.routing.layout_graph import LayoutGraph
+from src.services.deadlock_service import DeadlockService
+from src.traffic.journal import ZoneJournal
+from src.traffic.wait_for import WaitForGraph
+from src.traffic.zone_locks import POLICY_PRIORITY, ZoneLockManager
+from src.utils.exceptions import DeadlockError, ZoneLockError
+
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+class FakeClock:
+    """Relógio controlado pelo teste"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def corridor_graph() -> LayoutGraph:
+    """Corredor S0..S4 (x = 0..4) com um bolsão Q em (4, 1) ligado a S4"""
+    stations = [{'id': k + 1, 'code': f'S{k}', 'x': float(k), 'y': 0.0} for k in range(5)]
+    stations.append({'id': 6, 'code': 'Q', 'x': 4.0, 'y': 1.0})
+    paths = [{'id': k + 1, 'from_station_id': k + 1, 'to_station_id': k + 2} for k in range(4)]
+    paths.append({'id': 5, 'from_station_id': 5, 'to_station_id': 6})
+    return LayoutGraph.from_rows(stations, paths)
+
+def make_manager(zones=('CRUZ-01', 'CRUZ-02', 'CORR-01'), **kwargs) -> ZoneLockManager:
+    kwargs.setdefault('lease_time', math.inf)
+    return ZoneLockManager([{'code': code} for code in zones], **kwargs)
+
+
+# =====================================================
+# INTERTRAVAMENTO
+# =====================================================
+
+class TestZoneLockManager:
+    """Testes do gerenciador de zonas"""
+
+    def test_fifo_queue(self):
+        """Teste: Um AGV por zona; os demais são atendidos em ordem de chegada"""
+        granted = []
+        locks = make_manager(on_grant=lambda zone, agv: granted.append((zone, agv)))
+
+        assert locks.acquire('CRUZ-01', 'AGV-1')
+        assert locks.acquire('CRUZ-01', 'AGV-1')            # Renovação
+        assert not locks.acquire('CRUZ-01', 'AGV-2')
+        assert not locks.acquire('CRUZ-01', 'AGV-3', priority=5)
+        assert locks.waiters('CRUZ-01') == ['AGV-2', 'AGV-3']
+
+        assert locks.release('CRUZ-01', 'AGV-1') == [('CRUZ-01', 'AGV-2')]
+        assert granted == [('CRUZ-01', 'AGV-2')]
+        assert locks.holders('CRUZ-01') == ['AGV-2']
+        assert locks.waiters('CRUZ-01') == ['AGV-3']
+
+    def test_priority_queue_and_cancel(self):
+        """Teste: Fila por prioridade (FIFO no empate); quem desiste sai da fila"""
+        locks = ZoneLockManager([{'code': 'CRUZ-01', 'policy': POLICY_PRIORITY}], lease_time=math.inf)
+        locks.acquire('CRUZ-01', 'AGV-1')
+        for agv, priority in (('AGV-2', 0), ('AGV-3', 5), ('AGV-4', 5), ('AGV-5', 1)):
+            locks.acquire('CRUZ-01', agv, priority=priority)
+
+        assert locks.waiters('CRUZ-01') == ['AGV-3', 'AGV-4', 'AGV-5', 'AGV-2']
+        locks.release('CRUZ-01', 'AGV-3')                    # Desiste da espera
+        assert locks.release('CRUZ-01', 'AGV-1') == [('CRUZ-01', 'AGV-4')]
+        assert locks.waiters('CRUZ-01') == ['AGV-5', 'AGV-2']
+
+    def test_capacity(self):
+        """Teste: Zona com capacidade 2; aumentar a capacidade atende a fila"""
+        locks = ZoneLockManager([{'code': 'CORR-01', 'capacity': 2}], lease_time=math.inf)
+        assert locks.acquire('CORR-01', 'AGV-1')
+        assert locks.acquire('CORR-01', 'AGV-2')
+        assert not locks.acquire('CORR-01', 'AGV-3')
+        assert not locks.acquire('CORR-01', 'AGV-4')
+
+        locks.define_zone('CORR-01', capacity=4)
+        assert sorted(locks.holders('CORR-01')) == ['AGV-1', 'AGV-2', 'AGV-3', 'AGV-4']
+
+    def test_lease_expiration(self):
+        """Teste: Concessão vencida passa ao próximo; renovar adia o vencimento"""
+        clock = FakeClock()
+        locks = make_manager(lease_time=10.0, clock=clock)
+        locks.acquire('CRUZ-01', 'AGV-1')
+        locks.acquire('CRUZ-01', 'AGV-2')
+
+        clock.now += 8
+        locks.acquire('CRUZ-01', 'AGV-1')                   # Renova até 1018
+        clock.now += 8
+        assert locks.expire() == []
+
+        clock.now += 3
+        assert locks.expire() == [('CRUZ-01', 'AGV-2')]
+        assert locks.holders('CRUZ-01') == ['AGV-2']
+        assert locks.stats()['expired'] == 1
+
+    def test_deadlock_is_refused(self):
+        """Teste: Espera que fecharia um ciclo levanta DeadlockError sem alterar o estado"""
+        locks = make_manager()
+        locks.acquire('CRUZ-01', 'AGV-1')
+        locks.acquire('CRUZ-02', 'AGV-2')
+        locks.acquire('CORR-01', 'AGV-3')
+        assert not locks.acquire('CRUZ-02', 'AGV-1')        # 1 espera 2
+        assert not locks.acquire('CORR-01', 'AGV-2')        # 2 espera 3
+
+        with pytest.raises(DeadlockError) as error:
+            locks.acquire('CRUZ-01', 'AGV-3')               # 3 esperaria 1
+        assert error.value.cycle == [('AGV-3', 'CRUZ-01'), ('AGV-1', 'CRUZ-02'), ('AGV-2', 'CORR-01')]
+        assert locks.waiters('CRUZ-01') == []
+        assert locks.wait_for_graph() == {'AGV-1': {'AGV-2'}, 'AGV-2': {'AGV-3'}}
+        assert locks.stats()['deadlocks'] == 1
+
+    def test_release_all(self):
+        """Teste: AGV fora de operação libera as zonas e sai das filas"""
+        locks = make_manager()
+        locks.acquire('CRUZ-01', 'AGV-1')
+        locks.acquire('CRUZ-02', 'AGV-2')
+        locks.acquire('CRUZ-02', 'AGV-1')
+        locks.acquire('CRUZ-01', 'AGV-3')
+
+        assert locks.release_all('AGV-1') == [('CRUZ-01', 'AGV-3')]
+        assert locks.held_by('AGV-1') == set()
+        assert locks.waiters('CRUZ-02') == []
+
+    def test_invalid_zone(self):
+        """Teste: Zona desconhecida ou mal definida é rejeitada"""
+        locks = make_manager()
+        with pytest.raises(ZoneLockError):
+            locks.acquire('NADA', 'AGV-1')
+        with pytest.raises(ZoneLockError):
+            locks.define_zone('CRUZ-09', capacity=0)
+        with pytest.raises(ZoneLockError):
+            locks.define_zone('CRUZ-09', policy='random')
+
+
+# =====================================================
+# JOURNAL
+# =====================================================
+
+class TestZoneJournal:
+    """Testes da persistência do estado pelo journal"""
+
+    def _state(self, locks):
+        return {code: (locks.holders(code), locks.waiters(code)) for code in sorted(locks.zones)}
+
+    def test_restart_restores_state(self, tmp_path):
+        """Teste: Concessões, filas e prazos voltam após reiniciar"""
+        clock = FakeClock()
+        path = tmp_path / 'LAYOUT-01.wal'
+        locks = make_manager(journal=path, clock=clock, lease_time=30.0)
+        locks.acquire('CRUZ-01', 'AGV-1')
+        locks.acquire('CRUZ-01', 'AGV-2')
+        locks.acquire('CRUZ-01', 'AGV-3')
+        locks.acquire('CRUZ-02', 'AGV-3')
+        locks.release('CRUZ-01', 'AGV-2')
+        locks.close()
+        before = self._state(locks)
+
+        restored = make_manager(journal=path, clock=clock, lease_time=30.0)
+        assert self._state(restored) == before
+        assert restored.waiters('CRUZ-01') == ['AGV-3']
+
+        # Prazo gravado continua valendo depois do reinício
+        clock.now += 31
+        assert restored.expire() == [('CRUZ-01', 'AGV-3')]
+
+    def test_compaction_keeps_state(self, tmp_path):
+        """Teste: Journal compactado recria o mesmo estado com menos registros"""
+        path = tmp_path / 'LAYOUT-01.wal'
+        locks = make_manager(journal=path, compact_every=50)
+        for k in range(40):
+            locks.acquire('CRUZ-01', f'AGV-{k % 5}')
+            locks.release('CRUZ-01', f'AGV-{(k + 2) % 5}')
+        locks.acquire('CORR-01', 'AGV-9')
+        locks.close()
+
+        assert locks.journal.records <= 50
+        assert self._state(make_manager(journal=path)) == self._state(locks)
+
+    def test_truncated_record_is_dropped(self, tmp_path):
+        """Teste: Linha incompleta no fim (queda) é descartada e o journal segue válido"""
+        path = tmp_path / 'LAYOUT-01.wal'
+        locks = make_manager(journal=path)
+        locks.acquire('CRUZ-01', 'AGV-1')
+        locks.close()
+        with open(path, 'ab') as f:
+            f.write(b'{"op":"grant","zone":"CRUZ-02","ag')
+
+        restored = make_manager(journal=path)
+        assert restored.holders('CRUZ-02') == []
+        restored.acquire('CRUZ-02', 'AGV-2')
+        restored.close()
+
+        again = make_manager(journal=path)
+        assert again.holders('CRUZ-01') == ['AGV-1']
+        assert again.holders('CRUZ-02') == ['AGV-2']
+        assert all(record['op'] for record in ZoneJournal(path).replay())
+
+
+# =====================================================
+# GRAFO DE ESPERA
+# =====================================================
+
+def _reaches(edges, source, target) -> bool:
+    """Busca completa (referência para a detecção incremental)"""
+    adjacency = {}
+    for a, b in edges:
+        adjacency.setdefault(a, []).append(b)
+    seen, stack = {source}, [source]
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        for nxt in adjacency.get(node, ()):
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return False
+
+def _has_cycle(edges) -> bool:
+    """Ordenação topológica de Kahn sobre todas as arestas"""
+    indegree, adjacency = {}, {}
+    for a, b in edges:
+        adjacency.setdefault(a, []).append(b)
+        indegree[b] = indegree.get(b, 0) + 1
+        indegree.setdefault(a, 0)
+    ready = [node for node, degree in indegree.items() if degree == 0]
+    removed = 0
+    while ready:
+        removed += 1
+        for nxt in adjacency.get(ready.pop(), ()):
+            indegree[nxt] -= 1
+            if not indegree[nxt]:
+                ready.append(nxt)
+    return removed < len(indegree)
+
+class TestWaitForGraph:
+    """Testes da detecção incremental de ciclos"""
+
+    def test_cycle_and_resolution(self):
+        """Teste: Aresta que fecha o ciclo fica pendente até o ciclo se desfazer"""
+        graph = WaitForGraph()
+        assert graph.add_edge('AGV-1', 'CRUZ-01') is None
+        assert graph.add_edge('CRUZ-01', 'AGV-2') is None
+        assert graph.add_edge('AGV-2', 'CRUZ-02') is None
+        assert graph.add_edge('CRUZ-02', 'AGV-1') == ['CRUZ-02', 'AGV-1', 'CRUZ-01', 'AGV-2']
+        assert graph.add_edge('CRUZ-02', 'AGV-1') == ['CRUZ-02', 'AGV-1', 'CRUZ-01', 'AGV-2']
+        assert graph.has_path('AGV-1', 'CRUZ-02')
+        assert not graph.has_path('CRUZ-02', 'AGV-1')
+
+        assert graph.remove_edge('AGV-2', 'CRUZ-02') == [('CRUZ-02', 'AGV-1')]
+        assert graph.cycles() == []
+        assert graph.has_path('CRUZ-02', 'CRUZ-01')
+
+        assert graph.add_edge('AGV-2', 'AGV-2') == ['AGV-2']
+        assert graph.remove_node('AGV-2') == [('AGV-2', 'AGV-2')]
+        assert 'CRUZ-01' in graph and 'AGV-2' not in graph
+
+    def test_matches_full_search(self):
+        """Teste: Alterações aleatórias mantêm a ordem válida e os mesmos ciclos da busca completa"""
+        rng = random.Random(3)
+        graph = WaitForGraph()
+        edges = set()
+        for _ in range(2000):
+            a, b = rng.randrange(40), rng.randrange(40)
+            if len(edges) > 60:
+                a, b = rng.choice(sorted(edges))
+                graph.remove_edge(a, b)
+                edges.discard((a, b))
+            elif rng.random() < 0.02:
+                graph.remove_node(a)
+                edges = {edge for edge in edges if a not in edge}
+            else:
+                cycle = graph.add_edge(a, b)
+                edges.add((a, b))
+                assert (cycle is not None) == _reaches(edges - set(graph.pending()), b, a)
+
+            pending = graph.pending()
+            accepted = edges - set(pending)
+            assert all(graph._order[u] < graph._order[v] for u, v in accepted)
+            for (u, v), cycle in pending.items():
+                assert cycle[0] == u and cycle[1 % len(cycle)] == v
+                assert _reaches(accepted, v, u)
+            assert bool(pending) == _has_cycle(edges)
+        assert graph.searches < graph.visited
+
+
+# =====================================================
+# IMPASSES DA FROTA
+# =====================================================
+
+class TestDeadlockService:
+    """Testes da detecção de impasses e da proposta de recuo"""
+
+    def test_deadlock_formed_by_grant(self):
+        """Teste: Ciclo criado por uma concessão à fila é detectado e desfeito"""
+        found = []
+        deadlocks = DeadlockService(on_deadlock=found.append)
+        locks = make_manager(deadlock_service=deadlocks)
+        locks.acquire('CRUZ-01', 'B')
+        locks.acquire('CRUZ-02', 'C')
+        assert not locks.acquire('CRUZ-02', 'A')
+        assert not locks.acquire('CRUZ-01', 'A')
+        assert not locks.acquire('CRUZ-01', 'C')
+        assert found == []
+
+        # B libera: A recebe CRUZ-01 e fecha A -> CRUZ-02 -> C -> CRUZ-01 -> A
+        locks.release('CRUZ-01', 'B')
+        assert len(found) == 1
+        resolution = found[0]
+        assert sorted(resolution.agvs) == ['A', 'C']
+        assert sorted(resolution.zones) == ['CRUZ-01', 'CRUZ-02']
+        assert resolution.agv == 'A'
+        assert resolution.release == ['CRUZ-01']
+        assert resolution.cancel == ['CRUZ-02']
+        assert deadlocks.deadlocks() == [resolution]
+
+        locks.release_all('A')
+        assert deadlocks.deadlocks() == []
+        stats = deadlocks.stats()
+        assert (stats['detected'], stats['resolved'], stats['open']) == (1, 1, 0)
+        assert stats['detect_us']['count'] == 1
+        assert stats['update_us']['count'] == stats['changes']
+
+    def test_back_off_target(self):
+        """Teste: Recua o de menor prioridade, para a estação livre mais próxima fora das zonas do ciclo"""
+        positions = {'AGV-1': (3.0, 0.0), 'AGV-2': (4.0, 0.0)}
+        priorities = {'AGV-1': 5, 'AGV-2': 5}
+        deadlocks = DeadlockService(
+            corridor_graph(), {'CORR': [1, 2, 3]}, locate=positions.get, priority=priorities.get
+        )
+        # AGV-1 ocupa o corredor e precisa sair por S4, onde AGV-2 espera o corredor
+        deadlocks.hold('AGV-1', 'CORR')
+        deadlocks.wait('AGV-2', 'CORR')
+        deadlocks.block('AGV-1', 'AGV-2')
+
+        resolution = deadlocks.deadlocks()[0]
+        assert resolution.agv == 'AGV-2'
+        assert (resolution.target, resolution.path, resolution.distance) == ('Q', ['S4', 'Q'], 1.0)
+        assert resolution.cancel == ['CORR'] and resolution.release == []
+
+        # Com AGV-2 prioritário, AGV-1 volta pelo corredor que ocupa até S0
+        priorities['AGV-2'] = 9
+        resolution = deadlocks.propose(resolution.cycle)
+        assert resolution.agv == 'AGV-1'
+        assert resolution.path == ['S3', 'S2', 'S1', 'S0']
+        assert resolution.release == ['CORR']
+
+        # Sem recuo possível dentro do limite, ainda indica quem deve ceder
+        deadlocks.max_retreat = 0.5
+        resolution = deadlocks.propose(resolution.cycle)
+        assert resolution.agv == 'AGV-1' and resolution.target is None
+        assert resolution.to_dict()['distance'] is None
+
+        deadlocks.unblock('AGV-1', 'AGV-2')
+        assert deadlocks.deadlocks() == []